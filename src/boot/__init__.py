@@ -30,10 +30,11 @@
 
 import bltest
 import commands
+import memoryindex
 import memoryrange
 import peripherals
 import properties
 import status
 
-__all__ = ["bltest", "commands", "memoryrange", "peripherals", "properties", "status"]
+__all__ = ["bltest", "commands", "memoryindex", "memoryrange", "peripherals", "properties", "status"]
 
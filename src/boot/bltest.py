@@ -33,8 +33,12 @@ import os
 import copy
 import json
 import time
+import shutil
+import tempfile
+import memoryindex
 import peripherals
 import peripheralspeed
+import status
 import subprocess
 sys.path.append(os.path.abspath(".."))
 from utils import filetools
@@ -110,12 +114,21 @@ class Bootloader(object):
         ## timeout value for waiting return value from blhost
         self.timeout = 600
 
+        ## timeout value that overrides the automatically computed one, None means automatic
+        self.fixedTimeout = None
+
         ## The fileLength will use to calculate timeout value of waiting response of blhost
         self.fileLength  = 0
 
         ## The eraseLength will use to calculate timeout of waiting response of blhost for executing flash-erase-all/region, etc
         self.eraseLength = 0
 
+        ## Print each command and its full output to stdout
+        self.isVerbose = False
+
+        ## Called as logHook(args, status, duration, bytes) after each command, None to disable
+        self.logHook = None
+
     def __enter__(self):
         return self
 
@@ -136,9 +149,9 @@ class Bootloader(object):
     ##
     # @brief Utility function to return the MemoryRange containing the start address.
     def _getRegion(self, start):
-        for range in self.target.memoryRange.values():
-            if range.start <= start < range.start + range.length:
-                return range
+        region = self.target.getMemoryIndex().find(start, [memoryindex.kRegionKind_Ram, memoryindex.kRegionKind_Flash])
+        if region is not None:
+            return region.memoryRange
 
     ##
     # @brief Utility function to return the JSON formatted results.
@@ -260,9 +273,37 @@ class Bootloader(object):
     # @return List of arguments to set the timeout appropriate for the bootloader command.
     def _getTimeoutArgument(self, args):
         self._setTimeoutAutomatically(args)
+        if self.fixedTimeout != None:
+            self.timeout = self.fixedTimeout
         argsList = ['-t', str(int(self.timeout * 1000))]
         return argsList
 
+    ##
+    # @brief Use the given timeout for all following commands until it is set back to None
+    #
+    # Both blhost and sdphost take the '-t' timeout argument, so it works for both hosts.
+    def setFixedTimeout(self, timeoutSeconds):
+        self.fixedTimeout = timeoutSeconds
+
+    ##
+    # @brief Number of data bytes the command moves, for the log hook.
+    #
+    # Taken from the command arguments, fileLength is only a timeout hint (fill-memory sets it too) and SDP commands leave it 0.
+    def _getCommandBytes(self, args):
+        command = args[0]
+        try:
+            if command == 'read-memory':
+                return long(str(args[2]), 0)
+            elif command == 'read-register':
+                return long(str(args[3]), 0)
+            elif command in ['write-memory', 'write-file', 'dcd-write', 'receive-sb-file']:
+                for arg in args[1:]:
+                    if isinstance(arg, str) and os.path.isfile(arg):
+                        return os.path.getsize(arg)
+        except:
+            pass
+        return 0
+
     ##
     # @brief Utility function to run executable (blsim/blhost) for code reuse.
     # @todo Move the '--' marker from the commands to here after steAutobaud gets reworked.
@@ -270,6 +311,7 @@ class Bootloader(object):
     def _executeCommand(self, *args):
         # Make a copy of the base args so we don't mess up the original.
         theArgs = copy.copy(self._commandArgs)
+        commandBytes = self._getCommandBytes(args)
 
         # Modify args with command-specific timeout, and append the command params.
         for i, a in enumerate(self._getTimeoutArgument(args)):
@@ -278,16 +320,20 @@ class Bootloader(object):
 
         # Convert all args to strings.
         theArgs = [str(x) for x in theArgs]
-        print "Executing:", " ".join(theArgs)
         commandString = str("Executing " + " ".join(theArgs))
+        if self.isVerbose:
+            print commandString
 
         # Execute the command.
+        startTime = time.time()
         process = subprocess.Popen(theArgs, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         self.commandOutput = process.communicate()[0]
         self.toolStatus = process.returncode
+        duration = time.time() - startTime
 
-        print 'toolStatus:', self.toolStatus
-        print 'commandOutput:', self.commandOutput
+        if self.isVerbose:
+            print 'toolStatus:', self.toolStatus
+            print 'commandOutput:', self.commandOutput
 
         # Convert command JSON output into a dict.
         self.commandResults = self._parseResults(self.commandOutput);
@@ -296,6 +342,9 @@ class Bootloader(object):
         self.commandStatus = self.commandResults[kCmdResponse_Status][kCmdResponse_Value]
         self.commandStatusDescription = self.commandResults[kCmdResponse_Status][kCmdResponse_Description]
 
+        if self.logHook != None:
+            self.logHook(args, self.commandStatus, duration, commandBytes)
+
         return self.commandStatus, self.commandResults[kCmdResponse_Response], commandString
 
     ## @name Bootloader commands
@@ -693,6 +742,37 @@ class BootloaderDeviceSDP(Bootloader):
     def writeFile(self, address, filePath):
         return self._executeCommand('write-file', address, filePath)
 
+    ##
+    # @brief SDP write-file command, the file is sent as several smaller write-file commands
+    #
+    # @param progressCallback Called as progressCallback(sentBytes, totalBytes) after each chunk
+    # @return Result of the last executed write-file command
+    def writeFileInChunks(self, address, filePath, chunkSize, progressCallback=None):
+        totalBytes = os.path.getsize(filePath)
+        chunkFilePath = os.path.join(self.vectorsDir, 'writeFileChunk.dat')
+        result = None
+        sentBytes = 0
+        with open(filePath, 'rb') as fileObj:
+            while sentBytes < totalBytes:
+                chunkData = fileObj.read(chunkSize)
+                with open(chunkFilePath, 'wb') as chunkObj:
+                    chunkObj.write(chunkData)
+                self.fileLength = len(chunkData)
+                result = self.writeFile(address + sentBytes, chunkFilePath)
+                if result[0] != status.kSDP_Status_HabEnabled and result[0] != status.kSDP_Status_HabDisabled:
+                    break
+                sentBytes += len(chunkData)
+                if progressCallback != None:
+                    progressCallback(sentBytes, totalBytes)
+        try:
+            os.remove(chunkFilePath)
+        except:
+            pass
+        if result == None:
+            # Nothing was sent for an empty file, let the tool report it
+            result = self.writeFile(address, filePath)
+        return result
+
     ##
     # @brief SDP error-status command
     def errorStatus(self):
@@ -714,3 +794,49 @@ class BootloaderDeviceSDP(Bootloader):
         return self._executeCommand('jump-address', address)
 
     ## @}
+
+##
+# @brief Unit test for chunked SDP write-file, no device or sdphost is needed.
+class TestWriteFileInChunks:
+    class FakeBootloaderSDP(BootloaderDeviceSDP):
+        def __init__(self, vectorsDir, failAtWrite=None):
+            Bootloader.__init__(self, None, vectorsDir)
+            self.failAtWrite = failAtWrite
+            self.writeList = []
+        def writeFile(self, address, filePath):
+            with open(filePath, 'rb') as fileObj:
+                self.writeList.append((address, fileObj.read()))
+            if len(self.writeList) == self.failAtWrite:
+                return (status.kStatus_Fail, None, 'write-file')
+            return (status.kSDP_Status_HabDisabled, None, 'write-file')
+
+    def setup_method(self, method):
+        print method
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'image.bin')
+        self.data = bytes(bytearray([i & 0xFF for i in range(0x2800)]))
+        with open(self.filename, 'wb') as fileObj:
+            fileObj.write(self.data)
+        self.progressList = []
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.folder, True)
+
+    def _showProgress(self, sentBytes, totalBytes):
+        self.progressList.append((sentBytes, totalBytes))
+
+    def test_chunks(self):
+        sdphost = self.FakeBootloaderSDP(self.folder)
+        result = sdphost.writeFileInChunks(0x80000000, self.filename, 0x1000, self._showProgress)
+        assert result[0] == status.kSDP_Status_HabDisabled
+        assert [address for address, data in sdphost.writeList] == [0x80000000, 0x80001000, 0x80002000]
+        assert ''.encode('ascii').join([data for address, data in sdphost.writeList]) == self.data
+        assert self.progressList == [(0x1000, 0x2800), (0x2000, 0x2800), (0x2800, 0x2800)]
+        assert not os.path.isfile(os.path.join(self.folder, 'writeFileChunk.dat'))
+
+    def test_stop_at_failure(self):
+        sdphost = self.FakeBootloaderSDP(self.folder, 2)
+        result = sdphost.writeFileInChunks(0x80000000, self.filename, 0x1000, self._showProgress)
+        assert result[0] == status.kStatus_Fail
+        assert len(sdphost.writeList) == 2
+        assert self.progressList == [(0x1000, 0x2800)]
@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import bisect
+import collections
+
+kRegionKind_Ram      = 'ram'
+kRegionKind_Flash    = 'flash'
+kRegionKind_Xip      = 'xip'
+kRegionKind_Reserved = 'reserved'
+
+##
+# @brief One indexed address region, end is exclusive.
+MemoryRegion = collections.namedtuple('MemoryRegion', ['start', 'end', 'name', 'kind', 'memoryRange'])
+
+##
+# @brief Address regions sorted by start, for lookup and overlap queries.
+#
+# Regions may overlap (e.g. simulator flash range covers TCM), lookups then return the
+# smallest region first. Queries bisect on start and walk back only while the running
+# maximum of region end is still above the address. The walk is short for the few,
+# mostly disjoint regions of a target, but one huge region (like simulator flash)
+# keeps that maximum high for every region after it, so a query can cost O(n).
+class MemoryIndex(object):
+
+    def __init__(self):
+        self.regionList = []
+        self.startList = []
+        self.maxEndList = []
+        self.isSorted = True
+
+    def add( self, start, length, name, kind, memoryRange=None ):
+        if length <= 0:
+            return
+        self.regionList.append(MemoryRegion(start, start + length, name, kind, memoryRange))
+        self.isSorted = False
+
+    def addMemoryRange( self, name, memoryRange ):
+        if memoryRange.isFlash:
+            kind = kRegionKind_Flash
+        else:
+            kind = kRegionKind_Ram
+        self.add(memoryRange.start, memoryRange.length, name, kind, memoryRange)
+
+    def _sort( self ):
+        if self.isSorted:
+            return
+        self.regionList.sort(key=lambda region: (region.start, region.end))
+        self.startList = [region.start for region in self.regionList]
+        self.maxEndList = []
+        maxEnd = 0
+        for region in self.regionList:
+            maxEnd = max(maxEnd, region.end)
+            self.maxEndList.append(maxEnd)
+        self.isSorted = True
+
+    def _getCandidates( self, lastIndex, start ):
+        candidateList = []
+        index = lastIndex
+        while index >= 0 and self.maxEndList[index] > start:
+            if self.regionList[index].end > start:
+                candidateList.append(self.regionList[index])
+            index -= 1
+        return candidateList
+
+    def _filterKind( self, regionList, kind ):
+        if kind == None:
+            return regionList
+        if isinstance(kind, (list, tuple)):
+            return [region for region in regionList if region.kind in kind]
+        return [region for region in regionList if region.kind == kind]
+
+    ##
+    # @brief All regions that contain addr, smallest first.
+    def findAll( self, addr, kind=None ):
+        self._sort()
+        regionList = self._getCandidates(bisect.bisect_right(self.startList, addr) - 1, addr)
+        regionList.sort(key=lambda region: region.end - region.start)
+        return self._filterKind(regionList, kind)
+
+    ##
+    # @brief Smallest region that contains addr, None if there is none.
+    def find( self, addr, kind=None ):
+        regionList = self.findAll(addr, kind)
+        if len(regionList):
+            return regionList[0]
+        return None
+
+    ##
+    # @brief Smallest region that contains all of [start, start + length), None if there is none.
+    def findContaining( self, start, length, kind=None ):
+        for region in self.findAll(start, kind):
+            if start + length <= region.end:
+                return region
+        return None
+
+    ##
+    # @brief All regions that overlap [start, start + length), in address order.
+    def findOverlaps( self, start, length, kind=None ):
+        self._sort()
+        if length <= 0:
+            return []
+        regionList = self._getCandidates(bisect.bisect_left(self.startList, start + length) - 1, start)
+        regionList.reverse()
+        return self._filterKind(regionList, kind)
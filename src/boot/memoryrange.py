@@ -29,6 +29,9 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import os
+import mmap
+import shutil
+import tempfile
 import exceptions
 
 ##
@@ -58,7 +61,7 @@ class MemoryRange(object):
             else:
                 self.sizeInFile = 0
         else:
-            self.sizeInFile = self.sizeInFile
+            self.sizeInFile = sizeInFile
 
         self.isFlash = isFlash
         self.flashSectorSize = flashSectorSize
@@ -69,19 +72,20 @@ class MemoryRange(object):
     def hasBackingStore(self):
         return self.backingFilename is not None
     
+    ##
+    # @brief Copy of the whole range, padded with zero bytes up to length.
+    #
+    # Use openData() instead for large ranges, it does not copy anything.
     def getData(self):
-        if self.hasBackingStore():
-            with open(self.backingFilename, 'rb') as dataFile:
-                dataFile.seek(self.offsetInFile)
-                data = bytearray(dataFile.read(self.sizeInFile))
-        else:
-            data = bytearray()
-        
-        # Extend by adding zero bytes if the size in file is smaller than total size.
-        if self.sizeInFile < self.length:
-            data += b'\x00' * (self.length - self.sizeInFile)
-        
-        return data
+        with self.openData() as rangeData:
+            return bytearray(rangeData.getView(self.start, self.length))
+    
+    ##
+    # @brief Zero-copy access to the data of this range.
+    #
+    # @return A MemoryRangeData instance, close it when done.
+    def openData(self, isWritable=False):
+        return MemoryRangeData(self, isWritable)
     
     def __repr__(self):
         return "<%s@0x%x: 0x%08x-0x%08x>" % (
@@ -148,6 +152,125 @@ class MemoryRange(object):
             return False
         return (other.start == self.start) and (other.end == self.end)
 
+##
+# @brief Slice of a mapped file without copying it.
+def _getBufferView(data, offset, length):
+    try:
+        return memoryview(data)[offset:offset + length]
+    except TypeError:
+        # mmap has no new-style buffer interface in Python 2
+        return buffer(data, offset, length)
+
+##
+# @brief Data of a MemoryRange, served from a memory mapped backing file.
+#
+# Bytes beyond sizeInFile are padding. Read-only access synthesises zeros for the
+# requested bytes only. Writable access first grows the backing file to the full
+# range by truncate(), which leaves a hole on Linux and macOS file systems, so there a
+# flash of any size can be modelled while only the pages that are touched take disk
+# space. On Windows the file is not marked sparse (FSCTL_SET_SPARSE), so NTFS allocates
+# the whole range on disk; memory is still only used for the pages that are touched.
+class MemoryRangeData(object):
+    def __init__(self, memoryRange, isWritable=False):
+        self.memoryRange = memoryRange
+        self.isWritable = isWritable
+        self.sizeInMap = 0
+        self._fileObj = None
+        self._map = None
+        self._mapOffset = 0
+        
+        if memoryRange.hasBackingStore():
+            self._mapBackingFile()
+        elif isWritable:
+            raise ValueError('Memory range without backing file cannot be written')
+    
+    def _mapBackingFile(self):
+        memoryRange = self.memoryRange
+        if self.isWritable:
+            if not os.path.isfile(memoryRange.backingFilename):
+                open(memoryRange.backingFilename, 'wb').close()
+            self._fileObj = open(memoryRange.backingFilename, 'r+b')
+            # Growing by truncate() leaves a hole, no block is allocated until it is written.
+            if os.fstat(self._fileObj.fileno()).st_size < memoryRange.offsetInFile + memoryRange.length:
+                self._fileObj.truncate(memoryRange.offsetInFile + memoryRange.length)
+            dataSize = memoryRange.length
+            access = mmap.ACCESS_WRITE
+        else:
+            self._fileObj = open(memoryRange.backingFilename, 'rb')
+            fileSize = os.fstat(self._fileObj.fileno()).st_size
+            dataSize = max(0, min(memoryRange.sizeInFile, memoryRange.length, fileSize - memoryRange.offsetInFile))
+            access = mmap.ACCESS_READ
+        if dataSize == 0:
+            return
+        # Map offset must be a multiple of the allocation granularity.
+        mapStart = memoryRange.offsetInFile - memoryRange.offsetInFile % mmap.ALLOCATIONGRANULARITY
+        self._mapOffset = memoryRange.offsetInFile - mapStart
+        self._map = mmap.mmap(self._fileObj.fileno(), self._mapOffset + dataSize, access=access, offset=mapStart)
+        self.sizeInMap = dataSize
+    
+    def __len__(self):
+        return self.memoryRange.length
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return False # Don't suppress exceptions
+    
+    def _getOffset(self, start, length):
+        offset = start - self.memoryRange.start
+        if offset < 0 or length < 0 or offset + length > self.memoryRange.length:
+            raise ValueError('0x%08x-0x%08x is outside %r' % (start, start + length - 1, self.memoryRange))
+        return offset
+    
+    ##
+    # @brief Bytes of [start, start + length) by address.
+    #
+    # @return A view into the mapped file when the bytes are all in it, otherwise a view of
+    #       a new buffer holding the file bytes and the padding of this request.
+    def getView(self, start, length):
+        offset = self._getOffset(start, length)
+        if self._map is not None and offset + length <= self.sizeInMap:
+            return _getBufferView(self._map, self._mapOffset + offset, length)
+        data = bytearray(length)
+        if offset < self.sizeInMap:
+            data[0:self.sizeInMap - offset] = self._map[self._mapOffset + offset:self._mapOffset + self.sizeInMap]
+        return memoryview(data)
+    
+    def read(self, start, length):
+        view = self.getView(start, length)
+        if isinstance(view, memoryview):
+            return view.tobytes()
+        return str(view)
+    
+    def write(self, start, data):
+        if not self.isWritable:
+            raise ValueError('%r is opened read-only' % (self.memoryRange))
+        offset = self._getOffset(start, len(data))
+        self._map[self._mapOffset + offset:self._mapOffset + offset + len(data)] = bytes(data)
+    
+    ##
+    # @brief Yield (address, view) chunks of the range, for streaming it without a full copy.
+    def iterViews(self, chunkSize):
+        for offset in range(0, self.memoryRange.length, chunkSize):
+            length = min(chunkSize, self.memoryRange.length - offset)
+            yield self.memoryRange.start + offset, self.getView(self.memoryRange.start + offset, length)
+    
+    def flush(self):
+        if self._map is not None and self.isWritable:
+            self._map.flush()
+    
+    def close(self):
+        if self._map is not None:
+            self.flush()
+            self._map.close()
+            self._map = None
+        if self._fileObj is not None:
+            self._fileObj.close()
+            self._fileObj = None
+        self.sizeInMap = 0
+
 ##
 # @brief Add a new MemoryRange to an existing list and merge if needed.
 #
@@ -177,13 +300,22 @@ def addRangeToListAndCoalesce(l, r):
 ##
 # @brief Merge contiguous MemoryRange objects.
 #
+# Ranges are sorted by start once and merged in a single pass, so thousands of image
+# segments cost O(n log n) instead of one list scan per segment.
+#
 # @param ranges A list of MemoryRange objects.
-# @return List of MemoryRange objects.
+# @return List of MemoryRange objects, sorted by start.
 def coalesceRangeList(ranges):
     result = []
     
-    for r in ranges:
-        result = addRangeToListAndCoalesce(result, r)
+    for r in sorted(ranges, key=lambda r: r.start):
+        if len(result) and r.start <= result[-1].end + 1:
+            try:
+                result[-1] = result[-1].mergeWith(r)
+                continue
+            except MemoryMergeFailure:
+                pass
+        result.append(r)
     
     return result
 
@@ -286,3 +418,73 @@ class TestRangeLists:
         assert len(l) == 1
         self.checkStartLength(l[0], 0x700, 0x1000)
         
+
+##
+# @brief Unit test for memory range data provider.
+class TestMemoryRangeData:
+    def setup_method(self, method):
+        print method
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'state_mem.dat')
+        with open(self.filename, 'wb') as fileObj:
+            fileObj.write(bytearray(range(0x10)))
+    
+    def teardown_method(self, method):
+        shutil.rmtree(self.folder, True)
+    
+    def test_read_file_and_padding(self):
+        r = MemoryRange(0x1000, 0x20, self.filename)
+        with r.openData() as rangeData:
+            assert rangeData.read(0x1004, 4) == bytes(bytearray([4, 5, 6, 7]))
+            assert rangeData.read(0x100e, 4) == bytes(bytearray([0xe, 0xf, 0, 0]))
+        assert r.getData() == bytearray(range(0x10)) + bytearray(0x10)
+    
+    def test_offset_in_file(self):
+        r = MemoryRange(0x1000, 0x8, self.filename, offsetInFile=0xc)
+        assert r.getData() == bytearray([0xc, 0xd, 0xe, 0xf, 0, 0, 0, 0])
+    
+    def test_no_data_in_file(self):
+        for r in [MemoryRange(0x1000, 0x10), MemoryRange(0x1000, 0x10, self.filename, offsetInFile=0x10)]:
+            with r.openData() as rangeData:
+                assert rangeData.sizeInMap == 0
+                assert len(rangeData.getView(0x1000, 0)) == 0
+                assert rangeData.read(0x1008, 4) == bytes(bytearray(4))
+            assert r.getData() == bytearray(0x10)
+    
+    def test_write(self):
+        r = MemoryRange(0x1000, 0x20, self.filename)
+        with r.openData(True) as rangeData:
+            rangeData.write(0x101e, bytearray([0xaa, 0x55]))
+        assert os.path.getsize(self.filename) == 0x20
+        assert r.getData()[0x1c:0x20] == bytearray([0, 0, 0xaa, 0x55])
+        assert r.getData()[0:0x10] == bytearray(range(0x10))
+    
+    def test_write_read_only(self):
+        r = MemoryRange(0x1000, 0x20, self.filename)
+        with r.openData() as rangeData:
+            try:
+                rangeData.write(0x1000, bytearray(1))
+                assert False
+            except ValueError:
+                pass
+        try:
+            MemoryRange(0x1000, 0x20).openData(True)
+            assert False
+        except ValueError:
+            pass
+    
+    def test_out_of_range(self):
+        r = MemoryRange(0x1000, 0x20, self.filename)
+        with r.openData() as rangeData:
+            for start, length in [(0xfff, 1), (0x101f, 2), (0x1000, -1)]:
+                try:
+                    rangeData.getView(start, length)
+                    assert False
+                except ValueError:
+                    pass
+    
+    def test_iter_views(self):
+        r = MemoryRange(0x1000, 0x18, self.filename)
+        with r.openData() as rangeData:
+            chunkList = [(addr, bytearray(view)) for addr, view in rangeData.iterViews(0x10)]
+        assert chunkList == [(0x1000, bytearray(range(0x10))), (0x1010, bytearray(8))]
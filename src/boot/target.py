@@ -29,7 +29,7 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import sys, os
-import commands, memoryrange, peripherals
+import commands, memoryindex, memoryrange, peripherals
 sys.path.append(os.path.abspath(".."))
 from utils import misc
 
@@ -46,6 +46,8 @@ class Target(object):
 
         self.baseDir = misc.get_dict_default(kwargs, 'baseDir', '.')
         self.memoryRange = misc.get_dict_default(kwargs, 'memoryRange', {})
+        self.reservedRegionDict = misc.get_dict_default(kwargs, 'reservedRegionDict', {})
+        self.memoryIndex = None
         self.availableCommands = misc.get_dict_default(kwargs, 'availableCommands', 0)
         self.availablePeripherals = misc.get_dict_default(kwargs, 'availablePeripherals', 0)
         self.romUsbVid = misc.get_dict_default(kwargs, 'romUsbVid', None)
@@ -59,7 +61,20 @@ class Target(object):
         self.flexspiNorMemBase = misc.get_dict_default(kwargs, 'flexspiNorMemBase', None)
         self.isSipFlexspiNorDevice = misc.get_dict_default(kwargs, 'isSipFlexspiNorDevice', None)
         self.isEccTypeSetInFuseMiscConf = misc.get_dict_default(kwargs, 'isEccTypeSetInFuseMiscConf', None)
-        
+
+    ##
+    # @brief Interval index over all memories and reserved regions of the target, built on first use.
+    #
+    # Reserved regions are given as [start, end] with inclusive end, like blhost reports them.
+    def getMemoryIndex(self):
+        if self.memoryIndex is None:
+            self.memoryIndex = memoryindex.MemoryIndex()
+            for name, memoryRange in self.memoryRange.items():
+                self.memoryIndex.addMemoryRange(name, memoryRange)
+            for name, (start, end) in self.reservedRegionDict.items():
+                self.memoryIndex.add(start, end - start + 1, name, memoryindex.kRegionKind_Reserved)
+        return self.memoryIndex
+
     ##
     # @brief Check if a command is supported by the target.
     #
@@ -2,6 +2,8 @@
 
 import fusecore
 import fusedef
+import fuseplan
+import fusesim
+import fusesnap
 
-__all__ = ["fusecore", "fusedef"]
-
+__all__ = ["fusecore", "fusedef", "fuseplan", "fusesim", "fusesnap"]
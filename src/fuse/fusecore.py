@@ -4,6 +4,8 @@ import wx
 import sys
 import os
 import fusedef
+import fuseplan
+import fusesnap
 sys.path.append(os.path.abspath(".."))
 from run import runcore
 from ui import uidef
@@ -19,6 +21,7 @@ class secBootFuse(runcore.secBootRun):
         self.runModeFuseFlagList = [None] * fusedef.kMaxEfuseWords
         self.toBeRefreshedFuseList = [False] * fusedef.kMaxEfuseWords
         self.isRunModeFuseFlagRemapped = False
+        self.fuseSnapshotLogFilename = os.path.join(self.exeTopRoot, 'gen', 'fuse_snapshot', 'fuseLot.fsl')
 
         self.applyFuseOperToRunMode()
 
@@ -81,6 +84,14 @@ class secBootFuse(runcore.secBootRun):
         if needSwapAndShow:
             self._swapRemappedScannedFuseIfAppliable()
             self.showScannedFuses(self.scannedFuseList)
+            if not isRefreshOpt:
+                self.saveFuseSnapshot()
+
+    def saveFuseSnapshot( self ):
+        try:
+            fusesnap.appendFuseSnapshot(self.fuseSnapshotLogFilename, self.scannedFuseList, self.getMcuDeviceUuid())
+        except:
+            self.printLog('Fuse snapshot cannot be saved into ' + self.fuseSnapshotLogFilename)
 
     def _swapRemappedToBeBurnFuseIfAppliable( self ):
         if self.tgt.hasRemappedFuse:
@@ -90,23 +101,6 @@ class secBootFuse(runcore.secBootRun):
         else:
             pass
 
-    def _burnFuseLockRegion( self, srcFuseValue, destFuseValue ):
-        destFuseValue = destFuseValue | srcFuseValue
-        # High-4bits cannot be burned along with low-28bits for fuse lock region, this is design limitation
-        srcLock = srcFuseValue & fusedef.kEfuseMask_LockLow
-        destLock = destFuseValue & fusedef.kEfuseMask_LockLow
-        if srcLock != destLock:
-            # Don't allow to lock Fuse SRK because SRK will be OP+RP+WP if lock bit is set and then ROM cannot get SRK
-            if ((srcLock & fusedef.kEfuseMask_LockSrk) == 0) and \
-               ((destLock & fusedef.kEfuseMask_LockSrk) != 0):
-                destLock = destLock & (~fusedef.kEfuseMask_LockSrk)
-                self.popupMsgBox('Fuse 0x400[14] - SRK_LOCK is not allowed to be set, because SRK will be OP+RP+WP if SRK_LOCK is set and then ROM cannot get SRK!')
-            self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, destLock)
-        srcLock = srcFuseValue & fusedef.kEfuseMask_LockHigh
-        destLock = destFuseValue & fusedef.kEfuseMask_LockHigh
-        if srcLock != destLock:
-            self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, destLock)
-
     def burnAllFuseRegions( self ):
         self.toBeBurnnedFuseList = self.getUserFuses()
         self._swapRemappedToBeBurnFuseIfAppliable()
@@ -115,15 +109,18 @@ class secBootFuse(runcore.secBootRun):
             self.scanAllFuseRegions(False)
         else:
             self._swapRemappedScannedFuseIfAppliable()
+        desiredFuseDict = {}
         for i in range(fusedef.kMaxEfuseWords):
             if self.runModeFuseFlagList[i]:
                 if self.toBeBurnnedFuseList[i] != self.scannedFuseList[i] and \
                    self.toBeBurnnedFuseList[i] != None and \
                    self.scannedFuseList[i] != None:
-                    if i == fusedef.kEfuseIndex_LOCK:
-                        self._burnFuseLockRegion(self.scannedFuseList[i], self.toBeBurnnedFuseList[i])
-                    else:
-                        fuseValue = self.toBeBurnnedFuseList[i] | self.scannedFuseList[i]
-                        self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_START + i, fuseValue)
-                    self.toBeRefreshedFuseList[i] = True
+                    desiredFuseDict[fusedef.kEfuseIndex_START + i] = self.toBeBurnnedFuseList[i]
+        fusePlan = fuseplan.compileFusePlan(self.scannedFuseList, desiredFuseDict)
+        for warn in fusePlan.warningList:
+            self.popupMsgBox(warn)
+        if not self.executeFusePlan(fusePlan):
+            self.popupMsgBox('Fuse regions were not burned successfully, please check the log for details!')
+        for fuseBurn in fusePlan.burnList:
+            self.toBeRefreshedFuseList[fuseBurn.fuseIndex - fusedef.kEfuseIndex_START] = True
         self.scanAllFuseRegions(True, True)
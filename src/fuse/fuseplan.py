@@ -0,0 +1,149 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import fusedef
+
+kFuseAddrBase = 0x400
+kFuseAddrStep = 0x10
+
+# Fuse words that cannot be programmed any more once the given LOCK bits are set
+kFuseWriteLockList = [(range(fusedef.kEfuseIndex_SRK0, fusedef.kEfuseIndex_SRK7 + 1), fusedef.kEfuseMask_LockSrk),
+                      (range(fusedef.kEfuseIndex_SW_GP2_0, fusedef.kEfuseIndex_SW_GP2_3 + 1), fusedef.kEfuseMask_WLockSwGp2),
+                      (range(fusedef.kEfuseIndex_GP4_0, fusedef.kEfuseIndex_GP4_3 + 1), fusedef.kEfuseMask_WLockGp4)]
+
+# Fuse words that cannot be read back any more once the given LOCK bits are set
+kFuseReadLockList = [(range(fusedef.kEfuseIndex_SW_GP2_0, fusedef.kEfuseIndex_SW_GP2_3 + 1), fusedef.kEfuseMask_RLockSwGp2),
+                     (range(fusedef.kEfuseIndex_GP4_0, fusedef.kEfuseIndex_GP4_3 + 1), fusedef.kEfuseMask_RLockGp4)]
+
+def getFuseAddr( fuseIndex ):
+    return kFuseAddrBase + fuseIndex * kFuseAddrStep
+
+def _getMaskForIndex( fuseIndex, lockList ):
+    for indexList, lockMask in lockList:
+        if fuseIndex in indexList:
+            return lockMask
+    return 0
+
+class FuseBurn(object):
+
+    def __init__(self, fuseIndex, oldValue, newValue, burnValue):
+        self.fuseIndex = fuseIndex
+        self.oldValue = oldValue
+        self.newValue = newValue
+        # Only the bits that flip from 0 to 1 are programmed
+        self.burnValue = burnValue
+
+    def getFlippedBits( self ):
+        return [bit for bit in range(32) if (self.burnValue >> bit) & 0x1]
+
+    def __repr__(self):
+        return "<FuseBurn 0x%03x: 0x%08x -> 0x%08x>" % (getFuseAddr(self.fuseIndex), self.oldValue, self.newValue)
+
+class FusePlan(object):
+
+    def __init__(self):
+        self.burnList = []
+        self.errorList = []
+        self.warningList = []
+        self.verifyFuseDict = {}
+
+    def isValid( self ):
+        return len(self.errorList) == 0
+
+    def isEmpty( self ):
+        return len(self.burnList) == 0
+
+    def getReport( self ):
+        lines = []
+        for err in self.errorList:
+            lines.append('Error: ' + err)
+        for warn in self.warningList:
+            lines.append('Warning: ' + warn)
+        for burn in self.burnList:
+            lines.append('Burn (0x%03x) 0x%08x -> 0x%08x, bit(s) %s flip to 1' %(getFuseAddr(burn.fuseIndex), burn.oldValue, burn.newValue,
+                                                                                 ','.join([str(bit) for bit in burn.getFlippedBits()])))
+        if not len(lines):
+            lines.append('Nothing to burn')
+        return lines
+
+##
+# @brief Compile the desired fuse state into an ordered, minimal list of burns.
+#
+# @param scannedFuseList Current value of all fuse words, None if the word is not readable.
+# @param desiredFuseDict Fuse index -> bits that must be set after the burn.
+# @param exactFuseIndexList Fuse words (like keys) that must end up exactly as desired, any other
+#                           bit already set in these words is a conflict.
+def compileFusePlan( scannedFuseList, desiredFuseDict, exactFuseIndexList=[] ):
+    fusePlan = FusePlan()
+    curLock = scannedFuseList[fusedef.kEfuseIndex_LOCK]
+    newLock = curLock
+    dataBurnList = []
+    secBurnList = []
+    for fuseIndex in sorted(desiredFuseDict.keys()):
+        desiredValue = desiredFuseDict[fuseIndex]
+        if desiredValue == None:
+            continue
+        if fuseIndex < fusedef.kEfuseIndex_START or fuseIndex >= fusedef.kMaxEfuseWords:
+            fusePlan.errorList.append('Fuse index 0x%x is out of range' %(fuseIndex))
+            continue
+        oldValue = scannedFuseList[fuseIndex]
+        if oldValue == None:
+            fusePlan.errorList.append('Fuse (0x%03x) cannot be read, so it is not allowed to be burned' %(getFuseAddr(fuseIndex)))
+            continue
+        if fuseIndex == fusedef.kEfuseIndex_LOCK:
+            newLock = oldValue | desiredValue
+            # Don't allow to lock Fuse SRK because SRK will be OP+RP+WP if lock bit is set and then ROM cannot get SRK
+            if ((oldValue & fusedef.kEfuseMask_LockSrk) == 0) and ((newLock & fusedef.kEfuseMask_LockSrk) != 0):
+                newLock = newLock & (~fusedef.kEfuseMask_LockSrk)
+                fusePlan.warningList.append('Fuse 0x400[14] - SRK_LOCK is not allowed to be set, because SRK will be OP+RP+WP if SRK_LOCK is set and then ROM cannot get SRK!')
+            continue
+        newValue = oldValue | desiredValue
+        if fuseIndex in exactFuseIndexList and oldValue != 0 and newValue != desiredValue:
+            fusePlan.errorList.append('Fuse (0x%03x) has been burned with another value, it is program-once!' %(getFuseAddr(fuseIndex)))
+            continue
+        if newValue == oldValue:
+            continue
+        if curLock != None and (curLock & _getMaskForIndex(fuseIndex, kFuseWriteLockList)):
+            fusePlan.errorList.append('Fuse (0x%03x) has been write-locked!' %(getFuseAddr(fuseIndex)))
+            continue
+        fuseBurn = FuseBurn(fuseIndex, oldValue, newValue, newValue & (~oldValue))
+        if fuseIndex == fusedef.kEfuseLocation_SecConfig1 and (fuseBurn.burnValue & fusedef.kEfuseMask_SecConfig1):
+            # Closing HAB goes after all other data words, so a failure in between never leaves a closed part without keys
+            secBurnList.append(fuseBurn)
+        else:
+            dataBurnList.append(fuseBurn)
+    fusePlan.burnList = dataBurnList + secBurnList
+    if newLock != None and curLock != None and newLock != curLock:
+        # High-4bits cannot be burned along with low-28bits for fuse lock region, this is design limitation
+        lockBurnValue = newLock & (~curLock)
+        if lockBurnValue & fusedef.kEfuseMask_LockLow:
+            lowLock = curLock | (lockBurnValue & fusedef.kEfuseMask_LockLow)
+            fusePlan.burnList.append(FuseBurn(fusedef.kEfuseIndex_LOCK, curLock, lowLock, lockBurnValue & fusedef.kEfuseMask_LockLow))
+            curLock = lowLock
+        if lockBurnValue & fusedef.kEfuseMask_LockHigh:
+            fusePlan.burnList.append(FuseBurn(fusedef.kEfuseIndex_LOCK, curLock, newLock, lockBurnValue & fusedef.kEfuseMask_LockHigh))
+    for fuseBurn in fusePlan.burnList:
+        fusePlan.verifyFuseDict[fuseBurn.fuseIndex] = fuseBurn.newValue
+    if newLock != None:
+        # Words which become read-locked by this plan cannot be verified
+        for fuseIndex in fusePlan.verifyFuseDict.keys():
+            if newLock & _getMaskForIndex(fuseIndex, kFuseReadLockList):
+                del fusePlan.verifyFuseDict[fuseIndex]
+    return fusePlan
+
+##
+# @brief Burn a valid plan in order, then verify all burned words in one pass.
+#
+# @param burnFuse Callable (fuseIndex, burnValue), returns True if the word was programmed
+# @param readFuse Callable (fuseIndex), returns the word read back from device, None if it cannot be read
+# @return (True if all burns were accepted, fuse indexes that failed verification)
+def executeFusePlan( fusePlan, burnFuse, readFuse ):
+    if not fusePlan.isValid():
+        return False, []
+    for fuseBurn in fusePlan.burnList:
+        if not burnFuse(fuseBurn.fuseIndex, fuseBurn.burnValue):
+            return False, []
+    failedFuseIndexList = []
+    for fuseIndex in sorted(fusePlan.verifyFuseDict.keys()):
+        if readFuse(fuseIndex) != fusePlan.verifyFuseDict[fuseIndex]:
+            failedFuseIndexList.append(fuseIndex)
+    return True, failedFuseIndexList
@@ -0,0 +1,234 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import copy
+import random
+import fusedef
+import fuseplan
+sys.path.append(os.path.abspath(".."))
+from boot import bltest
+from boot import status
+
+kEfuseValue_Mask = 0xFFFFFFFF
+
+kFuseReadLockList = fuseplan.kFuseReadLockList + \
+                    [(range(fusedef.kEfuseIndex_SRK0, fusedef.kEfuseIndex_SRK7 + 1), fusedef.kEfuseMask_LockSrk)]
+
+##
+# @brief In-memory model of the 80 eFuse words of one part.
+#
+# Words are kept in blhost (physical) order. Programming can only flip bits from 0 to 1,
+# and the write/read lock bits in the LOCK word are honoured the same way the OCOTP does.
+class FuseImage(object):
+
+    def __init__(self, hasRemappedFuse=False, fuseList=None):
+        self.hasRemappedFuse = hasRemappedFuse
+        self.fuseList = [0] * fusedef.kMaxEfuseWords
+        if fuseList != None:
+            for i in range(min(len(fuseList), fusedef.kMaxEfuseWords)):
+                if fuseList[i] != None:
+                    self.fuseList[i] = fuseList[i] & kEfuseValue_Mask
+        self.programCount = 0
+
+    def clone( self ):
+        return copy.deepcopy(self)
+
+    def isWriteLocked( self, fuseIndex ):
+        lock = self.fuseList[fusedef.kEfuseIndex_LOCK]
+        return (lock & fuseplan._getMaskForIndex(fuseIndex, fuseplan.kFuseWriteLockList)) != 0
+
+    def isReadLocked( self, fuseIndex ):
+        lock = self.fuseList[fusedef.kEfuseIndex_LOCK]
+        return (lock & fuseplan._getMaskForIndex(fuseIndex, kFuseReadLockList)) != 0
+
+    def read( self, fuseIndex ):
+        if fuseIndex < fusedef.kEfuseIndex_START or fuseIndex >= fusedef.kMaxEfuseWords:
+            return status.kStatus_InvalidArgument, None
+        if self.isReadLocked(fuseIndex):
+            return status.kStatus_Fail, None
+        return status.kStatus_Success, self.fuseList[fuseIndex]
+
+    def program( self, fuseIndex, fuseValue ):
+        if fuseIndex < fusedef.kEfuseIndex_START or fuseIndex >= fusedef.kMaxEfuseWords:
+            return status.kStatus_InvalidArgument
+        if self.isWriteLocked(fuseIndex):
+            return status.kStatus_Fail
+        if fuseIndex == fusedef.kEfuseIndex_LOCK and \
+           (fuseValue & fusedef.kEfuseMask_LockLow) and (fuseValue & fusedef.kEfuseMask_LockHigh):
+            # High-4bits cannot be burned along with low-28bits for fuse lock region, this is design limitation
+            return status.kStatus_Fail
+        self.fuseList[fuseIndex] |= (fuseValue & kEfuseValue_Mask)
+        self.programCount += 1
+        return status.kStatus_Success
+
+    ##
+    # @brief Return all words in the order shown by fuse panel, see _swapRemappedScannedFuseIfAppliable()
+    def getLogicalFuseList( self ):
+        fuseList = list(self.fuseList)
+        if self.hasRemappedFuse:
+            for i in range(fusedef.kEfuseRemapLen):
+                fuseList[fusedef.kEfuseRemapIndex_Src + i], fuseList[fusedef.kEfuseRemapIndex_Dest + i] = \
+                fuseList[fusedef.kEfuseRemapIndex_Dest + i], fuseList[fusedef.kEfuseRemapIndex_Src + i]
+        for i in range(fusedef.kMaxEfuseWords):
+            if self.isReadLocked(i):
+                fuseList[i] = None
+        return fuseList
+
+##
+# @brief Decode the boot related fields from the given fuse words, None words are left undecoded.
+def decodeBootConfig( fuseList ):
+    def getField( fuseIndex, mask, shift ):
+        if fuseList[fuseIndex] == None:
+            return None
+        return (fuseList[fuseIndex] & mask) >> shift
+    bootCfg = {}
+    secConfig0 = getField(fusedef.kEfuseLocation_SecConfig0, fusedef.kEfuseMask_SecConfig0, fusedef.kEfuseShift_SecConfig0)
+    secConfig1 = getField(fusedef.kEfuseLocation_SecConfig1, fusedef.kEfuseMask_SecConfig1, fusedef.kEfuseShift_SecConfig1)
+    if secConfig0 != None and secConfig1 != None:
+        bootCfg['habStatus'] = (secConfig1 << 1) | secConfig0
+    else:
+        bootCfg['habStatus'] = None
+    bootCfg['btFuseSel'] = getField(fusedef.kEfuseLocation_BtFuseSel, fusedef.kEfuseMask_BtFuseSel, fusedef.kEfuseShift_BtFuseSel)
+    bootCfg['beeKey0Sel'] = getField(fusedef.kEfuseLocation_BeeKeySel, fusedef.kEfuseMask_BeeKey0Sel, fusedef.kEfuseShift_BeeKey0Sel)
+    bootCfg['beeKey1Sel'] = getField(fusedef.kEfuseLocation_BeeKeySel, fusedef.kEfuseMask_BeeKey1Sel, fusedef.kEfuseShift_BeeKey1Sel)
+    bootCfg['eepromEnable'] = getField(fusedef.kEfuseLocation_LpspiCfg, fusedef.kEfuseMask_EepromEnable, fusedef.kEfuseShift_EepromEnable)
+    bootCfg['lpspiIndex'] = getField(fusedef.kEfuseLocation_LpspiCfg, fusedef.kEfuseMask_LpspiIndex, fusedef.kEfuseShift_LpspiIndex)
+    bootCfg['spiAddressing'] = getField(fusedef.kEfuseLocation_LpspiCfg, fusedef.kEfuseMask_SpiAddressing, fusedef.kEfuseShift_SpiAddressing)
+    bootCfg['lpspiSpeed'] = getField(fusedef.kEfuseLocation_LpspiCfg, fusedef.kEfuseMask_LpspiSpeed, fusedef.kEfuseShift_LpspiSpeed)
+    bootCfg['rawNandPortSize'] = getField(fusedef.kEfuseLocation_SemcNandCfg, fusedef.kEfuseMask_RawNandPortSize, fusedef.kEfuseShift_RawNandPortSize)
+    bootCfg['rawNandEccEdoSet'] = getField(fusedef.kEfuseLocation_SemcNandCfg, fusedef.kEfuseMask_RawNandEccEdoSet, fusedef.kEfuseShift_RawNandEccEdoSet)
+    bootCfg['rawNandEccStatus'] = getField(fusedef.kEfuseLocation_SemcNandCfg, fusedef.kEfuseMask_RawNandEccStatus, fusedef.kEfuseShift_RawNandEccStatus)
+    return bootCfg
+
+##
+# @brief Stand-in for the blhost device, only eFuse commands are served and all of them hit the FuseImage.
+#
+# It can be assigned to secBootRun.blhost in place of the object returned by bltest.createBootloader().
+class FuseSimBootloader(bltest.Bootloader):
+
+    def __init__(self, target, fuseImage=None):
+        super(FuseSimBootloader, self).__init__(target, '')
+        if fuseImage == None:
+            hasRemappedFuse = False
+            if target != None and target.hasRemappedFuse:
+                hasRemappedFuse = True
+            fuseImage = FuseImage(hasRemappedFuse)
+        self.fuseImage = fuseImage
+
+    def _executeCommand(self, *args):
+        commandString = str("Executing fusesim " + " ".join([str(x) for x in args]))
+        response = None
+        if args[0] == 'efuse-read-once':
+            self.commandStatus, fuseValue = self.fuseImage.read(int(args[1]))
+            if fuseValue != None:
+                response = [4, fuseValue]
+        elif args[0] == 'efuse-program-once':
+            self.commandStatus = self.fuseImage.program(int(args[1]), int(str(args[2]), 16))
+        else:
+            self.commandStatus = status.kStatus_UnknownCommand
+        self.toolStatus = 0
+        self.commandStatusDescription = ''
+        self.commandResults = {bltest.kCmdResponse_Status : {bltest.kCmdResponse_Value : self.commandStatus,
+                                                             bltest.kCmdResponse_Description : self.commandStatusDescription},
+                               bltest.kCmdResponse_Response : response}
+        return self.commandStatus, response, commandString
+
+##
+# @brief What-if evaluation: run the plan against a copy of the image and decode the result.
+#
+# @return (True if all burns were accepted, resulting FuseImage, decoded boot config)
+def evaluateFusePlan( fuseImage, fusePlan ):
+    simImage = fuseImage.clone()
+    isAccepted = fusePlan.isValid()
+    if isAccepted:
+        for fuseBurn in fusePlan.burnList:
+            if simImage.program(fuseBurn.fuseIndex, fuseBurn.burnValue) != status.kStatus_Success:
+                isAccepted = False
+                break
+    return isAccepted, simImage, decodeBootConfig(simImage.fuseList)
+
+def _genRandomFuseImage( rng, hasRemappedFuse ):
+    fuseImage = FuseImage(hasRemappedFuse)
+    for i in range(fusedef.kEfuseIndex_START + 1, fusedef.kMaxEfuseWords):
+        if rng.random() < 0.3:
+            fuseImage.fuseList[i] = rng.getrandbits(32) & rng.getrandbits(32)
+    fuseImage.fuseList[fusedef.kEfuseIndex_LOCK] = rng.getrandbits(32) & rng.getrandbits(32) & rng.getrandbits(32)
+    return fuseImage
+
+def _genRandomDesiredFuses( rng, burnCount ):
+    desiredFuseDict = {}
+    for burn in range(burnCount):
+        fuseIndex = rng.randrange(fusedef.kMaxEfuseWords)
+        desiredFuseDict[fuseIndex] = desiredFuseDict.get(fuseIndex, 0) | rng.getrandbits(32)
+    exactFuseIndexList = [fuseIndex for fuseIndex in desiredFuseDict.keys() if rng.random() < 0.3]
+    return desiredFuseDict, exactFuseIndexList
+
+##
+# @brief Compile and execute random fuse plans against FuseSimBootloader, and check the result on the FuseImage.
+#
+# Each sequence scans a random part through blhost commands, compiles a random desired state
+# with fuseplan.compileFusePlan(), runs fuseplan.executeFusePlan() on the simulated blhost and
+# then checks that the part accepted every burn of a valid plan, verified without error, ended
+# up with all desired bits, never lost a bit, never got SRK locked by the plan and was not
+# touched at all by an invalid plan.
+#
+# @return List of error strings, empty if all sequences behaved as expected
+def runRandomPlanSequences( sequenceCount, burnCount=8, seed=None, hasRemappedFuse=False ):
+    rng = random.Random(seed)
+    errorList = []
+    for seq in range(sequenceCount):
+        fuseImage = _genRandomFuseImage(rng, hasRemappedFuse)
+        blhost = FuseSimBootloader(None, fuseImage)
+        scannedFuseList = []
+        for i in range(fusedef.kMaxEfuseWords):
+            ret, results, cmdStr = blhost.efuseReadOnce(i)
+            if ret == status.kStatus_Success:
+                scannedFuseList.append(results[1])
+            else:
+                scannedFuseList.append(None)
+        desiredFuseDict, exactFuseIndexList = _genRandomDesiredFuses(rng, burnCount)
+        fusePlan = fuseplan.compileFusePlan(scannedFuseList, desiredFuseDict, exactFuseIndexList)
+        oldImage = fuseImage.clone()
+        def burnFuse( fuseIndex, burnValue ):
+            return blhost.efuseProgramOnce(fuseIndex, '%08x' %(burnValue))[0] == status.kStatus_Success
+        def readFuse( fuseIndex ):
+            ret, results, cmdStr = blhost.efuseReadOnce(fuseIndex)
+            if ret == status.kStatus_Success:
+                return results[1]
+            return None
+        isBurned, failedFuseIndexList = fuseplan.executeFusePlan(fusePlan, burnFuse, readFuse)
+        for i in range(fusedef.kMaxEfuseWords):
+            if fuseImage.fuseList[i] & oldImage.fuseList[i] != oldImage.fuseList[i]:
+                errorList.append('seq %d: fuse 0x%03x lost bits' %(seq, fuseplan.getFuseAddr(i)))
+        if not fusePlan.isValid():
+            if fuseImage.fuseList != oldImage.fuseList:
+                errorList.append('seq %d: invalid plan changed fuses' %(seq))
+            continue
+        if not isBurned:
+            errorList.append('seq %d: part rejected a burn of valid plan %s' %(seq, fusePlan.burnList))
+            continue
+        for fuseIndex in failedFuseIndexList:
+            errorList.append('seq %d: fuse 0x%03x failed verification' %(seq, fuseplan.getFuseAddr(fuseIndex)))
+        if fuseImage.programCount - oldImage.programCount != len(fusePlan.burnList):
+            errorList.append('seq %d: %d words were programmed for %d burns' %(seq, fuseImage.programCount - oldImage.programCount, len(fusePlan.burnList)))
+        for fuseIndex, desiredValue in desiredFuseDict.items():
+            if fuseIndex == fusedef.kEfuseIndex_LOCK:
+                continue
+            if fuseImage.fuseList[fuseIndex] != oldImage.fuseList[fuseIndex] | desiredValue:
+                errorList.append('seq %d: fuse 0x%03x misses desired bits' %(seq, fuseplan.getFuseAddr(fuseIndex)))
+            elif fuseIndex in exactFuseIndexList and fuseImage.fuseList[fuseIndex] != desiredValue:
+                errorList.append('seq %d: fuse 0x%03x is not exactly as desired' %(seq, fuseplan.getFuseAddr(fuseIndex)))
+        if (fuseImage.fuseList[fusedef.kEfuseIndex_LOCK] & ~oldImage.fuseList[fusedef.kEfuseIndex_LOCK]) & fusedef.kEfuseMask_LockSrk:
+            errorList.append('seq %d: plan set SRK_LOCK' %(seq))
+        decodeBootConfig(fuseImage.getLogicalFuseList())
+    return errorList
+
+if __name__ == "__main__":
+    sequenceCount = 1000
+    if len(sys.argv) > 1:
+        sequenceCount = int(sys.argv[1], 0)
+    errorList = runRandomPlanSequences(sequenceCount)
+    for err in errorList:
+        print err
+    print '%d sequences, %d errors' % (sequenceCount, len(errorList))
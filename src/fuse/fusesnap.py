@@ -0,0 +1,185 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import array
+import time
+import fusedef
+import fuseplan
+
+##
+# Snapshot record, all members are uint32 (little-endian):
+#   [0]      magic 'FSNP'
+#   [1]      timestamp (seconds since epoch)
+#   [2..3]   UUID low, UUID high
+#   [4..6]   valid mask, bit n set means word n was readable
+#   [7..86]  80 fuse words, 0 if not readable
+kFuseSnapMagic = 0x504E5346  # 'FSNP'
+kFuseSnapOffset_Timestamp = 1
+kFuseSnapOffset_Uuid      = 2
+kFuseSnapOffset_ValidMask = 4
+kFuseSnapOffset_Fuse      = 7
+kFuseSnapValidMaskWords   = (fusedef.kMaxEfuseWords + 31) / 32
+kFuseSnapRecordWords      = kFuseSnapOffset_Fuse + fusedef.kMaxEfuseWords
+
+def _newWordArray( initList=[] ):
+    # 'I' is 4 bytes on all hosts this tool runs on, 'L' is 8 bytes on 64-bit Linux
+    words = array.array('I', initList)
+    assert words.itemsize == 4
+    return words
+
+def _convertUuidToWords( uuid ):
+    if uuid == None:
+        return 0, 0
+    uuid = int(uuid, 16)
+    return (uuid & 0xFFFFFFFF), ((uuid >> 32) & 0xFFFFFFFF)
+
+def packFuseSnapshot( fuseList, uuid=None, timestamp=None ):
+    if timestamp == None:
+        timestamp = time.time()
+    uuidLow, uuidHigh = _convertUuidToWords(uuid)
+    record = _newWordArray([0] * kFuseSnapRecordWords)
+    record[0] = kFuseSnapMagic
+    record[kFuseSnapOffset_Timestamp] = int(timestamp) & 0xFFFFFFFF
+    record[kFuseSnapOffset_Uuid] = uuidLow
+    record[kFuseSnapOffset_Uuid + 1] = uuidHigh
+    for i in range(fusedef.kMaxEfuseWords):
+        if fuseList[i] != None:
+            record[kFuseSnapOffset_ValidMask + i / 32] |= (1 << (i % 32))
+            record[kFuseSnapOffset_Fuse + i] = fuseList[i] & 0xFFFFFFFF
+    return record
+
+def appendFuseSnapshot( logFilename, fuseList, uuid=None, timestamp=None ):
+    record = packFuseSnapshot(fuseList, uuid, timestamp)
+    with open(logFilename, 'ab') as fileObj:
+        record.tofile(fileObj)
+
+##
+# @brief Keep only the latest record of each UUID, a board is logged again every time it is scanned.
+#
+# Records without UUID (0) cannot be told apart, so all of them are kept.
+def _getLatestRecords( words ):
+    recordCount = len(words) / kFuseSnapRecordWords
+    latestRecordDict = {}
+    recordList = []
+    for record in range(recordCount):
+        offset = record * kFuseSnapRecordWords
+        uuid = (words[offset + kFuseSnapOffset_Uuid + 1], words[offset + kFuseSnapOffset_Uuid])
+        if uuid == (0, 0):
+            recordList.append(record)
+        elif not latestRecordDict.has_key(uuid) or \
+             words[latestRecordDict[uuid] * kFuseSnapRecordWords + kFuseSnapOffset_Timestamp] <= words[offset + kFuseSnapOffset_Timestamp]:
+            latestRecordDict[uuid] = record
+    recordList = sorted(recordList + latestRecordDict.values())
+    if len(recordList) == recordCount:
+        return words
+    latestWords = _newWordArray()
+    for record in recordList:
+        latestWords.extend(words[record * kFuseSnapRecordWords:(record + 1) * kFuseSnapRecordWords])
+    return latestWords
+
+##
+# @brief Latest snapshot of every board of one lot log, kept as one flat uint32 array so a column is just a strided slice.
+class FuseSnapshotLot(object):
+
+    def __init__(self, words):
+        self.words = _getLatestRecords(words)
+        self.boardCount = len(self.words) / kFuseSnapRecordWords
+
+    @classmethod
+    def fromFile(cls, logFilename):
+        words = _newWordArray()
+        with open(logFilename, 'rb') as fileObj:
+            data = fileObj.read()
+        recordBytes = kFuseSnapRecordWords * 4
+        # A torn last record (tool killed while appending) is dropped
+        words.fromstring(data[0:len(data) / recordBytes * recordBytes])
+        if sys.byteorder != 'little':
+            words.byteswap()
+        badRecords = [i for i in range(len(words) / kFuseSnapRecordWords) if words[i * kFuseSnapRecordWords] != kFuseSnapMagic]
+        if len(badRecords):
+            raise ValueError("%s is not a fuse snapshot log (bad record %d)" % (logFilename, badRecords[0]))
+        return cls(words)
+
+    def getUuid( self, board ):
+        offset = board * kFuseSnapRecordWords + kFuseSnapOffset_Uuid
+        return '%08x%08x' % (self.words[offset + 1], self.words[offset])
+
+    def getTimestamp( self, board ):
+        return self.words[board * kFuseSnapRecordWords + kFuseSnapOffset_Timestamp]
+
+    def getFuseColumn( self, fuseIndex ):
+        return self.words[kFuseSnapOffset_Fuse + fuseIndex::kFuseSnapRecordWords]
+
+    def getValidColumn( self, fuseIndex ):
+        maskColumn = self.words[kFuseSnapOffset_ValidMask + fuseIndex / 32::kFuseSnapRecordWords]
+        bit = 1 << (fuseIndex % 32)
+        return [(mask & bit) != 0 for mask in maskColumn]
+
+    ##
+    # @brief Value -> number of boards, unreadable words are counted under None.
+    def getHistogram( self, fuseIndex ):
+        histogram = {}
+        for value, isValid in zip(self.getFuseColumn(fuseIndex), self.getValidColumn(fuseIndex)):
+            if not isValid:
+                value = None
+            histogram[value] = histogram.get(value, 0) + 1
+        return histogram
+
+    ##
+    # @brief Boards whose value of the given word is shared by less than maxRatio of the lot.
+    def getOutliers( self, fuseIndex, maxRatio=0.05 ):
+        histogram = self.getHistogram(fuseIndex)
+        rareValues = set([value for value, count in histogram.items() if count <= self.boardCount * maxRatio])
+        if not len(rareValues):
+            return []
+        outliers = []
+        for board, value, isValid in zip(range(self.boardCount), self.getFuseColumn(fuseIndex), self.getValidColumn(fuseIndex)):
+            if not isValid:
+                value = None
+            if value in rareValues:
+                outliers.append(board)
+        return outliers
+
+    ##
+    # @brief Boards having all bits of mask set in the given word, e.g. (kEfuseIndex_LOCK, kEfuseMask_LockSrk)
+    def findBoardsWithBits( self, fuseIndex, mask ):
+        return [board for board, value, isValid in zip(range(self.boardCount), self.getFuseColumn(fuseIndex), self.getValidColumn(fuseIndex)) \
+                if isValid and (value & mask) == mask]
+
+def _formatValue( value ):
+    if value == None:
+        return '--------'
+    return '%08x' % value
+
+def reportFuseSnapshotLot( lot, maxRatio=0.05 ):
+    lines = ['%d boards' % lot.boardCount]
+    for fuseIndex in range(fusedef.kMaxEfuseWords):
+        histogram = lot.getHistogram(fuseIndex)
+        if len(histogram) <= 1:
+            continue
+        lines.append('Fuse (0x%03x): %s' % (fuseplan.getFuseAddr(fuseIndex),
+                                             ', '.join(['%s x%d' % (_formatValue(value), count) for value, count in sorted(histogram.items(), key=lambda item: -item[1])])))
+        fuseColumn = lot.getFuseColumn(fuseIndex)
+        validColumn = lot.getValidColumn(fuseIndex)
+        for board in lot.getOutliers(fuseIndex, maxRatio):
+            value = None
+            if validColumn[board]:
+                value = fuseColumn[board]
+            lines.append('  outlier %s = %s' % (lot.getUuid(board), _formatValue(value)))
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    if not ((len(sys.argv) in [3, 4] and sys.argv[1] == 'report') or (len(sys.argv) == 5 and sys.argv[1] == 'find')):
+        print 'Usage: fusesnap.py report <log> [maxRatio]'
+        print '       fusesnap.py find <log> <fuseIndex> <mask>'
+        sys.exit(1)
+    lot = FuseSnapshotLot.fromFile(sys.argv[2])
+    if sys.argv[1] == 'report':
+        maxRatio = 0.05
+        if len(sys.argv) > 3:
+            maxRatio = float(sys.argv[3])
+        print reportFuseSnapshotLot(lot, maxRatio)
+    else:
+        for board in lot.findBoardsWithBits(int(sys.argv[3], 0), int(sys.argv[4], 0)):
+            print lot.getUuid(board), time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(lot.getTimestamp(board)))
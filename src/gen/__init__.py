@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 
 import gencore
+import genbeebatch
+import gendcd
+import gendcdcheck
+import genkeystore
 import gendef
 
-__all__ = ["gencore", "gendef"]
+__all__ = ["gencore", "genbeebatch", "gendcd", "gendcdcheck", "genkeystore", "gendef"]
 
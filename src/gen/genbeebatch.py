@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import re
+import subprocess
+import multiprocessing
+import multiprocessing.pool
+
+kBeeEncAppFilename_Suffix = '_bee_encrypted'
+
+##
+# @brief Parse image_enc region arg 'facCount,[start,length,protect],...' into (facCount, [(start, length, protect)]).
+def parseBeeRegionArg( regionArg ):
+    facCount = regionArg.split(',')[0].strip()
+    facList = []
+    for facContent in re.findall(r'\[([^\]]*)\]', regionArg):
+        facFields = [field.strip() for field in facContent.split(',')]
+        if len(facFields) != 3:
+            raise ValueError('Bad BEE region arg: ' + regionArg)
+        facList.append((int(facFields[0], 0), int(facFields[1], 0), int(facFields[2], 0)))
+    if not facCount.isdigit() or int(facCount) != len(facList):
+        raise ValueError('Bad BEE region arg: ' + regionArg)
+    return int(facCount), facList
+
+##
+# @brief Encrypt one plaintext bootable image for many devices, each with its own engine keys.
+#
+# Everything that does not depend on the key is done once in the constructor: plaintext image
+# check, region layout check and the common part of image_enc command line. Devices are
+# encrypted by parallel image_enc processes, one per core by default, and every image is
+# handed out as soon as its process ends, so the first board can be flashed while the rest
+# of the lot is still being encrypted.
+#
+# @param engineIndexList Enabled BEE engines, in engine index order
+# @param stripCfgBlock Called with encrypted image filename in worker thread, returns filename of the image without config block
+class BeeImagePipeline(object):
+
+    def __init__(self, imageEncPath, plainImageFilename, engineIndexList, userKeyCmdDict, outputFolder, stripCfgBlock):
+        self.imageEncPath = imageEncPath
+        self.plainImageFilename = plainImageFilename
+        self.outputFolder = outputFolder
+        self.engineIndexList = engineIndexList
+        self.stripCfgBlock = stripCfgBlock
+        if not os.path.isfile(plainImageFilename):
+            raise ValueError('Plaintext bootable image %s does not exist' % (plainImageFilename))
+        self.plainImageLength = os.path.getsize(plainImageFilename)
+        self.regionList = self._getCheckedRegionList(userKeyCmdDict)
+        self.commonArgList = ['base_addr=' + userKeyCmdDict['base_addr']]
+        for engineIndex in self.engineIndexList:
+            self.commonArgList.append('region%d_arg=' % (engineIndex) + userKeyCmdDict['engine%d_arg' % (engineIndex)])
+            self.commonArgList.append('region%d_lock=' % (engineIndex) + userKeyCmdDict['engine%d_lock' % (engineIndex)])
+        self.commonArgList.append('use_zero_key=' + userKeyCmdDict['use_zero_key'])
+        self.commonArgList.append('is_boot_image=' + userKeyCmdDict['is_boot_image'])
+
+    def _getCheckedRegionList( self, userKeyCmdDict ):
+        imageStart = int(userKeyCmdDict['base_addr'], 0)
+        imageEnd = imageStart + self.plainImageLength
+        regionList = []
+        for engineIndex in self.engineIndexList:
+            facCount, facList = parseBeeRegionArg(userKeyCmdDict['engine%d_arg' % (engineIndex)])
+            for start, length, protect in facList:
+                if start >= imageEnd or start + length <= imageStart:
+                    raise ValueError('BEE region [0x%x, 0x%x) of engine %d does not cover image [0x%x, 0x%x)' %(start, start + length, engineIndex, imageStart, imageEnd))
+                regionList.append((engineIndex, start, length, protect))
+        return regionList
+
+    def getDeviceImageFilename( self, deviceUuid ):
+        imageName, imageType = os.path.splitext(os.path.split(self.plainImageFilename)[1])
+        return os.path.join(self.outputFolder, deviceUuid, imageName + kBeeEncAppFilename_Suffix + imageType)
+
+    ##
+    # @return (deviceUuid, encrypted image filename or None, image without config block filename or None, image_enc output)
+    def _encryptForDevice( self, deviceKey ):
+        deviceUuid, engineKeyList = deviceKey
+        encImageFilename = self.getDeviceImageFilename(deviceUuid)
+        deviceFolder = os.path.split(encImageFilename)[0]
+        if not os.path.isdir(deviceFolder):
+            os.makedirs(deviceFolder)
+        if os.path.isfile(encImageFilename):
+            os.remove(encImageFilename)
+        argList = [self.imageEncPath, 'ifile=' + self.plainImageFilename, 'ofile=' + encImageFilename]
+        for engineIndex in self.engineIndexList:
+            argList.append('region%d_key=' % (engineIndex) + engineKeyList[engineIndex])
+        argList += self.commonArgList
+        try:
+            process = subprocess.Popen(argList, cwd=os.path.split(self.imageEncPath)[0], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            commandOutput = process.communicate()[0]
+        except OSError as err:
+            return deviceUuid, None, None, str(err)
+        if not os.path.isfile(encImageFilename):
+            return deviceUuid, None, None, commandOutput
+        return deviceUuid, encImageFilename, self.stripCfgBlock(encImageFilename), commandOutput
+
+    ##
+    # @brief Yield (deviceUuid, encrypted image filename or None, image without config block filename or None, image_enc output) in completion order.
+    #
+    # @param deviceKeyList [(deviceUuid, [engine0 key, engine1 key])], keys of disabled engines are not used
+    def iterEncryptedImages( self, deviceKeyList, jobCount=None ):
+        if jobCount == None:
+            jobCount = multiprocessing.cpu_count()
+        jobCount = max(1, min(jobCount, len(deviceKeyList)))
+        # image_enc does the work, so threads are enough to keep all cores busy
+        jobPool = multiprocessing.pool.ThreadPool(jobCount)
+        try:
+            for result in jobPool.imap_unordered(self._encryptForDevice, deviceKeyList):
+                yield result
+        finally:
+            jobPool.terminate()
+            jobPool.join()
@@ -1,19 +1,29 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
+import wx
 import sys
 import os
 import time
-import array
+import threading
+import copy
 import shutil
+import hashlib
 import subprocess
 import bincopy
 import gendef
+import gendcd
+import gendcdcheck
+import genkeystore
+import genbeebatch
 sys.path.append(os.path.abspath(".."))
 from ui import uicore
 from ui import uidef
 from ui import uivar
+from ui import uilog
 from run import rundef
 from utils import elf
+from utils import binblob
+from boot import memoryindex
 
 class secBootGen(uicore.secBootUi):
 
@@ -47,8 +57,7 @@ class secBootGen(uicore.secBootUi):
         self.dcdFolder = os.path.join(self.exeTopRoot, 'gen', 'dcd_file')
         self.dcdBinFilename = os.path.join(self.exeTopRoot, 'gen', 'dcd_file', gendef.kStdDcdFilename_Bin)
         self.dcdCfgFilename = os.path.join(self.exeTopRoot, 'gen', 'dcd_file', gendef.kStdDcdFilename_Cfg)
-        self.imgutilPath = os.path.join(self.exeTopRoot, 'tools', 'imgutil', 'win', 'imgutil.exe')
-        self.dcdBatFilename = os.path.join(self.exeTopRoot, 'gen', 'dcd_file', 'imx_dcd_gen.bat')
+        self.dcdCacheFolder = os.path.join(self.exeTopRoot, 'gen', 'dcd_file', 'dcd_cache')
         self.dcdModelFolder = os.path.join(self.exeTopRoot, 'src', 'targets', 'dcd_model')
         self.dcdSdramBaseAddress = None
 
@@ -64,12 +73,18 @@ class secBootGen(uicore.secBootUi):
         self.beeDek1Filename = os.path.join(self.exeTopRoot, 'gen', 'bee_crypto', 'bee_dek1.bin')
         self.encBatFilename = os.path.join(self.exeTopRoot, 'gen', 'bee_crypto', 'imx_application_enc.bat')
         self.otpmkDekFilename = os.path.join(self.exeTopRoot, 'gen', 'bee_crypto', 'otpmk_dek.bin')
+        self.dekStoreFilename = os.path.join(self.exeTopRoot, 'gen', 'bee_crypto', 'bee_dek_store.json')
+        self.dekStore = None
+        self.deviceEncAppFolder = os.path.join(self.exeTopRoot, 'gen', 'bee_crypto', 'device_image')
+        self.deviceEncAppFilenameDict = {}
+        self.isLotEncryptionRunning = False
         self.destEncAppFilename = None
         self.destEncAppNoCfgBlockFilename = None
 
         self.flBdFilename = os.path.join(self.exeTopRoot, 'gen', 'bd_file', 'imx_flashloader_gen.bd')
         self.flBdBatFilename = os.path.join(self.exeTopRoot, 'gen', 'bd_file', 'imx_flashloader_gen.bat')
         self.destFlFilename = os.path.join(self.exeTopRoot, 'gen', 'bootable_image', 'ivt_flashloader_signed.bin')
+        self.signedFlCacheFolder = os.path.join(self.exeTopRoot, 'gen', 'bootable_image', 'signed_fl_cache')
 
         self.userFileFolder = os.path.join(self.exeTopRoot, 'gen', 'user_file')
         self.mdkAxfConvToolPath = os.path.join(self.exeTopRoot, 'tools', 'ide_utils', 'keil_mdk', 'fromelf.exe')
@@ -243,8 +258,7 @@ class secBootGen(uicore.secBootUi):
     def showSuperRootKeys( self ):
         self.clearSrkData()
         keyWords = gendef.kSecKeyLengthInBits_SRK / 32
-        for i in range(keyWords):
-            val32 = self.getVal32FromBinFile(self.srkFuseFilename, (i * 4))
+        for val32 in self.getVal32ListFromBinFile(self.srkFuseFilename, keyWords):
             self.printSrkData(self.getFormattedHexValue(val32))
 
     def cleanUpCertificate( self ):
@@ -395,7 +409,8 @@ class secBootGen(uicore.secBootUi):
                     #if entryPointAddress == None:
                     #    self.popupMsgBox('Cannot get entryAddr symbol from image file: ' + srcAppFilename)
                     startAddress = elfObj.programmheaders[0].p_paddr
-                    entryPointAddress = self.getVal32FromBinFile(srcAppFilename, elfObj.programmheaders[0].p_offset + 4)
+                    with binblob.BinBlob.fromFile(srcAppFilename, True) as elfBlob:
+                        entryPointAddress = elfBlob.u32(elfObj.programmheaders[0].p_offset + 4)
                     for i in range(elfObj.e_phnum):
                         lengthInByte += elfObj.programmheaders[i].p_memsz
                     isConvSuccessed = True
@@ -423,77 +438,110 @@ class secBootGen(uicore.secBootUi):
         #print ('Image length is 0x%x' %(lengthInByte))
         return startAddress, entryPointAddress, lengthInByte
 
+    ##
+    # @brief Regions an application can execute from: TCM/OCRAM, SDRAM from sdramBase and XIP windows.
+    def _getAppMemoryIndex( self, sdramBase ):
+        memIndex = memoryindex.MemoryIndex()
+        for memName in ['itcm', 'dtcm', 'ocram']:
+            memIndex.addMemoryRange(memName, self.tgt.memoryRange[memName])
+        if sdramBase != None:
+            memIndex.add(sdramBase, gendef.kBootDeviceMemBase_SemcSdram + gendef.kBootDeviceMemMaxSize_SemcSdram - sdramBase, 'sdram', memoryindex.kRegionKind_Ram)
+        memIndex.add(self.tgt.flexspiNorMemBase, gendef.kBootDeviceMemXipSize_FlexspiNor, 'flexspiNor', memoryindex.kRegionKind_Xip)
+        memIndex.add(gendef.kBootDeviceMemBase_SemcNor, gendef.kBootDeviceMemXipSize_SemcNor, 'semcNor', memoryindex.kRegionKind_Xip)
+        return memIndex
+
     def _verifyAppVectorAddressForBd( self, vectorAddr, initialLoadSize ):
         executeBase = 0
-        if ((vectorAddr >= self.tgt.memoryRange['itcm'].start) and (vectorAddr < self.tgt.memoryRange['itcm'].start + self.tgt.memoryRange['itcm'].length)):
-             executeBase = self.tgt.memoryRange['itcm'].start
-        elif ((vectorAddr >= self.tgt.memoryRange['dtcm'].start) and (vectorAddr < self.tgt.memoryRange['dtcm'].start + self.tgt.memoryRange['dtcm'].length)):
-             executeBase = self.tgt.memoryRange['dtcm'].start
-        elif ((vectorAddr >= self.tgt.memoryRange['ocram'].start) and (vectorAddr < self.tgt.memoryRange['ocram'].start + self.tgt.memoryRange['ocram'].length)):
-             executeBase = self.tgt.memoryRange['ocram'].start
-        elif ((vectorAddr >= self.tgt.flexspiNorMemBase) and (vectorAddr < self.tgt.flexspiNorMemBase + rundef.kBootDeviceMemXipSize_FlexspiNor)):
-             executeBase = self.tgt.flexspiNorMemBase
-        elif ((vectorAddr >= rundef.kBootDeviceMemBase_SemcNor) and (vectorAddr < rundef.kBootDeviceMemBase_SemcNor + rundef.kBootDeviceMemXipSize_SemcNor)):
-             executeBase = rundef.kBootDeviceMemBase_SemcNor
-        elif ((self.dcdSdramBaseAddress != None) and ((vectorAddr >= self.dcdSdramBaseAddress) and (vectorAddr < rundef.kBootDeviceMemBase_SemcSdram + rundef.kBootDeviceMemMaxSize_SemcSdram))):
-             executeBase = self.dcdSdramBaseAddress
-        else:
-            pass
+        region = self._getAppMemoryIndex(self.dcdSdramBaseAddress).find(vectorAddr)
+        if region != None:
+            executeBase = region.start
         if (vectorAddr - executeBase) >= initialLoadSize:
             return True
         else:
             return False
 
-    def _updateDcdBatfileContent( self ):
-        batContent = "\"" + self.imgutilPath + "\""
-        batContent += " --dcd_gen"
-        batContent += " dcd_desc_file=" + "\"" + self.dcdCfgFilename + "\""
-        batContent += " ofile=" + "\"" + self.dcdBinFilename + "\""
-        with open(self.dcdBatFilename, 'wb') as fileObj:
-            fileObj.write(batContent)
-            fileObj.close()
+    def _getDcdCacheFilename( self, dcdCfgContent ):
+        hashObj = hashlib.sha256()
+        hashObj.update(str(gendcd.kDcdCompilerVersion))
+        hashObj.update(dcdCfgContent)
+        return os.path.join(self.dcdCacheFolder, 'dcd_' + hashObj.hexdigest()[0:16] + '.bin')
 
-    def _parseDcdGenerationResult( self, output ):
-        # imgutil ouput template:
-        # DCD binary file is generated successfully
-        info = 'DCD binary file is generated successfully'
-        if output.find(info) != -1:
-            self.printLog('DCD binary is generated: ' + self.dcdBinFilename)
+    def _genDcdBinFileAccordingToCfgFile( self ):
+        with open(self.dcdCfgFilename, 'rb') as fileObj:
+            dcdCfgContent = fileObj.read()
+            fileObj.close()
+        dcdCacheFilename = self._getDcdCacheFilename(dcdCfgContent)
+        if os.path.isfile(dcdCacheFilename):
+            shutil.copy(dcdCacheFilename, self.dcdBinFilename)
+            self.printLog('DCD binary is reused from ' + dcdCacheFilename)
             return True
-        else:
-            self.popupMsgBox('DCD binary is not generated successfully! Check your DCD descriptor file and make sure you don\'t put the tool in path with blank space!')
+        try:
+            dcdData = gendcd.compileDcdDescriptor(dcdCfgContent)
+        except ValueError as err:
+            self.popupMsgBox('DCD binary is not generated successfully! Check your DCD descriptor file: ' + str(err))
             return False
+        with open(self.dcdBinFilename, 'wb') as fileObj:
+            fileObj.write(dcdData)
+            fileObj.close()
+        if not os.path.isdir(self.dcdCacheFolder):
+            os.mkdir(self.dcdCacheFolder)
+        shutil.copy(self.dcdBinFilename, dcdCacheFilename)
+        self.printLog('DCD binary is generated: ' + self.dcdBinFilename)
+        return True
 
-    def _genDcdBinFileAccordingToCfgFile( self ):
-        curdir = os.getcwd()
-        os.chdir(os.path.split(self.imgutilPath)[0])
-        process = subprocess.Popen(self.dcdBatFilename, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        os.chdir(curdir)
-        commandOutput = process.communicate()[0]
-        print commandOutput
-        if self._parseDcdGenerationResult(commandOutput):
-            return True
-        else:
+    ##
+    # @brief Log DCD analysis warnings, only a DCD that can never be accepted by ROM fails the build.
+    def _checkDcdBinFile( self ):
+        with open(self.dcdBinFilename, 'rb') as fileObj:
+            dcdData = fileObj.read()
+            fileObj.close()
+        try:
+            dcdReport = gendcdcheck.analyzeDcd(dcdData)
+        except ValueError as err:
+            self.popupMsgBox('DCD binary is invalid! ' + str(err))
             return False
+        for index, kind, text in dcdReport.issueList:
+            if index != None:
+                self.printLog('DCD warning (' + kind + '): #' + str(index) + ' ' + text)
+            else:
+                self.printLog('DCD warning (' + kind + '): ' + text)
+        self.printLog('DCD size: %d / %d bytes, about %.1f us to execute' % (dcdReport.dcdSize, gendcd.kDcdMaxSize, dcdReport.estimatedUs))
+        if dcdReport.dcdSize > gendcd.kDcdMaxSize:
+            self.popupMsgBox('DCD is %d bytes, it exceeds the ROM limit of %d bytes!' % (dcdReport.dcdSize, gendcd.kDcdMaxSize))
+            return False
+        return True
 
-    def _addDcdContentIfAppliable( self ):
+    ##
+    # @brief DCD binary of DCD settings, ready to be put in image or to be sent by SDP dcd-write.
+    #
+    # @return (True, DCD binary filename or None if DCD is disabled), or (False, None) if DCD is not usable
+    def prepareDcdBinFile( self ):
         dcdConvResult = True
+        dcdCtrlDict, dcdSettingsDict = uivar.getBootDeviceConfiguration(uidef.kBootDevice_Dcd)
+        if not dcdCtrlDict['isDcdEnabled']:
+            return True, None
+        if dcdCtrlDict['dcdFileType'] == gendef.kUserDcdFileType_Bin:
+            pass
+        elif dcdCtrlDict['dcdFileType'] == gendef.kUserDcdFileType_Cfg:
+            dcdConvResult = self._genDcdBinFileAccordingToCfgFile()
+        else:
+            pass
+        if dcdConvResult:
+            dcdConvResult = self._checkDcdBinFile()
+        if not dcdConvResult:
+            return False, None
+        return True, self.dcdBinFilename
+
+    def _addDcdContentIfAppliable( self ):
         dcdContent = ''
         self.dcdSdramBaseAddress = None
         dcdCtrlDict, dcdSettingsDict = uivar.getBootDeviceConfiguration(uidef.kBootDevice_Dcd)
-        if dcdCtrlDict['isDcdEnabled']:
-            if dcdCtrlDict['dcdFileType'] == gendef.kUserDcdFileType_Bin:
-                pass
-            elif dcdCtrlDict['dcdFileType'] == gendef.kUserDcdFileType_Cfg:
-                self._updateDcdBatfileContent()
-                dcdConvResult = self._genDcdBinFileAccordingToCfgFile()
-            else:
-                pass
-            if dcdConvResult:
-                shutil.copy(self.dcdBinFilename, os.path.join(os.path.split(self.elftosbPath)[0], gendef.kStdDcdFilename_Bin))
-                dcdContent += "    DCDFilePath = \"" + gendef.kStdDcdFilename_Bin + "\";\n"
-                if dcdSettingsDict['sdramBase'] != None:
-                    self.dcdSdramBaseAddress = self._getVal32FromHexText(dcdSettingsDict['sdramBase'])
+        dcdConvResult, dcdBinFilename = self.prepareDcdBinFile()
+        if dcdBinFilename != None:
+            shutil.copy(dcdBinFilename, os.path.join(os.path.split(self.elftosbPath)[0], gendef.kStdDcdFilename_Bin))
+            dcdContent += "    DCDFilePath = \"" + gendef.kStdDcdFilename_Bin + "\";\n"
+            if dcdSettingsDict['sdramBase'] != None:
+                self.dcdSdramBaseAddress = self._getVal32FromHexText(dcdSettingsDict['sdramBase'])
         return dcdConvResult, dcdContent
 
     def _updateBdfileContent( self, secureBootType, bootDevice, vectorAddress, entryPointAddress):
@@ -709,10 +757,7 @@ class secBootGen(uicore.secBootUi):
             pass
 
     def _isValidNonXipAppImage( self, imageStartAddr ):
-        if ((imageStartAddr >= self.tgt.memoryRange['itcm'].start) and (imageStartAddr < self.tgt.memoryRange['itcm'].start + self.tgt.memoryRange['itcm'].length)) or \
-           ((imageStartAddr >= self.tgt.memoryRange['dtcm'].start) and (imageStartAddr < self.tgt.memoryRange['dtcm'].start + self.tgt.memoryRange['dtcm'].length)) or \
-           ((imageStartAddr >= self.tgt.memoryRange['ocram'].start) and (imageStartAddr < self.tgt.memoryRange['ocram'].start + self.tgt.memoryRange['ocram'].length)) or \
-           ((imageStartAddr >= rundef.kBootDeviceMemBase_SemcSdram) and (imageStartAddr < rundef.kBootDeviceMemBase_SemcSdram + rundef.kBootDeviceMemMaxSize_SemcSdram)):
+        if self._getAppMemoryIndex(gendef.kBootDeviceMemBase_SemcSdram).find(imageStartAddr, memoryindex.kRegionKind_Ram) != None:
             return True
         else:
             self.popupMsgBox('Non-XIP Application is detected but it is not in the range of ITCM/DTCM/OCRAM/SDRAM!')
@@ -741,22 +786,22 @@ class secBootGen(uicore.secBootUi):
         self.isXipApp = False
         self.destAppVectorAddress = imageStartAddr
         if self.bootDevice == uidef.kBootDevice_FlexspiNor:
-            if ((imageStartAddr >= self.tgt.flexspiNorMemBase) and (imageStartAddr < self.tgt.flexspiNorMemBase + rundef.kBootDeviceMemXipSize_FlexspiNor)):
-                if (imageStartAddr + imageLength <= self.tgt.flexspiNorMemBase + rundef.kBootDeviceMemXipSize_FlexspiNor):
+            if ((imageStartAddr >= self.tgt.flexspiNorMemBase) and (imageStartAddr < self.tgt.flexspiNorMemBase + gendef.kBootDeviceMemXipSize_FlexspiNor)):
+                if (imageStartAddr + imageLength <= self.tgt.flexspiNorMemBase + gendef.kBootDeviceMemXipSize_FlexspiNor):
                     self.isXipApp = True
                     self.destAppVectorOffset = imageStartAddr - self.tgt.flexspiNorMemBase
                 else:
-                    self.popupMsgBox('XIP Application is detected but the size exceeds maximum XIP size 0x%s !' %(rundef.kBootDeviceMemXipSize_FlexspiNor))
+                    self.popupMsgBox('XIP Application is detected but the size exceeds maximum XIP size 0x%s !' %(gendef.kBootDeviceMemXipSize_FlexspiNor))
                     return False
             else:
                 self.destAppVectorOffset = gendef.kInitialLoadSize_NOR
         elif self.bootDevice == uidef.kBootDevice_SemcNor:
-            if ((imageStartAddr >= rundef.kBootDeviceMemBase_SemcNor) and (imageStartAddr < rundef.kBootDeviceMemBase_SemcNor + rundef.kBootDeviceMemXipSize_SemcNor)):
-                if (imageStartAddr + imageLength <= rundef.kBootDeviceMemBase_SemcNor + rundef.kBootDeviceMemXipSize_SemcNor):
+            if ((imageStartAddr >= gendef.kBootDeviceMemBase_SemcNor) and (imageStartAddr < gendef.kBootDeviceMemBase_SemcNor + gendef.kBootDeviceMemXipSize_SemcNor)):
+                if (imageStartAddr + imageLength <= gendef.kBootDeviceMemBase_SemcNor + gendef.kBootDeviceMemXipSize_SemcNor):
                     self.isXipApp = True
-                    self.destAppVectorOffset = imageStartAddr - rundef.kBootDeviceMemBase_SemcNor
+                    self.destAppVectorOffset = imageStartAddr - gendef.kBootDeviceMemBase_SemcNor
                 else:
-                    self.popupMsgBox('XIP Application is detected but the size exceeds maximum XIP size 0x%s !' %(rundef.kBootDeviceMemXipSize_SemcNor))
+                    self.popupMsgBox('XIP Application is detected but the size exceeds maximum XIP size 0x%s !' %(gendef.kBootDeviceMemXipSize_SemcNor))
                     return False
             else:
                 self.destAppVectorOffset = gendef.kInitialLoadSize_NOR
@@ -829,6 +874,8 @@ class secBootGen(uicore.secBootUi):
             return False
 
     def genBootableImage( self ):
+        # Lot-encrypted images are made from the plaintext image, they are stale once it is regenerated
+        self._invalidateDeviceEncAppFiles()
         self._updateBdBatfileContent()
         # We have to change system dir to the path of elftosb.exe, or elftosb.exe may not be ran successfully
         curdir = os.getcwd()
@@ -847,8 +894,7 @@ class secBootGen(uicore.secBootUi):
             if os.path.isfile(self.habDekFilename):
                 self.clearHabDekData()
                 keyWords = gendef.kSecKeyLengthInBits_DEK / 32
-                for i in range(keyWords):
-                    val32 = self.getVal32FromBinFile(self.habDekFilename, (i * 4))
+                for val32 in self.getVal32ListFromBinFile(self.habDekFilename, keyWords):
                     self.printHabDekData(self.getFormattedHexValue(val32))
 
     def _setDestAppFilenameForBee( self ):
@@ -871,16 +917,14 @@ class secBootGen(uicore.secBootUi):
         if os.path.isfile(dekFilename):
             self.clearGp4DekData()
             keyWords = gendef.kSecKeyLengthInBits_DEK / 32
-            for i in range(keyWords):
-                val32 = self.getVal32FromBinFile(dekFilename, (i * 4))
+            for val32 in self.getVal32ListFromBinFile(dekFilename, keyWords):
                 self.printGp4DekData(self.getFormattedHexValue(val32))
 
     def _showBeeDekForSwGp2( self, dekFilename ):
         if os.path.isfile(dekFilename):
             self.clearSwGp2DekData()
             keyWords = gendef.kSecKeyLengthInBits_DEK / 32
-            for i in range(keyWords):
-                val32 = self.getVal32FromBinFile(dekFilename, (i * 4))
+            for val32 in self.getVal32ListFromBinFile(dekFilename, keyWords):
                 self.printSwGp2DekData(self.getFormattedHexValue(val32))
 
     def _genBeeDekFilesAndShow( self, userKeyCtrlDict, userKeyCmdDict ):
@@ -928,15 +972,238 @@ class secBootGen(uicore.secBootUi):
         commandOutput = process.communicate()[0]
         print commandOutput
 
-    def encrypteImageUsingFlexibleUserKeys( self ):
+    def _getEnabledBeeEngineIndexList( self, userKeyCtrlDict ):
+        engineIndexList = []
+        if userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_Engine0 or userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_BothEngines:
+            engineIndexList.append(0)
+        if userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_Engine1 or userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_BothEngines:
+            engineIndexList.append(1)
+        return engineIndexList
+
+    ##
+    # @brief Run image_enc with keys on its command line, so no DEK is left in bat file or DEK files.
+    def _encrypteBootableImageWithoutBatfile( self, userKeyCtrlDict, userKeyCmdDict ):
+        argList = [self.imageEncPath, 'ifile=' + self.destAppFilename, 'ofile=' + self.destEncAppFilename, 'base_addr=' + userKeyCmdDict['base_addr']]
+        for engineIndex in self._getEnabledBeeEngineIndexList(userKeyCtrlDict):
+            for argName in ['key', 'arg', 'lock']:
+                argList.append('region%d_%s=' %(engineIndex, argName) + userKeyCmdDict['engine%d_%s' %(engineIndex, argName)])
+        argList += ['use_zero_key=' + userKeyCmdDict['use_zero_key'], 'is_boot_image=' + userKeyCmdDict['is_boot_image']]
+        process = subprocess.Popen(argList, cwd=os.path.split(self.imageEncPath)[0], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        commandOutput = process.communicate()[0]
+        print commandOutput
+
+    ##
+    # @brief Show DEKs of given device from DEK store, they are never written to DEK files.
+    def _showBeeDeksForDevice( self, userKeyCtrlDict, deviceUuid ):
+        for engineIndex in self._getEnabledBeeEngineIndexList(userKeyCtrlDict):
+            keySource = userKeyCtrlDict['engine' + str(engineIndex) + '_key_src']
+            dekWordList = self.getBeeDekWordList(engineIndex, deviceUuid)
+            if dekWordList == None:
+                continue
+            if keySource == uidef.kUserKeySource_SW_GP2:
+                self.clearSwGp2DekData()
+                for val32 in dekWordList:
+                    self.printSwGp2DekData(self.getFormattedHexValue(val32))
+            elif keySource == uidef.kUserKeySource_GP4:
+                self.clearGp4DekData()
+                for val32 in dekWordList:
+                    self.printGp4DekData(self.getFormattedHexValue(val32))
+            else:
+                pass
+
+    def isPerDeviceDekEnabled( self ):
+        dekStoreDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_DekStore)
+        return dekStoreDict['isPerDeviceDek']
+
+    ##
+    # @brief Open the DEK store, passphrase is asked only once per session.
+    def openDekStore( self ):
+        if self.dekStore == None:
+            passphrase = self.popupPassphraseBox('Passphrase of DEK store ' + self.dekStoreFilename)
+            if passphrase == None:
+                return None
+            try:
+                self.dekStore = genkeystore.DekKeyStore(self.dekStoreFilename, passphrase)
+            except ValueError as err:
+                self.popupMsgBox(str(err))
+                return None
+        return self.dekStore
+
+    ##
+    # @brief Generate BEE DEKs for a lot of devices in one go, so later devices only need a store lookup.
+    def genDekStoreForDevices( self, deviceUuidList ):
+        dekStore = self.openDekStore()
+        if dekStore == None:
+            return False
+        dekCount = dekStore.generate(deviceUuidList, genkeystore.kDekSlotList_Bee)
+        self.printLog('%d DEKs are generated into DEK store for %d devices' %(dekCount, len(deviceUuidList)))
+        return True
+
+    ##
+    # @brief Same as genDekStoreForDevices(), devices are listed in a file, one UUID per line.
+    def genDekStoreForDevicesInFile( self, uuidListFilename ):
+        try:
+            deviceUuidList = genkeystore.readDeviceUuidList(uuidListFilename)
+        except IOError as err:
+            self.popupMsgBox(str(err))
+            return False
+        if not len(deviceUuidList):
+            self.popupMsgBox('No device UUID is found in ' + uuidListFilename)
+            return False
+        return self.genDekStoreForDevices(deviceUuidList)
+
+    ##
+    # @brief User key settings with engine keys replaced by the DEKs of given device in DEK store.
+    def _getUserKeyCmdDictForDevice( self, userKeyCtrlDict, userKeyCmdDict, deviceUuid ):
+        if deviceUuid == None:
+            self.popupMsgBox('Per-device DEK needs device UUID, Please connect to device first!')
+            return None
+        dekStore = self.openDekStore()
+        if dekStore == None:
+            return None
+        engineIndexList = self._getEnabledBeeEngineIndexList(userKeyCtrlDict)
+        dekStore.generate([deviceUuid], [genkeystore.kDekSlotList_Bee[engineIndex] for engineIndex in engineIndexList])
+        userKeyCmdDict = copy.deepcopy(userKeyCmdDict)
+        for engineIndex in engineIndexList:
+            userKeyCmdDict['engine' + str(engineIndex) + '_key'] = dekStore.getDek(deviceUuid, genkeystore.kDekSlotList_Bee[engineIndex])
+        self.printLog('BEE DEKs of device ' + deviceUuid + ' are taken from DEK store')
+        return userKeyCmdDict
+
+    ##
+    # @brief DEK words of BEE engine, from DEK store in per-device mode, otherwise from DEK file.
+    def getBeeDekWordList( self, engineIndex, deviceUuid=None ):
+        if self.isPerDeviceDekEnabled():
+            dekStore = self.openDekStore()
+            if dekStore == None or deviceUuid == None:
+                return None
+            dekContent = dekStore.getDek(deviceUuid, genkeystore.kDekSlotList_Bee[engineIndex])
+            if dekContent == None:
+                return None
+            return genkeystore.getDek128WordList(dekContent)
+        else:
+            dekFilename = [self.beeDek0Filename, self.beeDek1Filename][engineIndex]
+            return self.getVal32ListFromBinFile(dekFilename, gendef.kSecKeyLengthInBits_DEK / 32)
+
+    def encrypteImageUsingFlexibleUserKeys( self, deviceUuid=None ):
         userKeyCtrlDict, userKeyCmdDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_UserKeys)
+        if self.isPerDeviceDekEnabled():
+            userKeyCmdDict = self._getUserKeyCmdDictForDevice(userKeyCtrlDict, userKeyCmdDict, deviceUuid)
+            if userKeyCmdDict == None:
+                return False
         if userKeyCmdDict['is_boot_image'] == '1':
             self._setDestAppFilenameForBee()
-            self._updateEncBatfileContent(userKeyCtrlDict, userKeyCmdDict)
-            self._encrypteBootableImage()
-            self._genBeeDekFilesAndShow(userKeyCtrlDict, userKeyCmdDict)
+            if self.isPerDeviceDekEnabled():
+                self._encrypteBootableImageWithoutBatfile(userKeyCtrlDict, userKeyCmdDict)
+                self._showBeeDeksForDevice(userKeyCtrlDict, deviceUuid)
+            else:
+                self._updateEncBatfileContent(userKeyCtrlDict, userKeyCmdDict)
+                self._encrypteBootableImage()
+                self._genBeeDekFilesAndShow(userKeyCtrlDict, userKeyCmdDict)
         elif userKeyCmdDict['is_boot_image'] == '0':
             pass
+        return True
+
+    ##
+    # @brief Encrypt current bootable image for a lot of devices, each with its own DEKs.
+    #
+    # Settings are checked here, image_enc runs in a worker thread so GUI stays responsive.
+    # Callbacks are called in main thread, by then the image is already selectable for flashing.
+    #
+    # @param deviceKeyList [(deviceUuid, [engine0 key, engine1 key])], all devices in DEK store if None
+    # @param imageReadyCallback Called with (deviceUuid, encrypted image filename) as soon as each image is ready
+    # @param lotDoneCallback Called with (failed device count) when the whole lot is done
+    # @return True if encryption is started
+    def encrypteImageForDevices( self, deviceKeyList=None, imageReadyCallback=None, lotDoneCallback=None ):
+        if self.isLotEncryptionRunning:
+            self.popupMsgBox('Lot encryption is still running, Please wait for it to finish!')
+            return False
+        userKeyCtrlDict, userKeyCmdDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_UserKeys)
+        engineIndexList = self._getEnabledBeeEngineIndexList(userKeyCtrlDict)
+        if deviceKeyList == None:
+            dekStore = self.openDekStore()
+            if dekStore == None:
+                return False
+            deviceUuidList = dekStore.getDeviceUuids()
+            if not len(deviceUuidList):
+                self.popupMsgBox('There is no device in DEK store, Please generate DEKs for devices first!')
+                return False
+            dekStore.generate(deviceUuidList, [genkeystore.kDekSlotList_Bee[engineIndex] for engineIndex in engineIndexList])
+            deviceKeyList = [(deviceUuid, [dekStore.getDek(deviceUuid, slot) for slot in genkeystore.kDekSlotList_Bee]) for deviceUuid in deviceUuidList]
+        try:
+            beePipeline = genbeebatch.BeeImagePipeline(self.imageEncPath, self.destAppFilename, engineIndexList, userKeyCmdDict, self.deviceEncAppFolder, self.genAppFileWithoutCfgBlock)
+        except ValueError as err:
+            self.popupMsgBox(str(err))
+            return False
+        # Images of previous key settings must not be flashed to devices missing from this lot
+        self._invalidateDeviceEncAppFiles()
+        self.isLotEncryptionRunning = True
+        lotThread = threading.Thread(target=self._encrypteImageForDevicesTask, args=(beePipeline, deviceKeyList, imageReadyCallback, lotDoneCallback))
+        lotThread.setDaemon(True)
+        lotThread.start()
+        return True
+
+    ##
+    # @brief Worker thread of encrypteImageForDevices(), results are handed to main thread by wx.CallAfter().
+    def _encrypteImageForDevicesTask( self, beePipeline, deviceKeyList, imageReadyCallback, lotDoneCallback ):
+        readyCount = 0
+        failedCount = 0
+        try:
+            for deviceUuid, encAppFilename, noCfgBlockFilename, commandOutput in beePipeline.iterEncryptedImages(deviceKeyList):
+                if encAppFilename == None:
+                    failedCount += 1
+                    self.printLog('BEE encrypted image of device ' + deviceUuid + ' was not generated: ' + commandOutput, uilog.kLogLevel_Error)
+                    continue
+                readyCount += 1
+                self.printLog('BEE encrypted image of device ' + deviceUuid + ' is ready: ' + encAppFilename)
+                wx.CallAfter(self._setDeviceEncAppFile, deviceUuid, encAppFilename, noCfgBlockFilename, imageReadyCallback)
+        except Exception as err:
+            failedCount = len(deviceKeyList) - readyCount
+            self.printLog('Lot encryption is aborted: ' + str(err), uilog.kLogLevel_Error)
+        # Queued after all images, so it runs after their callbacks
+        wx.CallAfter(self._finishLotEncryption, failedCount, lotDoneCallback)
+
+    def _setDeviceEncAppFile( self, deviceUuid, encAppFilename, noCfgBlockFilename, imageReadyCallback ):
+        self.deviceEncAppFilenameDict[deviceUuid] = (encAppFilename, noCfgBlockFilename)
+        if imageReadyCallback != None:
+            imageReadyCallback(deviceUuid, encAppFilename)
+
+    def _finishLotEncryption( self, failedCount, lotDoneCallback ):
+        self.isLotEncryptionRunning = False
+        self.printLog('Lot encryption is done, %d of %d devices are ready' % (len(self.deviceEncAppFilenameDict), len(self.deviceEncAppFilenameDict) + failedCount))
+        if lotDoneCallback != None:
+            lotDoneCallback(failedCount)
+
+    def _invalidateDeviceEncAppFiles( self ):
+        self.deviceEncAppFilenameDict = {}
+        if os.path.isdir(self.deviceEncAppFolder):
+            shutil.rmtree(self.deviceEncAppFolder, True)
+
+    ##
+    # @brief Copy of given FlexSPI NOR image without its config block, which is programmed by flashloader instead.
+    #
+    # It only works on files, so it is also safe to call from encryption worker threads.
+    def genAppFileWithoutCfgBlock( self, appFilename ):
+        appPath, appFile = os.path.split(appFilename)
+        appName, appType = os.path.splitext(appFile)
+        noCfgBlockFilename = os.path.join(appPath, appName + '_nocfgblock' + appType)
+        imageData = None
+        with open(appFilename, 'rb') as fileObj:
+            imageData = fileObj.read()
+            if len(imageData) > rundef.kFlexspiNorCfgInfo_Length:
+                imageData = imageData[rundef.kFlexspiNorCfgInfo_Length:len(imageData)]
+            fileObj.close()
+        with open(noCfgBlockFilename, 'wb') as fileObj:
+            fileObj.write(imageData)
+            fileObj.close()
+        return noCfgBlockFilename
+
+    ##
+    # @brief Use the lot-encrypted image of given device for flashing, False if there is none.
+    def selectDestEncAppFileForDevice( self, deviceUuid ):
+        if deviceUuid == None or not self.deviceEncAppFilenameDict.has_key(deviceUuid):
+            return False
+        self.destEncAppFilename, self.destEncAppNoCfgBlockFilename = self.deviceEncAppFilenameDict[deviceUuid]
+        return True
 
     def _createSignedFlBdfile( self, srcFlFilename):
         imageStartAddr, imageEntryAddr, imageLength = self._getImageInfo(srcFlFilename)
@@ -955,15 +1222,40 @@ class secBootGen(uicore.secBootUi):
             fileObj.write(batContent)
             fileObj.close()
 
+    def _getSignedFlCacheFilename( self, srcFlFilename ):
+        # Signed flashloader only depends on flashloader image, certificates and target
+        hashObj = hashlib.sha256()
+        for filename in [srcFlFilename, self.srkTableFilename, self.crtSrkCaPemFileList[0], self.crtCsfUsrPemFileList[0], self.crtImgUsrPemFileList[0]]:
+            with open(filename, 'rb') as fileObj:
+                hashObj.update(fileObj.read())
+        hashObj.update(str(self.mcuDevice))
+        return os.path.join(self.signedFlCacheFolder, 'ivt_flashloader_signed_' + hashObj.hexdigest()[0:16] + '.bin')
+
     def genSignedFlashloader( self, srcFlFilename ):
+        if not self.isCertificateGenerated(uidef.kSecureBootType_HabAuth):
+            self.popupMsgBox('You should first generate certificates!')
+            return None
+        signedFlCacheFilename = self._getSignedFlCacheFilename(srcFlFilename)
+        if os.path.isfile(signedFlCacheFilename):
+            self.printLog('Signed flashloader is reused from ' + signedFlCacheFilename)
+            return signedFlCacheFilename
         if self._createSignedFlBdfile(srcFlFilename):
             self._updateFlBdBatfileContent(srcFlFilename)
+            # A signed flashloader left by an earlier run must never be taken as the output of this one
+            if os.path.isfile(self.destFlFilename):
+                os.remove(self.destFlFilename)
             curdir = os.getcwd()
             os.chdir(os.path.split(self.elftosbPath)[0])
             process = subprocess.Popen(self.flBdBatFilename, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
             os.chdir(curdir)
             commandOutput = process.communicate()[0]
             print commandOutput
+            if process.returncode != 0 or not os.path.isfile(self.destFlFilename):
+                self.printLog('Failed to sign flashloader!')
+                return None
+            if not os.path.isdir(self.signedFlCacheFolder):
+                os.mkdir(self.signedFlCacheFolder)
+            shutil.copy(self.destFlFilename, signedFlCacheFilename)
             return self.destFlFilename
         else:
             return None
@@ -972,51 +1264,39 @@ class secBootGen(uicore.secBootUi):
         return hex(self.getVal32FromBinFile(filename, offset))
 
     def getVal32FromBinFile( self, filename, offset=0):
-        var32Vaule = 0
         if os.path.isfile(filename):
-            var32Vaule = array.array('c', [chr(0xff)]) * 4
-            with open(filename, 'rb') as fileObj:
-                fileObj.seek(offset)
-                var32Vaule = fileObj.read(4)
-                fileObj.close()
-            var32Vaule = (ord(var32Vaule[3])<<24) + (ord(var32Vaule[2])<<16) + (ord(var32Vaule[1])<<8) + ord(var32Vaule[0])
-        return var32Vaule
+            return binblob.BinBlob.fromFile(filename).u32(offset)
+        return 0
+
+    ##
+    # @brief Read count words at once, all 0 if the file doesn't exist
+    def getVal32ListFromBinFile( self, filename, count, offset=0):
+        if os.path.isfile(filename):
+            return binblob.BinBlob.fromFile(filename).u32List(offset, count)
+        return [0] * count
 
     def getVal32FromByteArray( self, binarray, offset=0):
-        val32Vaule = ((binarray[3+offset]<<24) + (binarray[2+offset]<<16) + (binarray[1+offset]<<8) + binarray[0+offset])
-        return val32Vaule
+        return binblob.BinBlob(binarray).u32(offset)
 
     def fillVal32IntoBinFile( self, filename, val32):
-        with open(filename, 'ab') as fileObj:
-            byteStr = ''
-            for i in range(4):
-                byteStr = chr((val32 & (0xFF << (i * 8))) >> (i * 8))
-                fileObj.write(byteStr)
-            fileObj.close()
+        self.fillVal32ListIntoBinFile(filename, [val32])
+
+    def fillVal32ListIntoBinFile( self, filename, val32List):
+        blob = binblob.BinBlob()
+        blob.appendU32List(val32List)
+        blob.toFile(filename, True)
 
     def getDek128ContentFromBinFile( self, filename ):
         if os.path.isfile(filename):
-            dek128Content = ''
-            with open(filename, 'rb') as fileObj:
-                var8Value = fileObj.read(16)
-                for i in range(16):
-                    temp = str(hex(ord(var8Value[15 - i]) & 0xFF))
-                    if len(temp) >= 4 and temp[0:2] == '0x':
-                        dek128Content += temp[2:4]
-                    else:
-                        return None
-                fileObj.close()
-            return dek128Content
+            blob = binblob.BinBlob.fromFile(filename)
+            if len(blob) < 16:
+                return None
+            return '%032x' % blob.u128(0)
         else:
             return None
 
     def fillDek128ContentIntoBinFile( self, filename, dekContent ):
-        with open(filename, 'wb') as fileObj:
-            halfbyteStr = ''
-            for i in range(16):
-                locEnd = 32 - i * 2
-                locStart = locEnd - 2
-                halfbyteStr = chr(int(dekContent[locStart:locEnd], 16) & 0xFF)
-                fileObj.write(halfbyteStr)
-            fileObj.close()
+        blob = binblob.BinBlob()
+        blob.appendU128(int(dekContent[0:32], 16))
+        blob.toFile(filename)
 
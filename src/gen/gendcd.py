@@ -0,0 +1,189 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import re
+import struct
+import collections
+
+##
+# DCD descriptor syntax (same as imgutil --dcd_gen), one command per ';':
+#   *(uint32_t*)0x400FC068 = 0xffffffff;          write value
+#   *(uint32_t*)0x400FC068 |= 0x00000003;          set bitmask
+#   *(uint32_t*)0x400FC068 &= ~0x00000003;         clear bitmask
+#   (*(uint32_t*)0x402F003C & 0x01) == 0;          check data, all bits clear
+#   (*(uint32_t*)0x402F003C & 0x01) == 0x01;       check data, all bits set
+#   (*(uint32_t*)0x402F003C & 0x01) != 0x01;       check data, any bit clear
+#   (*(uint32_t*)0x402F003C & 0x01) != 0;          check data, any bit set
+#   nop;
+# uint16_t/uint8_t accesses are also allowed, // and /* */ comments are skipped.
+
+kDcdTag_Header    = 0xD2
+kDcdTag_WriteData = 0xCC
+kDcdTag_CheckData = 0xCF
+kDcdTag_Nop       = 0xC0
+
+kDcdVersion       = 0x41
+kDcdHeaderSize    = 4
+kDcdMaxSize       = 1768
+
+kDcdFlag_Mask     = 0x1
+kDcdFlag_Set      = 0x2
+
+kDcdAccessBytesDict = {'uint32_t' : 4,
+                       'uint16_t' : 2,
+                       'uint8_t'  : 1}
+
+# Bump it when the output of compiler changes, it is part of the DCD cache key
+kDcdCompilerVersion = 1
+
+DcdCommand = collections.namedtuple('DcdCommand', ['tag', 'params', 'dataList'])
+
+def getDcdParams( accessBytes, flags ):
+    return (flags << 3) | accessBytes
+
+def getDcdAccessBytes( params ):
+    return params & 0x7
+
+def getDcdFlags( params ):
+    return params >> 3
+
+_kNumber = r'(0[xX][0-9a-fA-F]+|[0-9]+)'
+_kAccess = r'\*\s*\(\s*(uint32_t|uint16_t|uint8_t)\s*\*\s*\)\s*' + _kNumber
+_kWritePattern = re.compile(r'^' + _kAccess + r'\s*(=|\|=|&=)\s*(~?)\s*' + _kNumber + r'$')
+_kCheckPattern = re.compile(r'^\(\s*' + _kAccess + r'\s*&\s*' + _kNumber + r'\s*\)\s*(==|!=)\s*' + _kNumber + r'$')
+_kCommentPattern = re.compile(r'/\*.*?\*/|//[^\n]*', re.S)
+
+def _keepNewLines( match ):
+    return '\n' * match.group(0).count('\n')
+
+def _parseStatement( statement ):
+    writeMatch = _kWritePattern.match(statement)
+    if writeMatch != None:
+        accessType, addr, operator, invert, value = writeMatch.groups()
+        addr = int(addr, 0)
+        value = int(value, 0)
+        if operator == '=' and invert == '':
+            flags = 0
+        elif operator == '|=' and invert == '':
+            flags = kDcdFlag_Mask | kDcdFlag_Set
+        elif operator == '&=' and invert == '~':
+            flags = kDcdFlag_Mask
+        else:
+            raise ValueError('Unrecognized DCD write flag')
+        return DcdCommand(kDcdTag_WriteData, getDcdParams(kDcdAccessBytesDict[accessType], flags), [addr, value])
+    checkMatch = _kCheckPattern.match(statement)
+    if checkMatch != None:
+        accessType, addr, mask, operator, value = checkMatch.groups()
+        addr = int(addr, 0)
+        mask = int(mask, 0)
+        value = int(value, 0)
+        if value == 0:
+            flags = 0
+        elif value == mask:
+            flags = kDcdFlag_Set
+        else:
+            raise ValueError('Cannot find mask in the Check Data command')
+        if operator == '!=':
+            flags ^= kDcdFlag_Mask | kDcdFlag_Set
+        return DcdCommand(kDcdTag_CheckData, getDcdParams(kDcdAccessBytesDict[accessType], flags), [addr, mask])
+    if statement.lower() == 'nop':
+        return DcdCommand(kDcdTag_Nop, 0, [])
+    raise ValueError('Unrecognized DCD command')
+
+##
+# @brief Parse descriptor text into a command list, one write/check/nop per statement.
+def parseDcdDescriptor( descContent ):
+    descContent = _kCommentPattern.sub(_keepNewLines, descContent)
+    descContent = re.sub(r'^\s*\[[^\]\n]*\]', '', descContent, flags=re.M)
+    commandList = []
+    lineNumber = 1
+    for statement in descContent.split(';'):
+        leadingSpace = statement[0:len(statement) - len(statement.lstrip())]
+        statementLineNumber = lineNumber + leadingSpace.count('\n')
+        lineNumber += statement.count('\n')
+        statement = statement.strip()
+        if statement == '':
+            continue
+        try:
+            commandList.append(_parseStatement(statement))
+        except ValueError as err:
+            raise ValueError('Line %d: %s: %s' % (statementLineNumber, str(err), statement))
+    return commandList
+
+##
+# @brief Consecutive writes with the same params share one Write Data command.
+def mergeDcdWrites( commandList ):
+    mergedList = []
+    for command in commandList:
+        if command.tag == kDcdTag_WriteData and len(mergedList) and \
+           mergedList[-1].tag == kDcdTag_WriteData and mergedList[-1].params == command.params:
+            mergedList[-1].dataList.extend(command.dataList)
+        else:
+            mergedList.append(DcdCommand(command.tag, command.params, list(command.dataList)))
+    return mergedList
+
+def packDcdCommands( commandList ):
+    body = ''
+    for command in commandList:
+        commandLength = 4 + len(command.dataList) * 4
+        body += struct.pack('>BHB', command.tag, commandLength, command.params)
+        body += struct.pack('>%dI' % len(command.dataList), *[data & 0xFFFFFFFF for data in command.dataList])
+    return struct.pack('>BHB', kDcdTag_Header, kDcdHeaderSize + len(body), kDcdVersion) + body
+
+##
+# @brief Split a DCD binary back into commands, raise ValueError if it is malformed.
+def decodeDcdBinary( dcdData ):
+    if len(dcdData) < kDcdHeaderSize:
+        raise ValueError('DCD binary is too short')
+    tag, dcdLength, version = struct.unpack_from('>BHB', dcdData, 0)
+    if tag != kDcdTag_Header or dcdLength > len(dcdData) or dcdLength < kDcdHeaderSize:
+        raise ValueError('Invaid dcd binary file')
+    commandList = []
+    offset = kDcdHeaderSize
+    while offset < dcdLength:
+        if offset + 4 > dcdLength:
+            raise ValueError('Truncated DCD command at offset 0x%x' % offset)
+        tag, commandLength, params = struct.unpack_from('>BHB', dcdData, offset)
+        if commandLength < 4 or commandLength % 4 or offset + commandLength > dcdLength:
+            raise ValueError('Bad DCD command length at offset 0x%x' % offset)
+        dataList = list(struct.unpack_from('>%dI' % ((commandLength - 4) / 4), dcdData, offset + 4))
+        if tag == kDcdTag_WriteData and len(dataList) % 2:
+            raise ValueError('Odd Write Data length at offset 0x%x' % offset)
+        elif tag == kDcdTag_CheckData and len(dataList) not in [2, 3]:
+            raise ValueError('Bad Check Data length at offset 0x%x' % offset)
+        elif tag not in [kDcdTag_WriteData, kDcdTag_CheckData, kDcdTag_Nop]:
+            raise ValueError('Unrecognized DCD command 0x%02x at offset 0x%x' % (tag, offset))
+        commandList.append(DcdCommand(tag, params, dataList))
+        offset += commandLength
+    return commandList
+
+##
+# @brief One command per address, undo of mergeDcdWrites()
+def splitDcdWrites( commandList ):
+    splitList = []
+    for command in commandList:
+        if command.tag == kDcdTag_WriteData:
+            for i in range(0, len(command.dataList), 2):
+                splitList.append(DcdCommand(command.tag, command.params, command.dataList[i:i + 2]))
+        else:
+            splitList.append(command)
+    return splitList
+
+##
+# @brief Compile descriptor text into DCD binary, raise ValueError if it is malformed or ROM cannot take it.
+def compileDcdDescriptor( descContent ):
+    commandList = mergeDcdWrites(parseDcdDescriptor(descContent))
+    dcdSize = kDcdHeaderSize + sum([4 + len(command.dataList) * 4 for command in commandList])
+    if dcdSize > kDcdMaxSize:
+        raise ValueError('DCD is %d bytes, ROM limit is %d bytes' % (dcdSize, kDcdMaxSize))
+    return packDcdCommands(commandList)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print 'Usage: gendcd.py <dcd_desc_file> <ofile>'
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as fileObj:
+        dcdData = compileDcdDescriptor(fileObj.read())
+    with open(sys.argv[2], 'wb') as fileObj:
+        fileObj.write(dcdData)
+    print 'DCD binary file is generated successfully'
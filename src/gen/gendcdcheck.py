@@ -0,0 +1,247 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import gendcd
+import gendef
+
+# Address windows a DCD is expected to write: peripheral registers (incl. SEMC/IOMUXC/CCM) and SEMC memory
+kDcdWritableRangeList = [(0x40000000, 0x20000000, 'Peripheral'),
+                         (gendef.kBootDeviceMemBase_SemcSdram, gendef.kBootDeviceMemMaxSize_SemcSdram, 'SEMC')]
+
+# Registers whose writes act on hardware rather than just hold a value, never pruned and treated
+# as a barrier (like Check Data) by analyzeDcd()
+kDcdSideEffectRegList = [(0x402F0000, 0x04,   'SEMC MCR (SWRST/MDIS)'),
+                         (0x402F003C, 0x04,   'SEMC INTR (write-1-to-clear status)'),
+                         (0x402F0090, 0x14,   'SEMC IPCR0-2/IPCMD/IPTXDAT (IP command)'),
+                         (0x400FC000, 0x4000, 'CCM (clock gate/mux sequence, write-1-to-clear CISR)'),
+                         (0x400D8000, 0x1000, 'CCM_ANALOG (SET/CLR/TOG registers)'),
+                         (0x400F8000, 0x4000, 'SRC (reset control, write-1-to-clear SRSR)'),
+                         (0x400B8000, 0x4000, 'WDOG1 (service sequence)'),
+                         (0x400BC000, 0x4000, 'RTWDOG (unlock/refresh sequence)'),
+                         (0x400D0000, 0x4000, 'WDOG2 (service sequence)')]
+
+# Rough ROM cost of each command, only used for the execution time estimate
+kDcdCostUs_Command   = 0.2
+kDcdCostUs_Write     = 0.1
+kDcdCostUs_CheckPoll = 0.1
+# Check Data without count polls until the condition is met, assume this many polls for it
+kDcdEstimatedPolls_Unbounded = 100
+
+kDcdIssue_OutOfRange  = 'out-of-range'
+kDcdIssue_Redundant   = 'redundant'
+kDcdIssue_Overridden  = 'overridden'
+kDcdIssue_Unbounded   = 'unbounded-poll'
+kDcdIssue_TooLarge    = 'too-large'
+
+def _isWritableAddr( addr, accessBytes ):
+    for start, length, name in kDcdWritableRangeList:
+        if addr >= start and addr + accessBytes <= start + length:
+            return True
+    return False
+
+def _getSideEffectRegName( addr, accessBytes ):
+    for start, length, name in kDcdSideEffectRegList:
+        if addr < start + length and addr + accessBytes > start:
+            return name
+    return None
+
+def _formatCommand( command ):
+    accessBytes = gendcd.getDcdAccessBytes(command.params)
+    flags = gendcd.getDcdFlags(command.params)
+    if command.tag == gendcd.kDcdTag_WriteData:
+        addr, value = command.dataList
+        operator = {0 : '=', gendcd.kDcdFlag_Mask : '&= ~', gendcd.kDcdFlag_Mask | gendcd.kDcdFlag_Set : '|='}.get(flags, '?=')
+        return '*(uint%d_t*)0x%08X %s 0x%08X' % (accessBytes * 8, addr, operator, value)
+    elif command.tag == gendcd.kDcdTag_CheckData:
+        addr, mask = command.dataList[0:2]
+        expected = 0
+        if flags & gendcd.kDcdFlag_Set:
+            expected = mask
+        operator = '=='
+        if flags & gendcd.kDcdFlag_Mask:
+            operator = '!='
+            expected ^= mask
+        countStr = ''
+        if len(command.dataList) == 3:
+            countStr = ' (count %d)' % command.dataList[2]
+        return '(*(uint%d_t*)0x%08X & 0x%08X) %s 0x%08X%s' % (accessBytes * 8, addr, mask, operator, expected, countStr)
+    return 'nop'
+
+##
+# @brief Result of analyzeDcd(): commands (one write per entry), issues [(index, kind, text)], size and time estimate.
+class DcdReport(object):
+
+    def __init__(self, commandList):
+        self.commandList = commandList
+        self.issueList = []
+        self.dcdSize = len(gendcd.packDcdCommands(gendcd.mergeDcdWrites(commandList)))
+        self.pollCount = 0
+        self.estimatedUs = 0.0
+
+    def addIssue( self, index, kind, text ):
+        self.issueList.append((index, kind, text))
+
+    ##
+    # @brief Indexes of the writes optimizeDcd() drops when pruning is enabled.
+    def getPrunableIndexList( self ):
+        return sorted(set([index for index, kind, text in self.issueList if kind in [kDcdIssue_Redundant, kDcdIssue_Overridden]]))
+
+    def getText( self ):
+        lines = []
+        for index, command in enumerate(self.commandList):
+            lines.append('%4d: %s' % (index, _formatCommand(command)))
+        for index, kind, text in self.issueList:
+            if index != None:
+                lines.append('[%s] #%d %s' % (kind, index, text))
+            else:
+                lines.append('[%s] %s' % (kind, text))
+        lines.append('DCD size: %d / %d bytes, %d commands, about %d polls, about %.1f us' %
+                     (self.dcdSize, gendcd.kDcdMaxSize, len(gendcd.mergeDcdWrites(self.commandList)), self.pollCount, self.estimatedUs))
+        return '\n'.join(lines)
+
+##
+# @brief Decode and check a DCD.
+#
+# Register values are tracked between Check Data commands only, as a poll means hardware
+# state changes on its own. A write is redundant when it leaves a known value unchanged and
+# overridden when a later plain write to the same address comes before any Check Data.
+# A write to kDcdSideEffectRegList is never reported and, like Check Data, forgets all known
+# values, as it may depend on or change the registers written before it.
+def analyzeDcd( dcdData ):
+    report = DcdReport(gendcd.splitDcdWrites(gendcd.decodeDcdBinary(dcdData)))
+    knownValueDict = {}
+    lastWriteDict = {}
+    lastParams = None
+    for index, command in enumerate(report.commandList):
+        if command.tag != gendcd.kDcdTag_WriteData or command.params != lastParams:
+            report.estimatedUs += kDcdCostUs_Command
+        lastParams = command.params
+        if command.tag == gendcd.kDcdTag_CheckData:
+            if len(command.dataList) == 3:
+                polls = command.dataList[2]
+            else:
+                polls = kDcdEstimatedPolls_Unbounded
+                report.addIssue(index, kDcdIssue_Unbounded, 'polls 0x%08X without count, ROM waits forever if it never matches' % command.dataList[0])
+            report.pollCount += polls
+            report.estimatedUs += polls * kDcdCostUs_CheckPoll
+            knownValueDict = {}
+            lastWriteDict = {}
+            continue
+        elif command.tag != gendcd.kDcdTag_WriteData:
+            continue
+        report.estimatedUs += kDcdCostUs_Write
+        accessBytes = gendcd.getDcdAccessBytes(command.params)
+        flags = gendcd.getDcdFlags(command.params)
+        addr, value = command.dataList
+        if not _isWritableAddr(addr, accessBytes):
+            report.addIssue(index, kDcdIssue_OutOfRange, 'writes 0x%08X, outside peripheral/SEMC space' % addr)
+        if _getSideEffectRegName(addr, accessBytes) != None:
+            knownValueDict = {}
+            lastWriteDict = {}
+            continue
+        key = (addr, accessBytes)
+        knownValue = knownValueDict.get(key, None)
+        if flags == 0:
+            newValue = value
+        elif flags == gendcd.kDcdFlag_Mask | gendcd.kDcdFlag_Set:
+            newValue = None if knownValue == None else knownValue | value
+        elif flags == gendcd.kDcdFlag_Mask:
+            newValue = None if knownValue == None else knownValue & ~value
+        else:
+            newValue = None
+        if knownValue != None and newValue == knownValue:
+            report.addIssue(index, kDcdIssue_Redundant, 'leaves 0x%08X unchanged' % addr)
+            continue
+        knownValueDict[key] = newValue
+        if flags == 0:
+            if lastWriteDict.has_key(key):
+                report.addIssue(lastWriteDict[key], kDcdIssue_Overridden, 'is overridden by #%d' % index)
+            lastWriteDict[key] = index
+    if report.dcdSize > gendcd.kDcdMaxSize:
+        report.addIssue(None, kDcdIssue_TooLarge, 'DCD is %d bytes, ROM limit is %d bytes' % (report.dcdSize, gendcd.kDcdMaxSize))
+    return report
+
+##
+# @brief Same DCD with consecutive writes of the same params merged into one Write Data command.
+#
+# By default every write is kept in order. With isPruningEnabled, the writes analyzeDcd() reports
+# as redundant or overridden are dropped too, side effect registers are never dropped.
+# Raise ValueError if it still exceeds ROM limit.
+def optimizeDcd( dcdData, isPruningEnabled=False ):
+    report = analyzeDcd(dcdData)
+    commandList = report.commandList
+    if isPruningEnabled:
+        prunableIndexList = report.getPrunableIndexList()
+        commandList = [command for index, command in enumerate(commandList) if index not in prunableIndexList]
+    optimizedData = gendcd.packDcdCommands(gendcd.mergeDcdWrites(commandList))
+    if len(optimizedData) > gendcd.kDcdMaxSize:
+        raise ValueError('Optimized DCD is %d bytes, ROM limit is %d bytes' % (len(optimizedData), gendcd.kDcdMaxSize))
+    return optimizedData
+
+##
+# @brief Unit test for DCD pruning.
+class TestOptimizeDcd:
+    def setup_method(self, method):
+        print method
+
+    def _compile( self, descContent ):
+        return gendcd.compileDcdDescriptor(descContent)
+
+    def test_default_keeps_writes(self):
+        dcdData = self._compile('*(uint32_t*)0x401F8014 = 0x1; *(uint32_t*)0x401F8014 = 0x1;')
+        assert optimizeDcd(dcdData) == dcdData
+
+    def test_prune(self):
+        dcdData = self._compile('*(uint32_t*)0x401F8014 = 0x1;'
+                                '*(uint32_t*)0x401F8018 = 0x2;'
+                                '*(uint32_t*)0x401F8018 = 0x2;'
+                                '*(uint32_t*)0x401F8014 = 0x3;'
+                                '*(uint32_t*)0x401F8014 |= 0x1;')
+        expectedData = self._compile('*(uint32_t*)0x401F8018 = 0x2; *(uint32_t*)0x401F8014 = 0x3;')
+        assert optimizeDcd(dcdData, True) == expectedData
+
+    def test_side_effect_regs_kept(self):
+        descContent = ('*(uint32_t*)0x402F0090 = 0x80000000;'
+                       '*(uint32_t*)0x402F009C = 0xA55A000F;'
+                       '*(uint32_t*)0x402F009C = 0xA55A000F;'
+                       '*(uint32_t*)0x402F003C = 0x3;'
+                       '*(uint32_t*)0x402F003C = 0x3;'
+                       '*(uint32_t*)0x400D8034 = 0x1;'
+                       '*(uint32_t*)0x400D8034 = 0x1;')
+        dcdData = self._compile(descContent)
+        assert analyzeDcd(dcdData).getPrunableIndexList() == []
+        assert optimizeDcd(dcdData, True) == dcdData
+
+    def test_side_effect_write_is_barrier(self):
+        # IPCR0 is consumed by IPCMD, so the first IPCR0 write is not overridden by the second one
+        dcdData = self._compile('*(uint32_t*)0x402F0040 = 0x1;'
+                                '*(uint32_t*)0x402F009C = 0xA55A000F;'
+                                '*(uint32_t*)0x402F0040 = 0x2;')
+        assert optimizeDcd(dcdData, True) == dcdData
+
+    def test_check_data_is_barrier(self):
+        dcdData = self._compile('*(uint32_t*)0x401F8014 = 0x1;'
+                                '(*(uint32_t*)0x401F8014 & 0x1) == 0x1;'
+                                '*(uint32_t*)0x401F8014 = 0x1;')
+        assert optimizeDcd(dcdData, True) == dcdData
+
+if __name__ == "__main__":
+    argList = sys.argv[1:]
+    isPruningEnabled = '--prune' in argList
+    if isPruningEnabled:
+        argList.remove('--prune')
+    if len(argList) not in [1, 2]:
+        print 'Usage: gendcdcheck.py [--prune] <dcd binary> [optimized dcd binary]'
+        print '  --prune  also drop the redundant/overridden writes (side effect registers are kept)'
+        sys.exit(1)
+    with open(argList[0], 'rb') as fileObj:
+        dcdData = fileObj.read()
+    report = analyzeDcd(dcdData)
+    print report.getText()
+    if len(argList) == 2:
+        optimizedData = optimizeDcd(dcdData, isPruningEnabled)
+        with open(argList[1], 'wb') as fileObj:
+            fileObj.write(optimizedData)
+        if isPruningEnabled:
+            print 'Pruned %d writes' % len(report.getPrunableIndexList())
+        print 'Optimized DCD: %d -> %d bytes, %d bytes saved' % (len(dcdData), len(optimizedData), len(dcdData) - len(optimizedData))
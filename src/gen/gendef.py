@@ -48,4 +48,7 @@ kUserDcdFileType_Cfg = 0x1
 kStdDcdFilename_Bin = 'dcd.bin'
 kStdDcdFilename_Cfg = 'dcd.cfg'
 
+kBootDeviceMemBase_SemcSdram       = 0x80000000
+kBootDeviceMemMaxSize_SemcSdram    = 0x60000000 #1.5GB
+
 
@@ -0,0 +1,167 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import hmac
+import json
+import hashlib
+import binascii
+import getpass
+
+kDekStoreVersion = 1
+
+kDekByteSize = 16
+
+kDekSlot_BeeEngine0 = 'bee_engine0'
+kDekSlot_BeeEngine1 = 'bee_engine1'
+kDekSlotList_Bee = [kDekSlot_BeeEngine0, kDekSlot_BeeEngine1]
+
+# PBKDF2-HMAC-SHA256 rounds for the store key, it is derived once per store open
+kDekStoreKdfRounds = 100000
+kDekStoreSaltByteSize = 16
+kDekStoreNonceByteSize = 16
+kDekStoreTagByteSize = 16
+
+kDekStoreCheckMessage = 'MCUBootUtility DEK store'
+
+##
+# @brief N random 128bit DEKs as hex strings, drawn from OS entropy in one call.
+def genDek128List( count ):
+    randomBytes = bytearray(os.urandom(kDekByteSize * count))
+    return [binascii.hexlify(bytes(randomBytes[i * kDekByteSize:(i + 1) * kDekByteSize])).decode('ascii') for i in range(count)]
+
+##
+# @brief DEK hex string -> 32bit words, in the order they are stored in DEK bin file and fuses.
+def getDek128WordList( dekContent ):
+    val128 = int(dekContent[0:32], 16)
+    return [(val128 >> (32 * i)) & 0xFFFFFFFF for i in range(kDekByteSize / 4)]
+
+##
+# @brief Device UUIDs of a lot, one hex UUID per line, blank lines are skipped.
+def readDeviceUuidList( filename ):
+    with open(filename, 'r') as fileObj:
+        return [line.strip().lower() for line in fileObj.readlines() if line.strip() != '']
+
+def _toBytes( text ):
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
+
+def _xorBytes( data, keyStream ):
+    return bytes(bytearray([a ^ b for a, b in zip(bytearray(data), bytearray(keyStream))]))
+
+##
+# @brief Per-device DEKs, saved as {"version", "salt", "check", "devices": {uuid: {slot: sealed DEK}}}.
+#
+# Every DEK is sealed on its own with keys derived from the passphrase: it is XORed with
+# HMAC-SHA256(encKey, nonce) and authenticated with HMAC-SHA256(macKey, uuid|slot|nonce|data),
+# so a DEK cannot be read, altered or moved to another device without the passphrase.
+# A DEK is only generated once for a device slot and never replaced by generate().
+class DekKeyStore(object):
+
+    def __init__(self, filename, passphrase):
+        self.filename = filename
+        self.salt = None
+        self.encKey = None
+        self.macKey = None
+        self.deviceDict = {}
+        fileDict = None
+        if os.path.isfile(filename):
+            with open(filename, 'r') as fileObj:
+                fileDict = json.load(fileObj)
+                fileObj.close()
+            if fileDict.get('version', None) != kDekStoreVersion:
+                raise ValueError('%s is not a supported DEK store' % (filename))
+            self.salt = binascii.unhexlify(fileDict['salt'])
+        else:
+            self.salt = os.urandom(kDekStoreSaltByteSize)
+        self._deriveKeys(passphrase)
+        if fileDict != None:
+            if not hmac.compare_digest(self._getCheckValue(), _toBytes(fileDict['check'])):
+                raise ValueError('Wrong passphrase for DEK store ' + filename)
+            self.deviceDict = fileDict['devices']
+
+    def _deriveKeys( self, passphrase ):
+        storeKey = hashlib.pbkdf2_hmac('sha256', _toBytes(passphrase), self.salt, kDekStoreKdfRounds, 64)
+        self.encKey = storeKey[0:32]
+        self.macKey = storeKey[32:64]
+
+    def _getCheckValue( self ):
+        return _toBytes(hmac.new(self.macKey, _toBytes(kDekStoreCheckMessage), hashlib.sha256).hexdigest())
+
+    def _getTag( self, deviceUuid, slot, nonce, data ):
+        message = _toBytes(deviceUuid) + b'|' + _toBytes(slot) + b'|' + nonce + data
+        return hmac.new(self.macKey, message, hashlib.sha256).digest()[0:kDekStoreTagByteSize]
+
+    def _seal( self, deviceUuid, slot, dekContent ):
+        nonce = os.urandom(kDekStoreNonceByteSize)
+        keyStream = hmac.new(self.encKey, nonce, hashlib.sha256).digest()
+        data = _xorBytes(binascii.unhexlify(dekContent), keyStream)
+        return binascii.hexlify(nonce + data + self._getTag(deviceUuid, slot, nonce, data)).decode('ascii')
+
+    def _unseal( self, deviceUuid, slot, sealedContent ):
+        sealedData = binascii.unhexlify(sealedContent)
+        nonce = sealedData[0:kDekStoreNonceByteSize]
+        data = sealedData[kDekStoreNonceByteSize:kDekStoreNonceByteSize + kDekByteSize]
+        tag = sealedData[kDekStoreNonceByteSize + kDekByteSize:]
+        if not hmac.compare_digest(self._getTag(deviceUuid, slot, nonce, data), tag):
+            raise ValueError('DEK of device %s slot %s is corrupted' % (deviceUuid, slot))
+        keyStream = hmac.new(self.encKey, nonce, hashlib.sha256).digest()
+        return binascii.hexlify(_xorBytes(data, keyStream)).decode('ascii')
+
+    def getDeviceUuids( self ):
+        return sorted(self.deviceDict.keys())
+
+    def hasDek( self, deviceUuid, slot ):
+        return self.deviceDict.has_key(deviceUuid) and self.deviceDict[deviceUuid].has_key(slot)
+
+    ##
+    # @brief DEK hex string of a device slot, None if it has not been generated.
+    def getDek( self, deviceUuid, slot ):
+        if not self.hasDek(deviceUuid, slot):
+            return None
+        return self._unseal(deviceUuid, slot, self.deviceDict[deviceUuid][slot])
+
+    ##
+    # @brief Generate the missing DEKs of all given devices and slots, save the store once.
+    #
+    # @return Number of new DEKs
+    def generate( self, deviceUuidList, slotList ):
+        missingList = [(deviceUuid, slot) for deviceUuid in deviceUuidList for slot in slotList if not self.hasDek(deviceUuid, slot)]
+        if not len(missingList):
+            return 0
+        dekList = genDek128List(len(missingList))
+        for (deviceUuid, slot), dekContent in zip(missingList, dekList):
+            self.deviceDict.setdefault(deviceUuid, {})[slot] = self._seal(deviceUuid, slot, dekContent)
+        self.save()
+        return len(missingList)
+
+    def save( self ):
+        fileDict = {'version' : kDekStoreVersion,
+                    'salt'    : binascii.hexlify(self.salt).decode('ascii'),
+                    'check'   : self._getCheckValue().decode('ascii'),
+                    'devices' : self.deviceDict}
+        fileFolder = os.path.split(self.filename)[0]
+        if fileFolder != '' and not os.path.isdir(fileFolder):
+            os.makedirs(fileFolder)
+        tempFilename = self.filename + '.tmp'
+        with open(tempFilename, 'w') as fileObj:
+            json.dump(fileDict, fileObj, indent=1, sort_keys=True)
+            fileObj.flush()
+            os.fsync(fileObj.fileno())
+            fileObj.close()
+        try:
+            os.rename(tempFilename, self.filename)
+        except OSError:
+            # os.rename() cannot replace an existing file on Windows
+            os.remove(self.filename)
+            os.rename(tempFilename, self.filename)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print 'Usage: genkeystore.py <dek store file> <device uuid list file>'
+        sys.exit(1)
+    deviceUuidList = readDeviceUuidList(sys.argv[2])
+    dekStore = DekKeyStore(sys.argv[1], getpass.getpass('DEK store passphrase: '))
+    dekCount = dekStore.generate(deviceUuidList, kDekSlotList_Bee)
+    print '%d DEKs are generated, %d devices in store' % (dekCount, len(dekStore.getDeviceUuids()))
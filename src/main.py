@@ -35,6 +35,7 @@ class secBootMain(memcore.secBootMem):
         memcore.secBootMem.__init__(self, parent)
         self.connectStage = uidef.kConnectStage_Rom
         self.isBootableAppAllowedToView = False
+        self.isFlashImageWaitingForEncImage = False
         self.gaugeTimer = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.increaseGauge, self.gaugeTimer)
 
@@ -124,7 +125,7 @@ class secBootMain(memcore.secBootMem):
 
     def callbackSetUsbhidPort( self, event ):
         self._setUartUsbPort()
-        self.periodicUsbhidDetectTask()
+        self.startUsbhidDetectTask()
 
     def callbackSetOneStep( self, event ):
         if not self.isToolRunAsEntryMode:
@@ -161,6 +162,14 @@ class secBootMain(memcore.secBootMem):
         connectSteps = uidef.kConnectStep_Normal
         self.getOneStepConnectMode()
         retryToDetectUsb = False
+        if self.isOneStepConnectMode and self.connectStage == uidef.kConnectStage_Rom:
+            # Flashloader may be still running from last connection, then ROM download and jump are skipped
+            self.updatePortSetupValue(False, False)
+            if self.probeConnectStage() == uidef.kConnectStage_Flashloader:
+                self.connectStage = uidef.kConnectStage_Flashloader
+                self.updateConnectStatus('yellow')
+                usbIdList = self.getUsbid()
+                self.setPortSetupValue(self.connectStage, usbIdList, False, False)
         if self.isOneStepConnectMode:
             if self.connectStage == uidef.kConnectStage_Reset or self.connectStage == uidef.kConnectStage_ExternalMemory:
                 connectSteps = uidef.kConnectStep_Fast - 2
@@ -196,8 +205,12 @@ class secBootMain(memcore.secBootMem):
                     return
             elif self.connectStage == uidef.kConnectStage_Flashloader:
                 self.connectToDevice(self.connectStage)
-                if self._retryToPingBootloader(kBootloaderType_Flashloader):
+                if (self.isUartPortSelected and self.negotiateFlashloaderUartSpeed()) or \
+                   self._retryToPingBootloader(kBootloaderType_Flashloader):
                     self.getMcuDeviceInfoViaFlashloader()
+                    if self.mcuDeviceHabStatus == None:
+                        # ROM stage was skipped (Flashloader was already running), so HAB status comes from fuses
+                        self.getMcuDeviceHabStatusViaFlashloader()
                     self.getMcuDeviceBtFuseSel()
                     self.updateConnectStatus('green')
                     self.connectStage = uidef.kConnectStage_ExternalMemory
@@ -428,8 +441,7 @@ class secBootMain(memcore.secBootMem):
                 else:
                     self.popupMsgBox('Please configure boot device via Flashloader first!')
             elif self.keyStorageRegion == uidef.kKeyStorageRegion_FlexibleUserKeys:
-                self.encrypteImageUsingFlexibleUserKeys()
-                status = True
+                status = self.encrypteImageUsingFlexibleUserKeys(self.getMcuDeviceUuid())
             else:
                 pass
             self._stopGaugeTimer()
@@ -526,9 +538,20 @@ class secBootMain(memcore.secBootMem):
         self.invalidateStepButtonColor(uidef.kSecureBootSeqStep_FlashImage, status)
         return status
 
+    def _isDeviceEncImageBeingGenerated( self ):
+        if not self.isLotEncryptionRunning or self.connectStage != uidef.kConnectStage_Reset:
+            return False
+        deviceUuid = self.getMcuDeviceUuid()
+        return deviceUuid != None and not self.deviceEncAppFilenameDict.has_key(deviceUuid)
+
     def callbackFlashImage( self, event ):
         if not self.isToolRunAsEntryMode:
-            self._doFlashImage()
+            if self._isDeviceEncImageBeingGenerated():
+                # Flashed by _deviceEncImageReadyCallback() once the image of this device is ready
+                self.isFlashImageWaitingForEncImage = True
+                self.printLog('BEE encrypted image of device ' + self.getMcuDeviceUuid() + ' is not ready yet, it will be flashed once ready')
+            else:
+                self._doFlashImage()
         else:
             self.popupMsgBox('Separated action is not available under Entry Mode, You should use All-In-One Action!')
 
@@ -636,8 +659,9 @@ class secBootMain(memcore.secBootMem):
         self.saveLog()
 
     def _deinitToolToExit( self ):
-        if self.usbhidDetectTimer != None:
-            self.usbhidDetectTimer.cancel()
+        self.stopUsbhidDetectTask()
+        self.flushLog()
+        self.logPipeline.close()
         uivar.setAdvancedSettings(uidef.kAdvancedSettings_Tool, self.toolCommDict)
         uivar.deinitVar()
         #exit(0)
@@ -663,6 +687,57 @@ class secBootMain(memcore.secBootMem):
         self.setToolRunMode()
         self._switchToolRunMode()
 
+    def callbackSetPerDeviceDek( self, event ):
+        self.setPerDeviceDekMode()
+
+    def callbackGenDekStore( self, event ):
+        uuidListFilename = self.popupOpenFileBox('Device UUID list file, one UUID per line')
+        if uuidListFilename != None:
+            self.genDekStoreForDevicesInFile(uuidListFilename)
+
+    def callbackEncImageForDevices( self, event ):
+        if self.secureBootType != uidef.kSecureBootType_BeeCrypto or self.bootDevice != uidef.kBootDevice_FlexspiNor or \
+           self.keyStorageRegion != uidef.kKeyStorageRegion_FlexibleUserKeys:
+            self.popupMsgBox('Lot encryption is only available for BEE encrypted image with flexible user keys in FlexSPI NOR device!')
+        elif not self.isPerDeviceDekEnabled():
+            self.popupMsgBox('Lot encryption needs per-device DEK, Please enable it first!')
+        else:
+            self.printLog("'Encrypt Image for Devices' menu is clicked")
+            self.isFlashImageWaitingForEncImage = False
+            if self.encrypteImageForDevices(None, self._deviceEncImageReadyCallback, self._deviceEncLotDoneCallback):
+                self._startGaugeTimer()
+
+    def _deviceEncImageReadyCallback( self, deviceUuid, encAppFilename ):
+        if self.isFlashImageWaitingForEncImage and deviceUuid == self.mcuDeviceUuid:
+            self.isFlashImageWaitingForEncImage = False
+            self._doFlashImage()
+
+    def _deviceEncLotDoneCallback( self, failedCount ):
+        self._stopGaugeTimer()
+        if self.isFlashImageWaitingForEncImage:
+            self.isFlashImageWaitingForEncImage = False
+            self.popupMsgBox('BEE encrypted image of connected device was not generated, Please check the log!')
+        elif failedCount:
+            self.popupMsgBox('BEE encrypted images of %d devices were not generated, Please check the log!' % (failedCount))
+
+    def callbackRunRamImage( self, event ):
+        if self.connectStage != uidef.kConnectStage_Rom:
+            self.popupMsgBox('RAM image can only be loaded by ROM, Please reset board in SDP mode (BMOD[1:0] pins = 2\'b01) and try again!')
+            return
+        imageFilename = self.popupOpenFileBox('RAM bootable image with IVT, e.g. SDRAM test image')
+        if imageFilename == None:
+            return
+        status = False
+        self._startGaugeTimer()
+        self.printLog("'Run RAM Image via SDP' menu is clicked")
+        if self.updatePortSetupValue(True, True):
+            self.connectToDevice(uidef.kConnectStage_Rom)
+            if self._retryToPingBootloader(kBootloaderType_Rom):
+                status = self.runRamImageViaSdp(imageFilename)
+        self._stopGaugeTimer()
+        if not status:
+            self.popupMsgBox('Failed to load and run RAM image, Please check the log and reset board!')
+
     def callbackShowHomePage( self, event ):
         msgText = (('https://github.com/JayHeng/NXP-MCUBootUtility.git \n'))
         wx.MessageBox(msgText, "Home Page", wx.OK | wx.ICON_INFORMATION)
@@ -2,6 +2,6 @@
 
 import memcore
 import memdef
+import memstruct
 
-__all__ = ["memcore", "memdef"]
-
+__all__ = ["memcore", "memdef", "memstruct"]
@@ -2,9 +2,14 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import stat
+import time
+import struct
+import bisect
 import shutil
 import boot
 import memdef
+import memstruct
 sys.path.append(os.path.abspath(".."))
 from fuse import fusecore
 from run import rundef
@@ -14,6 +19,7 @@ from utils import misc
 
 s_visibleAsciiStart = ' '
 s_visibleAsciiEnd = '~'
+s_erasedBlankUnit = memdef.kMemErasedPattern * memdef.kMemBlankCheckUnit
 
 class secBootMem(fusecore.secBootFuse):
 
@@ -38,6 +44,8 @@ class secBootMem(fusecore.secBootFuse):
         self.needToShowDbbtIntr = None
         self._initShowIntr()
 
+        self.bootStructCache = memstruct.BootStructCache()
+
     def _initShowIntr( self ):
         self.needToShowCfgIntr = True
         self.needToShowEkib0Intr = True
@@ -54,7 +62,7 @@ class secBootMem(fusecore.secBootFuse):
         self.needToShowDbbtIntr = True
 
     def _getCsfBlockInfo( self ):
-        self.destAppCsfAddress = self.getVal32FromBinFile(self.destAppFilename, self.destAppIvtOffset + memdef.kMemberOffsetInIvt_Csf)
+        self.destAppCsfAddress = memstruct.Ivt.fromFile(self.destAppFilename, self.destAppIvtOffset).csf
 
     def _getInfoFromIvt( self ):
         self._getCsfBlockInfo()
@@ -93,6 +101,111 @@ class secBootMem(fusecore.secBootFuse):
         contentToShow += '        ' + visibleContent
         return contentToShow, memContent
 
+    def _getErasedRunLength( self, memContent, offset=0 ):
+        runLen = 0
+        while memContent[offset + runLen:offset + runLen + memdef.kMemBlankCheckUnit] == s_erasedBlankUnit:
+            runLen += memdef.kMemBlankCheckUnit
+        return runLen
+
+    ##
+    # @brief Collapse erased 16-byte lines from addr into one line, the run never crosses runEnd.
+    def _showErasedRunIfAppliable( self, addr, memLeft, fileObj, runEnd=None ):
+        if addr % 16:
+            return 0
+        maxLen = memLeft
+        if runEnd != None:
+            maxLen = min(maxLen, runEnd - addr)
+        maxLen = misc.align_down(maxLen, 16)
+        if maxLen < memdef.kMemBlankCheckUnit:
+            return 0
+        filePos = fileObj.tell()
+        runLen = 0
+        while runLen < maxLen:
+            readLen = min(memdef.kMemBlankCheckUnit, maxLen - runLen)
+            memContent = fileObj.read(readLen)
+            if memContent == s_erasedBlankUnit[0:readLen]:
+                runLen += readLen
+                continue
+            # Count the erased whole lines at the head of this unit, then stop
+            runLen += misc.align_down(len(memContent) - len(memContent.lstrip(memdef.kMemErasedPattern)), 16)
+            break
+        if runLen < memdef.kMemBlankCheckUnit:
+            runLen = 0
+        fileObj.seek(filePos + runLen)
+        if runLen:
+            self.printMem(self.getFormattedHexValue(addr) + '    ------------------ ' + str(runLen) + ' bytes erased ------------------')
+        return runLen
+
+    def _writeSparseDumpRecords( self, fileObj, addr, memContent ):
+        offset = 0
+        dataStart = 0
+        while offset < len(memContent):
+            runLen = self._getErasedRunLength(memContent, offset)
+            if runLen:
+                if offset > dataStart:
+                    fileObj.write(struct.pack('<III', memdef.kMemSparseRecordType_Data, addr + dataStart, offset - dataStart))
+                    fileObj.write(memContent[dataStart:offset])
+                fileObj.write(struct.pack('<III', memdef.kMemSparseRecordType_Erased, addr + offset, runLen))
+                offset += runLen
+                dataStart = offset
+            else:
+                offset = min(offset + memdef.kMemBlankCheckUnit, len(memContent))
+        if offset > dataStart:
+            fileObj.write(struct.pack('<III', memdef.kMemSparseRecordType_Data, addr + dataStart, offset - dataStart))
+            fileObj.write(memContent[dataStart:offset])
+
+    def _getSparseDumpLength( self, fileObj ):
+        # Returns the file offset and the memory length covered by all complete records
+        fileObj.seek(0, os.SEEK_END)
+        fileLen = fileObj.tell()
+        fileObj.seek(0)
+        if fileObj.read(len(memdef.kMemSparseDumpMagic)) != memdef.kMemSparseDumpMagic:
+            return 0, 0
+        filePos = len(memdef.kMemSparseDumpMagic)
+        memLen = 0
+        while filePos + 12 <= fileLen:
+            recordType, recordAddr, recordLen = struct.unpack('<III', fileObj.read(12))
+            recordEnd = filePos + 12
+            if recordType == memdef.kMemSparseRecordType_Data:
+                recordEnd += recordLen
+            if recordEnd > fileLen:
+                break
+            fileObj.seek(recordEnd)
+            filePos = recordEnd
+            memLen += recordLen
+        return filePos, memLen
+
+    def convertToSparseDumpFile( self, srcFilename, memStart, destFilename ):
+        with open(srcFilename, 'rb') as srcFileObj:
+            with open(destFilename, 'wb') as destFileObj:
+                destFileObj.write(memdef.kMemSparseDumpMagic)
+                addr = memStart
+                while True:
+                    memContent = srcFileObj.read(memdef.kMemDumpChunkSize)
+                    if not memContent:
+                        break
+                    self._writeSparseDumpRecords(destFileObj, addr, memContent)
+                    addr += len(memContent)
+
+    def expandSparseDumpFile( self, srcFilename, destFilename ):
+        memStart = None
+        with open(srcFilename, 'rb') as srcFileObj:
+            if srcFileObj.read(len(memdef.kMemSparseDumpMagic)) != memdef.kMemSparseDumpMagic:
+                return None
+            with open(destFilename, 'wb') as destFileObj:
+                while True:
+                    recordHeader = srcFileObj.read(12)
+                    if len(recordHeader) < 12:
+                        break
+                    recordType, recordAddr, recordLen = struct.unpack('<III', recordHeader)
+                    if memStart == None:
+                        memStart = recordAddr
+                    if recordType == memdef.kMemSparseRecordType_Data:
+                        destFileObj.write(srcFileObj.read(recordLen))
+                    else:
+                        destFileObj.write(memdef.kMemErasedPattern * recordLen)
+        return memStart
+
     def _showSemcNandFcb( self ):
         memFilename = 'semcNandFcb.dat'
         memFilepath = os.path.join(self.blhostVectorsDir, memFilename)
@@ -105,6 +218,8 @@ class secBootMem(fusecore.secBootFuse):
         readoutMemLen = os.path.getsize(memFilepath)
         memLeft = readoutMemLen
         with open(memFilepath, 'rb') as fileObj:
+            nfcb = self.bootStructCache.decode(memstruct.SemcNandFcb, fileObj.read(), 0, nfcbAddr)
+            fileObj.seek(0)
             while memLeft > 0:
                 contentToShow, memContent = self._getOneLineContentToShow(nfcbAddr, memLeft, fileObj)
                 memLeft -= len(memContent)
@@ -113,11 +228,8 @@ class secBootMem(fusecore.secBootFuse):
                     self.printMem('------------------------------------NFCB----------------------------------------------', uidef.kMemBlockColor_NFCB)
                     self.needToShowNfcbIntr = False
                 self.printMem(contentToShow, uidef.kMemBlockColor_NFCB)
-        fingerprint = self.getVal32FromBinFile(memFilepath, rundef.kSemcNandFcbOffset_Fingerprint)
-        semcTag = self.getVal32FromBinFile(memFilepath, rundef.kSemcNandFcbOffset_SemcTag)
-        if fingerprint == rundef.kSemcNandFcbTag_Fingerprint and semcTag == rundef.kSemcNandFcbTag_Semc:
-            dbbtStartPage = self.getVal32FromBinFile(memFilepath, rundef.kSemcNandFcbOffset_DBBTSerachAreaStartPage)
-            dbbtAddr = self.bootDeviceMemBase + dbbtStartPage * self.comMemReadUnit
+        if nfcb.isValid():
+            dbbtAddr = self.bootDeviceMemBase + nfcb.dbbtSearchStartPage * self.comMemReadUnit
         else:
             return False, 0
         try:
@@ -136,6 +248,8 @@ class secBootMem(fusecore.secBootFuse):
         readoutMemLen = os.path.getsize(memFilepath)
         memLeft = readoutMemLen
         with open(memFilepath, 'rb') as fileObj:
+            dbbt = self.bootStructCache.decode(memstruct.SemcNandDbbt, fileObj.read(), 0, dbbtAddr)
+            fileObj.seek(0)
             while memLeft > 0:
                 contentToShow, memContent = self._getOneLineContentToShow(dbbtAddr, memLeft, fileObj)
                 memLeft -= len(memContent)
@@ -144,17 +258,22 @@ class secBootMem(fusecore.secBootFuse):
                     self.printMem('------------------------------------DBBT----------------------------------------------', uidef.kMemBlockColor_DBBT)
                     self.needToShowDbbtIntr = False
                 self.printMem(contentToShow, uidef.kMemBlockColor_DBBT)
+        if dbbt.isValid():
+            self.printLog('DBBT: ' + str(len(dbbt.badBlockList)) + ' bad block(s) ' + str(dbbt.badBlockList))
+            self.updateSemcNandBadBlockCache(dbbt.badBlockList)
         try:
             os.remove(memFilepath)
         except:
             pass
         return True
 
-    def _tryToSaveImageDataFile( self, readbackFilename ):
+    def _tryToSaveImageDataFile( self, readbackFilename, memStart=0 ):
         if self.needToSaveReadbackImageData():
             savedBinFile = self.getImageDataFileToSave()
             if os.path.isfile(savedBinFile):
-                if readbackFilename != savedBinFile:
+                if savedBinFile.endswith(memdef.kMemSparseDumpFileExt):
+                    self.convertToSparseDumpFile(readbackFilename, memStart, savedBinFile)
+                elif readbackFilename != savedBinFile:
                     shutil.copy(readbackFilename, savedBinFile)
             else:
                 finalBinFile = os.path.join(self.userFolder, os.path.split(readbackFilename)[1])
@@ -165,45 +284,141 @@ class secBootMem(fusecore.secBootFuse):
         except:
             pass
 
+    def _verifyBootStructsInReadback( self, memFilepath, imageMemBase ):
+        if self.secureBootType == uidef.kSecureBootType_BeeCrypto:
+            # IVT may sit in the BEE encrypted region, so it cannot be compared as plain text
+            return True
+        with open(memFilepath, 'rb') as fileObj:
+            memContent = fileObj.read()
+        with open(self.destAppFilename, 'rb') as fileObj:
+            destAppContent = fileObj.read()
+        if len(memContent) < self.destAppIvtOffset + memdef.kMemBlockSize_IVT + memdef.kMemBlockSize_BootData:
+            self.printLog('Readback from boot device is too short to hold IVT and Boot Data!')
+            return False
+        ivt = self.bootStructCache.decode(memstruct.Ivt, memContent, self.destAppIvtOffset, imageMemBase + self.destAppIvtOffset)
+        expectedIvt = memstruct.Ivt.fromBuffer(destAppContent, self.destAppIvtOffset)
+        if not ivt.isValid() or ivt.getFieldList() != expectedIvt.getFieldList():
+            self.printLog('IVT read back from boot device does not match the bootable image!')
+            return False
+        bootData = self.bootStructCache.decode(memstruct.BootData, memContent, self.destAppIvtOffset + memdef.kMemBlockSize_IVT, ivt.bootData)
+        if bootData.getFieldList() != memstruct.BootData.fromBuffer(destAppContent, self.destAppIvtOffset + memdef.kMemBlockSize_IVT).getFieldList():
+            self.printLog('Boot Data read back from boot device does not match the bootable image!')
+            return False
+        if self.bootDevice == uidef.kBootDevice_FlexspiNor and len(memContent) >= memdef.kMemBlockSize_FDCB:
+            fdcb = self.bootStructCache.decode(memstruct.FlexspiNorFdcb, memContent, 0, imageMemBase)
+            if not fdcb.isValid():
+                self.printLog('FDCB read back from boot device is invalid!')
+                return False
+        return True
+
+    def _readSemcNandImageFromBlocks( self, goodBlockList, imageLen, memFilepath ):
+        blockFilename = os.path.split(self.semcNandImageBlockFilename)[1]
+        status = boot.status.kStatus_Success
+        with open(memFilepath, 'wb') as fileObj:
+            for block in goodBlockList:
+                readLen = min(imageLen - fileObj.tell(), self.semcNandBlockSize)
+                status, results, cmdStr = self.blhost.readMemory(self.bootDeviceMemBase + block * self.semcNandBlockSize, readLen, blockFilename, self.bootDeviceMemId)
+                self.printLog(cmdStr)
+                if status != boot.status.kStatus_Success:
+                    break
+                with open(self.semcNandImageBlockFilename, 'rb') as blockFileObj:
+                    fileObj.write(blockFileObj.read())
+        try:
+            os.remove(self.semcNandImageBlockFilename)
+        except:
+            pass
+        return status
+
+    ##
+    # @brief Sorted start/end addresses of all colored blocks in the readback of bootable image.
+    def _getReadbackBlockBoundaryList( self, imageMemBase ):
+        boundaryList = [imageMemBase + memdef.kMemBlockSize_FDCB,
+                        imageMemBase + self.destAppIvtOffset,
+                        imageMemBase + self.destAppIvtOffset + memdef.kMemBlockSize_IVT,
+                        imageMemBase + self.destAppIvtOffset + memdef.kMemBlockSize_IVT + memdef.kMemBlockSize_BootData,
+                        imageMemBase + self.destAppIvtOffset + memdef.kMemBlockOffsetToIvt_DCD,
+                        imageMemBase + self.destAppIvtOffset + memdef.kMemBlockOffsetToIvt_DCD + self.destAppDcdLength,
+                        imageMemBase + self.destAppVectorOffset,
+                        imageMemBase + self.destAppVectorOffset + self.destAppBinaryBytes]
+        if self.secureBootType == uidef.kSecureBootType_BeeCrypto:
+            for blockOffset, blockSize in [(memdef.kMemBlockOffset_EKIB0, memdef.kMemBlockSize_EKIB),
+                                           (memdef.kMemBlockOffset_EPRDB0, memdef.kMemBlockSize_EPRDB),
+                                           (memdef.kMemBlockOffset_EKIB1, memdef.kMemBlockSize_EKIB),
+                                           (memdef.kMemBlockOffset_EPRDB1, memdef.kMemBlockSize_EPRDB)]:
+                boundaryList += [imageMemBase + blockOffset, imageMemBase + blockOffset + blockSize]
+        if self.secureBootType == uidef.kSecureBootType_HabAuth or self.secureBootType == uidef.kSecureBootType_HabCrypto or \
+           (self.secureBootType == uidef.kSecureBootType_BeeCrypto and self.isCertEnabledForBee):
+            csfStart = imageMemBase + (self.destAppCsfAddress - self.destAppVectorAddress) + self.destAppInitialLoadSize
+            boundaryList += [csfStart, csfStart + memdef.kMemBlockSize_CSF]
+        if self.secureBootType == uidef.kSecureBootType_HabCrypto and self.habDekDataOffset != None:
+            keyBlobStart = imageMemBase + (self.destAppVectorOffset - self.destAppInitialLoadSize) + self.habDekDataOffset
+            boundaryList += [keyBlobStart, keyBlobStart + memdef.kMemBlockSize_KeyBlob]
+        boundaryList.sort()
+        return boundaryList
+
     def readProgrammedMemoryAndShow( self ):
         if not os.path.isfile(self.destAppFilename):
             self.popupMsgBox('You should program your image first!')
             return
         self.clearMem()
+        self.bootStructCache.invalidate()
         self._getInfoFromIvt()
         self._getDcdInfo()
 
         imageMemBase = 0
         readoutMemLen = 0
         imageFileLen = os.path.getsize(self.destAppFilename)
+        if self.habDekDataOffset != None and (self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob > imageFileLen):
+            readoutMemLen += self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob
+        else:
+            readoutMemLen += imageFileLen
+        goodBlockList = None
         if self.bootDevice == uidef.kBootDevice_SemcNand:
-            semcNandOpt, semcNandFcbOpt, semcNandImageInfoList = uivar.getBootDeviceConfiguration(self.bootDevice)
             status, dbbtAddr = self._showSemcNandFcb()
             if status:
                 self._showSemcNandDbbt(dbbtAddr)
-            # Only Readout first image
-            imageMemBase = self.bootDeviceMemBase + (semcNandImageInfoList[0] >> 16) * self.semcNandBlockSize
+            # Only Readout first image, from the same good blocks it was programmed to
+            goodBlockList = self.getSemcNandImageGoodBlockList(0, readoutMemLen)
+            if goodBlockList == None:
+                self.printLog('There are not enough good blocks for image copy 0 !')
+                return False
+            imageMemBase = self.bootDeviceMemBase + goodBlockList[0] * self.semcNandBlockSize
         elif self.bootDevice == uidef.kBootDevice_FlexspiNor or self.bootDevice == uidef.kBootDevice_LpspiNor:
             imageMemBase = self.bootDeviceMemBase
         else:
             pass
-        if self.habDekDataOffset != None and (self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob > imageFileLen):
-            readoutMemLen += self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob
-        else:
-            readoutMemLen += imageFileLen
 
         memFilename = 'bootableImageFromBootDevice.dat'
         memFilepath = os.path.join(self.blhostVectorsDir, memFilename)
-        status, results, cmdStr = self.blhost.readMemory(imageMemBase, readoutMemLen, memFilename, self.bootDeviceMemId)
-        self.printLog(cmdStr)
+        if goodBlockList != None and goodBlockList[-1] - goodBlockList[0] + 1 != len(goodBlockList):
+            # Image skips bad blocks, it is shown at contiguous addresses from its first block
+            self.printLog('Image copy 0 is in blocks ' + ', '.join([str(block) for block in goodBlockList]))
+            status = self._readSemcNandImageFromBlocks(goodBlockList, readoutMemLen, memFilepath)
+        else:
+            status, results, cmdStr = self.blhost.readMemory(imageMemBase, readoutMemLen, memFilename, self.bootDeviceMemId)
+            self.printLog(cmdStr)
         if status != boot.status.kStatus_Success:
             return False
 
         readoutMemLen = os.path.getsize(memFilepath)
+        if not self._verifyBootStructsInReadback(memFilepath, imageMemBase):
+            self.popupMsgBox('Boot structures read back from boot device are corrupted, see log for details!')
         memLeft = readoutMemLen
         addr = imageMemBase
+        # Erased runs are split at block boundaries, so they never swallow the head of a colored block
+        boundaryList = self._getReadbackBlockBoundaryList(imageMemBase)
         with open(memFilepath, 'rb') as fileObj:
             while memLeft > 0:
+                boundaryIndex = bisect.bisect_right(boundaryList, addr)
+                if boundaryIndex < len(boundaryList):
+                    runEnd = boundaryList[boundaryIndex]
+                else:
+                    runEnd = None
+                erasedLen = self._showErasedRunIfAppliable(addr, memLeft, fileObj, runEnd)
+                if erasedLen:
+                    memLeft -= erasedLen
+                    addr += erasedLen
+                    continue
                 contentToShow, memContent = self._getOneLineContentToShow(addr, memLeft, fileObj)
                 memLeft -= len(memContent)
                 addr += len(memContent)
@@ -289,7 +504,7 @@ class secBootMem(fusecore.secBootFuse):
                         self.printMem(contentToShow)
             fileObj.close()
         self._initShowIntr()
-        self._tryToSaveImageDataFile(memFilepath)
+        self._tryToSaveImageDataFile(memFilepath, imageMemBase)
 
     def _getUserComMemParameters( self, isMemWrite=False ):
         status = False
@@ -316,10 +531,93 @@ class secBootMem(fusecore.secBootFuse):
             memStart += self.bootDeviceMemBase
         return memStart
 
+    def _getMemDumpFilename( self, memStart ):
+        if self.needToSaveReadbackImageData():
+            savedBinFile = self.getImageDataFileToSave()
+            if savedBinFile != None and savedBinFile != '' and not os.path.isdir(savedBinFile):
+                return savedBinFile
+        dumpFilename = os.path.join(self.userFolder, 'dumpFromBootDevice_' + self.getFormattedHexValue(memStart) + '.dat')
+        self.setImageDataFilePath(dumpFilename)
+        return dumpFilename
+
+    def dumpBootDeviceMemoryToFile( self, memStart, memLength, dumpFilename ):
+        isPipe = os.path.exists(dumpFilename) and stat.S_ISFIFO(os.stat(dumpFilename).st_mode)
+        isSparse = dumpFilename.endswith(memdef.kMemSparseDumpFileExt)
+        chunkSize = misc.align_up(memdef.kMemDumpChunkSize, self.comMemReadUnit)
+        memEnd = memStart + memLength
+        dumpedLen = 0
+        if isPipe:
+            partFilename = dumpFilename
+            dumpFileObj = open(partFilename, 'wb')
+        else:
+            # The part file name carries the region, so a stale dump of another region will never be resumed
+            partFilename = dumpFilename + '.' + self.getFormattedHexValue(memStart) + '_' + self.getFormattedHexValue(memLength) + memdef.kMemDumpPartFileSuffix
+            if os.path.isfile(partFilename):
+                dumpFileObj = open(partFilename, 'r+b')
+                if isSparse:
+                    filePos, dumpedLen = self._getSparseDumpLength(dumpFileObj)
+                else:
+                    dumpedLen = misc.align_down(min(os.path.getsize(partFilename), memLength), chunkSize)
+                    filePos = dumpedLen
+                dumpFileObj.seek(filePos)
+                dumpFileObj.truncate()
+                if dumpedLen:
+                    self.printLog('Resume dumping from ' + self.getFormattedHexValue(memStart + dumpedLen))
+            else:
+                dumpFileObj = open(partFilename, 'wb')
+        if isSparse and dumpFileObj.tell() == 0:
+            dumpFileObj.write(memdef.kMemSparseDumpMagic)
+        memFilename = 'dumpChunkFromBootDevice.dat'
+        memFilepath = os.path.join(self.blhostVectorsDir, memFilename)
+        status = boot.status.kStatus_Success
+        startTime = time.time()
+        resumedLen = dumpedLen
+        with dumpFileObj:
+            while dumpedLen < memLength:
+                addr = memStart + dumpedLen
+                chunkStart = misc.align_down(addr, self.comMemReadUnit)
+                chunkEnd = min(misc.align_up(memEnd, self.comMemReadUnit), chunkStart + chunkSize)
+                status, results, cmdStr = self.blhost.readMemory(chunkStart, chunkEnd - chunkStart, memFilename, self.bootDeviceMemId)
+                if status != boot.status.kStatus_Success:
+                    self.printLog(cmdStr)
+                    break
+                with open(memFilepath, 'rb') as fileObj:
+                    fileObj.seek(addr - chunkStart)
+                    memContent = fileObj.read(min(memEnd, chunkEnd) - addr)
+                if isSparse:
+                    self._writeSparseDumpRecords(dumpFileObj, addr, memContent)
+                else:
+                    dumpFileObj.write(memContent)
+                dumpFileObj.flush()
+                dumpedLen += len(memContent)
+                elapsedTime = max(time.time() - startTime, 0.001)
+                self.printLog('Dumped ' + self.getFormattedHexValue(dumpedLen) + ' / ' + self.getFormattedHexValue(memLength) + \
+                              ' bytes (%d%%), %.1f KB/s' %(dumpedLen * 100 / memLength, (dumpedLen - resumedLen) / 1024.0 / elapsedTime))
+        try:
+            os.remove(memFilepath)
+        except:
+            pass
+        if status != boot.status.kStatus_Success:
+            return False, status
+        if not isPipe:
+            if os.path.isfile(dumpFilename):
+                os.remove(dumpFilename)
+            os.rename(partFilename, dumpFilename)
+        return True, status
+
     def readBootDeviceMemory( self ):
         status, memStart, memLength = self._getUserComMemParameters(False)
         if status:
             memStart = self._convertComMemStart(memStart)
+            if memLength >= memdef.kMemDumpThreshold:
+                dumpFilename = self._getMemDumpFilename(memStart)
+                status, errorCode = self.dumpBootDeviceMemoryToFile(memStart, memLength, dumpFilename)
+                if status:
+                    self.clearMem()
+                    self.printMem('Dumped ' + self.getFormattedHexValue(memLength) + ' bytes from ' + self.getFormattedHexValue(memStart) + ' into ' + dumpFilename)
+                else:
+                    self.popupMsgBox('Failed to dump boot device, error code is %d, Read again to resume it!' %(errorCode))
+                return
             alignedMemStart = misc.align_down(memStart, self.comMemReadUnit)
             alignedMemLength = misc.align_up(memLength, self.comMemReadUnit) + self.comMemReadUnit
             if memLength + memStart > alignedMemStart + self.comMemReadUnit:
@@ -335,11 +633,16 @@ class secBootMem(fusecore.secBootFuse):
                 with open(memFilepath, 'rb') as fileObj:
                     fileObj.seek(memStart - alignedMemStart)
                     while memLeft > 0:
+                        erasedLen = self._showErasedRunIfAppliable(addr, memLeft, fileObj)
+                        if erasedLen:
+                            memLeft -= erasedLen
+                            addr += erasedLen
+                            continue
                         contentToShow, memContent = self._getOneLineContentToShow(addr, memLeft, fileObj)
                         memLeft -= len(memContent)
                         addr += len(memContent)
                         self.printMem(contentToShow)
-                self._tryToSaveImageDataFile(memFilepath)
+                self._tryToSaveImageDataFile(memFilepath, alignedMemStart)
             else:
                 self.popupMsgBox('Failed to read boot device, error code is %d !' %(status))
 
@@ -347,12 +650,7 @@ class secBootMem(fusecore.secBootFuse):
         status, memStart, memLength = self._getUserComMemParameters(False)
         if status:
             memStart = self._convertComMemStart(memStart)
-            alignedMemStart = misc.align_down(memStart, self.comMemEraseUnit)
-            alignedMemLength = misc.align_up(memLength, self.comMemEraseUnit)
-            if memLength + memStart > alignedMemStart + self.comMemEraseUnit:
-                alignedMemLength += self.comMemEraseUnit
-            status, results, cmdStr = self.blhost.flashEraseRegion(alignedMemStart, alignedMemLength, self.bootDeviceMemId)
-            self.printLog(cmdStr)
+            status = self.eraseBootDeviceForWriteIntents([(memStart, memLength)])
             if status != boot.status.kStatus_Success:
                 self.popupMsgBox('Failed to erase boot device, error code is %d !' %(status))
 
@@ -363,10 +661,7 @@ class secBootMem(fusecore.secBootFuse):
             if memStart % self.comMemWriteUnit:
                 self.popupMsgBox('Start Address should be aligned with 0x%x !' %(self.comMemWriteUnit))
                 return
-            eraseMemStart = misc.align_down(memStart, self.comMemEraseUnit)
-            eraseMemEnd = misc.align_up(memStart + os.path.getsize(memBinFile), self.comMemEraseUnit)
-            status, results, cmdStr = self.blhost.flashEraseRegion(eraseMemStart, eraseMemEnd - eraseMemStart, self.bootDeviceMemId)
-            self.printLog(cmdStr)
+            status = self.eraseBootDeviceForWriteIntents([(memStart, os.path.getsize(memBinFile))])
             if status != boot.status.kStatus_Success:
                 self.popupMsgBox('Failed to erase boot device, error code is %d !' %(status))
                 return
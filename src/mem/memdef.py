@@ -7,6 +7,26 @@ kMemBlockOffset_EPRDB1 = 0x880
 
 kMemBlockOffsetToIvt_DCD = 0x40
 
+kSemcNandFcbTag_Fingerprint = 0x4E464342  # 'NFCB'
+kSemcNandFcbTag_Semc        = 0x434D4553  # 'SEMC'
+
+kSemcNandFcbOffset_Fingerprint             = 0x004
+kSemcNandFcbOffset_DBBTSerachAreaStartPage = 0x00c
+kSemcNandFcbOffset_FirmwareCopies          = 0x014
+kSemcNandFcbOffset_SemcTag                 = 0x100
+kSemcNandFcbOffset_PageByteSize            = 0x1a0
+kSemcNandFcbOffset_PagesInBlock            = 0x1a8
+kSemcNandFcbOffset_BlocksInPlane           = 0x1ac
+kSemcNandFcbOffset_PlanesInDevice          = 0x1b0
+
+kFlexspiNorCfgTag_Flexspi = 0x42464346  # 'FCFB'
+
+kFlexspiNorCfgOffset_FlexspiTag     = 0x000
+kFlexspiNorCfgOffset_SflashA1Size   = 0x050
+kFlexspiNorCfgOffset_PageByteSize   = 0x1c0
+kFlexspiNorCfgOffset_SectorByteSize = 0x1c4
+kFlexspiNorCfgOffset_BlockByteSize  = 0x1d0
+
 kMemBlockSize_NFCB       = 0x400
 kMemBlockSize_DBBT       = 0x420
 kMemBlockSize_FDCB       = 0x200
@@ -24,3 +44,15 @@ kMemberOffsetInIvt_BootData = 0x10
 kMemberOffsetInIvt_Self     = 0x14
 kMemberOffsetInIvt_Csf      = 0x18
 
+
+kMemDumpChunkSize        = 0x40000
+kMemDumpThreshold        = 0x100000
+kMemDumpPartFileSuffix   = '.part'
+
+kMemErasedPattern        = '\xff'
+kMemBlankCheckUnit       = 0x200
+
+kMemSparseDumpFileExt    = '.sdat'
+kMemSparseDumpMagic      = 'SPRS'
+kMemSparseRecordType_Data   = 0x0
+kMemSparseRecordType_Erased = 0x1
@@ -0,0 +1,220 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import struct
+import memdef
+
+kIvtTag_Header       = 0xD1
+kIvtVersion_List     = [0x40, 0x41, 0x42, 0x43]
+
+kDbbtTag_Fingerprint = 0x54424244  # 'DBBT'
+kDbbtOffset_BadBlockList = 0x20
+kDbbtMaxBadBlocks        = (memdef.kMemBlockSize_DBBT - kDbbtOffset_BadBlockList) / 4
+
+##
+# @brief Base class of all boot structure decoders.
+#
+# Subclasses list their members as (name, offset, struct format) in kFields, every member is
+# unpacked directly from the source buffer so the buffer is never copied or re-read.
+class BootStruct(object):
+    kName = ''
+    kSize = 0
+    kFields = []
+
+    def __init__(self, addr=0):
+        self.addr = addr
+
+    @classmethod
+    def fromBuffer(cls, buf, offset=0, addr=0):
+        obj = cls(addr)
+        if len(buf) < offset + cls.kSize:
+            raise ValueError("%s needs 0x%x bytes but only 0x%x are available" % (cls.kName, cls.kSize, len(buf) - offset))
+        for name, fieldOffset, fieldFmt in cls.kFields:
+            val = struct.unpack_from('<' + fieldFmt, buf, offset + fieldOffset)
+            if len(val) == 1:
+                val = val[0]
+            setattr(obj, name, val)
+        obj._decodeExtra(buf, offset)
+        return obj
+
+    @classmethod
+    def fromFile(cls, filename, offset=0, addr=0):
+        with open(filename, 'rb') as fileObj:
+            fileObj.seek(offset)
+            buf = fileObj.read(cls.kSize)
+        return cls.fromBuffer(buf, 0, addr)
+
+    def _decodeExtra( self, buf, offset ):
+        pass
+
+    def isValid( self ):
+        return True
+
+    def getFieldList( self ):
+        return [(name, getattr(self, name)) for name, fieldOffset, fieldFmt in self.kFields]
+
+    def __repr__(self):
+        return "<%s@0x%08x>" % (self.kName, self.addr)
+
+class SemcNandFcb(BootStruct):
+    kName = 'NFCB'
+    kSize = memdef.kMemBlockSize_NFCB
+    kFields = [('crcChecksum',           0x000,                                     'I'),
+               ('fingerprint',           memdef.kSemcNandFcbOffset_Fingerprint,              'I'),
+               ('version',               0x008,                                     'I'),
+               ('dbbtSearchStartPage',   memdef.kSemcNandFcbOffset_DBBTSerachAreaStartPage,  'I'),
+               ('firmwareCopies',        memdef.kSemcNandFcbOffset_FirmwareCopies,           'I'),
+               ('semcTag',               memdef.kSemcNandFcbOffset_SemcTag,                  'I'),
+               ('pageByteSize',          memdef.kSemcNandFcbOffset_PageByteSize,             'I'),
+               ('pagesInBlock',          memdef.kSemcNandFcbOffset_PagesInBlock,             'I'),
+               ('blocksInPlane',         memdef.kSemcNandFcbOffset_BlocksInPlane,            'I'),
+               ('planesInDevice',        memdef.kSemcNandFcbOffset_PlanesInDevice,           'I')]
+
+    def isValid( self ):
+        return self.fingerprint == memdef.kSemcNandFcbTag_Fingerprint and self.semcTag == memdef.kSemcNandFcbTag_Semc
+
+    def getBlockByteSize( self ):
+        return self.pageByteSize * self.pagesInBlock
+
+    def getDeviceByteSize( self ):
+        return self.getBlockByteSize() * self.blocksInPlane * self.planesInDevice
+
+class SemcNandDbbt(BootStruct):
+    kName = 'DBBT'
+    kSize = memdef.kMemBlockSize_DBBT
+    kFields = [('crcChecksum',           0x000, 'I'),
+               ('fingerprint',           0x004, 'I'),
+               ('version',               0x008, 'I'),
+               ('badBlockNumber',        0x010, 'I')]
+
+    def _decodeExtra( self, buf, offset ):
+        self.badBlockList = []
+        if self.isValid():
+            badBlockNumber = min(self.badBlockNumber, kDbbtMaxBadBlocks)
+            self.badBlockList = list(struct.unpack_from('<%dI' % badBlockNumber, buf, offset + kDbbtOffset_BadBlockList))
+
+    def isValid( self ):
+        return self.fingerprint == kDbbtTag_Fingerprint
+
+class FlexspiNorFdcb(BootStruct):
+    kName = 'FDCB'
+    kSize = memdef.kMemBlockSize_FDCB
+    kFields = [('tag',                   memdef.kFlexspiNorCfgOffset_FlexspiTag,     'I'),
+               ('version',               0x004, 'I'),
+               ('readSampleClkSrc',      0x00c, 'B'),
+               ('csHoldTime',            0x00d, 'B'),
+               ('csSetupTime',           0x00e, 'B'),
+               ('columnAddressWidth',    0x00f, 'B'),
+               ('controllerMiscOption',  0x040, 'I'),
+               ('deviceType',            0x044, 'B'),
+               ('sflashPadType',         0x045, 'B'),
+               ('serialClkFreq',         0x046, 'B'),
+               ('sflashA1Size',          memdef.kFlexspiNorCfgOffset_SflashA1Size,   'I'),
+               ('sflashA2Size',          0x054, 'I'),
+               ('sflashB1Size',          0x058, 'I'),
+               ('sflashB2Size',          0x05c, 'I'),
+               ('pageByteSize',          memdef.kFlexspiNorCfgOffset_PageByteSize,   'I'),
+               ('sectorByteSize',        memdef.kFlexspiNorCfgOffset_SectorByteSize, 'I'),
+               ('blockByteSize',         memdef.kFlexspiNorCfgOffset_BlockByteSize,  'I'),
+               ('lookupTable',           0x080, '64I')]
+
+    def isValid( self ):
+        return self.tag == memdef.kFlexspiNorCfgTag_Flexspi
+
+class Ivt(BootStruct):
+    kName = 'IVT'
+    kSize = memdef.kMemBlockSize_IVT
+    kFields = [('header',                memdef.kMemberOffsetInIvt_Hdr,      'I'),
+               ('entry',                 memdef.kMemberOffsetInIvt_Entry,    'I'),
+               ('dcd',                   0x0c,                               'I'),
+               ('bootData',              memdef.kMemberOffsetInIvt_BootData, 'I'),
+               ('selfAddr',              memdef.kMemberOffsetInIvt_Self,     'I'),
+               ('csf',                   memdef.kMemberOffsetInIvt_Csf,      'I')]
+
+    def _decodeExtra( self, buf, offset ):
+        # IVT header is big-endian: tag, length, version
+        self.tag, self.length, self.version = struct.unpack_from('>BHB', buf, offset)
+
+    def isValid( self ):
+        return self.tag == kIvtTag_Header and self.length == memdef.kMemBlockSize_IVT and self.version in kIvtVersion_List
+
+class BootData(BootStruct):
+    kName = 'Boot Data'
+    kSize = memdef.kMemBlockSize_BootData
+    kFields = [('start',                 0x000, 'I'),
+               ('size',                  0x004, 'I'),
+               ('plugin',                0x008, 'I')]
+
+class BeeEkib(BootStruct):
+    kName = 'EKIB'
+    kSize = memdef.kMemBlockSize_EKIB
+    kFields = [('encryptedKey',          0x000, '4I'),
+               ('encryptedIv',           0x010, '4I')]
+
+    def isValid( self ):
+        # An erased EKIB means BEE is not enabled for this region
+        return self.encryptedKey != (0xFFFFFFFF,) * 4
+
+class BeeEprdb(BootStruct):
+    kName = 'EPRDB'
+    kSize = memdef.kMemBlockSize_EPRDB
+    kFields = [('encryptedHeader',       0x000, '4I')]
+
+    def _decodeExtra( self, buf, offset ):
+        # EPRDB is AES-CBC encrypted by the key in EKIB, so only the raw blocks can be shown here
+        self.encryptedBlocks = struct.unpack_from('<%dI' % (self.kSize / 4), buf, offset)
+
+    def isValid( self ):
+        return self.encryptedHeader != (0xFFFFFFFF,) * 4
+
+##
+# @brief Holds decoded structures of one readback, so each structure is parsed only once.
+class BootStructCache(object):
+
+    def __init__(self):
+        self.readbackId = 0
+        self.structDict = {}
+
+    def invalidate( self ):
+        self.readbackId += 1
+        self.structDict = {}
+
+    def decode( self, structClass, buf, offset=0, addr=0 ):
+        key = (structClass.kName, addr, offset)
+        if not self.structDict.has_key(key):
+            self.structDict[key] = structClass.fromBuffer(buf, offset, addr)
+        return self.structDict[key]
+
+kStructClassDict = {'nfcb'     : SemcNandFcb,
+                    'dbbt'     : SemcNandDbbt,
+                    'fdcb'     : FlexspiNorFdcb,
+                    'ivt'      : Ivt,
+                    'bootdata' : BootData,
+                    'ekib'     : BeeEkib,
+                    'eprdb'    : BeeEprdb}
+
+def formatBootStruct( bootStruct ):
+    lines = ['%s (%s)' % (bootStruct.kName, 'valid' if bootStruct.isValid() else 'invalid')]
+    for name, val in bootStruct.getFieldList():
+        if isinstance(val, tuple):
+            val = ' '.join(['0x%08x' % v for v in val])
+        else:
+            val = '0x%08x' % val
+        lines.append('  %-22s = %s' % (name, val))
+    if isinstance(bootStruct, SemcNandDbbt):
+        lines.append('  %-22s = %s' % ('badBlockList', ', '.join([str(b) for b in bootStruct.badBlockList])))
+    return '\n'.join(lines)
+
+def inspect( filename, structName, offset=0 ):
+    structClass = kStructClassDict[structName.lower()]
+    return formatBootStruct(structClass.fromFile(filename, offset))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != 'inspect' or not kStructClassDict.has_key(sys.argv[3].lower()):
+        print 'Usage: memstruct.py inspect <file> <' + '|'.join(sorted(kStructClassDict.keys())) + '> [offset]'
+        sys.exit(1)
+    offset = 0
+    if len(sys.argv) > 4:
+        offset = int(sys.argv[4], 0)
+    print inspect(sys.argv[2], sys.argv[3], offset)
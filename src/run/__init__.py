@@ -2,6 +2,8 @@
 
 import runcore
 import rundef
+import runerase
+import rungeometry
+import runoption
 
-__all__ = ["runcore", "rundef"]
-
+__all__ = ["runcore", "rundef", "runerase", "rungeometry", "runoption"]
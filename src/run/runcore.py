@@ -2,16 +2,24 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-import math
+import json
+import time
+import threading
 import rundef
+import runerase
+import rungeometry
+import runoption
 import boot
 sys.path.append(os.path.abspath(".."))
 from gen import gencore
 from gen import gendef
 from fuse import fusedef
+from fuse import fuseplan
 from ui import uidef
 from ui import uivar
+from ui import uilog
 from mem import memdef
+from mem import memstruct
 from boot import bltest
 from boot import target
 from utils import misc
@@ -72,8 +80,22 @@ class secBootRun(gencore.secBootGen):
         self.bootDeviceMemBase = None
         self.semcNandImageCopies = None
         self.semcNandBlockSize = None
+        self.semcNandBlockCount = None
+        self.semcNandDbbtStartPage = None
+        self.semcNandBadBlockBitmap = None
         self.isFlexspiNorErasedForImage = False
 
+        self.deviceCacheFolder = os.path.join(self.exeTopRoot, 'gen', 'device_cache')
+        self.semcNandBbtCacheFilename = os.path.join(self.exeTopRoot, 'gen', 'device_cache', 'semcNandBbt.json')
+        self.uartSpeedCacheFilename = os.path.join(self.exeTopRoot, 'gen', 'device_cache', 'uartSpeed.json')
+        # (COM port, UART rate) the running flashloader was switched to, self.uartBaudrate stays the selected one
+        self.flashloaderUartSession = None
+        self.bootDeviceGeometryCache = rungeometry.GeometryCache(os.path.join(self.exeTopRoot, 'gen', 'device_cache', 'bootDeviceGeometry.json'))
+        self.semcNandImageBlockFilename = os.path.join(self.blhostVectorsDir, 'semcNandImageBlock.dat')
+
+        self.mcuDeviceUuid = None
+        self.mcuDeviceFuseCache = {}
+
         self.mcuDeviceHabStatus = None
         self.mcuDeviceBtFuseSel = None
         self.mcuDeviceBeeKey0Sel = None
@@ -82,6 +104,9 @@ class secBootRun(gencore.secBootGen):
         self.comMemWriteUnit = 0
         self.comMemEraseUnit = 0
         self.comMemReadUnit = 0
+        self.comMemTotalSize = 0
+        # Erase unit and total size above are only trusted for erase planning after they are got from current device
+        self.isComMemGeometryKnown = False
 
         self.createMcuTarget()
 
@@ -92,8 +117,15 @@ class secBootRun(gencore.secBootGen):
         self.createMcuTarget()
         return [self.tgt.romUsbVid, self.tgt.romUsbPid, self.tgt.flashloaderUsbVid, self.tgt.flashloaderUsbPid]
 
+    def _attachHostLogger( self, host ):
+        host.logHook = self.logPipeline.logCommand
+        host.isVerbose = self.logPipeline.isEnabledFor(uilog.kLogLevel_Debug)
+
     def connectToDevice( self , connectStage):
         if connectStage == uidef.kConnectStage_Rom:
+            self.mcuDeviceUuid = None
+            self.mcuDeviceHabStatus = None
+            self.invalidateMcuDeviceFuseCache()
             # Create the target object.
             self.createMcuTarget()
             if self.isUartPortSelected:
@@ -115,11 +147,12 @@ class secBootRun(gencore.secBootGen):
                                                    sdpPeripheral,
                                                    uartBaudrate, uartComPort,
                                                    usbVid, usbPid)
+            self._attachHostLogger(self.sdphost)
         elif connectStage == uidef.kConnectStage_Flashloader:
             if self.isUartPortSelected:
                 blPeripheral = 'uart'
                 uartComPort = self.uartComPort
-                uartBaudrate = int(self.uartBaudrate)
+                uartBaudrate = int(self.getFlashloaderUartBaudrate())
                 usbVid = ''
                 usbPid = ''
             elif self.isUsbhidPortSelected:
@@ -136,6 +169,7 @@ class secBootRun(gencore.secBootGen):
                                                   uartBaudrate, uartComPort,
                                                   usbVid, usbPid,
                                                   True)
+            self._attachHostLogger(self.blhost)
         elif connectStage == uidef.kConnectStage_Reset:
             self.tgt = None
         else:
@@ -166,8 +200,10 @@ class secBootRun(gencore.secBootGen):
             pass
 
     def _readMcuDeviceRegisterUuid( self ):
-        self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_UUID1, 'OCOTP->B0W1 UUID[31:00]')
-        self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_UUID2, 'OCOTP->B0W2 UUID[63:32]')
+        uuid1 = self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_UUID1, 'OCOTP->B0W1 UUID[31:00]')
+        uuid2 = self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_UUID2, 'OCOTP->B0W2 UUID[63:32]')
+        if uuid1 != None and uuid2 != None:
+            self.mcuDeviceUuid = '%08x%08x' %(uuid2, uuid1)
 
     def _readMcuDeviceRegisterSrcSmbr( self ):
         self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_SRC_SBMR1, 'SRC->SMBR1')
@@ -178,18 +214,32 @@ class secBootRun(gencore.secBootGen):
         self._readMcuDeviceRegisterUuid()
         self._readMcuDeviceRegisterSrcSmbr()
 
+    def _showMcuDeviceHabStatus( self ):
+        if self.mcuDeviceHabStatus == fusedef.kHabStatus_FAB:
+            self.printDeviceStatus('HAB status = FAB')
+        elif self.mcuDeviceHabStatus == fusedef.kHabStatus_Open:
+            self.printDeviceStatus('HAB status = Open')
+        elif self.mcuDeviceHabStatus == fusedef.kHabStatus_Closed0 or self.mcuDeviceHabStatus == fusedef.kHabStatus_Closed1:
+            self.printDeviceStatus('HAB status = Closed')
+        else:
+            pass
+
     def getMcuDeviceHabStatus( self ):
         secConfig = self._getDeviceRegisterBySdphost( rundef.kRegisterAddr_SRC_SBMR2, '', False)
         if secConfig != None:
             self.mcuDeviceHabStatus = ((secConfig & rundef.kRegisterMask_SecConfig) >> rundef.kRegisterShift_SecConfig)
-            if self.mcuDeviceHabStatus == fusedef.kHabStatus_FAB:
-                self.printDeviceStatus('HAB status = FAB')
-            elif self.mcuDeviceHabStatus == fusedef.kHabStatus_Open:
-                self.printDeviceStatus('HAB status = Open')
-            elif self.mcuDeviceHabStatus == fusedef.kHabStatus_Closed0 or self.mcuDeviceHabStatus == fusedef.kHabStatus_Closed1:
-                self.printDeviceStatus('HAB status = Closed')
-            else:
-                pass
+            self._showMcuDeviceHabStatus()
+
+    ##
+    # @brief Get HAB status from SEC_CONFIG[1:0] fuses, for connections that skip ROM (SRC_SBMR2 mirrors these fuses).
+    def getMcuDeviceHabStatusViaFlashloader( self ):
+        secConfig0 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_SecConfig0, '', False)
+        secConfig1 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_SecConfig1, '', False)
+        if secConfig0 != None and secConfig1 != None:
+            secConfig0 = (secConfig0 & fusedef.kEfuseMask_SecConfig0) >> fusedef.kEfuseShift_SecConfig0
+            secConfig1 = (secConfig1 & fusedef.kEfuseMask_SecConfig1) >> fusedef.kEfuseShift_SecConfig1
+            self.mcuDeviceHabStatus = (secConfig1 << 1) | secConfig0
+            self._showMcuDeviceHabStatus()
 
     def jumpToFlashloader( self ):
         flashloaderBinFile = None
@@ -202,25 +252,315 @@ class secBootRun(gencore.secBootGen):
             flashloaderBinFile = os.path.join(self.cpuDir, 'ivt_flashloader.bin')
         else:
             pass
-        status, results, cmdStr = self.sdphost.writeFile(self.tgt.flashloaderLoadAddr, flashloaderBinFile)
-        self.printLog(cmdStr)
-        if status != boot.status.kSDP_Status_HabEnabled and status != boot.status.kSDP_Status_HabDisabled:
+        # New flashloader autobauds again on its first ping
+        self.flashloaderUartSession = None
+        # Flashloader is a RAM image like any other, its IVT is at the jump address
+        return self.loadRamImageViaSdp(flashloaderBinFile, self.tgt.flashloaderJumpAddr - self.tgt.flashloaderLoadAddr)
+
+    ##
+    # @brief Load a RAM bootable image (e.g. an SDRAM test image) through ROM SDP and run it.
+    #
+    # IVT is searched at the usual RAM/NAND and NOR offsets. The DCD of DCD settings (if it is
+    # enabled) is applied first, so SDRAM is up before the image is written into it.
+    def runRamImageViaSdp( self, imageFilename ):
+        ivtOffset = None
+        for offset in [gendef.kIvtOffset_RAM_FLASHLOADER, gendef.kIvtOffset_NOR, 0]:
+            try:
+                ivt = memstruct.Ivt.fromFile(imageFilename, offset)
+            except:
+                continue
+            if ivt.isValid():
+                ivtOffset = offset
+                break
+        if ivtOffset == None:
+            self.printLog('No valid IVT is found in ' + imageFilename)
             return False
-        status, results, cmdStr = self.sdphost.jumpAddress(self.tgt.flashloaderJumpAddr)
+        dcdStatus, dcdFilename = self.prepareDcdBinFile()
+        if not dcdStatus:
+            return False
+        return self.loadRamImageViaSdp(imageFilename, ivtOffset, dcdFilename)
+
+    def _showSdpWriteProgress( self, sentBytes, totalBytes ):
+        elapsedTime = max(time.time() - self.sdpWriteStartTime, 0.001)
+        self.printLog('Loaded ' + self.getFormattedHexValue(sentBytes) + ' / ' + self.getFormattedHexValue(totalBytes) + \
+                      ' bytes (%d%%), %.1f KB/s' %(sentBytes * 100 / totalBytes, sentBytes / 1024.0 / elapsedTime))
+
+    def _isSdpStatusOk( self, status ):
+        return (status == boot.status.kSDP_Status_HabEnabled or status == boot.status.kSDP_Status_HabDisabled)
+
+    ##
+    # @brief ROM keeps its own data in reserved RAM (target reservedRegionDict) while SDP is running, so SDP must not write there.
+    def _isSdpWriteOutOfReservedRegion( self, start, length, dataName ):
+        regionList = self.tgt.getMemoryIndex().findOverlaps(start, length, boot.memoryindex.kRegionKind_Reserved)
+        for region in regionList:
+            self.printLog(dataName + ' [' + self.getFormattedHexValue(start) + ', ' + self.getFormattedHexValue(start + length) + \
+                          ') overlaps ROM reserved region ' + region.name + ' [' + self.getFormattedHexValue(region.start) + ', ' + \
+                          self.getFormattedHexValue(region.end) + ')!')
+        return len(regionList) == 0
+
+    ##
+    # @brief Load a RAM bootable image (IVT at ivtOffset) through ROM SDP and run it, flash is not touched.
+    #
+    # Used to start the flashloader. Failures are only logged, the caller tells the user what to do.
+    #
+    # @param dcdFilename DCD binary applied by dcd-write before loading, e.g. to bring up SDRAM
+    def loadRamImageViaSdp( self, imageFilename, ivtOffset=0, dcdFilename=None ):
+        try:
+            ivt = memstruct.Ivt.fromFile(imageFilename, ivtOffset)
+        except:
+            ivt = None
+        if ivt == None or not ivt.isValid():
+            self.printLog('No valid IVT is found at offset ' + self.getFormattedHexValue(ivtOffset) + ' of ' + imageFilename)
+            return False
+        if not self._isSdpWriteOutOfReservedRegion(ivt.selfAddr - ivtOffset, os.path.getsize(imageFilename), 'RAM image'):
+            return False
+        if dcdFilename != None:
+            if not self._isSdpWriteOutOfReservedRegion(self.tgt.flashloaderLoadAddr, os.path.getsize(dcdFilename), 'DCD'):
+                return False
+            status, results, cmdStr = self.sdphost.dcdWrite(self.tgt.flashloaderLoadAddr, dcdFilename)
+            self.printLog(cmdStr)
+            if not self._isSdpStatusOk(status):
+                self.printLog('DCD was not applied successfully!')
+                return False
+        self.sdpWriteStartTime = time.time()
+        status, results, cmdStr = self.sdphost.writeFileInChunks(ivt.selfAddr - ivtOffset, imageFilename, rundef.kSdpWriteFileChunkSize, self._showSdpWriteProgress)
         self.printLog(cmdStr)
-        if status != boot.status.kSDP_Status_HabEnabled and status != boot.status.kSDP_Status_HabDisabled:
+        if not self._isSdpStatusOk(status):
+            self.printLog('RAM image was not loaded successfully!')
             return False
-        return True
+        if dcdFilename != None and ivt.dcd != 0:
+            # DCD has been applied by dcd-write, ROM must not run the one in IVT again
+            status, results, cmdStr = self.sdphost.skipDcdHeader()
+            self.printLog(cmdStr)
+        status, results, cmdStr = self.sdphost.jumpAddress(ivt.selfAddr)
+        self.printLog(cmdStr)
+        return self._isSdpStatusOk(status)
 
     def pingFlashloader( self ):
         status, results, cmdStr = self.blhost.getProperty(boot.properties.kPropertyTag_CurrentVersion)
         self.printLog(cmdStr)
         return (status == boot.status.kStatus_Success)
 
+    def _loadUartSpeedCache( self ):
+        if os.path.isfile(self.uartSpeedCacheFilename):
+            try:
+                with open(self.uartSpeedCacheFilename, 'r') as fileObj:
+                    return json.load(fileObj)
+            except:
+                pass
+        return {}
+
+    def _saveUartSpeedCache( self, speedCache ):
+        with open(self.uartSpeedCacheFilename, 'w') as fileObj:
+            json.dump(speedCache, fileObj, indent=1)
+
+    ##
+    # @brief UART rate of the running flashloader, the switched one of this session first, else the selected one.
+    def getFlashloaderUartBaudrate( self ):
+        if self.flashloaderUartSession != None and self.flashloaderUartSession[0] == self.uartComPort:
+            return self.flashloaderUartSession[1]
+        return self.uartBaudrate
+
+    def _setFlashloaderUartBaudrate( self, speed ):
+        self.blhost.setBaudRate(speed)
+        if speed == self.uartBaudrate:
+            self.flashloaderUartSession = None
+        else:
+            self.flashloaderUartSession = (self.uartComPort, speed)
+
+    ##
+    # @brief Find the rate a flashloader answers at after a failed switch, and bring it back to fallbackSpeed if possible.
+    #
+    # @return True if flashloader answers, it is then at self.getFlashloaderUartBaudrate()
+    def _recoverFlashloaderUartSpeed( self, fallbackSpeed, failedSpeed, speedList ):
+        for speed in [fallbackSpeed, failedSpeed] + [speed for speed in speedList if speed != failedSpeed]:
+            self.blhost.setBaudRate(speed)
+            if not self._pingFlashloaderAny(rundef.kUartSpeedNegotiation_PingBurst):
+                continue
+            if speed != fallbackSpeed:
+                # Flashloader did switch, so ask it to go back to the rate that is known to work
+                status, results, cmdStr = self.blhost.setProperty(rundef.kPropertyTag_FlashloaderUartBaudrate, fallbackSpeed)
+                self.printLog(cmdStr)
+                if status == boot.status.kStatus_Success:
+                    self.blhost.setBaudRate(fallbackSpeed)
+                    if self._pingFlashloaderBurst(rundef.kUartSpeedNegotiation_PingBurst):
+                        speed = fallbackSpeed
+                    else:
+                        self.blhost.setBaudRate(speed)
+            self._setFlashloaderUartBaudrate(speed)
+            self.printLog('Flashloader answers at UART speed ' + speed + ' again')
+            return True
+        self.blhost.setBaudRate(fallbackSpeed)
+        self.printLog('Flashloader does not answer at any UART speed after the switch, Please reset board!')
+        return False
+
+    def _pingFlashloaderAny( self, pingCnt ):
+        for i in range(pingCnt):
+            status, results, cmdStr = self.blhost.getProperty(boot.properties.kPropertyTag_CurrentVersion)
+            if status == boot.status.kStatus_Success:
+                return True
+        return False
+
+    def _pingFlashloaderBurst( self, pingCnt ):
+        for i in range(pingCnt):
+            status, results, cmdStr = self.blhost.getProperty(boot.properties.kPropertyTag_CurrentVersion)
+            if status != boot.status.kStatus_Success:
+                return False
+        return True
+
+    def _measureFlashloaderUartThroughput( self ):
+        filename = 'uartSpeedProbe.dat'
+        startTime = time.time()
+        status, results, cmdStr = self.blhost.readMemory(self.tgt.memoryRange['ocram'].start, rundef.kUartSpeedNegotiation_ProbeLength, filename)
+        elapsedTime = time.time() - startTime
+        try:
+            os.remove(os.path.join(self.blhostVectorsDir, filename))
+        except:
+            pass
+        if status != boot.status.kStatus_Success or elapsedTime <= 0:
+            return None
+        return int(rundef.kUartSpeedNegotiation_ProbeLength / elapsedTime)
+
+    ##
+    # @brief Connect to the running flashloader at its current UART rate, then ask it for a faster one.
+    #
+    # Flashloader locks its rate by autobaud on the first ping (which may already be the connect probe),
+    # so the current rate (the selected one, or the one this session switched to) always goes first.
+    # Faster rates are then requested by set-property, the rate that last worked with this adapter
+    # first, and each switch is verified by a ping burst. If a switch is not stable, the flashloader is
+    # searched at every rate of this negotiation and brought back to the last good one. The measured
+    # throughput of a switched rate is saved per adapter.
+    #
+    # Rate switching needs a flashloader that knows kPropertyTag_FlashloaderUartBaudrate, the stock
+    # flashloader images under /src/targets/ do not, so with them the rate just stays as selected.
+    #
+    # @return True if flashloader answered
+    def negotiateFlashloaderUartSpeed( self ):
+        adapterId = self.getUartAdapterId(self.uartComPort)
+        speedCache = self._loadUartSpeedCache()
+        currentSpeed = self.getFlashloaderUartBaudrate()
+        self.blhost.setBaudRate(currentSpeed)
+        self.blhost.setFixedTimeout(rundef.kProbeTimeout_Bootloader)
+        try:
+            if not self._pingFlashloaderBurst(rundef.kUartSpeedNegotiation_PingBurst):
+                self.printLog('Flashloader does not answer at ' + currentSpeed)
+                return False
+            speedList = [speed for speed in rundef.kUartSpeed_BlhostNegotiation if int(speed) > int(currentSpeed)]
+            if speedCache.has_key(adapterId):
+                lastSpeed = str(speedCache[adapterId]['baudrate'])
+                if lastSpeed in speedList:
+                    speedList.remove(lastSpeed)
+                    speedList.insert(0, lastSpeed)
+            isSwitched = False
+            for speed in speedList:
+                status, results, cmdStr = self.blhost.setProperty(rundef.kPropertyTag_FlashloaderUartBaudrate, speed)
+                self.printLog(cmdStr)
+                if status == boot.status.kStatus_UnknownProperty:
+                    self.printLog('Flashloader cannot switch UART speed (no property ' + self.getFormattedHexValue(rundef.kPropertyTag_FlashloaderUartBaudrate) + \
+                                  '), UART speed stays at ' + currentSpeed)
+                    break
+                elif status != boot.status.kStatus_Success:
+                    continue
+                self.blhost.setBaudRate(speed)
+                if self._pingFlashloaderBurst(rundef.kUartSpeedNegotiation_PingBurst):
+                    self._setFlashloaderUartBaudrate(speed)
+                    isSwitched = True
+                    break
+                self.printLog('UART speed ' + speed + ' is not stable with this adapter')
+                if speedCache.has_key(adapterId):
+                    del speedCache[adapterId]
+                    try:
+                        self._saveUartSpeedCache(speedCache)
+                    except:
+                        pass
+                return self._recoverFlashloaderUartSpeed(currentSpeed, speed, speedList)
+        finally:
+            self.blhost.setFixedTimeout(None)
+        if not isSwitched:
+            return True
+        switchedSpeed = self.getFlashloaderUartBaudrate()
+        throughput = self._measureFlashloaderUartThroughput()
+        speedCache[adapterId] = {'baudrate' : int(switchedSpeed), 'throughput' : throughput}
+        try:
+            self._saveUartSpeedCache(speedCache)
+        except:
+            pass
+        self.printLog('UART speed is switched from ' + currentSpeed + ' to ' + switchedSpeed + ', measured throughput ' + str(throughput) + ' bytes/s')
+        return True
+
+    def _probeBootloader( self, connectStage, probeResults ):
+        if connectStage == uidef.kConnectStage_Rom:
+            status, results, cmdStr = self.sdphost.errorStatus()
+            probeResults[connectStage] = ((status == boot.status.kSDP_Status_HabEnabled or status == boot.status.kSDP_Status_HabDisabled), cmdStr)
+        elif connectStage == uidef.kConnectStage_Flashloader:
+            status, results, cmdStr = self.blhost.getProperty(boot.properties.kPropertyTag_CurrentVersion)
+            if status != boot.status.kStatus_Success and self.isUartPortSelected and self.getFlashloaderUartBaudrate() != self.uartBaudrate:
+                # Session rate is tried first, flashloader may also be a new one at the selected rate
+                self.blhost.setBaudRate(self.uartBaudrate)
+                status, results, cmdStr = self.blhost.getProperty(boot.properties.kPropertyTag_CurrentVersion)
+                if status == boot.status.kStatus_Success:
+                    self.flashloaderUartSession = None
+                else:
+                    self.blhost.setBaudRate(self.getFlashloaderUartBaudrate())
+            probeResults[connectStage] = ((status == boot.status.kStatus_Success), cmdStr)
+        else:
+            pass
+
+    ##
+    # @brief Find out whether ROM or Flashloader is running, so the connection can start from the right stage.
+    #
+    # @return uidef.kConnectStage_Flashloader, uidef.kConnectStage_Rom, or None if nothing answers
+    def probeConnectStage( self ):
+        self.connectToDevice(uidef.kConnectStage_Rom)
+        self.connectToDevice(uidef.kConnectStage_Flashloader)
+        probeStageList = [uidef.kConnectStage_Flashloader, uidef.kConnectStage_Rom]
+        if self.isUsbhidPortSelected:
+            # ROM and Flashloader enumerate with different VID/PID, so just skip the one that is not there
+            if not self.isUsbhidDevicePresent(self.tgt.flashloaderUsbVid, self.tgt.flashloaderUsbPid):
+                probeStageList.remove(uidef.kConnectStage_Flashloader)
+            if not self.isUsbhidDevicePresent(self.tgt.romUsbVid, self.tgt.romUsbPid):
+                probeStageList.remove(uidef.kConnectStage_Rom)
+        probeResults = {}
+        self.sdphost.setFixedTimeout(rundef.kProbeTimeout_Bootloader)
+        self.blhost.setFixedTimeout(rundef.kProbeTimeout_Bootloader)
+        try:
+            if self.isUsbhidPortSelected:
+                # Two different USB devices, both can be pinged at the same time
+                probeThreads = [threading.Thread(target=self._probeBootloader, args=(stage, probeResults)) for stage in probeStageList]
+                for probeThread in probeThreads:
+                    probeThread.start()
+                for probeThread in probeThreads:
+                    probeThread.join()
+            else:
+                # Both share one COM port, Flashloader goes first as ROM never answers blhost
+                for stage in probeStageList:
+                    self._probeBootloader(stage, probeResults)
+                    if probeResults[stage][0]:
+                        break
+        finally:
+            self.sdphost.setFixedTimeout(None)
+            self.blhost.setFixedTimeout(None)
+        for stage in probeStageList:
+            if probeResults.has_key(stage):
+                isAlive, cmdStr = probeResults[stage]
+                self.printLog(cmdStr)
+                if isAlive:
+                    return stage
+        return None
+
+    def invalidateMcuDeviceFuseCache( self ):
+        self.mcuDeviceFuseCache = {}
+
     def readMcuDeviceFuseByBlhost( self, fuseIndex, fuseName, needToShow=True):
+        if self.mcuDeviceFuseCache.has_key(fuseIndex):
+            fuseValue = self.mcuDeviceFuseCache[fuseIndex]
+            if needToShow:
+                self.printDeviceStatus(fuseName + " = " + self._convertLongIntHexText(str(hex(fuseValue))))
+            return fuseValue
         status, results, cmdStr = self.blhost.efuseReadOnce(fuseIndex)
         self.printLog(cmdStr)
         if (status == boot.status.kStatus_Success):
+            self.mcuDeviceFuseCache[fuseIndex] = results[1]
             if needToShow:
                 self.printDeviceStatus(fuseName + " = " + self._convertLongIntHexText(str(hex(results[1]))))
             return results[1]
@@ -229,6 +569,14 @@ class secBootRun(gencore.secBootGen):
                 self.printDeviceStatus(fuseName + " = --------")
             return None
 
+    def getMcuDeviceUuid( self ):
+        if self.mcuDeviceUuid == None and self.blhost != None:
+            uuid1 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_TESTER0, '', False)
+            uuid2 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_TESTER1, '', False)
+            if uuid1 != None and uuid2 != None:
+                self.mcuDeviceUuid = '%08x%08x' %(uuid2, uuid1)
+        return self.mcuDeviceUuid
+
     def _readMcuDeviceFuseTester( self ):
         self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_TESTER0, '(0x410) TESTER0')
         self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_TESTER1, '(0x420) TESTER1')
@@ -245,10 +593,7 @@ class secBootRun(gencore.secBootGen):
             os.remove(self.otpmkDekFilename)
         except:
             pass
-        self.fillVal32IntoBinFile(self.otpmkDekFilename, otpmk4)
-        self.fillVal32IntoBinFile(self.otpmkDekFilename, otpmk5)
-        self.fillVal32IntoBinFile(self.otpmkDekFilename, otpmk6)
-        self.fillVal32IntoBinFile(self.otpmkDekFilename, otpmk7)
+        self.fillVal32ListIntoBinFile(self.otpmkDekFilename, [otpmk4, otpmk5, otpmk6, otpmk7])
 
     def _readMcuDeviceFuseOtpmkDek( self ):
         otpmk4 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_OTPMK4, '', False)
@@ -322,69 +667,201 @@ class secBootRun(gencore.secBootGen):
         else:
             pass
 
-    def _getSemcNandDeviceInfo ( self ):
-        filename = 'semcNandFcb.dat'
+    def _readBootDeviceToBuffer( self, filename, memAddr, memLength ):
         filepath = os.path.join(self.blhostVectorsDir, filename)
-        status, results, cmdStr = self.blhost.readMemory(self.bootDeviceMemBase + rundef.kSemcNandFcbInfo_StartAddr, rundef.kSemcNandFcbInfo_Length, filename, self.bootDeviceMemId)
+        status, results, cmdStr = self.blhost.readMemory(memAddr, memLength, filename, self.bootDeviceMemId)
         self.printLog(cmdStr)
-        if status != boot.status.kStatus_Success:
-            return False
-        fingerprint = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_Fingerprint)
-        semcTag = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_SemcTag)
-        if fingerprint == rundef.kSemcNandFcbTag_Fingerprint and semcTag == rundef.kSemcNandFcbTag_Semc:
-            firmwareCopies = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_FirmwareCopies)
-            pageByteSize = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_PageByteSize)
-            pagesInBlock = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_PagesInBlock)
-            blocksInPlane = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_BlocksInPlane)
-            planesInDevice = self.getVal32FromBinFile(filepath, rundef.kSemcNandFcbOffset_PlanesInDevice)
-            self.printDeviceStatus("Page Size (bytes) = " + self._convertLongIntHexText(str(hex(pageByteSize))))
-            self.printDeviceStatus("Pages In Block    = " + self._convertLongIntHexText(str(hex(pagesInBlock))))
-            self.printDeviceStatus("Blocks In Plane   = " + self._convertLongIntHexText(str(hex(blocksInPlane))))
-            self.printDeviceStatus("Planes In Device  = " + self._convertLongIntHexText(str(hex(planesInDevice))))
-            self.semcNandImageCopies = firmwareCopies
-            self.semcNandBlockSize = pageByteSize * pagesInBlock
-            self.comMemWriteUnit = pageByteSize
-            self.comMemEraseUnit = pageByteSize * pagesInBlock
-            self.comMemReadUnit = pageByteSize
+        buf = None
+        if status == boot.status.kStatus_Success:
+            with open(filepath, 'rb') as fileObj:
+                buf = fileObj.read()
+                fileObj.close()
+        try:
+            os.remove(filepath)
+        except:
+            pass
+        return buf
+
+    def _getBootDeviceGeometry( self, probeFunc, filename, memAddr, memLength ):
+        # Geometry of a given device never changes, so it is probed only once per UUID and device configuration
+        uuid = self.getMcuDeviceUuid()
+        optionList = list(uivar.getBootDeviceConfiguration(self.bootDevice))
+        geometry = self.bootDeviceGeometryCache.get(uuid, self.bootDevice, optionList)
+        if geometry != None:
+            self.printLog('Boot device geometry is reused from cache for device ' + uuid)
+            return geometry
+        buf = self._readBootDeviceToBuffer(filename, memAddr, memLength)
+        if buf != None:
+            geometry = probeFunc(buf)
+        if geometry != None:
+            self.bootDeviceGeometryCache.put(uuid, self.bootDevice, optionList, geometry)
+        return geometry
+
+    def _getSemcNandDeviceInfo ( self ):
+        geometry = self._getBootDeviceGeometry(rungeometry.probeSemcNandGeometry, 'semcNandFcb.dat',
+                                               self.bootDeviceMemBase + rundef.kSemcNandFcbInfo_StartAddr, rundef.kSemcNandFcbInfo_Length)
+        if geometry != None:
+            self.printDeviceStatus("Page Size (bytes) = " + self._convertLongIntHexText(str(hex(geometry.pageByteSize))))
+            self.printDeviceStatus("Pages In Block    = " + self._convertLongIntHexText(str(hex(geometry.pagesInBlock))))
+            self.printDeviceStatus("Blocks In Plane   = " + self._convertLongIntHexText(str(hex(geometry.blocksInPlane))))
+            self.printDeviceStatus("Planes In Device  = " + self._convertLongIntHexText(str(hex(geometry.planesInDevice))))
+            self.semcNandImageCopies = geometry.firmwareCopies
+            self.semcNandBlockSize = rungeometry.getBlockByteSize(geometry)
+            self.semcNandBlockCount = geometry.blocksInPlane * geometry.planesInDevice
+            self.semcNandDbbtStartPage = geometry.dbbtSearchStartPage
+            self.semcNandBadBlockBitmap = None
+            self.comMemWriteUnit = geometry.pageByteSize
+            self.comMemEraseUnit = rungeometry.getBlockByteSize(geometry)
+            self.comMemReadUnit = geometry.pageByteSize
+            self.comMemTotalSize = rungeometry.getTotalByteSize(geometry)
+            self.isComMemGeometryKnown = True
         else:
             self.printDeviceStatus("Page Size (bytes) = --------")
             self.printDeviceStatus("Pages In Block    = --------")
             self.printDeviceStatus("Blocks In Plane   = --------")
             self.printDeviceStatus("Planes In Device  = --------")
             return False
+        return True
+
+    def _loadSemcNandBadBlockCache( self ):
+        bbtCache = {}
+        if os.path.isfile(self.semcNandBbtCacheFilename):
+            try:
+                with open(self.semcNandBbtCacheFilename, 'r') as fileObj:
+                    bbtCache = json.load(fileObj)
+            except:
+                bbtCache = {}
+        return bbtCache
+
+    def _saveSemcNandBadBlockCache( self, bbtCache ):
+        with open(self.semcNandBbtCacheFilename, 'w') as fileObj:
+            json.dump(bbtCache, fileObj, indent=1)
+
+    def updateSemcNandBadBlockCache( self, badBlockList ):
+        if self.semcNandBlockCount != None:
+            self.semcNandBadBlockBitmap = self._buildSemcNandBadBlockBitmap(badBlockList)
+        uuid = self.getMcuDeviceUuid()
+        if uuid != None:
+            bbtCache = self._loadSemcNandBadBlockCache()
+            bbtCache[uuid] = sorted(badBlockList)
+            self._saveSemcNandBadBlockCache(bbtCache)
+
+    def invalidateSemcNandBadBlockCache( self ):
+        self.semcNandBadBlockBitmap = None
+        uuid = self.getMcuDeviceUuid()
+        bbtCache = self._loadSemcNandBadBlockCache()
+        if uuid != None and bbtCache.has_key(uuid):
+            del bbtCache[uuid]
+            self._saveSemcNandBadBlockCache(bbtCache)
+
+    def _buildSemcNandBadBlockBitmap( self, badBlockList ):
+        bitmap = bytearray((self.semcNandBlockCount + 7) / 8)
+        for block in badBlockList:
+            if block < self.semcNandBlockCount:
+                bitmap[block >> 3] |= 1 << (block & 0x7)
+        return bitmap
+
+    def isSemcNandBlockBad( self, block ):
+        return (self.semcNandBadBlockBitmap[block >> 3] & (1 << (block & 0x7))) != 0
+
+    def _readSemcNandDbbt( self ):
+        filename = 'semcNandDbbt.dat'
+        filepath = os.path.join(self.blhostVectorsDir, filename)
+        dbbtAddr = self.bootDeviceMemBase + self.semcNandDbbtStartPage * self.comMemReadUnit
+        status, results, cmdStr = self.blhost.readMemory(dbbtAddr, memdef.kMemBlockSize_DBBT, filename, self.bootDeviceMemId)
+        self.printLog(cmdStr)
+        if status != boot.status.kStatus_Success:
+            return None
+        dbbt = memstruct.SemcNandDbbt.fromFile(filepath, 0, dbbtAddr)
         try:
             os.remove(filepath)
         except:
             pass
-        return True
+        return dbbt.badBlockList
+
+    def getSemcNandBadBlockBitmap( self ):
+        if self.semcNandBadBlockBitmap == None:
+            uuid = self.getMcuDeviceUuid()
+            bbtCache = self._loadSemcNandBadBlockCache()
+            if uuid != None and bbtCache.has_key(uuid):
+                self.semcNandBadBlockBitmap = self._buildSemcNandBadBlockBitmap(bbtCache[uuid])
+            else:
+                badBlockList = self._readSemcNandDbbt()
+                if badBlockList == None:
+                    # DBBT is not available, no block is known as bad
+                    self.semcNandBadBlockBitmap = self._buildSemcNandBadBlockBitmap([])
+                else:
+                    self.updateSemcNandBadBlockCache(badBlockList)
+        return self.semcNandBadBlockBitmap
+
+    def _getSemcNandGoodBlocksForImage( self, imageInfo, imageLen ):
+        startBlock = imageInfo >> 16
+        blockCount = imageInfo & 0x0000FFFF
+        if blockCount == 0:
+            blockCount = self.semcNandBlockCount - startBlock
+        neededBlocks = misc.align_up(imageLen, self.semcNandBlockSize) / self.semcNandBlockSize
+        goodBlockList = []
+        for block in range(startBlock, min(startBlock + blockCount, self.semcNandBlockCount)):
+            if not self.isSemcNandBlockBad(block):
+                goodBlockList.append(block)
+                if len(goodBlockList) == neededBlocks:
+                    return goodBlockList
+        return None
+
+    ##
+    # @brief Good blocks that hold the first imageLen bytes of SEMC NAND image copy, bad blocks are skipped as ROM does.
+    def getSemcNandImageGoodBlockList( self, copyIndex, imageLen ):
+        semcNandOpt, semcNandFcbOpt, semcNandImageInfoList = uivar.getBootDeviceConfiguration(uidef.kBootDevice_SemcNand)
+        self.getSemcNandBadBlockBitmap()
+        return self._getSemcNandGoodBlocksForImage(semcNandImageInfoList[copyIndex], imageLen)
+
+    ##
+    # @brief Address in SEMC NAND of the given offset in an image copy that is programmed to goodBlockList.
+    def getSemcNandImageAddr( self, goodBlockList, offset ):
+        return self.bootDeviceMemBase + goodBlockList[offset / self.semcNandBlockSize] * self.semcNandBlockSize + offset % self.semcNandBlockSize
+
+    def _writeSemcNandImageToBlocks( self, goodBlockList ):
+        if goodBlockList[-1] - goodBlockList[0] + 1 == len(goodBlockList):
+            imageLoadAddr = self.bootDeviceMemBase + goodBlockList[0] * self.semcNandBlockSize
+            status, results, cmdStr = self.blhost.writeMemory(imageLoadAddr, self.destAppFilename, self.bootDeviceMemId)
+            self.printLog(cmdStr)
+            return status
+        # Bad blocks are skipped, so the image is split into blocks and each one is written to next good block
+        status = boot.status.kStatus_Success
+        with open(self.destAppFilename, 'rb') as fileObj:
+            for block in goodBlockList:
+                with open(self.semcNandImageBlockFilename, 'wb') as blockFileObj:
+                    blockFileObj.write(fileObj.read(self.semcNandBlockSize))
+                imageLoadAddr = self.bootDeviceMemBase + block * self.semcNandBlockSize
+                status, results, cmdStr = self.blhost.writeMemory(imageLoadAddr, self.semcNandImageBlockFilename, self.bootDeviceMemId)
+                self.printLog(cmdStr)
+                if status != boot.status.kStatus_Success:
+                    break
+        try:
+            os.remove(self.semcNandImageBlockFilename)
+        except:
+            pass
+        return status
 
     def _getFlexspiNorDeviceInfo ( self ):
-        filename = 'flexspiNorCfg.dat'
-        filepath = os.path.join(self.blhostVectorsDir, filename)
-        status, results, cmdStr = self.blhost.readMemory(self.bootDeviceMemBase + rundef.kFlexspiNorCfgInfo_StartAddr, rundef.kFlexspiNorCfgInfo_Length, filename, self.bootDeviceMemId)
-        self.printLog(cmdStr)
-        if status != boot.status.kStatus_Success:
-            return False
-        flexspiTag = self.getVal32FromBinFile(filepath, rundef.kFlexspiNorCfgOffset_FlexspiTag)
-        if flexspiTag == rundef.kFlexspiNorCfgTag_Flexspi:
-            pageByteSize = self.getVal32FromBinFile(filepath, rundef.kFlexspiNorCfgOffset_PageByteSize)
-            sectorByteSize = self.getVal32FromBinFile(filepath, rundef.kFlexspiNorCfgOffset_SectorByteSize)
-            blockByteSize = self.getVal32FromBinFile(filepath, rundef.kFlexspiNorCfgOffset_BlockByteSize)
-            self.printDeviceStatus("Page Size (bytes)   = " + self._convertLongIntHexText(str(hex(pageByteSize))))
-            self.printDeviceStatus("Sector Size (bytes) = " + self._convertLongIntHexText(str(hex(sectorByteSize))))
-            self.printDeviceStatus("Block Size (bytes)  = " + self._convertLongIntHexText(str(hex(blockByteSize))))
-            self.comMemWriteUnit = pageByteSize
-            self.comMemEraseUnit = sectorByteSize
-            self.comMemReadUnit = pageByteSize
+        geometry = self._getBootDeviceGeometry(rungeometry.probeFlexspiNorGeometry, 'flexspiNorCfg.dat',
+                                               self.bootDeviceMemBase + rundef.kFlexspiNorCfgInfo_StartAddr, rundef.kFlexspiNorCfgInfo_Length)
+        if geometry != None:
+            self.printDeviceStatus("Page Size (bytes)   = " + self._convertLongIntHexText(str(hex(geometry.pageByteSize))))
+            self.printDeviceStatus("Sector Size (bytes) = " + self._convertLongIntHexText(str(hex(geometry.sectorByteSize))))
+            self.printDeviceStatus("Block Size (bytes)  = " + self._convertLongIntHexText(str(hex(geometry.blockByteSize))))
+            self.printDeviceStatus("Serial Clk Freq     = " + str(geometry.serialClkFreq))
+            self.printDeviceStatus("Pad Type            = " + str(geometry.sflashPadType))
+            self.comMemWriteUnit = geometry.pageByteSize
+            self.comMemEraseUnit = geometry.sectorByteSize
+            self.comMemReadUnit = geometry.pageByteSize
+            self.comMemTotalSize = geometry.totalByteSize
+            self.isComMemGeometryKnown = True
         else:
             self.printDeviceStatus("Page Size (bytes)   = --------")
             self.printDeviceStatus("Sector Size (bytes) = --------")
             self.printDeviceStatus("Block Size (bytes)  = --------")
             return False
-        try:
-            os.remove(filepath)
-        except:
-            pass
         return True
 
     def _getLpspiNorDeviceInfo ( self ):
@@ -392,30 +869,22 @@ class secBootRun(gencore.secBootGen):
         sectorByteSize = 0
         totalByteSize = 0
         lpspiNorOpt0, lpspiNorOpt1 = uivar.getBootDeviceConfiguration(self.bootDevice)
-        val = (lpspiNorOpt0 & 0x0000000F) >> 0
-        if val <= 2:
-            pageByteSize = int(math.pow(2, val + 8))
-        else:
-            pageByteSize = int(math.pow(2, val + 2))
-        val = (lpspiNorOpt0 & 0x000000F0) >> 4
-        if val <= 1:
-            sectorByteSize = int(math.pow(2, val + 12))
-        else:
-            sectorByteSize = int(math.pow(2, val + 13))
-        val = (lpspiNorOpt0 & 0x00000F00) >> 8
-        if val <= 11:
-            totalByteSize = int(math.pow(2, val + 19))
-        else:
-            totalByteSize = int(math.pow(2, val + 3))
+        lpspiNorOptDict = runoption.kLpspiNorOpt0.decode(lpspiNorOpt0)
+        pageByteSize = runoption.getLpspiNorPageByteSize(lpspiNorOptDict['pageSize'])
+        sectorByteSize = runoption.getLpspiNorSectorByteSize(lpspiNorOptDict['sectorSize'])
+        totalByteSize = runoption.getLpspiNorTotalByteSize(lpspiNorOptDict['totalSize'])
         self.printDeviceStatus("Page Size (bytes)   = " + self._convertLongIntHexText(str(hex(pageByteSize))))
         self.printDeviceStatus("Sector Size (bytes) = " + self._convertLongIntHexText(str(hex(sectorByteSize))))
         self.printDeviceStatus("Total Size (bytes)  = " + self._convertLongIntHexText(str(hex(totalByteSize))))
         self.comMemWriteUnit = pageByteSize
         self.comMemEraseUnit = sectorByteSize
         self.comMemReadUnit = pageByteSize
+        self.comMemTotalSize = totalByteSize
+        self.isComMemGeometryKnown = True
         return True
 
     def getBootDeviceInfoViaFlashloader ( self ):
+        self.isComMemGeometryKnown = False
         if self.bootDevice == uidef.kBootDevice_SemcNand:
             self.printDeviceStatus("--------SEMC NAND memory----------")
             self._getSemcNandDeviceInfo()
@@ -433,7 +902,29 @@ class secBootRun(gencore.secBootGen):
         else:
             pass
 
+    def _getBootDeviceEraseGeometry( self ):
+        if not self.isComMemGeometryKnown:
+            # Values may be left from another device, so intents are erased as they are, never aligned or by chip erase
+            return runerase.EraseGeometry(self.bootDeviceMemBase, 0, 0)
+        return runerase.EraseGeometry(self.bootDeviceMemBase, self.comMemEraseUnit, self.comMemTotalSize)
+
+    def eraseBootDeviceForWriteIntents( self, intentList, memId=None ):
+        if memId == None:
+            memId = self.bootDeviceMemId
+        eraseCmdList = runerase.planErase(intentList, self._getBootDeviceEraseGeometry())
+        status = boot.status.kStatus_Success
+        for eraseCmd in eraseCmdList:
+            if eraseCmd.eraseType == rundef.kEraseType_Chip:
+                status, results, cmdStr = self.blhost.flashEraseAll(memId)
+            else:
+                status, results, cmdStr = self.blhost.flashEraseRegion(eraseCmd.start, eraseCmd.length, memId)
+            self.printLog(cmdStr)
+            if status != boot.status.kStatus_Success:
+                break
+        return status
+
     def _eraseFlexspiNorForConfigBlockLoading( self ):
+        # Device geometry is unknown here (config block is not readable), so only the config block area is erased
         status, results, cmdStr = self.blhost.flashEraseRegion(self.tgt.flexspiNorMemBase, rundef.kFlexspiNorCfgInfo_Length, rundef.kBootDeviceMemId_FlexspiNor)
         self.printLog(cmdStr)
         return (status == boot.status.kStatus_Success)
@@ -514,15 +1005,12 @@ class secBootRun(gencore.secBootGen):
         if os.path.isfile(self.otpmkDekFilename):
             self.clearOtpmkDekData()
             keyWords = gendef.kSecKeyLengthInBits_DEK / 32
-            for i in range(keyWords):
-                val32 = self.getVal32FromBinFile(self.otpmkDekFilename, (i * 4))
+            for val32 in self.getVal32ListFromBinFile(self.otpmkDekFilename, keyWords):
                 self.printOtpmkDekData(self.getFormattedHexValue(val32))
 
     def _eraseFlexspiNorForImageLoading( self ):
         imageLen = os.path.getsize(self.destAppFilename)
-        memEraseLen = misc.align_up(imageLen, self.comMemEraseUnit)
-        status, results, cmdStr = self.blhost.flashEraseRegion(self.tgt.flexspiNorMemBase, memEraseLen, rundef.kBootDeviceMemId_FlexspiNor)
-        self.printLog(cmdStr)
+        status = self.eraseBootDeviceForWriteIntents([(self.tgt.flexspiNorMemBase, imageLen)], rundef.kBootDeviceMemId_FlexspiNor)
         if status != boot.status.kStatus_Success:
             return False
         self.isFlexspiNorErasedForImage = True
@@ -576,6 +1064,7 @@ class secBootRun(gencore.secBootGen):
         isReady = True
         isBlank = True
         keyWords = gendef.kSecKeyLengthInBits_SRK / 32
+        keyWordList = self.getVal32ListFromBinFile(srkFuseFilename, keyWords)
         for i in range(keyWords):
             srk = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_SRK0 + i, '(' + str(hex(0x580 + i * 0x10)) + ') ' + 'SRK' + str(i), False)
             if srk == None:
@@ -583,7 +1072,7 @@ class secBootRun(gencore.secBootGen):
                 break
             elif srk != 0:
                 isBlank = False
-                val32 = self.getVal32FromBinFile(srkFuseFilename, (i * 4))
+                val32 = keyWordList[i]
                 if srk != val32:
                     isReady = False
                     break
@@ -592,20 +1081,58 @@ class secBootRun(gencore.secBootGen):
     def burnMcuDeviceFuseByBlhost( self, fuseIndex, fuseValue):
         status, results, cmdStr = self.blhost.efuseProgramOnce(fuseIndex, self.getFormattedFuseValue(fuseValue))
         self.printLog(cmdStr)
+        if fuseIndex == fusedef.kEfuseIndex_LOCK:
+            # New lock bits may change what other fuse words read back, so all of them need to be read again
+            lock = self.mcuDeviceFuseCache.get(fuseIndex)
+            self.invalidateMcuDeviceFuseCache()
+            if status == boot.status.kStatus_Success and lock != None:
+                self.mcuDeviceFuseCache[fuseIndex] = lock | fuseValue
+        elif status == boot.status.kStatus_Success and self.mcuDeviceFuseCache.has_key(fuseIndex):
+            # eFuse bits can only be changed from 0 to 1, so the new value is always OR-ed
+            self.mcuDeviceFuseCache[fuseIndex] = self.mcuDeviceFuseCache[fuseIndex] | fuseValue
+        elif self.mcuDeviceFuseCache.has_key(fuseIndex):
+            del self.mcuDeviceFuseCache[fuseIndex]
         return (status == boot.status.kStatus_Success)
 
+    def compileMcuDeviceFusePlan( self, desiredFuseDict, exactFuseIndexList=[] ):
+        scannedFuseList = [None] * fusedef.kMaxEfuseWords
+        for fuseIndex in [fusedef.kEfuseIndex_LOCK] + desiredFuseDict.keys():
+            scannedFuseList[fuseIndex] = self.readMcuDeviceFuseByBlhost(fuseIndex, '', False)
+        return fuseplan.compileFusePlan(scannedFuseList, desiredFuseDict, exactFuseIndexList)
+
+    def executeFusePlan( self, fusePlan ):
+        for line in fusePlan.getReport():
+            self.printLog(line)
+        def readBurnedFuse( fuseIndex ):
+            # Burned words are verified on device, the cache must not answer it
+            if self.mcuDeviceFuseCache.has_key(fuseIndex):
+                del self.mcuDeviceFuseCache[fuseIndex]
+            return self.readMcuDeviceFuseByBlhost(fuseIndex, '', False)
+        isBurned, failedFuseIndexList = fuseplan.executeFusePlan(fusePlan, self.burnMcuDeviceFuseByBlhost, readBurnedFuse)
+        for fuseIndex in failedFuseIndexList:
+            self.printLog('Fuse (' + str(hex(fuseplan.getFuseAddr(fuseIndex))) + ') verification failed!')
+        return isBurned and not len(failedFuseIndexList)
+
+    ##
+    # @brief Set the given bits of one fuse word, it goes through a fuse plan like all other burns.
+    def burnMcuDeviceFuseBitsByPlan( self, fuseIndex, fuseBits ):
+        fusePlan = self.compileMcuDeviceFusePlan({fuseIndex : fuseBits})
+        return self.executeFusePlan(fusePlan)
+
     def burnSrkData ( self ):
         if os.path.isfile(self.srkFuseFilename):
             isReady, isBlank = self._isDeviceFuseSrkRegionReadyForBurn(self.srkFuseFilename)
             if isReady:
                 if isBlank:
+                    desiredFuseDict = {}
                     keyWords = gendef.kSecKeyLengthInBits_SRK / 32
+                    keyWordList = self.getVal32ListFromBinFile(self.srkFuseFilename, keyWords)
                     for i in range(keyWords):
-                        val32 = self.getVal32FromBinFile(self.srkFuseFilename, (i * 4))
-                        burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_SRK0 + i, val32)
-                        if not burnResult:
-                            self.popupMsgBox('Fuse SRK Regions were not burned successfully!')
-                            return False
+                        desiredFuseDict[fusedef.kEfuseIndex_SRK0 + i] = keyWordList[i]
+                    fusePlan = self.compileMcuDeviceFusePlan(desiredFuseDict, desiredFuseDict.keys())
+                    if not self.executeFusePlan(fusePlan):
+                        self.popupMsgBox('Fuse SRK Regions were not burned successfully!')
+                        return False
                 return True
             else:
                 self.popupMsgBox('Fuse SRK Regions have been burned, it is program-once!')
@@ -613,7 +1140,7 @@ class secBootRun(gencore.secBootGen):
             self.popupMsgBox('Super Root Keys hasn\'t been generated!')
         return False
 
-    def _isDeviceFuseSwGp2RegionReadyForBurn( self, swgp2DekFilename ):
+    def _isDeviceFuseSwGp2RegionReadyForBurn( self, keyWordList ):
         isReady = True
         isBlank = True
         keyWords = gendef.kSecKeyLengthInBits_DEK / 32
@@ -624,13 +1151,13 @@ class secBootRun(gencore.secBootGen):
                 break
             elif dek != 0:
                 isBlank = False
-                val32 = self.getVal32FromBinFile(swgp2DekFilename, (i * 4))
+                val32 = keyWordList[i]
                 if dek != val32:
                     isReady = False
                     break
         return isReady, isBlank
 
-    def _isDeviceFuseGp4RegionReadyForBurn( self, gp4DekFilename ):
+    def _isDeviceFuseGp4RegionReadyForBurn( self, keyWordList ):
         isReady = True
         isBlank = True
         keyWords = gendef.kSecKeyLengthInBits_DEK / 32
@@ -641,121 +1168,102 @@ class secBootRun(gencore.secBootGen):
                 break
             elif dek != 0:
                 isBlank = False
-                val32 = self.getVal32FromBinFile(gp4DekFilename, (i * 4))
+                val32 = keyWordList[i]
                 if dek != val32:
                     isReady = False
                     break
         return isReady, isBlank
 
-    def _lockFuseSwGp2( self ):
-        lock = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, '', False)
-        if lock != None:
-            lock = (lock | (fusedef.kEfuseMask_WLockSwGp2 | fusedef.kEfuseMask_RLockSwGp2)) & (~fusedef.kEfuseMask_LockHigh)
-            burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, lock)
-            if not burnResult:
-                self.popupMsgBox('Fuse LOCK SW_GP2 region was not burned successfully!')
-                return False
-        return True
-
-    def _lockFuseGp4( self ):
-        lock = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, '', False)
-        if lock != None:
-            lock = (lock | (fusedef.kEfuseMask_WLockGp4 | fusedef.kEfuseMask_RLockGp4)) & (~fusedef.kEfuseMask_LockHigh)
-            burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_LOCK, lock)
-            if not burnResult:
-                self.popupMsgBox('Fuse LOCK GP4 region was not burned successfully!')
-                return False
-
     def burnBeeDekData ( self ):
         needToBurnSwGp2 = False
         needToBurnGp4 = False
-        swgp2DekFilename = None
-        gp4DekFilename = None
+        swgp2DekEngineIndex = None
+        gp4DekEngineIndex = None
         userKeyCtrlDict, userKeyCmdDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_UserKeys)
-        if userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_Engine1 or userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_BothEngines:
-            if userKeyCtrlDict['engine1_key_src'] == uidef.kUserKeySource_SW_GP2:
+        # Engine 0 goes last, so it wins if both engines use the same region
+        for engineIndex in reversed(self._getEnabledBeeEngineIndexList(userKeyCtrlDict)):
+            keySource = userKeyCtrlDict['engine' + str(engineIndex) + '_key_src']
+            if keySource == uidef.kUserKeySource_SW_GP2:
                 needToBurnSwGp2 = True
-                swgp2DekFilename = self.beeDek1Filename
-            elif userKeyCtrlDict['engine1_key_src'] == uidef.kUserKeySource_GP4:
+                swgp2DekEngineIndex = engineIndex
+            elif keySource == uidef.kUserKeySource_GP4:
                 needToBurnGp4 = True
-                gp4DekFilename = self.beeDek1Filename
-            else:
-                pass
-        if userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_Engine0 or userKeyCtrlDict['engine_sel'] == uidef.kUserEngineSel_BothEngines:
-            if userKeyCtrlDict['engine0_key_src'] == uidef.kUserKeySource_SW_GP2:
-                needToBurnSwGp2 = True
-                swgp2DekFilename = self.beeDek0Filename
-            elif userKeyCtrlDict['engine0_key_src'] == uidef.kUserKeySource_GP4:
-                needToBurnGp4 = True
-                gp4DekFilename = self.beeDek0Filename
+                gp4DekEngineIndex = engineIndex
             else:
                 pass
+        deviceUuid = None
+        if self.isPerDeviceDekEnabled():
+            deviceUuid = self.getMcuDeviceUuid()
         keyWords = gendef.kSecKeyLengthInBits_DEK / 32
+        desiredFuseDict = {}
+        dekFuseIndexList = []
+        lockMask = 0
         if needToBurnSwGp2:
-            isReady, isBlank = self._isDeviceFuseSwGp2RegionReadyForBurn(swgp2DekFilename)
+            keyWordList = self.getBeeDekWordList(swgp2DekEngineIndex, deviceUuid)
+            if keyWordList == None:
+                self.popupMsgBox('DEK for Fuse SW_GP2 Regions is not available!')
+                return False
+            isReady, isBlank = self._isDeviceFuseSwGp2RegionReadyForBurn(keyWordList)
             if isReady:
                 if isBlank:
                     for i in range(keyWords):
-                        val32 = self.getVal32FromBinFile(swgp2DekFilename, (i * 4))
-                        burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_SW_GP2_0 + i, val32)
-                        if not burnResult:
-                            self.popupMsgBox('Fuse SW_GP2 Regions were not burned successfully!')
-                            return False
-                    if not self._lockFuseSwGp2():
-                        return False
+                        desiredFuseDict[fusedef.kEfuseIndex_SW_GP2_0 + i] = keyWordList[i]
+                        dekFuseIndexList.append(fusedef.kEfuseIndex_SW_GP2_0 + i)
+                    lockMask |= fusedef.kEfuseMask_WLockSwGp2 | fusedef.kEfuseMask_RLockSwGp2
             else:
                 self.popupMsgBox('Fuse SW_GP2 Regions have been burned/locked, it is program-once!')
         else:
             pass
         if needToBurnGp4:
-            isReady, isBlank = self._isDeviceFuseGp4RegionReadyForBurn(gp4DekFilename)
+            keyWordList = self.getBeeDekWordList(gp4DekEngineIndex, deviceUuid)
+            if keyWordList == None:
+                self.popupMsgBox('DEK for Fuse GP4 Regions is not available!')
+                return False
+            isReady, isBlank = self._isDeviceFuseGp4RegionReadyForBurn(keyWordList)
             if isReady:
                 if isBlank:
                     for i in range(keyWords):
-                        val32 = self.getVal32FromBinFile(gp4DekFilename, (i * 4))
-                        burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseIndex_GP4_0 + i, val32)
-                        if not burnResult:
-                            self.popupMsgBox('Fuse GP4 Regions were not burned successfully!')
-                            return False
-                    if not self._lockFuseGp4():
-                        return False
+                        desiredFuseDict[fusedef.kEfuseIndex_GP4_0 + i] = keyWordList[i]
+                        dekFuseIndexList.append(fusedef.kEfuseIndex_GP4_0 + i)
+                    lockMask |= fusedef.kEfuseMask_WLockGp4 | fusedef.kEfuseMask_RLockGp4
             else:
                 self.popupMsgBox('Fuse GP4 Regions have been burned/locked, it is program-once!')
         else:
             pass
+        if len(desiredFuseDict):
+            # DEK words and their lock bits are burned by one plan, lock always goes last
+            desiredFuseDict[fusedef.kEfuseIndex_LOCK] = lockMask
+            fusePlan = self.compileMcuDeviceFusePlan(desiredFuseDict, dekFuseIndexList)
+            if not self.executeFusePlan(fusePlan):
+                self.popupMsgBox('Fuse SW_GP2/GP4 Regions were not burned successfully!')
+                return False
         return True
 
     def _genDestEncAppFileWithoutCfgBlock( self ):
-        destEncAppPath, destEncAppFile = os.path.split(self.destEncAppFilename)
-        destEncAppName, destEncAppType = os.path.splitext(destEncAppFile)
-        destEncAppName += '_nocfgblock'
-        self.destEncAppNoCfgBlockFilename = os.path.join(destEncAppPath, destEncAppName + destEncAppType)
-        imageLen = os.path.getsize(self.destEncAppFilename)
-        imageData = None
-        with open(self.destEncAppFilename, 'rb') as fileObj:
-            imageData = fileObj.read(imageLen)
-            if len(imageData) > rundef.kFlexspiNorCfgInfo_Length:
-                imageData = imageData[rundef.kFlexspiNorCfgInfo_Length:len(imageData)]
-            fileObj.close()
-        with open(self.destEncAppNoCfgBlockFilename, 'wb') as fileObj:
-            fileObj.write(imageData)
-            fileObj.close()
+        self.destEncAppNoCfgBlockFilename = self.genAppFileWithoutCfgBlock(self.destEncAppFilename)
 
     def flashBootableImage ( self ):
         self._prepareForBootDeviceOperation()
         imageLen = os.path.getsize(self.destAppFilename)
         if self.bootDevice == uidef.kBootDevice_SemcNand:
-            semcNandOpt, semcNandFcbOpt, semcNandImageInfoList = uivar.getBootDeviceConfiguration(self.bootDevice)
-            memEraseLen = misc.align_up(imageLen, self.comMemEraseUnit)
+            goodBlockListList = []
+            eraseIntentList = []
             for i in range(self.semcNandImageCopies):
-                imageLoadAddr = self.bootDeviceMemBase + (semcNandImageInfoList[i] >> 16) * self.semcNandBlockSize
-                status, results, cmdStr = self.blhost.flashEraseRegion(imageLoadAddr, memEraseLen, self.bootDeviceMemId)
-                self.printLog(cmdStr)
-                if status != boot.status.kStatus_Success:
+                goodBlockList = self.getSemcNandImageGoodBlockList(i, imageLen)
+                if goodBlockList == None:
+                    self.printLog('There are not enough good blocks for image copy %d !' %(i))
                     return False
-                status, results, cmdStr = self.blhost.writeMemory(imageLoadAddr, self.destAppFilename, self.bootDeviceMemId)
-                self.printLog(cmdStr)
+                goodBlockListList.append(goodBlockList)
+                for block in goodBlockList:
+                    eraseIntentList.append((self.bootDeviceMemBase + block * self.semcNandBlockSize, self.semcNandBlockSize))
+            status = self.eraseBootDeviceForWriteIntents(eraseIntentList)
+            if status != boot.status.kStatus_Success:
+                self.invalidateSemcNandBadBlockCache()
+                return False
+            for goodBlockList in goodBlockListList:
+                status = self._writeSemcNandImageToBlocks(goodBlockList)
                 if status != boot.status.kStatus_Success:
+                    self.invalidateSemcNandBadBlockCache()
                     return False
         elif self.bootDevice == uidef.kBootDevice_FlexspiNor:
             if not self.isFlexspiNorErasedForImage:
@@ -768,7 +1276,8 @@ class secBootRun(gencore.secBootGen):
                         self.isFlexspiNorErasedForImage = False
                         return False
             if self.secureBootType == uidef.kSecureBootType_BeeCrypto and self.keyStorageRegion == uidef.kKeyStorageRegion_FlexibleUserKeys:
-                self._genDestEncAppFileWithoutCfgBlock()
+                if not (self.isPerDeviceDekEnabled() and self.selectDestEncAppFileForDevice(self.getMcuDeviceUuid())):
+                    self._genDestEncAppFileWithoutCfgBlock()
                 imageLoadAddr = self.bootDeviceMemBase + rundef.kFlexspiNorCfgInfo_Length
                 status, results, cmdStr = self.blhost.writeMemory(imageLoadAddr, self.destEncAppNoCfgBlockFilename, self.bootDeviceMemId)
                 self.printLog(cmdStr)
@@ -780,10 +1289,8 @@ class secBootRun(gencore.secBootGen):
             if status != boot.status.kStatus_Success:
                 return False
         elif self.bootDevice == uidef.kBootDevice_LpspiNor:
-            memEraseLen = misc.align_up(imageLen, self.comMemEraseUnit)
             imageLoadAddr = self.bootDeviceMemBase
-            status, results, cmdStr = self.blhost.flashEraseRegion(imageLoadAddr, memEraseLen, self.bootDeviceMemId)
-            self.printLog(cmdStr)
+            status = self.eraseBootDeviceForWriteIntents([(imageLoadAddr, imageLen)])
             if status != boot.status.kStatus_Success:
                 return False
             status, results, cmdStr = self.blhost.writeMemory(imageLoadAddr, self.destAppFilename, self.bootDeviceMemId)
@@ -810,72 +1317,32 @@ class secBootRun(gencore.secBootGen):
 
     def burnBootDeviceFuses( self ):
         if self.bootDevice == uidef.kBootDevice_SemcNand:
-            setSemcNandCfg = 0
             semcNandOpt, semcNandFcbOpt, imageInfo = uivar.getBootDeviceConfiguration(self.bootDevice)
-            # Set Device Ecc Status
-            eccStatus = (semcNandOpt & 0x00020000) >> 17
-            setSemcNandCfg = (setSemcNandCfg & (~fusedef.kEfuseMask_RawNandEccStatus) | (eccStatus << fusedef.kEfuseShift_RawNandEccStatus))
-            # Set I/O Port Size
-            portSize = (semcNandOpt & 0x00000300) >> 8
-            if portSize <= 1:
-                portSize = 0
-            else:
-                portSize = 1
-            setSemcNandCfg = (setSemcNandCfg & (~fusedef.kEfuseMask_RawNandPortSize) | (portSize << fusedef.kEfuseShift_RawNandPortSize))
-            if self.tgt.isEccTypeSetInFuseMiscConf:
-                # Set ECC Check Type
-                eccType = (semcNandOpt & 0x00010000) >> 16
-                eccType = (eccType + 1) % 2
-                setSemcNandCfg = (setSemcNandCfg & (~fusedef.kEfuseMask_RawNandEccEdoSet) | (eccType << fusedef.kEfuseShift_RawNandEccEdoSet))
-            else:
-                # Set EDO mode
-                edoMode = (semcNandOpt & 0x00000008) >> 3
-                setSemcNandCfg = (setSemcNandCfg & (~fusedef.kEfuseMask_RawNandEccEdoSet) | (edoMode << fusedef.kEfuseShift_RawNandEccEdoSet))
+            setSemcNandCfg, semcNandCfgMask = runoption.convertSemcNandOptToFuse(semcNandOpt, self.tgt.isEccTypeSetInFuseMiscConf)
             getSemcNandCfg = self._getMcuDeviceSemcNandCfg()
             if getSemcNandCfg != None:
                 getSemcNandCfg = getSemcNandCfg | setSemcNandCfg
-                if (getSemcNandCfg & (fusedef.kEfuseMask_RawNandEccStatus | fusedef.kEfuseMask_RawNandPortSize | fusedef.kEfuseMask_RawNandEccEdoSet)) != setSemcNandCfg:
+                if (getSemcNandCfg & semcNandCfgMask) != setSemcNandCfg:
                     self.popupMsgBox('Fuse MISC_CONF1[31:0] has been burned, it is program-once!')
                     return False
                 else:
-                    burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_SemcNandCfg, getSemcNandCfg)
+                    burnResult = self.burnMcuDeviceFuseBitsByPlan(fusedef.kEfuseLocation_SemcNandCfg, getSemcNandCfg)
                     if not burnResult:
                         self.popupMsgBox('Fuse MISC_CONF1[31:0] region was not burned successfully!')
                         return False
         elif self.bootDevice == uidef.kBootDevice_FlexspiNor:
             pass
         elif self.bootDevice == uidef.kBootDevice_LpspiNor:
-            setLpspiCfg = 0
-            # Set EEPROM enable
-            setLpspiCfg = setLpspiCfg | fusedef.kEfuseMask_EepromEnable
             lpspiNorOpt0, lpspiNorOpt1 = uivar.getBootDeviceConfiguration(self.bootDevice)
-            # Set Spi Index
-            spiIndex = ((lpspiNorOpt0 & 0x00F00000) >> 20) - 1
-            setLpspiCfg = (setLpspiCfg & (~fusedef.kEfuseMask_LpspiIndex) | (spiIndex << fusedef.kEfuseShift_LpspiIndex))
-            # Set Spi Speed
-            spiSpeed = (lpspiNorOpt1 & 0x0000000F) >> 0
-            setLpspiCfg = (setLpspiCfg & (~fusedef.kEfuseMask_LpspiSpeed) | (spiSpeed << fusedef.kEfuseShift_LpspiSpeed))
-            # Set Spi Addressing
-            spiAddressing = 0
-            val = (lpspiNorOpt0 & 0x00000F00) >> 8
-            totalByteSize = 0
-            if val <= 11:
-                totalByteSize = int(math.pow(2, val + 19))
-            else:
-                totalByteSize = int(math.pow(2, val + 3))
-            if totalByteSize > (64 * 1024):
-                spiAddressing = fusedef.kSpiAddressing_3Bytes
-            else:
-                spiAddressing = fusedef.kSpiAddressing_2Bytes
-            setLpspiCfg = (setLpspiCfg & (~fusedef.kEfuseMask_SpiAddressing) | (spiAddressing << fusedef.kEfuseShift_SpiAddressing))
+            setLpspiCfg, lpspiCfgMask = runoption.convertLpspiNorOptToFuse(lpspiNorOpt0, lpspiNorOpt1)
             getLpspiCfg = self._getMcuDeviceLpspiCfg()
             if getLpspiCfg != None:
                 getLpspiCfg = getLpspiCfg | setLpspiCfg
-                if (getLpspiCfg & (fusedef.kEfuseMask_EepromEnable | fusedef.kEfuseMask_LpspiIndex | fusedef.kEfuseMask_SpiAddressing | fusedef.kEfuseMask_LpspiSpeed)) != setLpspiCfg:
+                if (getLpspiCfg & lpspiCfgMask) != setLpspiCfg:
                     self.popupMsgBox('Fuse MISC_CONF0[28:24] has been burned, it is program-once!')
                     return False
                 else:
-                    burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_LpspiCfg, getLpspiCfg)
+                    burnResult = self.burnMcuDeviceFuseBitsByPlan(fusedef.kEfuseLocation_LpspiCfg, getLpspiCfg)
                     if not burnResult:
                         self.popupMsgBox('Fuse MISC_CONF0[28:24] region was not burned successfully!')
                         return False
@@ -935,12 +1402,33 @@ class secBootRun(gencore.secBootGen):
                 if ((getBeeKeySel & fusedef.kEfuseMask_BeeKey1Sel) >> fusedef.kEfuseShift_BeeKey1Sel) != setBeeKey1Sel:
                     self.popupMsgBox('Fuse BOOT_CFG1[7:6] BEE_KEY1_SEL has been burned, it is program-once!')
                     return False
-            burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_BeeKeySel, getBeeKeySel)
+            burnResult = self.burnMcuDeviceFuseBitsByPlan(fusedef.kEfuseLocation_BeeKeySel, getBeeKeySel)
             if not burnResult:
                 self.popupMsgBox('Fuse BOOT_CFG1[7:4] BEE_KEY0/1_SEL region was not burned successfully!')
                 return False
         return True
 
+    ##
+    # @brief Let Flashloader generate KeyBlob from loaded DEK, it will be programmed at dekDataOffset from image start.
+    def _loadHabDekKeyBlobContext( self, dekDataOffset ):
+        # KeyBlob context option: tag 0xb, type 0 (update context), option block size 3, DEK size 128bit
+        keyBlobContextOpt = 0xb0300000
+        status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext, 0x4, keyBlobContextOpt)
+        self.printLog(cmdStr)
+        if status != boot.status.kStatus_Success:
+            return False
+        status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext + 4, 0x4, rundef.kRamFreeSpaceStart_LoadDekData)
+        self.printLog(cmdStr)
+        if status != boot.status.kStatus_Success:
+            return False
+        status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext + 8, 0x4, dekDataOffset)
+        self.printLog(cmdStr)
+        if status != boot.status.kStatus_Success:
+            return False
+        status, results, cmdStr = self.blhost.configureMemory(self.bootDeviceMemId, rundef.kRamFreeSpaceStart_LoadKeyBlobContext)
+        self.printLog(cmdStr)
+        return (status == boot.status.kStatus_Success)
+
     def flashHabDekToGenerateKeyBlob ( self ):
         if os.path.isfile(self.habDekFilename) and self.habDekDataOffset != None:
             self._prepareForBootDeviceOperation()
@@ -962,54 +1450,61 @@ class secBootRun(gencore.secBootGen):
             # if type = 0, next words indicate the address that holds dek
             #              the 3rd word
             #----------------------------------------------------------------------------
-            keyBlobContextOpt = 0xb0300000
             keyBlobDataOpt = 0xb1000000
             status, results, cmdStr = self.blhost.writeMemory(rundef.kRamFreeSpaceStart_LoadDekData, self.habDekFilename)
             self.printLog(cmdStr)
             if status != boot.status.kStatus_Success:
                 return False
-            status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext, 0x4, keyBlobContextOpt)
-            self.printLog(cmdStr)
-            if status != boot.status.kStatus_Success:
-                return False
-            status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext + 4, 0x4, rundef.kRamFreeSpaceStart_LoadDekData)
-            self.printLog(cmdStr)
-            if status != boot.status.kStatus_Success:
-                return False
-            status, results, cmdStr = self.blhost.fillMemory(rundef.kRamFreeSpaceStart_LoadKeyBlobContext + 8, 0x4, self.habDekDataOffset)
-            self.printLog(cmdStr)
-            if status != boot.status.kStatus_Success:
-                return False
-            status, results, cmdStr = self.blhost.configureMemory(self.bootDeviceMemId, rundef.kRamFreeSpaceStart_LoadKeyBlobContext)
-            self.printLog(cmdStr)
-            if status != boot.status.kStatus_Success:
+            if not self._loadHabDekKeyBlobContext(self.habDekDataOffset):
                 return False
+            loadedDekDataOffset = self.habDekDataOffset
+            ########################################################################
+            # Flashloader will not erase keyblob region automatically, so we need to handle it here manually
+            # Image sectors have been erased and programmed already, so only the sectors beyond them are erased
+            alignedErasedSize = misc.align_up(imageLen, self.comMemEraseUnit)
+            needToBeErasedSize = misc.align_up(self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob, self.comMemEraseUnit)
+            if alignedErasedSize < needToBeErasedSize:
+                eraseIntentList = []
+                for i in range(imageCopies):
+                    imageLoadAddr = 0x0
+                    if self.bootDevice == uidef.kBootDevice_SemcNand:
+                        # KeyBlob blocks follow image blocks in the same good block list
+                        goodBlockList = self.getSemcNandImageGoodBlockList(i, needToBeErasedSize)
+                        if goodBlockList == None:
+                            self.printLog('There are not enough good blocks for KeyBlob of image copy %d !' %(i))
+                            return False
+                        for block in goodBlockList[alignedErasedSize / self.semcNandBlockSize:]:
+                            eraseIntentList.append((self.bootDeviceMemBase + block * self.semcNandBlockSize, self.semcNandBlockSize))
+                        continue
+                    elif self.bootDevice == uidef.kBootDevice_FlexspiNor or self.bootDevice == uidef.kBootDevice_LpspiNor:
+                        imageLoadAddr = self.bootDeviceMemBase
+                    else:
+                        pass
+                    eraseIntentList.append((imageLoadAddr + alignedErasedSize, needToBeErasedSize - alignedErasedSize))
+                status = self.eraseBootDeviceForWriteIntents(eraseIntentList)
+                if status != boot.status.kStatus_Success:
+                    return False
+            ########################################################################
             for i in range(imageCopies):
+                if self.bootDevice == uidef.kBootDevice_SemcNand:
+                    # Flashloader puts KeyBlob at dekDataOffset from the configured start block of image copy,
+                    # so the offset is moved to the good block where the KeyBlob part of image copy really is
+                    semcNandOpt, semcNandFcbOpt, semcNandImageInfoList = uivar.getBootDeviceConfiguration(self.bootDevice)
+                    goodBlockList = self.getSemcNandImageGoodBlockList(i, self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob)
+                    if goodBlockList == None:
+                        self.printLog('There are not enough good blocks for KeyBlob of image copy %d !' %(i))
+                        return False
+                    copyStartAddr = self.bootDeviceMemBase + (semcNandImageInfoList[i] >> 16) * self.semcNandBlockSize
+                    dekDataOffset = self.getSemcNandImageAddr(goodBlockList, self.habDekDataOffset) - copyStartAddr
+                    if dekDataOffset != loadedDekDataOffset:
+                        if not self._loadHabDekKeyBlobContext(dekDataOffset):
+                            return False
+                        loadedDekDataOffset = dekDataOffset
                 ramFreeSpace = rundef.kRamFreeSpaceStart_LoadKeyBlobData + (rundef.kRamFreeSpaceStep_LoadKeyBlobData * i)
                 status, results, cmdStr = self.blhost.fillMemory(ramFreeSpace, 0x4, keyBlobDataOpt + i)
                 self.printLog(cmdStr)
                 if status != boot.status.kStatus_Success:
                     return False
-                ########################################################################
-                # Flashloader will not erase keyblob region automatically, so we need to handle it here manually
-                imageLoadAddr = 0x0
-                if self.bootDevice == uidef.kBootDevice_SemcNand:
-                    semcNandOpt, semcNandFcbOpt, imageInfo = uivar.getBootDeviceConfiguration(self.bootDevice)
-                    imageLoadAddr = self.bootDeviceMemBase + (imageInfo[i] >> 16) * self.semcNandBlockSize
-                elif self.bootDevice == uidef.kBootDevice_FlexspiNor or self.bootDevice == uidef.kBootDevice_LpspiNor:
-                    imageLoadAddr = self.bootDeviceMemBase
-                else:
-                    pass
-                alignedErasedSize = misc.align_up(imageLen, self.comMemEraseUnit)
-                needToBeErasedSize = misc.align_up(self.habDekDataOffset + memdef.kMemBlockSize_KeyBlob, self.comMemEraseUnit)
-                if alignedErasedSize < needToBeErasedSize:
-                    memEraseLen = needToBeErasedSize - alignedErasedSize
-                    alignedMemEraseAddr = imageLoadAddr + alignedErasedSize
-                    status, results, cmdStr = self.blhost.flashEraseRegion(alignedMemEraseAddr, memEraseLen, self.bootDeviceMemId)
-                    self.printLog(cmdStr)
-                    if status != boot.status.kStatus_Success:
-                        return False
-                ########################################################################
                 status, results, cmdStr = self.blhost.configureMemory(self.bootDeviceMemId, ramFreeSpace)
                 self.printLog(cmdStr)
                 if status != boot.status.kStatus_Success:
@@ -1029,7 +1524,7 @@ class secBootRun(gencore.secBootGen):
             secConfig1 = self.readMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_SecConfig1, '', False)
             if secConfig1 != None:
                 secConfig1 = secConfig1 | fusedef.kEfuseMask_SecConfig1
-                burnResult = self.burnMcuDeviceFuseByBlhost(fusedef.kEfuseLocation_SecConfig1, secConfig1)
+                burnResult = self.burnMcuDeviceFuseBitsByPlan(fusedef.kEfuseLocation_SecConfig1, secConfig1)
                 if not burnResult:
                     self.popupMsgBox('Fuse BOOT_CFG1[1] SEC_CONFIG[1] region was not burned successfully!')
                     return False
@@ -1038,4 +1533,6 @@ class secBootRun(gencore.secBootGen):
     def resetMcuDevice( self ):
         status, results, cmdStr = self.blhost.reset()
         self.printLog(cmdStr)
+        self.flashloaderUartSession = None
+        self.invalidateMcuDeviceFuseCache()
         return (status == boot.status.kStatus_Success)
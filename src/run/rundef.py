@@ -3,6 +3,20 @@ import sys, os
 kUartSpeed_Blhost = ['115200', '57600', '19200', '9600', '4800']
 kUartSpeed_Sdphost = ['115200']
 
+# Short timeout (seconds) used to find out which bootloader is running before connecting
+kProbeTimeout_Bootloader = 0.5
+
+# Flashloader autobauds on its first UART ping, so it is always pinged at the selected rate first,
+#  then asked by set-property to switch to a faster rate (fastest first)
+kUartSpeed_BlhostNegotiation = ['921600', '460800', '230400', '115200']
+# Only flashloader builds with run-time UART rate switching know this property, stock ones
+#  answer kStatus_UnknownProperty and the selected rate is kept
+kPropertyTag_FlashloaderUartBaudrate = 0x1F
+kUartSpeedNegotiation_PingBurst = 8
+kUartSpeedNegotiation_ProbeLength = 0x1000
+
+kSdpWriteFileChunkSize = 0x40000
+
 kBootDeviceMemId_SemcNor      = 0x8
 kBootDeviceMemId_FlexspiNor   = 0x9
 kBootDeviceMemId_SemcNand     = 0x100
@@ -12,7 +26,6 @@ kBootDeviceMemId_UsdhcSd      = 0x120
 kBootDeviceMemId_UsdhcMmc     = 0x121
 
 kBootDeviceMemBase_SemcNor       = 0x90000000
-kBootDeviceMemBase_SemcSdram     = 0x80000000
 kBootDeviceMemBase_FlexspiNor    = 0x60000000
 kBootDeviceMemBase_FlexspiNorSip = 0x70000000
 kBootDeviceMemBase_SemcNand      = 0x0
@@ -24,8 +37,6 @@ kBootDeviceMemBase_UsdhcMmc      = 0x0
 kBootDeviceMemXipSize_SemcNor      = 0x01000000 #16MB
 kBootDeviceMemXipSize_FlexspiNor   = 0x10000000 #256MB
 
-kBootDeviceMemMaxSize_SemcSdram    = 0x60000000 #1.5GB
-
 kRamFreeSpaceStart_LoadCommOpt        = 0x00002000
 kRamFreeSpaceStart_LoadDekData        = 0x00002100
 kRamFreeSpaceStart_LoadKeyBlobContext = 0x00002200
@@ -53,31 +64,16 @@ kRegisterMask_SecConfig = 0x00000003
 kRegisterShift_SecConfig = 0
 
 #----------------SEMC NAND----------------------
-kSemcNandFcbTag_Fingerprint = 0x4E464342  # 'NFCB'
-kSemcNandFcbTag_Semc        = 0x434D4553  # 'SEMC'
-
 kSemcNandFcbInfo_StartAddr = 0x0
 kSemcNandFcbInfo_Length    = 0x400
 
-kSemcNandFcbOffset_Fingerprint             = 0x004
-kSemcNandFcbOffset_DBBTSerachAreaStartPage = 0x00c
-kSemcNandFcbOffset_FirmwareCopies          = 0x014
 kSemcNandFcbOffset_NandCfgBlock            = 0x100
-kSemcNandFcbOffset_SemcTag                 = 0x100
-kSemcNandFcbOffset_PageByteSize            = 0x1a0
-kSemcNandFcbOffset_PagesInBlock            = 0x1a8
-kSemcNandFcbOffset_BlocksInPlane           = 0x1ac
-kSemcNandFcbOffset_PlanesInDevice          = 0x1b0
 
 #----------------FlexSPI NOR---------------------
-kFlexspiNorCfgTag_Flexspi = 0x42464346  # 'FCFB'
-
 kFlexspiNorCfgInfo_StartAddr = 0x0
 kFlexspiNorCfgInfo_Length    = 0x400
 kFlexspiNorCfgInfo_Notify    = 0xF000000F
 
-kFlexspiNorCfgOffset_FlexspiTag     = 0x000
-kFlexspiNorCfgOffset_PageByteSize   = 0x1c0
-kFlexspiNorCfgOffset_SectorByteSize = 0x1c4
-kFlexspiNorCfgOffset_BlockByteSize  = 0x1d0
-
+#----------------Erase Planner-------------------
+kEraseType_Region = 'region'
+kEraseType_Chip   = 'chip'
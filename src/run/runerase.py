@@ -0,0 +1,59 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import rundef
+sys.path.append(os.path.abspath(".."))
+from boot import memoryrange
+from utils import misc
+
+class EraseCommand(object):
+
+    def __init__(self, start, length, eraseType):
+        self.start = start
+        self.length = length
+        self.eraseType = eraseType
+
+    def __repr__(self):
+        return "<EraseCommand %s: 0x%08x-0x%08x>" % (self.eraseType, self.start, self.start + self.length - 1)
+
+class EraseGeometry(object):
+
+    def __init__(self, memBase, eraseUnit, deviceSize=0):
+        self.memBase = memBase
+        self.eraseUnit = eraseUnit
+        self.deviceSize = deviceSize
+
+##
+# @brief Turn a list of (start, length) write intents into a minimal list of erase commands.
+#
+# Intents are aligned to the erase unit and merged when they overlap or touch, every merged
+# range is then erased by one flash-erase-region command (Flashloader picks the erase
+# granularity itself). flash-erase-all is only used when the merged range already covers
+# the whole device.
+#
+# There is no choice between sector, block and chip erase by estimated time: blhost cannot
+# ask for a sector or block erase, and the config block and FCB give no erase timings. Erasing
+# more than the intents by chip erase is never done, as it would wipe data the user keeps.
+#
+# Pass eraseUnit and deviceSize 0 when the geometry is not known for current device, intents
+# are then erased exactly as given.
+#
+# @return List of EraseCommand
+def planErase( intentList, geometry ):
+    rangeList = []
+    for start, length in intentList:
+        if length <= 0:
+            continue
+        alignedStart = start
+        alignedEnd = start + length
+        if geometry.eraseUnit:
+            alignedStart = misc.align_down(alignedStart, geometry.eraseUnit)
+            alignedEnd = misc.align_up(alignedEnd, geometry.eraseUnit)
+        rangeList.append(memoryrange.MemoryRange(alignedStart, alignedEnd - alignedStart))
+    rangeList = memoryrange.coalesceRangeList(rangeList)
+
+    if geometry.deviceSize and len(rangeList) == 1 and rangeList[0].start <= geometry.memBase and \
+       rangeList[0].end + 1 >= geometry.memBase + geometry.deviceSize:
+        return [EraseCommand(geometry.memBase, geometry.deviceSize, rundef.kEraseType_Chip)]
+    return [EraseCommand(r.start, r.length, rundef.kEraseType_Region) for r in rangeList]
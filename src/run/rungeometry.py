@@ -0,0 +1,115 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+import json
+import collections
+sys.path.append(os.path.abspath(".."))
+from mem import memstruct
+
+FlexspiNorGeometry = collections.namedtuple('FlexspiNorGeometry', ['pageByteSize', 'sectorByteSize', 'blockByteSize', 'totalByteSize',
+                                                                   'deviceType', 'sflashPadType', 'serialClkFreq', 'readSampleClkSrc',
+                                                                   'csHoldTime', 'csSetupTime', 'columnAddressWidth', 'controllerMiscOption',
+                                                                   'lookupTable'])
+
+SemcNandGeometry = collections.namedtuple('SemcNandGeometry', ['pageByteSize', 'pagesInBlock', 'blocksInPlane', 'planesInDevice',
+                                                               'firmwareCopies', 'dbbtSearchStartPage'])
+
+kGeometryClassDict = {'FlexspiNorGeometry' : FlexspiNorGeometry,
+                      'SemcNandGeometry'   : SemcNandGeometry}
+
+def getBlockByteSize( geometry ):
+    if isinstance(geometry, SemcNandGeometry):
+        return geometry.pageByteSize * geometry.pagesInBlock
+    return geometry.blockByteSize
+
+def getTotalByteSize( geometry ):
+    if isinstance(geometry, SemcNandGeometry):
+        return geometry.pageByteSize * geometry.pagesInBlock * geometry.blocksInPlane * geometry.planesInDevice
+    return geometry.totalByteSize
+
+##
+# @brief Decode geometry from FlexSPI NOR config block in buffer, None if the block is not valid.
+def probeFlexspiNorGeometry( buf, offset=0 ):
+    fdcb = memstruct.FlexspiNorFdcb.fromBuffer(buf, offset)
+    if not fdcb.isValid():
+        return None
+    return FlexspiNorGeometry(fdcb.pageByteSize, fdcb.sectorByteSize, fdcb.blockByteSize, fdcb.sflashA1Size,
+                              fdcb.deviceType, fdcb.sflashPadType, fdcb.serialClkFreq, fdcb.readSampleClkSrc,
+                              fdcb.csHoldTime, fdcb.csSetupTime, fdcb.columnAddressWidth, fdcb.controllerMiscOption,
+                              fdcb.lookupTable)
+
+##
+# @brief Decode geometry from SEMC NAND FCB in buffer, None if the FCB is not valid.
+def probeSemcNandGeometry( buf, offset=0 ):
+    nfcb = memstruct.SemcNandFcb.fromBuffer(buf, offset)
+    if not nfcb.isValid():
+        return None
+    return SemcNandGeometry(nfcb.pageByteSize, nfcb.pagesInBlock, nfcb.blocksInPlane, nfcb.planesInDevice,
+                            nfcb.firmwareCopies, nfcb.dbbtSearchStartPage)
+
+##
+# @brief Geometry of probed boot devices, saved per device UUID, boot device and its configuration options.
+class GeometryCache(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.geometryDict = None
+
+    def _load( self ):
+        if self.geometryDict == None:
+            self.geometryDict = {}
+            if os.path.isfile(self.filename):
+                try:
+                    with open(self.filename, 'r') as fileObj:
+                        self.geometryDict = json.load(fileObj)
+                except:
+                    pass
+        return self.geometryDict
+
+    def _save( self ):
+        with open(self.filename, 'w') as fileObj:
+            json.dump(self.geometryDict, fileObj, indent=1)
+
+    def _makeKey( self, uuid, bootDevice, optionList ):
+        return '%s|%s|%s' % (uuid, bootDevice, repr(optionList))
+
+    def get( self, uuid, bootDevice, optionList ):
+        if uuid == None:
+            return None
+        geometryDict = self._load()
+        key = self._makeKey(uuid, bootDevice, optionList)
+        if not geometryDict.has_key(key):
+            return None
+        entry = geometryDict[key]
+        try:
+            geometryClass = kGeometryClassDict[entry['type']]
+            fieldDict = dict([(str(name), value) for name, value in entry['fields'].items()])
+            if fieldDict.has_key('lookupTable'):
+                fieldDict['lookupTable'] = tuple(fieldDict['lookupTable'])
+            return geometryClass(**fieldDict)
+        except:
+            return None
+
+    def put( self, uuid, bootDevice, optionList, geometry ):
+        if uuid == None:
+            return
+        geometryDict = self._load()
+        geometryDict[self._makeKey(uuid, bootDevice, optionList)] = {'type' : type(geometry).__name__, 'fields' : geometry._asdict()}
+        try:
+            self._save()
+        except:
+            pass
+
+    def invalidate( self, uuid, bootDevice=None ):
+        geometryDict = self._load()
+        prefix = '%s|' % (uuid)
+        if bootDevice != None:
+            prefix += '%s|' % (bootDevice)
+        for key in geometryDict.keys():
+            if key.startswith(prefix):
+                del geometryDict[key]
+        try:
+            self._save()
+        except:
+            pass
@@ -0,0 +1,269 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import os
+sys.path.append(os.path.abspath(".."))
+from fuse import fusedef
+from utils import bitfield
+
+##
+# Boot device option words (as passed to flashloader configure-memory) and the eFuse fields they map to.
+
+kFlexspiNorOpt0 = bitfield.BitFieldWord('FlexSPI NOR option0', [
+    bitfield.BitField('tag',             31, 28, fixedValue=0xC),
+    bitfield.BitField('optionSize',      27, 24),
+    bitfield.BitField('deviceType',      23, 20),
+    bitfield.BitField('queryPads',       19, 16),
+    bitfield.BitField('cmdPads',         15, 12),
+    bitfield.BitField('quadModeSetting', 11,  8),
+    bitfield.BitField('miscMode',         7,  4),
+    bitfield.BitField('maxFrequency',     3,  0),
+])
+
+kFlexspiNandOpt = bitfield.BitFieldWord('FlexSPI NAND option', [
+    bitfield.BitField('optionSize',      27, 24),
+    bitfield.BitField('flashSize',       19, 16),
+    bitfield.BitField('multiplane',      15, 12),
+    bitfield.BitField('pagesPerBlock',   11,  8),
+    bitfield.BitField('pageSize',         7,  4),
+    bitfield.BitField('maxFrequency',     3,  0),
+])
+
+kFlexspiNandFcbOpt = bitfield.BitFieldWord('FlexSPI NAND FCB option', [
+    bitfield.BitField('searchCount',     27, 24),
+    bitfield.BitField('searchStride',    23, 20),
+    bitfield.BitField('addressType',     11,  8),
+    bitfield.BitField('fcbSize',          3,  0),
+])
+
+kFlexspiNandImageInfo = bitfield.BitFieldWord('FlexSPI NAND image info', [
+    bitfield.BitField('blockCount',      31, 16),
+    bitfield.BitField('blockId',         15,  0),
+])
+
+kFlexspiNandKeyBlob = bitfield.BitFieldWord('FlexSPI NAND keyblob option', [
+    bitfield.BitField('type',            27, 24),
+    bitfield.BitField('keyBlobInfoSize', 23, 20),
+    bitfield.BitField('dekSize',          7,  4),
+    bitfield.BitField('imageIndex',       3,  0),
+])
+
+kSemcNorOpt = bitfield.BitFieldWord('SEMC NOR option', [
+    bitfield.BitField('pcsPort',         14, 12),
+    bitfield.BitField('advPolarity',     10, 10),
+    bitfield.BitField('dataPortSize',     9,  8),
+    bitfield.BitField('timingMode',       3,  2, valueList=[0, 1, 2]),
+    bitfield.BitField('commandSet',       1,  0, valueList=[0, 1]),
+])
+
+kSemcNandOpt = bitfield.BitFieldWord('SEMC NAND option', [
+    bitfield.BitField('eccStatus',       17, 17),
+    bitfield.BitField('eccType',         16, 16),
+    bitfield.BitField('pcsPort',         14, 12),
+    bitfield.BitField('ioPortSize',       9,  8),
+    bitfield.BitField('onfiTimingMode',   6,  4),
+    bitfield.BitField('edoMode',          3,  3),
+    bitfield.BitField('onfiVersion',      2,  0),
+])
+
+kSemcNandFcbOpt = bitfield.BitFieldWord('SEMC NAND FCB option', [
+    bitfield.BitField('imageCopies',     19, 16),
+    bitfield.BitField('searchStride',    15,  8),
+    bitfield.BitField('searchCount',      3,  0),
+])
+
+kSemcNandImageInfo = bitfield.BitFieldWord('SEMC NAND image info', [
+    bitfield.BitField('imageIndex',      31, 16),
+    bitfield.BitField('imageCount',      15,  0),
+])
+
+kUsdhcSdOpt = bitfield.BitFieldWord('uSDHC SD option', [
+    bitfield.BitField('pwrDownTime',     25, 24),
+    bitfield.BitField('pwrPolarity',     23, 23),
+    bitfield.BitField('pwrUpTime',       20, 20),
+    bitfield.BitField('pwrCycle',        19, 19),
+    bitfield.BitField('timingMode',      14, 12),
+    bitfield.BitField('busWidth',         8,  8),
+])
+
+kUsdhcMmcOpt1 = bitfield.BitFieldWord('uSDHC MMC option1', [
+    bitfield.BitField('partitionAccess', 26, 24),
+    bitfield.BitField('bootPartition',   22, 20),
+    bitfield.BitField('bootBusWidth',    17, 16),
+    bitfield.BitField('timing',          15, 12),
+    bitfield.BitField('busWidth',        11,  8),
+    bitfield.BitField('bootMode',         5,  4),
+    bitfield.BitField('bootBus',          3,  3),
+    bitfield.BitField('bootAck',          2,  2),
+    bitfield.BitField('bootConfig',       0,  0),
+])
+
+kUsdhcMmcOpt2 = bitfield.BitFieldWord('uSDHC MMC option2', [
+    bitfield.BitField('pwrDownTime',     25, 24),
+    bitfield.BitField('pwrPolarity',     23, 23),
+    bitfield.BitField('pwrUpTime',       20, 20),
+    bitfield.BitField('pwrCycle',        19, 19),
+    bitfield.BitField('is1V8',           18, 18),
+])
+
+kLpspiNorOpt0 = bitfield.BitFieldWord('LPSPI NOR option0', [
+    bitfield.BitField('tag',             31, 28, fixedValue=0xC),
+    bitfield.BitField('optionSize',      27, 24),
+    bitfield.BitField('spiIndex',        23, 20, valueList=[1, 2, 3, 4]),
+    bitfield.BitField('spiPcs',          19, 16),
+    bitfield.BitField('deviceType',      15, 12, valueList=[0, 1]),
+    bitfield.BitField('totalSize',       11,  8),
+    bitfield.BitField('sectorSize',       7,  4, valueList=[0, 1, 2, 3, 4, 5]),
+    bitfield.BitField('pageSize',         3,  0, valueList=[0, 1, 2, 3, 4, 5]),
+])
+
+kLpspiNorOpt1 = bitfield.BitFieldWord('LPSPI NOR option1', [
+    bitfield.BitField('spiSpeed',         3,  0, valueList=[0, 1, 2, 3]),
+])
+
+kFuseLpspiCfg = bitfield.BitFieldWord('MISC_CONF0 LPSPI', [
+    bitfield.BitField.fromMask('lpspiSpeed',    fusedef.kEfuseMask_LpspiSpeed,    fusedef.kEfuseShift_LpspiSpeed),
+    bitfield.BitField.fromMask('spiAddressing', fusedef.kEfuseMask_SpiAddressing, fusedef.kEfuseShift_SpiAddressing),
+    bitfield.BitField.fromMask('lpspiIndex',    fusedef.kEfuseMask_LpspiIndex,    fusedef.kEfuseShift_LpspiIndex),
+    bitfield.BitField.fromMask('eepromEnable',  fusedef.kEfuseMask_EepromEnable,  fusedef.kEfuseShift_EepromEnable),
+])
+
+kFuseSemcNandCfg = bitfield.BitFieldWord('MISC_CONF1 SEMC NAND', [
+    bitfield.BitField.fromMask('eccStatus', fusedef.kEfuseMask_RawNandEccStatus,  fusedef.kEfuseShift_RawNandEccStatus),
+    bitfield.BitField.fromMask('eccEdoSet', fusedef.kEfuseMask_RawNandEccEdoSet,  fusedef.kEfuseShift_RawNandEccEdoSet),
+    bitfield.BitField.fromMask('portSize',  fusedef.kEfuseMask_RawNandPortSize,   fusedef.kEfuseShift_RawNandPortSize),
+])
+
+##
+# LPSPI NOR size codes, page/sector/total size field value -> bytes
+def getLpspiNorPageByteSize( code ):
+    if code <= 2:
+        return 1 << (code + 8)
+    else:
+        return 1 << (code + 2)
+
+def getLpspiNorSectorByteSize( code ):
+    if code <= 1:
+        return 1 << (code + 12)
+    else:
+        return 1 << (code + 13)
+
+def getLpspiNorTotalByteSize( code ):
+    if code <= 11:
+        return 1 << (code + 19)
+    else:
+        return 1 << (code + 3)
+
+def _getSizeCode( getByteSizeFunc, maxCode, byteSize ):
+    for code in range(maxCode + 1):
+        if getByteSizeFunc(code) == byteSize:
+            return code
+    raise ValueError('Unsupported size: %d bytes' % byteSize)
+
+def getLpspiNorPageSizeCode( byteSize ):
+    return _getSizeCode(getLpspiNorPageByteSize, 5, byteSize)
+
+def getLpspiNorSectorSizeCode( byteSize ):
+    return _getSizeCode(getLpspiNorSectorByteSize, 5, byteSize)
+
+def getLpspiNorTotalSizeCode( byteSize ):
+    return _getSizeCode(getLpspiNorTotalByteSize, 15, byteSize)
+
+def _getLpspiSpiAddressing( totalSizeCode ):
+    if getLpspiNorTotalByteSize(totalSizeCode) > (64 * 1024):
+        return fusedef.kSpiAddressing_3Bytes
+    else:
+        return fusedef.kSpiAddressing_2Bytes
+
+##
+# Option word field -> fuse field conversion tables: (option field, fuse field, convert)
+kLpspiNorOpt0ToFuseTable = [(None,        'eepromEnable',  1),
+                            ('spiIndex',  'lpspiIndex',    lambda spiIndex: spiIndex - 1),
+                            ('totalSize', 'spiAddressing', _getLpspiSpiAddressing)]
+kLpspiNorOpt1ToFuseTable = [('spiSpeed',  'lpspiSpeed',    None)]
+
+# x8 -> 0, x16 -> 1
+kSemcNandPortSizeDict = {0 : 0, 1 : 0, 2 : 1, 3 : 1}
+# Some devices keep ECC check type in MISC_CONF1 instead of EDO mode, and the fuse is inverted
+kSemcNandOptToFuseTable_EccType = [('eccStatus',  'eccStatus', None),
+                                   ('ioPortSize', 'portSize',  kSemcNandPortSizeDict),
+                                   ('eccType',    'eccEdoSet', {0 : 1, 1 : 0})]
+kSemcNandOptToFuseTable_EdoMode = [('eccStatus',  'eccStatus', None),
+                                   ('ioPortSize', 'portSize',  kSemcNandPortSizeDict),
+                                   ('edoMode',    'eccEdoSet', None)]
+
+##
+# @brief Fuse value and the mask of fuse bits it covers, for MISC_CONF0 LPSPI boot fields.
+def convertLpspiNorOptToFuse( lpspiNorOpt0, lpspiNorOpt1 ):
+    fuseValue = bitfield.convertBitFieldWord(kLpspiNorOpt0, lpspiNorOpt0, kFuseLpspiCfg, kLpspiNorOpt0ToFuseTable)
+    fuseValue = bitfield.convertBitFieldWord(kLpspiNorOpt1, lpspiNorOpt1, kFuseLpspiCfg, kLpspiNorOpt1ToFuseTable, fuseValue)
+    return fuseValue, kFuseLpspiCfg.mask
+
+def convertSemcNandOptToFuse( semcNandOpt, isEccTypeSetInFuseMiscConf ):
+    if isEccTypeSetInFuseMiscConf:
+        conversionTable = kSemcNandOptToFuseTable_EccType
+    else:
+        conversionTable = kSemcNandOptToFuseTable_EdoMode
+    fuseValue = bitfield.convertBitFieldWord(kSemcNandOpt, semcNandOpt, kFuseSemcNandCfg, conversionTable)
+    return fuseValue, bitfield.getConvertedFieldMask(kFuseSemcNandCfg, conversionTable)
+
+class TestOptionToFuse:
+    def checkValueError(self, func, *args):
+        try:
+            func(*args)
+        except ValueError:
+            return
+        assert False, 'ValueError was not raised'
+
+    def test_lpspi_size_codes(self):
+        for code in range(6):
+            assert getLpspiNorPageSizeCode(getLpspiNorPageByteSize(code)) == code
+            assert getLpspiNorSectorSizeCode(getLpspiNorSectorByteSize(code)) == code
+        for code in range(16):
+            assert getLpspiNorTotalSizeCode(getLpspiNorTotalByteSize(code)) == code
+        assert getLpspiNorPageByteSize(0) == 256
+        assert getLpspiNorSectorByteSize(0) == 4 * 1024
+        assert getLpspiNorTotalByteSize(5) == 16 * 1024 * 1024
+        assert getLpspiNorTotalByteSize(12) == 32 * 1024
+        self.checkValueError(getLpspiNorPageSizeCode, 300)
+
+    def test_lpspi_default(self):
+        # LPSPI1, 16MB NOR, 20MHz
+        fuseValue, fuseMask = convertLpspiNorOptToFuse(0xc1100500, 0x00000000)
+        assert fuseValue == fusedef.kEfuseMask_EepromEnable
+        assert fuseMask == 0x3F000000
+
+    def test_lpspi_small_eeprom(self):
+        opt0 = kLpspiNorOpt0.encode({'spiIndex' : 3, 'totalSize' : 12})
+        opt1 = kLpspiNorOpt1.encode({'spiSpeed' : 2})
+        fuseValue, fuseMask = convertLpspiNorOptToFuse(opt0, opt1)
+        # EEPROM enabled, LPSPI3, 2-byte addressing, 5MHz
+        assert fuseValue == 0x2D000000
+        assert fuseValue & ~fuseMask == 0
+
+    def test_lpspi_bad_index(self):
+        self.checkValueError(kLpspiNorOpt0.set, 0xc1100500, 'spiIndex', 0)
+        # Index 0 in a raw option word cannot be mapped to the fuse
+        self.checkValueError(convertLpspiNorOptToFuse, 0xc1000500, 0x00000000)
+
+    def test_semc_nand_ecc_type(self):
+        opt = kSemcNandOpt.encode({'eccStatus' : 1, 'eccType' : 0, 'ioPortSize' : 2, 'edoMode' : 0})
+        fuseValue, fuseMask = convertSemcNandOptToFuse(opt, True)
+        # ECC type is inverted in fuse
+        assert fuseValue == fusedef.kEfuseMask_RawNandEccStatus | fusedef.kEfuseMask_RawNandPortSize | fusedef.kEfuseMask_RawNandEccEdoSet
+        assert fuseMask == 0x01000018
+        fuseValue, fuseMask = convertSemcNandOptToFuse(kSemcNandOpt.set(opt, 'eccType', 1), True)
+        assert fuseValue == 0x01000008
+
+    def test_semc_nand_edo_mode(self):
+        opt = kSemcNandOpt.encode({'eccStatus' : 0, 'eccType' : 1, 'ioPortSize' : 1, 'edoMode' : 1})
+        fuseValue, fuseMask = convertSemcNandOptToFuse(opt, False)
+        # x8 port, EDO mode goes to the same fuse bit as ECC type
+        assert fuseValue == fusedef.kEfuseMask_RawNandEccEdoSet
+        assert fuseMask == 0x01000018
+
+    def test_option_words_decode(self):
+        assert kFlexspiNorOpt0.validate(0xc0000007) == []
+        assert kLpspiNorOpt0.validate(0xc1100500) == []
+        assert kSemcNandFcbOpt.decode(0x00010101) == {'imageCopies' : 1, 'searchStride' : 1, 'searchCount' : 1}
+        assert len(kFlexspiNorOpt0.validate(0x00000007)) == 1
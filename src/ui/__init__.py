@@ -2,7 +2,11 @@
 
 import uicore
 import uidef
+import uicfgdef
 import uivar
+import uiconfig
+import uihotplug
+import uilog
 import ui_cfg_flexspinor
 import ui_cfg_flexspinand
 import ui_cfg_semcnor
@@ -15,5 +19,5 @@ import ui_settings_cert
 import ui_settings_fixed_otpmk_key
 import ui_settings_flexible_user_keys
 
-__all__ = ["uicore", "uidef", "uivar", "ui_cfg_flexspinor", "ui_cfg_flexspinand", "ui_cfg_semcnor", "ui_cfg_semcnand", "ui_cfg_usdhcsd", "ui_cfg_usdhcmmc", "ui_cfg_lpspinor", "ui_cfg_dcd", "ui_settings_cert", "ui_settings_fixed_otpmk_key", "ui_settings_flexible_user_keys"]
+__all__ = ["uicore", "uidef", "uicfgdef", "uivar", "uiconfig", "uihotplug", "uilog", "ui_cfg_flexspinor", "ui_cfg_flexspinand", "ui_cfg_semcnor", "ui_cfg_semcnand", "ui_cfg_usdhcsd", "ui_cfg_usdhcmmc", "ui_cfg_lpspinor", "ui_cfg_dcd", "ui_settings_cert", "ui_settings_fixed_otpmk_key", "ui_settings_flexible_user_keys"]
 
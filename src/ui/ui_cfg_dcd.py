@@ -9,7 +9,6 @@ import uivar
 sys.path.append(os.path.abspath(".."))
 from win import bootDeviceWin_DCD
 from gen import gendef
-from run import rundef
 
 class secBootUiCfgDcd(bootDeviceWin_DCD.bootDeviceWin_DCD):
 
@@ -135,11 +134,11 @@ class secBootUiCfgDcd(bootDeviceWin_DCD.bootDeviceWin_DCD):
             if len(hexText) > 2 and hexText[0:2] == '0x':
                 try:
                     val32 = int(hexText[2:len(hexText)], 16)
-                    if val32 >= rundef.kBootDeviceMemBase_SemcSdram and val32 < rundef.kBootDeviceMemBase_SemcSdram + rundef.kBootDeviceMemMaxSize_SemcSdram:
+                    if val32 >= gendef.kBootDeviceMemBase_SemcSdram and val32 < gendef.kBootDeviceMemBase_SemcSdram + gendef.kBootDeviceMemMaxSize_SemcSdram:
                         status = True
                         self.dcdSettingsDict['sdramBase'] = hexText
                     else:
-                        self.popupMsgBox('SDRAM base should be in the range of 0x%x - 0x%x' %(rundef.kBootDeviceMemBase_SemcSdram, (rundef.kBootDeviceMemBase_SemcSdram + rundef.kBootDeviceMemMaxSize_SemcSdram - 1)))
+                        self.popupMsgBox('SDRAM base should be in the range of 0x%x - 0x%x' %(gendef.kBootDeviceMemBase_SemcSdram, (gendef.kBootDeviceMemBase_SemcSdram + gendef.kBootDeviceMemMaxSize_SemcSdram - 1)))
                 except:
                     self.popupMsgBox('Illegal input detected! You should input like this format: 0x80000000')
             else:
@@ -5,6 +5,7 @@ import os
 import uivar
 import uidef
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_FlexspiNand
 
 class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
@@ -32,7 +33,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x6
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xFFFFFFF0) | (val << 0)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'maxFrequency', val)
 
     def _getPageSize( self ):
         txt = self.m_choice_Page_Size.GetString(self.m_choice_Page_Size.GetSelection())
@@ -42,7 +43,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x4
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xFFFFFF0F) | (val << 4)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'pageSize', val)
 
     def _getPagePerBlock( self ):
         txt = self.m_choice_Pages.GetString(self.m_choice_Pages.GetSelection())
@@ -56,7 +57,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x3
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xFFFFF0FF) | (val << 8)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'pagesPerBlock', val)
 
 
     def _getFlashSize( self ):
@@ -71,7 +72,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x4
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xFFF0FFFF) | (val << 16)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'flashSize', val)
 
 
     def _getMultiplane( self ):
@@ -82,7 +83,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x1
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xFFFF0FFF) | (val << 12)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'multiplane', val)
 
     def _getOptionSize( self ):
         txt = self.m_choice_Option_size.GetString(self.m_choice_Option_size.GetSelection())
@@ -120,7 +121,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0xF
         else:
             pass
-        self.flexspiNandOpt = (self.flexspiNandOpt & 0xF0FFFFFF) | (val << 24)
+        self.flexspiNandOpt = runoption.kFlexspiNandOpt.set(self.flexspiNandOpt, 'optionSize', val)
 
 
     def _getFCBSize( self ):
@@ -143,7 +144,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x10
         else:
             pass
-        self.flexspiNandFcbOpt = (self.flexspiNandFcbOpt & 0xFFFFFFF0) | (val << 0)
+        self.flexspiNandFcbOpt = runoption.kFlexspiNandFcbOpt.set(self.flexspiNandFcbOpt, 'fcbSize', val)
 
     def _getAddressType( self ):
         txt = self.m_choice_address_type.GetString(self.m_choice_address_type.GetSelection())
@@ -153,7 +154,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x1
         else:
             pass
-        self.flexspiNandFcbOpt = (self.flexspiNandFcbOpt & 0xFFFFF0FF) | (val << 8)
+        self.flexspiNandFcbOpt = runoption.kFlexspiNandFcbOpt.set(self.flexspiNandFcbOpt, 'addressType', val)
 
 
     def _getSearchStride( self ):
@@ -168,7 +169,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x3
         else:
             pass
-        self.flexspiNandFcbOpt = (self.flexspiNandFcbOpt & 0xFF0FFFFF) | (val << 20)
+        self.flexspiNandFcbOpt = runoption.kFlexspiNandFcbOpt.set(self.flexspiNandFcbOpt, 'searchStride', val)
 
 
     def _getSearchCount( self ):
@@ -183,7 +184,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x4
         else:
             pass
-        self.flexspiNandFcbOpt = (self.flexspiNandFcbOpt & 0xF0FFFFFF) | (val << 24)
+        self.flexspiNandFcbOpt = runoption.kFlexspiNandFcbOpt.set(self.flexspiNandFcbOpt, 'searchCount', val)
 
     ################################# may be exist problem Need to be confirmed#################################
     def _getBlockCountandID( self ):
@@ -193,8 +194,8 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             wx.MessageBox('Block ID Error', 'Confirm', wx.OK)
         if val_block_count > 8:
             wx.MessageBox('Max Block Number Error', 'Confirm', wx.OK)
-        self.flexspiNandImageInfo = (self.flexspiNandImageInfo & 0xFFFF0000) | (val_block_id << 0)
-        self.flexspiNandImageInfo = (self.flexspiNandImageInfo & 0x0000FFFF) | (val_block_count << 16)
+        self.flexspiNandImageInfo = runoption.kFlexspiNandImageInfo.set(self.flexspiNandImageInfo, 'blockId', val_block_id)
+        self.flexspiNandImageInfo = runoption.kFlexspiNandImageInfo.set(self.flexspiNandImageInfo, 'blockCount', val_block_count)
 
     ################################# may be exist problem Need to be confirmed#################################
 
@@ -235,7 +236,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
         else:
             pass
         if (self.flexspiNandKeyBlob & 0x0F000000) == 0x01000000:
-            self.flexspiNandKeyBlob = (self.flexspiNandKeyBlob & 0xFFFFFFF0) | (val << 0)
+            self.flexspiNandKeyBlob = runoption.kFlexspiNandKeyBlob.set(self.flexspiNandKeyBlob, 'imageIndex', val)
 
     def _getDekSize( self ):
         txt = self.m_choice_dek_size.GetString(self.m_choice_dek_size.GetSelection())
@@ -244,7 +245,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
         else:
             pass
         if (self.flexspiNandKeyBlob & 0x0F000000) == 0x00000000:
-            self.flexspiNandKeyBlob = (self.flexspiNandKeyBlob & 0xFFFFFF0F) | (val << 4)
+            self.flexspiNandKeyBlob = runoption.kFlexspiNandKeyBlob.set(self.flexspiNandKeyBlob, 'dekSize', val)
 
     def _getKeyBlobInfoSize( self ):
         txt = self.m_choice_keyblob_infosize.GetString(self.m_choice_keyblob_infosize.GetSelection())
@@ -286,7 +287,7 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             if txt != '3':
                 wx.MessageBox('keyblob_info size must equal to 3 if Type = Update', 'Confirm', wx.OK )
         else:
-            self.flexspiNandKeyBlob = (self.flexspiNandKeyBlob & 0xFF0FFFFF) | (val << 20)
+            self.flexspiNandKeyBlob = runoption.kFlexspiNandKeyBlob.set(self.flexspiNandKeyBlob, 'keyBlobInfoSize', val)
 
     def _getType( self ):
         txt = self.m_choice_type.GetString(self.m_choice_type.GetSelection())
@@ -296,28 +297,37 @@ class secBootUiFlexspiNand(bootDeviceWin_FlexspiNand.bootDeviceWin_FlexspiNand):
             val = 0x1
         else:
             pass
-        self.flexspiNandKeyBlob = (self.flexspiNandKeyBlob & 0xF0FFFFFF) | (val << 24)
+        self.flexspiNandKeyBlob = runoption.kFlexspiNandKeyBlob.set(self.flexspiNandKeyBlob, 'type', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def cancel_of_FLEXSPI_NAND(self, event):
         self.Show(False)
 
     def apply_of_FLEXSPI_NAND(self, event):
-        self._getFrequence()
-        self._getPageSize()
-        self._getPageSize()
-        self._getPagePerBlock()
-        self._getFlashSize()
-        self._getMultiplane()
-        self._getOptionSize()
-        self._getFCBSize()
-        self._getAddressType()
-        self._getSearchStride()
-        self._getSearchCount()
-        self._getBlockCountandID()
-        self._getType()
-        self._getImageIndex()
-        self._getDekSize()
-        self._getKeyBlobInfoSize()
+        try:
+            self._getFrequence()
+            self._getPageSize()
+            self._getPageSize()
+            self._getPagePerBlock()
+            self._getFlashSize()
+            self._getMultiplane()
+            self._getOptionSize()
+            self._getFCBSize()
+            self._getAddressType()
+            self._getSearchStride()
+            self._getSearchCount()
+            self._getBlockCountandID()
+            self._getType()
+            self._getImageIndex()
+            self._getDekSize()
+            self._getKeyBlobInfoSize()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_FlexspiNand, self.flexspiNandOpt, self.flexspiNandFcbOpt, self.flexspiNandImageInfo, self.flexspiNandKeyBlob)
         self.Show(False)
 
@@ -7,6 +7,7 @@ import math
 import uidef
 import uivar
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_FlexspiNor
 
 g_flexspiNorOpt0_ISSI_IS25LP064A           = 0xc0000007
@@ -68,31 +69,31 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
     def _recoverLastSettings ( self ):
         self.m_choice_deviceMode.SetSelection(self.flexspiDeviceModel)
 
-        deviceType = (self.flexspiNorOpt0 & 0x00F00000) >> 20
+        deviceType = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'deviceType')
         self.m_choice_deviceType.SetSelection(deviceType)
 
-        queryPads = (self.flexspiNorOpt0 & 0x000F0000) >> 16
+        queryPads = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'queryPads')
         if queryPads == 0:
             self.m_choice_queryPads.SetSelection(queryPads)
         else:
             self.m_choice_queryPads.SetSelection(queryPads - 1)
 
-        cmdPads = (self.flexspiNorOpt0 & 0x0000F000) >> 12
+        cmdPads = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'cmdPads')
         if queryPads == 0:
             self.m_choice_cmdPads.SetSelection(cmdPads)
         else:
             self.m_choice_cmdPads.SetSelection(cmdPads - 1)
 
-        quadModeSetting = (self.flexspiNorOpt0 & 0x00000F00) >> 8
+        quadModeSetting = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'quadModeSetting')
         self.m_choice_quadModeSetting.SetSelection(quadModeSetting)
 
-        miscMode = (self.flexspiNorOpt0 & 0x000000F0) >> 4
+        miscMode = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'miscMode')
         self.m_choice_miscMode.SetSelection(miscMode)
 
-        maxFrequency = (self.flexspiNorOpt0 & 0x0000000F) >> 0
+        maxFrequency = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'maxFrequency')
         self.m_choice_maxFrequency.SetSelection(maxFrequency - 1)
 
-        hasOption1 = (self.flexspiNorOpt0 & 0x0F000000) >> 24
+        hasOption1 = runoption.kFlexspiNorOpt0.get(self.flexspiNorOpt0, 'optionSize')
         self.m_choice_hasOption1.SetSelection(hasOption1)
         if hasOption1 == 0:
             self._updateOpt1Field(False)
@@ -123,17 +124,17 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             val = 0x9
         else:
             pass
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFF0FFFFF) | (val << 20)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'deviceType', val)
 
     def _getQueryPads( self ):
         val = int(self.m_choice_queryPads.GetString(self.m_choice_queryPads.GetSelection()))
         val = int(math.log(val, 2))
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFFF0FFFF) | (val << 16)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'queryPads', val)
 
     def _getCmdPads( self ):
         val = int(self.m_choice_cmdPads.GetString(self.m_choice_cmdPads.GetSelection()))
         val = int(math.log(val, 2))
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFFFF0FFF) | (val << 12)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'cmdPads', val)
 
     def _getQuadModeSetting( self ):
         txt = self.m_choice_quadModeSetting.GetString(self.m_choice_quadModeSetting.GetSelection())
@@ -149,7 +150,7 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             val = 0x4
         else:
             pass
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFFFFF0FF) | (val << 8)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'quadModeSetting', val)
 
     def _getMiscMode( self ):
         txt = self.m_choice_miscMode.GetString(self.m_choice_miscMode.GetSelection())
@@ -163,7 +164,7 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             val = 0x3
         else:
             pass
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFFFFFF0F) | (val << 4)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'miscMode', val)
 
     def _getMaxFrequency( self ):
         txt = self.m_choice_maxFrequency.GetString(self.m_choice_maxFrequency.GetSelection())
@@ -185,7 +186,7 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             val = 0x8
         else:
             pass
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xFFFFFFF0) | (val << 0)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'maxFrequency', val)
 
     def _getHasOpt1( self ):
         txt = self.m_choice_hasOption1.GetString(self.m_choice_hasOption1.GetSelection())
@@ -195,7 +196,11 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             val = 0x1
         else:
             pass
-        self.flexspiNorOpt0 = (self.flexspiNorOpt0 & 0xF0FFFFFF) | (val << 24)
+        self.flexspiNorOpt0 = runoption.kFlexspiNorOpt0.set(self.flexspiNorOpt0, 'optionSize', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def callbackUseTypicalDeviceModel( self, event ):
         self.flexspiDeviceModel = self.m_choice_deviceMode.GetSelection()
@@ -227,13 +232,18 @@ class secBootUiCfgFlexspiNor(bootDeviceWin_FlexspiNor.bootDeviceWin_FlexspiNor):
             pass
 
     def callbackOk( self, event ):
-        self._getDeviceType()
-        self._getQueryPads()
-        self._getCmdPads()
-        self._getQuadModeSetting()
-        self._getMiscMode()
-        self._getMaxFrequency()
-        self._getHasOpt1()
+        try:
+            self._getDeviceType()
+            self._getQueryPads()
+            self._getCmdPads()
+            self._getQuadModeSetting()
+            self._getMiscMode()
+            self._getMaxFrequency()
+            self._getHasOpt1()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_FlexspiNor, self.flexspiNorOpt0, self.flexspiNorOpt1, self.flexspiDeviceModel)
         uivar.setRuntimeSettings(False)
         self.Show(False)
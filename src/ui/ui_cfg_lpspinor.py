@@ -3,10 +3,10 @@
 import wx
 import sys
 import os
-import math
 import uivar
 import uidef
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_LpspiNor
 
 class secBootUiCfgLpspiNor(bootDeviceWin_LpspiNor.bootDeviceWin_LpspiNor):
@@ -29,31 +29,31 @@ class secBootUiCfgLpspiNor(bootDeviceWin_LpspiNor.bootDeviceWin_LpspiNor):
         self._recoverLastSettings()
 
     def _recoverLastSettings ( self ):
-        deviceType = (self.lpspiNorOpt0 & 0x0000F000) >> 12
+        deviceType = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'deviceType')
         self.m_choice_deviceType.SetSelection(deviceType)
 
-        pageSize = (self.lpspiNorOpt0 & 0x0000000F) >> 0
+        pageSize = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'pageSize')
         if pageSize <= 2:
             self.m_choice_pageSize.SetSelection(pageSize + 3)
         else:
             self.m_choice_pageSize.SetSelection(pageSize - 3)
 
-        sectorSize = (self.lpspiNorOpt0 & 0x000000F0) >> 4
+        sectorSize = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'sectorSize')
         self.m_choice_sectorSize.SetSelection(sectorSize)
 
-        totalSize = (self.lpspiNorOpt0 & 0x00000F00) >> 8
+        totalSize = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'totalSize')
         if totalSize <= 11:
             self.m_choice_totalSize.SetSelection(totalSize + 4)
         else:
             self.m_choice_totalSize.SetSelection(totalSize - 12)
 
-        spiIndex = (self.lpspiNorOpt0 & 0x00F00000) >> 20
+        spiIndex = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'spiIndex')
         self.m_choice_spiIndex.SetSelection(spiIndex - 1)
 
-        spiPcs = (self.lpspiNorOpt0 & 0x000F0000) >> 16
+        spiPcs = runoption.kLpspiNorOpt0.get(self.lpspiNorOpt0, 'spiPcs')
         self.m_choice_spiPcs.SetSelection(spiPcs)
 
-        spiSpeed = (self.lpspiNorOpt1 & 0x0000000F) >> 0
+        spiSpeed = runoption.kLpspiNorOpt1.get(self.lpspiNorOpt1, 'spiSpeed')
         self.m_choice_spiSpeed.SetSelection(spiSpeed)
 
     def _getDeviceType( self ):
@@ -64,46 +64,32 @@ class secBootUiCfgLpspiNor(bootDeviceWin_LpspiNor.bootDeviceWin_LpspiNor):
             val = 0x1
         else:
             pass
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFFFF0FFF) | (val << 12)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'deviceType', val)
 
     def _getPageSize( self ):
         val = int(self.m_choice_pageSize.GetString(self.m_choice_pageSize.GetSelection()))
-        val = int(math.log(val, 2))
-        if val >= 8:
-            val -= 8
-        elif val >= 5:
-            val -= 2
-        else:
-            pass
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFFFFFFF0) | (val << 0)
+        val = runoption.getLpspiNorPageSizeCode(val)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'pageSize', val)
 
     def _getSectorSize( self ):
+        # Sector size choices are in KB
         val = int(self.m_choice_sectorSize.GetString(self.m_choice_sectorSize.GetSelection()))
-        val = int(math.log(val, 2))
-        if val <= 3:
-            val -= 2
-        else:
-            val -= 3
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFFFFFF0F) | (val << 4)
+        val = runoption.getLpspiNorSectorSizeCode(val * 1024)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'sectorSize', val)
 
     def _getTotalSize( self ):
+        # Total size choices are in KB
         val = int(self.m_choice_totalSize.GetString(self.m_choice_totalSize.GetSelection()))
-        val = int(math.log(val, 2))
-        if val >= 9:
-            val -= 9
-        elif val >= 5:
-            val += 7
-        else:
-            pass
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFFFFF0FF) | (val << 8)
+        val = runoption.getLpspiNorTotalSizeCode(val * 1024)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'totalSize', val)
 
     def _getSpiIndex( self ):
         val = int(self.m_choice_spiIndex.GetString(self.m_choice_spiIndex.GetSelection()))
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFF0FFFFF) | (val << 20)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'spiIndex', val)
 
     def _getSpiPcs( self ):
         val = int(self.m_choice_spiPcs.GetString(self.m_choice_spiPcs.GetSelection()))
-        self.lpspiNorOpt0 = (self.lpspiNorOpt0 & 0xFFF0FFFF) | (val << 16)
+        self.lpspiNorOpt0 = runoption.kLpspiNorOpt0.set(self.lpspiNorOpt0, 'spiPcs', val)
 
     def _getSpiSpeed( self ):
         txt = self.m_choice_spiSpeed.GetString(self.m_choice_spiSpeed.GetSelection())
@@ -117,16 +103,25 @@ class secBootUiCfgLpspiNor(bootDeviceWin_LpspiNor.bootDeviceWin_LpspiNor):
             val = 0x3
         else:
             pass
-        self.lpspiNorOpt1 = (self.lpspiNorOpt1 & 0xFFFFFFF0) | (val << 0)
+        self.lpspiNorOpt1 = runoption.kLpspiNorOpt1.set(self.lpspiNorOpt1, 'spiSpeed', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def callbackOk(self, event):
-        self._getDeviceType()
-        self._getPageSize()
-        self._getSectorSize()
-        self._getTotalSize()
-        self._getSpiIndex()
-        self._getSpiPcs()
-        self._getSpiSpeed()
+        try:
+            self._getDeviceType()
+            self._getPageSize()
+            self._getSectorSize()
+            self._getTotalSize()
+            self._getSpiIndex()
+            self._getSpiPcs()
+            self._getSpiSpeed()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_LpspiNor, self.lpspiNorOpt0, self.lpspiNorOpt1)
         uivar.setRuntimeSettings(False)
         self.Show(False)
@@ -6,6 +6,7 @@ import os
 import uidef
 import uivar
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_SemcNand
 
 class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
@@ -77,91 +78,91 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             self.m_textCtrl_image7Cnt.Enable( True )
 
     def _recoverLastSettings ( self ):
-        onfiVersion = (self.semcNandOpt & 0x00000007) >> 0
+        onfiVersion = runoption.kSemcNandOpt.get(self.semcNandOpt, 'onfiVersion')
         self.m_choice_onfiVersion.SetSelection(onfiVersion - 1)
 
-        edoMode = (self.semcNandOpt & 0x00000008) >> 3
+        edoMode = runoption.kSemcNandOpt.get(self.semcNandOpt, 'edoMode')
         self.m_choice_edoMode.SetSelection(edoMode)
 
-        onfiTimingMode = (self.semcNandOpt & 0x00000070) >> 4
+        onfiTimingMode = runoption.kSemcNandOpt.get(self.semcNandOpt, 'onfiTimingMode')
         self.m_choice_onfiTimingMode.SetSelection(onfiTimingMode)
 
-        ioPortSize = (self.semcNandOpt & 0x00000300) >> 8
+        ioPortSize = runoption.kSemcNandOpt.get(self.semcNandOpt, 'ioPortSize')
         self.m_choice_ioPortSize.SetSelection(ioPortSize - 1)
 
-        pcsPort = (self.semcNandOpt & 0x00007000) >> 12
+        pcsPort = runoption.kSemcNandOpt.get(self.semcNandOpt, 'pcsPort')
         self.m_choice_pcsPort.SetSelection(pcsPort)
 
-        eccType = (self.semcNandOpt & 0x00010000) >> 16
+        eccType = runoption.kSemcNandOpt.get(self.semcNandOpt, 'eccType')
         self.m_choice_eccType.SetSelection(eccType)
 
-        eccStatus = (self.semcNandOpt & 0x00020000) >> 17
+        eccStatus = runoption.kSemcNandOpt.get(self.semcNandOpt, 'eccStatus')
         self.m_choice_eccStatus.SetSelection(eccStatus)
 
-        searchCount = (self.semcNandFcbOpt & 0x0000000F) >> 0
+        searchCount = runoption.kSemcNandFcbOpt.get(self.semcNandFcbOpt, 'searchCount')
         self.m_choice_searchCount.SetSelection(searchCount - 1)
 
-        searchStride = (self.semcNandFcbOpt & 0x0000FF00) >> 8
+        searchStride = runoption.kSemcNandFcbOpt.get(self.semcNandFcbOpt, 'searchStride')
         self.m_textCtrl_searchStride.Clear()
         self.m_textCtrl_searchStride.write(str(searchStride))
 
-        imageCopies = (self.semcNandFcbOpt & 0x000F0000) >> 16
+        imageCopies = runoption.kSemcNandFcbOpt.get(self.semcNandFcbOpt, 'imageCopies')
         self.m_choice_imageCopies.SetSelection(imageCopies - 1)
 
         self._updateImageInfoField(imageCopies)
 
         if imageCopies > 0:
-            imageIdx = self.semcNandImageInfoList[0] >> 16
-            imageCnt = self.semcNandImageInfoList[0] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[0], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[0], 'imageCount')
             self.m_textCtrl_image0Idx.Clear()
             self.m_textCtrl_image0Cnt.Clear()
             self.m_textCtrl_image0Idx.write(str(imageIdx))
             self.m_textCtrl_image0Cnt.write(str(imageCnt))
         if imageCopies > 1:
-            imageIdx = self.semcNandImageInfoList[1] >> 16
-            imageCnt = self.semcNandImageInfoList[1] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[1], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[1], 'imageCount')
             self.m_textCtrl_image1Idx.Clear()
             self.m_textCtrl_image1Cnt.Clear()
             self.m_textCtrl_image1Idx.write(str(imageIdx))
             self.m_textCtrl_image1Cnt.write(str(imageCnt))
         if imageCopies > 2:
-            imageIdx = self.semcNandImageInfoList[2] >> 16
-            imageCnt = self.semcNandImageInfoList[2] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[2], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[2], 'imageCount')
             self.m_textCtrl_image2Idx.Clear()
             self.m_textCtrl_image2Cnt.Clear()
             self.m_textCtrl_image2Idx.write(str(imageIdx))
             self.m_textCtrl_image2Cnt.write(str(imageCnt))
         if imageCopies > 3:
-            imageIdx = self.semcNandImageInfoList[3] >> 16
-            imageCnt = self.semcNandImageInfoList[3] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[3], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[3], 'imageCount')
             self.m_textCtrl_image3Idx.Clear()
             self.m_textCtrl_image3Cnt.Clear()
             self.m_textCtrl_image3Idx.write(str(imageIdx))
             self.m_textCtrl_image3Cnt.write(str(imageCnt))
         if imageCopies > 4:
-            imageIdx = self.semcNandImageInfoList[4] >> 16
-            imageCnt = self.semcNandImageInfoList[4] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[4], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[4], 'imageCount')
             self.m_textCtrl_image4Idx.Clear()
             self.m_textCtrl_image4Cnt.Clear()
             self.m_textCtrl_image4Idx.write(str(imageIdx))
             self.m_textCtrl_image4Cnt.write(str(imageCnt))
         if imageCopies > 5:
-            imageIdx = self.semcNandImageInfoList[5] >> 16
-            imageCnt = self.semcNandImageInfoList[5] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[5], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[5], 'imageCount')
             self.m_textCtrl_image5Idx.Clear()
             self.m_textCtrl_image5Cnt.Clear()
             self.m_textCtrl_image5Idx.write(str(imageIdx))
             self.m_textCtrl_image5Cnt.write(str(imageCnt))
         if imageCopies > 6:
-            imageIdx = self.semcNandImageInfoList[6] >> 16
-            imageCnt = self.semcNandImageInfoList[6] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[6], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[6], 'imageCount')
             self.m_textCtrl_image6Idx.Clear()
             self.m_textCtrl_image6Cnt.Clear()
             self.m_textCtrl_image6Idx.write(str(imageIdx))
             self.m_textCtrl_image6Cnt.write(str(imageCnt))
         if imageCopies > 7:
-            imageIdx = self.semcNandImageInfoList[7] >> 16
-            imageCnt = self.semcNandImageInfoList[7] & 0x0000FFFF
+            imageIdx = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[7], 'imageIndex')
+            imageCnt = runoption.kSemcNandImageInfo.get(self.semcNandImageInfoList[7], 'imageCount')
             self.m_textCtrl_image7Idx.Clear()
             self.m_textCtrl_image7Cnt.Clear()
             self.m_textCtrl_image7Idx.write(str(imageIdx))
@@ -173,7 +174,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x1
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFFFFF8) | (val << 0)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'onfiVersion', val)
 
     def _getEdoMode( self ):
         txt = self.m_choice_edoMode.GetString(self.m_choice_edoMode.GetSelection())
@@ -183,7 +184,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x1
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFFFFF7) | (val << 3)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'edoMode', val)
 
     def _getOnfiTimingMode( self ):
         txt = self.m_choice_onfiTimingMode.GetString(self.m_choice_onfiTimingMode.GetSelection())
@@ -201,7 +202,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x5
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFFFF8F) | (val << 4)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'onfiTimingMode', val)
 
     def _getIoPortSize( self ):
         txt = self.m_choice_ioPortSize.GetString(self.m_choice_ioPortSize.GetSelection())
@@ -211,7 +212,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x2
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFFFCFF) | (val << 8)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'ioPortSize', val)
 
     def _getPcsPort( self ):
         txt = self.m_choice_pcsPort.GetString(self.m_choice_pcsPort.GetSelection())
@@ -219,7 +220,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x0
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFF8FFF) | (val << 12)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'pcsPort', val)
 
     def _getEccType( self ):
         txt = self.m_choice_eccType.GetString(self.m_choice_eccType.GetSelection())
@@ -229,7 +230,7 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x1
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFEFFFF) | (val << 16)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'eccType', val)
 
     def _getEccStatus( self ):
         txt = self.m_choice_eccStatus.GetString(self.m_choice_eccStatus.GetSelection())
@@ -239,71 +240,80 @@ class secBootUiCfgSemcNand(bootDeviceWin_SemcNand.bootDeviceWin_SemcNand):
             val = 0x1
         else:
             pass
-        self.semcNandOpt = (self.semcNandOpt & 0xFFFDFFFF) | (val << 17)
+        self.semcNandOpt = runoption.kSemcNandOpt.set(self.semcNandOpt, 'eccStatus', val)
 
     def _getSearchCount( self ):
         val = int(self.m_choice_searchCount.GetString(self.m_choice_searchCount.GetSelection()))
-        self.semcNandFcbOpt = (self.semcNandFcbOpt & 0xFFFFFFF0) | (val << 0)
+        self.semcNandFcbOpt = runoption.kSemcNandFcbOpt.set(self.semcNandFcbOpt, 'searchCount', val)
 
     def _getSearchStride( self ):
         val = int(self.m_textCtrl_searchStride.GetLineText(0))
-        self.semcNandFcbOpt = (self.semcNandFcbOpt & 0xFFFF00FF) | (val << 8)
+        self.semcNandFcbOpt = runoption.kSemcNandFcbOpt.set(self.semcNandFcbOpt, 'searchStride', val)
 
     def _getImageCopies( self ):
         val = int(self.m_choice_imageCopies.GetString(self.m_choice_imageCopies.GetSelection()))
-        self.semcNandFcbOpt = (self.semcNandFcbOpt & 0xFFF0FFFF) | (val << 16)
+        self.semcNandFcbOpt = runoption.kSemcNandFcbOpt.set(self.semcNandFcbOpt, 'imageCopies', val)
 
     def _getImageInfo( self ):
         imageCopies = int(self.m_choice_imageCopies.GetString(self.m_choice_imageCopies.GetSelection()))
         if imageCopies > 0:
-            self.semcNandImageInfoList[0] = (int(self.m_textCtrl_image0Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image0Cnt.GetLineText(0))
+            self.semcNandImageInfoList[0] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image0Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image0Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[0] = None
         if imageCopies > 1:
-            self.semcNandImageInfoList[1] = (int(self.m_textCtrl_image1Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image1Cnt.GetLineText(0))
+            self.semcNandImageInfoList[1] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image1Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image1Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[1] = None
         if imageCopies > 2:
-            self.semcNandImageInfoList[2] = (int(self.m_textCtrl_image2Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image2Cnt.GetLineText(0))
+            self.semcNandImageInfoList[2] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image2Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image2Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[2] = None
         if imageCopies > 3:
-            self.semcNandImageInfoList[3] = (int(self.m_textCtrl_image3Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image3Cnt.GetLineText(0))
+            self.semcNandImageInfoList[3] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image3Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image3Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[3] = None
         if imageCopies > 4:
-            self.semcNandImageInfoList[4] = (int(self.m_textCtrl_image4Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image4Cnt.GetLineText(0))
+            self.semcNandImageInfoList[4] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image4Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image4Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[4] = None
         if imageCopies > 5:
-            self.semcNandImageInfoList[5] = (int(self.m_textCtrl_image5Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image5Cnt.GetLineText(0))
+            self.semcNandImageInfoList[5] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image5Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image5Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[5] = None
         if imageCopies > 6:
-            self.semcNandImageInfoList[6] = (int(self.m_textCtrl_image6Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image6Cnt.GetLineText(0))
+            self.semcNandImageInfoList[6] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image6Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image6Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[6] = None
         if imageCopies > 7:
-            self.semcNandImageInfoList[7] = (int(self.m_textCtrl_image7Idx.GetLineText(0)) << 16) + int(self.m_textCtrl_image7Cnt.GetLineText(0))
+            self.semcNandImageInfoList[7] = runoption.kSemcNandImageInfo.encode({'imageIndex' : int(self.m_textCtrl_image7Idx.GetLineText(0)), 'imageCount' : int(self.m_textCtrl_image7Cnt.GetLineText(0))})
         else:
             self.semcNandImageInfoList[7] = None
 
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
+
     def callbackChangeImageCopies( self, event ):
         imageCopies = int(self.m_choice_imageCopies.GetString(self.m_choice_imageCopies.GetSelection()))
         self._updateImageInfoField(imageCopies)
 
     def callbackOk( self, event ):
-        self._getOnfiVersion()
-        self._getEdoMode()
-        self._getOnfiTimingMode()
-        self._getIoPortSize()
-        self._getPcsPort()
-        self._getEccType()
-        self._getEccStatus()
-        self._getSearchCount()
-        self._getSearchStride()
-        self._getImageCopies()
-        self._getImageInfo()
+        try:
+            self._getOnfiVersion()
+            self._getEdoMode()
+            self._getOnfiTimingMode()
+            self._getIoPortSize()
+            self._getPcsPort()
+            self._getEccType()
+            self._getEccStatus()
+            self._getSearchCount()
+            self._getSearchStride()
+            self._getImageCopies()
+            self._getImageInfo()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_SemcNand, self.semcNandOpt, self.semcNandFcbOpt, self.semcNandImageInfoList)
         uivar.setRuntimeSettings(False)
         self.Show(False)
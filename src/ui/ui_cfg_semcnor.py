@@ -6,6 +6,7 @@ import os
 import uivar
 import uidef
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_SemcNor
 
 class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
@@ -29,7 +30,7 @@ class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
             val = 0x4
         else:
             pass
-        self.semcNorOpt = (self.semcNorOpt & 0xFFFF8FFF) | (val << 12)
+        self.semcNorOpt = runoption.kSemcNorOpt.set(self.semcNorOpt, 'pcsPort', val)
 
 
     def _getADVPolarity( self ):
@@ -40,7 +41,7 @@ class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
             val = 0x1
         else:
             pass
-        self.semcNorOpt = (self.semcNorOpt & 0xFFFFFBFF) | (val << 10)
+        self.semcNorOpt = runoption.kSemcNorOpt.set(self.semcNorOpt, 'advPolarity', val)
 
 
     def _getDataPortSize( self ):
@@ -55,7 +56,7 @@ class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
             val = 0x3
         else:
             pass
-        self.semcNorOpt = (self.semcNorOpt & 0xFFFFFCFF) | (val << 8)
+        self.semcNorOpt = runoption.kSemcNorOpt.set(self.semcNorOpt, 'dataPortSize', val)
 
 
 
@@ -69,7 +70,7 @@ class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
             val = 0x2
         else:
             pass
-        self.semcNorOpt = (self.semcNorOpt & 0xFFFFFFF3) | (val << 2)
+        self.semcNorOpt = runoption.kSemcNorOpt.set(self.semcNorOpt, 'timingMode', val)
 
     def _getCommandSet( self ):
         txt = self.m_choice_Command_Set.GetString(self.m_choice_Command_Set.GetSelection())
@@ -79,17 +80,26 @@ class secBootUiSemcNor(bootDeviceWin_SemcNor.bootDeviceWin_SemcNor):
             val = 0x1
         else:
             pass
-        self.semcNorOpt = (self.semcNorOpt & 0xFFFFFFFC) | (val << 2)
+        self.semcNorOpt = runoption.kSemcNorOpt.set(self.semcNorOpt, 'commandSet', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def cancel_of_SEMC_NOR(self, event):
         self.Show(False)
 
     def apply_of_SEMC_NOR(self, event):
-        self._getPCSPort()
-        self._getADVPolarity()
-        self._getDataPortSize()
-        self._getTimingMode()
-        self._getCommandSet()
+        try:
+            self._getPCSPort()
+            self._getADVPolarity()
+            self._getDataPortSize()
+            self._getTimingMode()
+            self._getCommandSet()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_SemcNor, self.semcNorOpt, self.semcNorSetting)
         self.Show(False)
 
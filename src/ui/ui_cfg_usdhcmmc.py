@@ -6,6 +6,7 @@ import os
 import uivar
 import uidef
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_UsdhcMmc
 
 class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
@@ -23,7 +24,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFFFFFE) | (val << 0)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootConfig', val)
 
 
     def _getBootAck( self ):
@@ -34,7 +35,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFFFFFB) | (val << 2)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootAck', val)
 
     def _getBootBus( self ):
         txt = self.m_choice_Boot_BusCondition.GetString(self.m_choice_Boot_BusCondition.GetSelection())
@@ -44,7 +45,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFFFFF7) | (val << 3)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootBus', val)
 
     def _getBootMode( self ):
         txt = self.m_choice_BOOT_MODE.GetString(self.m_choice_BOOT_MODE.GetSelection())
@@ -56,7 +57,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x2
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFFFFCF) | (val << 4)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootMode', val)
 
     def _getPartitionAccess( self ):
         txt = self.m_choice_PARTITION_ACCESS.GetString(self.m_choice_PARTITION_ACCESS.GetSelection())
@@ -78,7 +79,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x7
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xF8FFFFFF) | (val << 24)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'partitionAccess', val)
 
     def _getBusWidth( self ):
         txt = self.m_choice_BUS_WIDTH.GetString(self.m_choice_BUS_WIDTH.GetSelection())
@@ -94,7 +95,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x6
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFFF0FF) | (val << 8)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'busWidth', val)
 
     def _getBootPartition( self ):
         txt = self.m_choice_BOOT_PARTITION.GetString(self.m_choice_BOOT_PARTITION.GetSelection())
@@ -108,7 +109,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x7
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFF8FFFFF) | (val << 20)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootPartition', val)
 
     def _getBootBusWidth( self ):
         txt = self.m_choice_BOOT_BUS.GetString(self.m_choice_BOOT_BUS.GetSelection())
@@ -120,7 +121,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x2
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFCFFFF) | (val << 16)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'bootBusWidth', val)
 
     def _getTiming( self ):
         txt = self.m_choice_TIMING.GetString(self.m_choice_TIMING.GetSelection())
@@ -130,7 +131,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x2
         else:
             pass
-        self.usdhcMmcOpt1 = (self.usdhcMmcOpt1 & 0xFFFF0FFF) | (val << 12)
+        self.usdhcMmcOpt1 = runoption.kUsdhcMmcOpt1.set(self.usdhcMmcOpt1, 'timing', val)
 
     def _getPwrUpTime( self ):
         txt = self.m_choice_PWR_UP.GetString(self.m_choice_PWR_UP.GetSelection())
@@ -140,7 +141,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt2 = (self.usdhcMmcOpt2 & 0xFFEFFFFF) | (val << 20)
+        self.usdhcMmcOpt2 = runoption.kUsdhcMmcOpt2.set(self.usdhcMmcOpt2, 'pwrUpTime', val)
 
 
 
@@ -156,7 +157,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x3
         else:
             pass
-        self.usdhcMmcOpt2 = (self.usdhcMmcOpt2 & 0xFCFFFFFF) | (val << 24)
+        self.usdhcMmcOpt2 = runoption.kUsdhcMmcOpt2.set(self.usdhcMmcOpt2, 'pwrDownTime', val)
 
     def _get1V8( self ):
         txt = self.m_choice_1V8.GetString(self.m_choice_1V8.GetSelection())
@@ -166,7 +167,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt2 = (self.usdhcMmcOpt2 & 0xFFFBFFFF) | (val << 18)
+        self.usdhcMmcOpt2 = runoption.kUsdhcMmcOpt2.set(self.usdhcMmcOpt2, 'is1V8', val)
 
 
 
@@ -178,7 +179,7 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt2 = (self.usdhcMmcOpt2 & 0xFFF7FFFF) | (val << 19)
+        self.usdhcMmcOpt2 = runoption.kUsdhcMmcOpt2.set(self.usdhcMmcOpt2, 'pwrCycle', val)
 
     def _getPwrPolarity( self ):
         txt = self.m_choice_PWR_POLARITY.GetString(self.m_choice_PWR_POLARITY.GetSelection())
@@ -188,26 +189,35 @@ class secBootUiUsdhcMmc(bootDeviceWin_UsdhcMmc.bootDeviceWin_UsdhcMmc):
             val = 0x1
         else:
             pass
-        self.usdhcMmcOpt2 = (self.usdhcMmcOpt2 & 0xFF7FFFFF) | (val << 23)
+        self.usdhcMmcOpt2 = runoption.kUsdhcMmcOpt2.set(self.usdhcMmcOpt2, 'pwrPolarity', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def cancel_of_EMMC(self, event):
         self.Show(False)
 
     def apply_of_EMMC(self, event):
-        self._getBootConfig()
-        self._getBootAck()
-        self._getBootBus()
-        self._getBootMode()
-        self._getPartitionAccess()
-        self._getBusWidth()
-        self._getBootPartition()
-        self._getPwrUpTime()
-        self._getBootBusWidth()
-        self._getPwrDownTime()
-        self._get1V8()
-        self._getTiming()
-        self._getPwrCycle()
-        self._getPwrPolarity()
+        try:
+            self._getBootConfig()
+            self._getBootAck()
+            self._getBootBus()
+            self._getBootMode()
+            self._getPartitionAccess()
+            self._getBusWidth()
+            self._getBootPartition()
+            self._getPwrUpTime()
+            self._getBootBusWidth()
+            self._getPwrDownTime()
+            self._get1V8()
+            self._getTiming()
+            self._getPwrCycle()
+            self._getPwrPolarity()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_UsdhcMmc, self.usdhcMmcOpt1, self.usdhcMmcOpt2)
         self.Show(False)
 
@@ -6,6 +6,7 @@ import os
 import uivar
 import uidef
 sys.path.append(os.path.abspath(".."))
+from run import runoption
 from win import bootDeviceWin_UsdhcSd
 
 class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
@@ -22,7 +23,7 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x1
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFFFFFEFF) | (val << 8)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'busWidth', val)
 
     def _getTimingMode( self ):
         txt = self.m_choice_TIMING.GetString(self.m_choice_TIMING.GetSelection())
@@ -36,7 +37,7 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x3
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFFFF8FFF) | (val << 12)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'timingMode', val)
 
     def _getPwrUpTime( self ):
         txt = self.m_choice_PWR_UP.GetString(self.m_choice_PWR_UP.GetSelection())
@@ -46,7 +47,7 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x1
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFFEFFFFF) | (val << 20)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'pwrUpTime', val)
 
     def _getPwrCycle( self ):
         txt = self.m_choice_PWR_CYCLE.GetString(self.m_choice_PWR_CYCLE.GetSelection())
@@ -56,7 +57,7 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x1
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFFF7FFFF) | (val << 19)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'pwrCycle', val)
 
     def _getPwrDownTime( self ):
         txt = self.m_choice_Query_PWR_DOWN.GetString(self.m_choice_Query_PWR_DOWN.GetSelection())
@@ -70,7 +71,7 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x3
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFCFFFFFF) | (val << 24)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'pwrDownTime', val)
 
     def _getPwrPolarity( self ):
         txt = self.m_choice_PWR_POLARITY.GetString(self.m_choice_PWR_POLARITY.GetSelection())
@@ -80,18 +81,27 @@ class secBootUiUsdhcSd(bootDeviceWin_UsdhcSd.bootDeviceWin_UsdhcSd):
             val = 0x1
         else:
             pass
-        self.usdhcSDOpt = (self.usdhcSDOpt & 0xFF7FFFFF) | (val << 23)
+        self.usdhcSDOpt = runoption.kUsdhcSdOpt.set(self.usdhcSDOpt, 'pwrPolarity', val)
+
+    def popupMsgBox( self, msgStr ):
+        messageText = (msgStr)
+        wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
     def cancel_of_SD(self, event):
         self.Show(False)
 
     def apply_of_SD(self, event):
-        self._getBusWidth()
-        self._getTimingMode()
-        self._getPwrUpTime()
-        self._getPwrCycle()
-        self._getPwrDownTime()
-        self._getPwrPolarity()
+        try:
+            self._getBusWidth()
+            self._getTimingMode()
+            self._getPwrUpTime()
+            self._getPwrCycle()
+            self._getPwrDownTime()
+            self._getPwrPolarity()
+        except ValueError as err:
+            # Typed values may not fit in their option fields
+            self.popupMsgBox(str(err))
+            return
         uivar.setBootDeviceConfiguration(uidef.kBootDevice_UsdhcSd, self.usdhcSDOpt)
         self.Show(False)
 
@@ -0,0 +1,27 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+kCstVersion_Invalid = 'x.x.x'
+kCstVersion_v2_3_3  = '2.3.3'
+kCstVersion_v3_0_1  = '3.0.1'
+kCstVersion_v3_1_0  = '3.1.0'
+
+kCstVersion_Avail   = [kCstVersion_v3_0_1]
+
+kUserEngineSel_Engine0     = 'Engine 0'
+kUserEngineSel_Engine1     = 'Engine 1'
+kUserEngineSel_BothEngines = 'Both Engines'
+
+kSupportedEngineSel_iMXRT102x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1]
+kSupportedEngineSel_iMXRT105x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1]
+kSupportedEngineSel_iMXRT106x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1, kUserEngineSel_BothEngines]
+kSupportedEngineSel_iMXRT1064 = [kUserEngineSel_Engine0, kUserEngineSel_Engine1, kUserEngineSel_BothEngines]
+
+kUserKeySource_OTPMK  = 'Fuse OTPMK[255:128]'
+kUserKeySource_SW_GP2 = 'Fuse SW-GP2'
+kUserKeySource_GP4    = 'Fuse GP4[127:0]'
+
+kSupportedKeySource_iMXRT102x = [kUserKeySource_SW_GP2]
+kSupportedKeySource_iMXRT105x = [kUserKeySource_SW_GP2]
+kSupportedKeySource_iMXRT106x = [kUserKeySource_SW_GP2, kUserKeySource_GP4]
+kSupportedKeySource_iMXRT1064 = [kUserKeySource_SW_GP2, kUserKeySource_GP4]
@@ -0,0 +1,243 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import copy
+import json
+import uicfgdef
+
+kCfgVersion = 2
+
+kCfgSection_Board      = 'board'
+kCfgSection_BootDevice = 'bootDevice'
+kCfgSection_Security   = 'security'
+
+kCfgProfile_Default = 'default'
+
+kCfgType_Int  = (int, long)
+kCfgType_Dict = (dict,)
+kCfgType_List = (list,)
+
+##
+# Schema, key : (section, allowed types, default). None is always allowed as value.
+kCfgSchemaDict = {
+    'toolCommDict'                    : (kCfgSection_Board, kCfgType_Dict, {'isToolRunAsEntryMode':True,
+                                                                            'secBootType':0,
+                                                                            'mcuSeries':0,
+                                                                            'mcuDevice':1,
+                                                                            'bootDevice':0,
+                                                                            'isUsbhidPortSelected':True,
+                                                                            'isOneStepChecked':True,
+                                                                            'certSerial':'12345678',
+                                                                            'certKeyPass':'test',
+                                                                            'appFilename':None,
+                                                                            'appFormat':0,
+                                                                            'appBinBaseAddr':'Eg: 0x00003000',
+                                                                            'keyStoreRegion':1,
+                                                                            'certOptForBee':0}),
+
+    'flexspiNorOpt0'                  : (kCfgSection_BootDevice, kCfgType_Int, 0xc0000007),
+    'flexspiNorOpt1'                  : (kCfgSection_BootDevice, kCfgType_Int, 0x00000000),
+    'flexspiNorDeviceModel'           : (kCfgSection_BootDevice, kCfgType_Int, 0),
+    'flexspiNandOpt'                  : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'flexspiNandFcbOpt'               : (kCfgSection_BootDevice, kCfgType_Int, 0x00010601),
+    'flexspiNandImageInfo'            : (kCfgSection_BootDevice, kCfgType_Int, 0x0),
+    'flexspiNandKeyBlob'              : (kCfgSection_BootDevice, kCfgType_Int, 0x0),
+    'semcNorOpt'                      : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'semcNorSetting'                  : (kCfgSection_BootDevice, kCfgType_Int, 0x00010601),
+    'semcNandOpt'                     : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'semcNandFcbOpt'                  : (kCfgSection_BootDevice, kCfgType_Int, 0x00010101),
+    'semcNandImageInfoList'           : (kCfgSection_BootDevice, kCfgType_List, [0x00020001] + [None] * 7),
+    'usdhcSdOpt'                      : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'usdhcMmcOpt1'                    : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'usdhcMmcOpt2'                    : (kCfgSection_BootDevice, kCfgType_Int, 0xD0010101),
+    'lpspiNorOpt0'                    : (kCfgSection_BootDevice, kCfgType_Int, 0xc1100500),
+    'lpspiNorOpt1'                    : (kCfgSection_BootDevice, kCfgType_Int, 0x00000000),
+    'dcdCtrlDict'                     : (kCfgSection_BootDevice, kCfgType_Dict, {'isDcdEnabled':False,
+                                                                                 'dcdFileType':None}),
+    'dcdSettingsDict'                 : (kCfgSection_BootDevice, kCfgType_Dict, {'dcdSource':'Disable DCD',
+                                                                                 'userBinFile':'N/A',
+                                                                                 'userCfgFile':'N/A',
+                                                                                 'dcdPurpose':'SDRAM',
+                                                                                 'sdramBase':'0x80000000',
+                                                                                 'deviceModel':'No',
+                                                                                 'dcdDesc':None}),
+
+    'certSettingsDict'                : (kCfgSection_Security, kCfgType_Dict, {'cstVersion':uicfgdef.kCstVersion_v3_0_1,
+                                                                               'useExistingCaKey':'n',
+                                                                               'useEllipticCurveCrypto':'n',
+                                                                               'pkiTreeKeyLen':2048,
+                                                                               'pkiTreeKeyCn':None,
+                                                                               'pkiTreeDuration':10,
+                                                                               'SRKs':4,
+                                                                               'caFlagSet':'y'}),
+    'otpmkKeyOpt'                     : (kCfgSection_Security, kCfgType_Int, 0xe0100000),
+    'otpmkEncryptedRegionStartList'   : (kCfgSection_Security, kCfgType_List, [None] * 3),
+    'otpmkEncryptedRegionLengthList'  : (kCfgSection_Security, kCfgType_List, [None] * 3),
+    'userKeyCtrlDict'                 : (kCfgSection_Security, kCfgType_Dict, {'mcu_device':None,
+                                                                               'engine_sel':uicfgdef.kUserEngineSel_Engine0,
+                                                                               'engine0_key_src':uicfgdef.kUserKeySource_SW_GP2,
+                                                                               'engine0_fac_cnt':1,
+                                                                               'engine1_key_src':uicfgdef.kUserKeySource_SW_GP2,
+                                                                               'engine1_fac_cnt':1}),
+    'userKeyCmdDict'                  : (kCfgSection_Security, kCfgType_Dict, {'base_addr':'0x60000000',
+                                                                               'engine0_key':'0123456789abcdeffedcba9876543210',
+                                                                               'engine0_arg':'1,[0x60001000,0x1000,0]',
+                                                                               'engine0_lock':'0',
+                                                                               'engine1_key':'0123456789abcdeffedcba9876543210',
+                                                                               'engine1_arg':'1,[0x60002000,0x1000,0]',
+                                                                               'engine1_lock':'0',
+                                                                               'use_zero_key':'1',
+                                                                               'is_boot_image':'1'}),
+    'dekStoreDict'                    : (kCfgSection_Security, kCfgType_Dict, {'isPerDeviceDek':False}),
+}
+
+# Version 1 file (flat dump of uivar globals): section name -> keys stored in its list
+kCfgLegacyKeyListDict = {
+    'cfgToolCommon'  : ['toolCommDict'],
+    'cfgFlexspiNor'  : ['flexspiNorOpt0', 'flexspiNorOpt1', 'flexspiNorDeviceModel'],
+    'cfgSemcNand'    : ['semcNandOpt', 'semcNandFcbOpt', 'semcNandImageInfoList'],
+    'cfgLpspiNor'    : ['lpspiNorOpt0', 'lpspiNorOpt1'],
+    'cfgDcd'         : ['dcdCtrlDict', 'dcdSettingsDict'],
+    'cfgCertificate' : ['certSettingsDict'],
+    'cfgSnvsKey'     : ['otpmkKeyOpt', 'otpmkEncryptedRegionStartList', 'otpmkEncryptedRegionLengthList'],
+    'cfgUserKey'     : ['userKeyCtrlDict', 'userKeyCmdDict'],
+}
+
+class ConfigError(Exception):
+    pass
+
+def validateCfgValue( key, value ):
+    if not kCfgSchemaDict.has_key(key):
+        raise ConfigError('Unknown config key: ' + key)
+    section, cfgType, default = kCfgSchemaDict[key]
+    if value != None and not isinstance(value, cfgType):
+        raise ConfigError('Config %s should be %s, got %s' % (key, ' or '.join([t.__name__ for t in cfgType]), type(value).__name__))
+
+def _convertLegacyCfgDict( cfgDict ):
+    profileDict = {}
+    for legacyName, keyList in kCfgLegacyKeyListDict.items():
+        if cfgDict.has_key(legacyName):
+            for i in range(min(len(keyList), len(cfgDict[legacyName]))):
+                section = kCfgSchemaDict[keyList[i]][0]
+                profileDict.setdefault(section, {})[keyList[i]] = cfgDict[legacyName][i]
+    return profileDict
+
+##
+# @brief Settings of one profile, looked up by key, saved as {"version", "profiles": {name: {section: {key: value}}}}.
+#
+# Every ConfigStore is independent, so CLI and multi-board scripts can open any profile next to the GUI one.
+# save() only merges keys changed since load into the file as it is on disk then, and replaces the
+# file atomically, so several stations can share one file and a read-only store never writes it.
+class ConfigStore(object):
+
+    def __init__(self, filename=None, profile=kCfgProfile_Default, isReadOnly=False):
+        self.filename = filename
+        self.profile = profile
+        self.isReadOnly = isReadOnly
+        self.valueDict = {}
+        self.savedDict = {}
+        self.reload()
+
+    def _loadFileDict( self ):
+        if self.filename == None or not os.path.isfile(self.filename):
+            return None
+        with open(self.filename, 'r') as fileObj:
+            fileDict = json.load(fileObj)
+            fileObj.close()
+        if not fileDict.has_key('version'):
+            fileDict = {'version' : kCfgVersion, 'profiles' : {kCfgProfile_Default : _convertLegacyCfgDict(fileDict)}}
+        elif fileDict['version'] > kCfgVersion:
+            raise ConfigError('%s is version %d, newer than supported version %d' % (self.filename, fileDict['version'], kCfgVersion))
+        return fileDict
+
+    def _getFileProfileValues( self, fileDict ):
+        valueDict = {}
+        if fileDict != None and fileDict['profiles'].has_key(self.profile):
+            profileDict = fileDict['profiles'][self.profile]
+            for section in [kCfgSection_Board, kCfgSection_BootDevice, kCfgSection_Security]:
+                if profileDict.has_key(section) and isinstance(profileDict[section], dict):
+                    valueDict.update(profileDict[section])
+        return valueDict
+
+    def reload( self ):
+        fileValueDict = self._getFileProfileValues(self._loadFileDict())
+        self.valueDict = {}
+        for key, (section, cfgType, default) in kCfgSchemaDict.items():
+            value = copy.deepcopy(default)
+            if fileValueDict.has_key(key):
+                try:
+                    validateCfgValue(key, fileValueDict[key])
+                    value = fileValueDict[key]
+                    # Keys added to a dict setting later get their default
+                    if isinstance(value, dict):
+                        for dictKey, dictValue in default.items():
+                            if not value.has_key(dictKey):
+                                value[dictKey] = copy.deepcopy(dictValue)
+                except ConfigError:
+                    pass
+            self.valueDict[key] = value
+        self.savedDict = copy.deepcopy(self.valueDict)
+
+    ##
+    # @brief Value object itself, not a copy, like the former uivar globals.
+    def get( self, key ):
+        return self.valueDict[key]
+
+    def getList( self, keyList ):
+        return tuple([self.valueDict[key] for key in keyList])
+
+    def set( self, key, value ):
+        validateCfgValue(key, value)
+        self.valueDict[key] = value
+
+    def setList( self, keyList, valueList ):
+        for key, value in zip(keyList, valueList):
+            validateCfgValue(key, value)
+        for key, value in zip(keyList, valueList):
+            self.valueDict[key] = value
+
+    def getChangedKeys( self ):
+        return [key for key in self.valueDict.keys() if self.valueDict[key] != self.savedDict[key]]
+
+    def getProfileNames( self ):
+        fileDict = self._loadFileDict()
+        if fileDict == None:
+            return []
+        return fileDict['profiles'].keys()
+
+    def save( self ):
+        if self.isReadOnly:
+            raise ConfigError('Config profile %s is read-only' % (self.profile))
+        if self.filename == None:
+            raise ConfigError('Config profile %s has no file to be saved to' % (self.profile))
+        changedKeyList = self.getChangedKeys()
+        if not len(changedKeyList) and os.path.isfile(self.filename):
+            return
+        fileDict = self._loadFileDict()
+        if fileDict == None:
+            fileDict = {'version' : kCfgVersion, 'profiles' : {}}
+            changedKeyList = self.valueDict.keys()
+        fileDict['version'] = kCfgVersion
+        if not fileDict['profiles'].has_key(self.profile):
+            fileDict['profiles'][self.profile] = {}
+            changedKeyList = self.valueDict.keys()
+        profileDict = fileDict['profiles'][self.profile]
+        for key in changedKeyList:
+            section = kCfgSchemaDict[key][0]
+            if not profileDict.has_key(section):
+                profileDict[section] = {}
+            profileDict[section][key] = self.valueDict[key]
+        tempFilename = self.filename + '.tmp'
+        with open(tempFilename, 'w') as fileObj:
+            json.dump(fileDict, fileObj, indent=1, sort_keys=True)
+            fileObj.flush()
+            os.fsync(fileObj.fileno())
+            fileObj.close()
+        try:
+            os.rename(tempFilename, self.filename)
+        except OSError:
+            # os.rename() cannot replace an existing file on Windows
+            os.remove(self.filename)
+            os.rename(tempFilename, self.filename)
+        for key in changedKeyList:
+            self.savedDict[key] = copy.deepcopy(self.valueDict[key])
@@ -7,10 +7,11 @@ sys.setdefaultencoding('utf-8')
 import os
 import time
 import serial.tools.list_ports
-import pywinusb.hid
 import threading
 import uidef
 import uivar
+import uihotplug
+import uilog
 sys.path.append(os.path.abspath(".."))
 from win import secBootWin
 from run import rundef
@@ -39,10 +40,20 @@ class secBootUi(secBootWin.secBootWin):
 
         self.logFolder = os.path.join(self.exeTopRoot, 'gen', 'log_file')
         self.logFilename = os.path.join(self.exeTopRoot, 'gen', 'log_file', 'log.txt')
+        self.logJsonFilename = os.path.join(self.exeTopRoot, 'gen', 'log_file', 'log.jsonl')
+        self.logPipeline = uilog.LogPipeline()
+        if self.toolCommDict.has_key('logLevel'):
+            # e.g. uilog.kLogLevel_Debug also echoes every host tool command and its output to console
+            self.logPipeline.setLevel(self.toolCommDict['logLevel'])
+        if self.toolCommDict.has_key('isJsonLogEnabled') and self.toolCommDict['isJsonLogEnabled']:
+            self.logPipeline.addSink(uilog.JsonLinesSink(self.logJsonFilename))
+        self.logFlushTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self._logFlushTimerHandler, self.logFlushTimer)
 
         self.isToolRunAsEntryMode = None
         self._initToolRunMode()
         self.setToolRunMode()
+        self._initPerDeviceDekMode()
 
         self.updateConnectStatus()
 
@@ -61,9 +72,9 @@ class secBootUi(secBootWin.secBootWin):
         self.usbhidPid = None
         self.isUsbhidConnected = False
         self.usbhidToConnect = [None] * 2
+        self.usbhidHotplugMonitor = uihotplug.createHotplugMonitor(self._usbhidHotplugCallback, self.GetHandle())
         self._initPortSetupValue()
-        self.usbhidDetectTimer = None
-        self.periodicUsbhidDetectTask()
+        self.startUsbhidDetectTask()
         self.isOneStepConnectMode = None
         self.initOneStepConnectMode()
 
@@ -85,6 +96,15 @@ class secBootUi(secBootWin.secBootWin):
         self.isToolRunAsEntryMode = self.m_menuItem_entryMode.IsChecked()
         self.toolCommDict['isToolRunAsEntryMode'] = self.isToolRunAsEntryMode
 
+    def _initPerDeviceDekMode( self ):
+        dekStoreDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_DekStore)
+        self.m_menuItem_perDeviceDek.Check(dekStoreDict['isPerDeviceDek'])
+
+    def setPerDeviceDekMode( self ):
+        dekStoreDict = uivar.getAdvancedSettings(uidef.kAdvancedSettings_DekStore).copy()
+        dekStoreDict['isPerDeviceDek'] = self.m_menuItem_perDeviceDek.IsChecked()
+        uivar.setAdvancedSettings(uidef.kAdvancedSettings_DekStore, dekStoreDict)
+
     def _initTargetSetupValue( self ):
         self.m_choice_mcuSeries.Clear()
         self.m_choice_bootDevice.Clear()
@@ -123,34 +143,37 @@ class secBootUi(secBootWin.secBootWin):
         usbIdList = self.getUsbid()
         self.setPortSetupValue(uidef.kConnectStage_Rom, usbIdList)
 
-    def periodicUsbhidDetectTask( self ):
+    def startUsbhidDetectTask( self ):
         if self.isUsbhidPortSelected:
+            self.usbhidHotplugMonitor.start()
             self._retryToDetectUsbhidDevice(False)
-            self.usbhidDetectTimer = threading.Timer(1, self.periodicUsbhidDetectTask)
-            self.usbhidDetectTimer.start()
+        else:
+            self.usbhidHotplugMonitor.stop()
+
+    def stopUsbhidDetectTask( self ):
+        self.usbhidHotplugMonitor.stop()
+
+    def _usbhidHotplugCallback( self, event, vid, pid ):
+        # Called from monitor thread, GUI must only be touched from main thread
+        if self.usbhidToConnect[0] != None and \
+           (vid, pid) == (int(self.usbhidToConnect[0], 16), int(self.usbhidToConnect[1], 16)):
+            wx.CallAfter(self._retryToDetectUsbhidDevice, False)
 
     def _retryToDetectUsbhidDevice( self, needToRetry = True ):
         usbVid = [None]
         usbPid = [None]
         self.isUsbhidConnected = False
-        retryCnt = 1
-        if needToRetry:
-            retryCnt = kRetryDetectTimes
-        while retryCnt > 0:
-            # Auto detect USB-HID device
-            hidFilter = pywinusb.hid.HidDeviceFilter(vendor_id = int(self.usbhidToConnect[0], 16), product_id = int(self.usbhidToConnect[1], 16))
-            hidDevice = hidFilter.get_devices()
-            if len(hidDevice) > 0:
-                self.isUsbhidConnected = True
-                usbVid[0] = self.usbhidToConnect[0]
-                usbPid[0] = self.usbhidToConnect[1]
-                break
-            retryCnt = retryCnt - 1
-            if retryCnt != 0:
-                time.sleep(2)
-            else:
-                usbVid[0] = 'N/A - Not Found'
-                usbPid[0] = usbVid[0]
+        if self.usbhidHotplugMonitor.isPresent(self.usbhidToConnect[0], self.usbhidToConnect[1]):
+            self.isUsbhidConnected = True
+        elif needToRetry:
+            # Return as soon as the device enumerates, instead of sleeping between retries
+            self.isUsbhidConnected = self.usbhidHotplugMonitor.waitForAttach(self.usbhidToConnect[0], self.usbhidToConnect[1], kRetryDetectTimes * 2)
+        if self.isUsbhidConnected:
+            usbVid[0] = self.usbhidToConnect[0]
+            usbPid[0] = self.usbhidToConnect[1]
+        else:
+            usbVid[0] = 'N/A - Not Found'
+            usbPid[0] = usbVid[0]
         if self.m_choice_portVid.GetString(self.m_choice_portVid.GetSelection()) != usbVid[0]:
             self.m_choice_portVid.Clear()
             self.m_choice_portVid.SetItems(usbVid)
@@ -159,6 +182,17 @@ class secBootUi(secBootWin.secBootWin):
             self.m_choice_baudPid.SetItems(usbPid)
             self.m_choice_baudPid.SetSelection(0)
 
+    def getUartAdapterId( self, comPort ):
+        for comport in serial.tools.list_ports.comports():
+            comport = list(comport)
+            if comport[0] == comPort and len(comport) > 2:
+                # hwid (VID:PID and serial number) stays the same when the adapter gets another COM number
+                return comport[2]
+        return comPort
+
+    def isUsbhidDevicePresent( self, vid, pid ):
+        return self.usbhidHotplugMonitor.isPresent(vid, pid)
+
     def adjustPortSetupValue( self, connectStage=uidef.kConnectStage_Rom, usbIdList=[] ):
         self.isUartPortSelected = self.m_radioBtn_uart.GetValue()
         self.isUsbhidPortSelected = self.m_radioBtn_usbhid.GetValue()
@@ -195,6 +229,8 @@ class secBootUi(secBootWin.secBootWin):
         elif self.isUsbhidPortSelected:
             self.m_staticText_portVid.SetLabel('Vendor ID:')
             self.m_staticText_baudPid.SetLabel('Product ID:')
+            if len(usbIdList) >= 4:
+                self.usbhidHotplugMonitor.setVidPidList([(usbIdList[0], usbIdList[1]), (usbIdList[2], usbIdList[3])])
             if connectStage == uidef.kConnectStage_Rom:
                 self.usbhidToConnect[0] = usbIdList[0]
                 self.usbhidToConnect[1] = usbIdList[1]
@@ -632,16 +668,57 @@ class secBootUi(secBootWin.secBootWin):
         messageText = (msgStr.encode('utf-8'))
         wx.MessageBox(messageText, "Error", wx.OK | wx.ICON_INFORMATION)
 
-    def printLog( self, logStr ):
+    def popupPassphraseBox( self, msgStr ):
+        passphrase = None
+        passphraseDialog = wx.PasswordEntryDialog(self, msgStr, "Passphrase")
+        if passphraseDialog.ShowModal() == wx.ID_OK:
+            passphrase = passphraseDialog.GetValue()
+        passphraseDialog.Destroy()
+        return passphrase
+
+    def popupOpenFileBox( self, msgStr ):
+        filename = None
+        fileDialog = wx.FileDialog(self, msgStr, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+        if fileDialog.ShowModal() == wx.ID_OK:
+            filename = fileDialog.GetPath().encode("utf-8")
+        fileDialog.Destroy()
+        return filename
+
+    def flushLog( self ):
+        textDict = self.logPipeline.popPendingText()
         try:
-            self.m_textCtrl_log.write(logStr + "\n")
+            if textDict.has_key(uilog.kLogChannel_Log):
+                self.m_textCtrl_log.write(textDict[uilog.kLogChannel_Log])
+            if textDict.has_key(uilog.kLogChannel_DeviceStatus):
+                self.m_textCtrl_deviceStatus.write(textDict[uilog.kLogChannel_DeviceStatus])
         except:
             pass
 
+    def _logFlushTimerHandler( self, event ):
+        self.flushLog()
+
+    def _scheduleLogFlush( self ):
+        if not wx.IsMainThread():
+            wx.CallAfter(self._scheduleLogFlush)
+            return
+        # Text control is written once per batch, the tail of a batch is written by the timer
+        if self.logPipeline.isFlushNeeded():
+            self.flushLog()
+        elif not self.logFlushTimer.IsRunning():
+            self.logFlushTimer.Start(int(uilog.kLogFlushSeconds * 1000), wx.TIMER_ONE_SHOT)
+
+    def printLog( self, logStr, level=uilog.kLogLevel_Info ):
+        if not self.logPipeline.isEnabledFor(level):
+            return
+        self.logPipeline.log(logStr, level)
+        self._scheduleLogFlush()
+
     def clearLog( self ):
+        self.flushLog()
         self.m_textCtrl_log.Clear()
 
     def saveLog( self ):
+        self.flushLog()
         self.m_textCtrl_log.SaveFile(self.logFilename)
         msgText = (('Log is saved in file: ' + self.logFilename + ' \n').encode('utf-8'))
         wx.MessageBox(msgText, "Log Info", wx.OK | wx.ICON_INFORMATION)
@@ -674,9 +751,11 @@ class secBootUi(secBootWin.secBootWin):
         self.m_gauge_action.SetValue(s_maxGauge)
 
     def printDeviceStatus( self, statusStr ):
-        self.m_textCtrl_deviceStatus.write(statusStr + "\n")
+        self.logPipeline.log(statusStr, uilog.kLogLevel_Info, uilog.kLogChannel_DeviceStatus)
+        self._scheduleLogFlush()
 
     def clearDeviceStatus( self ):
+        self.flushLog()
         self.m_textCtrl_deviceStatus.Clear()
 
     def getUserAppFilePath( self ):
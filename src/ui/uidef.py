@@ -1,5 +1,7 @@
 import wx
 import sys, os
+# Values that are also stored in config file, kept wx free for uiconfig
+from uicfgdef import *
 
 kConnectStage_Rom            = 1
 kConnectStage_Flashloader    = 2
@@ -50,13 +52,8 @@ kAdvancedSettings_Cert      = 1
 kAdvancedSettings_BD        = 2
 kAdvancedSettings_OtpmkKey  = 3
 kAdvancedSettings_UserKeys  = 4
+kAdvancedSettings_DekStore  = 5
 
-kCstVersion_Invalid = 'x.x.x'
-kCstVersion_v2_3_3  = '2.3.3'
-kCstVersion_v3_0_1  = '3.0.1'
-kCstVersion_v3_1_0  = '3.1.0'
-
-kCstVersion_Avail   = [kCstVersion_v3_0_1]
 kCstCrtsFileList = ['_temp.txt']
 kCstKeysFileList = ['add_key.bat', 'add_key.sh', 'ahab_pki_tree.bat', 'ahab_pki_tree.sh', 'hab3_pki_tree.bat', 'hab3_pki_tree.sh', 'hab4_pki_tree.bat', 'hab4_pki_tree.sh']
 kCstKeysToolFileList = ['libcrypto-1_1.dll', 'libssl-1_1.dll', 'openssl.exe']
@@ -73,24 +70,6 @@ kAppImageFormat_MotoSrec    = 'Motorola S-Records (.srec/.s19)'
 kAppImageFormat_IntelHex    = 'Intel Extended Hex (.hex)'
 kAppImageFormat_RawBinary   = 'Raw Binary (.bin)'
 
-kUserEngineSel_Engine0     = 'Engine 0'
-kUserEngineSel_Engine1     = 'Engine 1'
-kUserEngineSel_BothEngines = 'Both Engines'
-
-kSupportedEngineSel_iMXRT102x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1]
-kSupportedEngineSel_iMXRT105x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1]
-kSupportedEngineSel_iMXRT106x = [kUserEngineSel_Engine0, kUserEngineSel_Engine1, kUserEngineSel_BothEngines]
-kSupportedEngineSel_iMXRT1064 = [kUserEngineSel_Engine0, kUserEngineSel_Engine1, kUserEngineSel_BothEngines]
-
-kUserKeySource_OTPMK  = 'Fuse OTPMK[255:128]'
-kUserKeySource_SW_GP2 = 'Fuse SW-GP2'
-kUserKeySource_GP4    = 'Fuse GP4[127:0]'
-
-kSupportedKeySource_iMXRT102x = [kUserKeySource_SW_GP2]
-kSupportedKeySource_iMXRT105x = [kUserKeySource_SW_GP2]
-kSupportedKeySource_iMXRT106x = [kUserKeySource_SW_GP2, kUserKeySource_GP4]
-kSupportedKeySource_iMXRT1064 = [kUserKeySource_SW_GP2, kUserKeySource_GP4]
-
 kMaxFacRegionCount = 3
 
 kMemBlockColor_Background = wx.WHITE
@@ -0,0 +1,236 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import threading
+
+kHotplugEvent_Attach = 'attach'
+kHotplugEvent_Detach = 'detach'
+
+kHotplugPollInterval = 1
+# Enumeration period of waitForAttach() when no backend thread keeps the present set up to date
+kHotplugWaitRescanInterval = 0.1
+
+def _convertUsbId( usbId ):
+    if isinstance(usbId, str) or isinstance(usbId, unicode):
+        return int(usbId, 16)
+    return usbId
+
+##
+# @brief Track the presence of a set of USB VID/PIDs and report attach/detach events.
+#
+# Subclasses only need to enumerate the present devices and to call _rescan() whenever the
+# system tells that something has changed. Callback is invoked from the monitor thread
+# as callback(event, vid, pid), so GUI code should forward it by wx.CallAfter().
+# Backends whose changes are not delivered by a thread of their own (Windows PnP messages
+# reach the main window) are rescanned by the caller of isPresent() and waitForAttach().
+class HotplugMonitor(object):
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.vidPidList = []
+        self.presentSet = set()
+        self.condition = threading.Condition()
+
+    def setVidPidList( self, vidPidList ):
+        with self.condition:
+            self.vidPidList = [(_convertUsbId(vid), _convertUsbId(pid)) for vid, pid in vidPidList]
+        self._rescan()
+
+    def isPresent( self, vid, pid ):
+        vidPid = (_convertUsbId(vid), _convertUsbId(pid))
+        with self.condition:
+            isWatched = vidPid in self.vidPidList
+        if isWatched:
+            if not self._isScannedInBackground():
+                self._rescan()
+            with self.condition:
+                return vidPid in self.presentSet
+        # Not watched, so ask the system directly
+        return vidPid in self._enumerate([vidPid])
+
+    ##
+    # @brief Block until the device shows up, return as soon as it enumerates.
+    #
+    # Any watched device attaching wakes the waiters, so keep waiting until it is the wanted one.
+    def waitForAttach( self, vid, pid, timeoutSeconds ):
+        vidPid = (_convertUsbId(vid), _convertUsbId(pid))
+        with self.condition:
+            if vidPid not in self.vidPidList:
+                self.vidPidList.append(vidPid)
+        self._rescan()
+        deadline = time.time() + timeoutSeconds
+        while True:
+            with self.condition:
+                if vidPid in self.presentSet:
+                    return True
+                timeLeft = deadline - time.time()
+                if timeLeft <= 0:
+                    return False
+                if self._isScannedInBackground():
+                    self.condition.wait(timeLeft)
+                    continue
+            # Nothing else updates the present set while this thread is blocked, so enumerate here
+            time.sleep(min(timeLeft, kHotplugWaitRescanInterval))
+            self._rescan()
+
+    ##
+    # @brief True if a backend thread rescans on every change, so waiters can just sleep on condition.
+    def _isScannedInBackground( self ):
+        return False
+
+    def start( self ):
+        pass
+
+    def stop( self ):
+        pass
+
+    def _enumerate( self, vidPidList ):
+        return set()
+
+    def _rescan( self ):
+        with self.condition:
+            vidPidList = list(self.vidPidList)
+        presentSet = self._enumerate(vidPidList)
+        with self.condition:
+            attachedList = list(presentSet - self.presentSet)
+            detachedList = list(self.presentSet - presentSet)
+            self.presentSet = presentSet
+            if len(attachedList):
+                self.condition.notifyAll()
+        if self.callback != None:
+            for vid, pid in detachedList:
+                self.callback(kHotplugEvent_Detach, vid, pid)
+            for vid, pid in attachedList:
+                self.callback(kHotplugEvent_Attach, vid, pid)
+
+##
+# @brief Fallback for hosts without hotplug notification, device list is enumerated periodically.
+class PollingHotplugMonitor(HotplugMonitor):
+
+    def __init__(self, callback=None, pollInterval=kHotplugPollInterval):
+        super(PollingHotplugMonitor, self).__init__(callback)
+        self.pollInterval = pollInterval
+        self.stopEvent = threading.Event()
+        self.pollThread = None
+
+    def start( self ):
+        if self.pollThread == None:
+            self.stopEvent.clear()
+            self.pollThread = threading.Thread(target=self._pollTask)
+            self.pollThread.setDaemon(True)
+            self.pollThread.start()
+
+    def stop( self ):
+        if self.pollThread != None:
+            self.stopEvent.set()
+            # Make sure old thread is gone, or a quick start() would clear the event and leave two threads polling
+            if self.pollThread != threading.currentThread():
+                self.pollThread.join()
+            self.pollThread = None
+
+    def _isScannedInBackground( self ):
+        return self.pollThread != None
+
+    def _pollTask( self ):
+        while not self.stopEvent.isSet():
+            if len(self.vidPidList):
+                self._rescan()
+            self.stopEvent.wait(self.pollInterval)
+
+    def _enumerate( self, vidPidList ):
+        import pywinusb.hid
+        presentSet = set()
+        for vid, pid in vidPidList:
+            hidFilter = pywinusb.hid.HidDeviceFilter(vendor_id = vid, product_id = pid)
+            if len(hidFilter.get_devices()) > 0:
+                presentSet.add((vid, pid))
+        return presentSet
+
+##
+# @brief Linux backend, udev notifies every USB add/remove so nothing runs between boards.
+class UdevHotplugMonitor(HotplugMonitor):
+
+    def __init__(self, callback=None):
+        super(UdevHotplugMonitor, self).__init__(callback)
+        import pyudev
+        self.udevContext = pyudev.Context()
+        self.udevMonitor = pyudev.Monitor.from_netlink(self.udevContext)
+        self.udevMonitor.filter_by('usb')
+        self.udevObserver = None
+
+    def start( self ):
+        import pyudev
+        if self.udevObserver == None:
+            self.udevObserver = pyudev.MonitorObserver(self.udevMonitor, callback=self._onUdevEvent)
+            self.udevObserver.setDaemon(True)
+            self.udevObserver.start()
+
+    def stop( self ):
+        if self.udevObserver != None:
+            self.udevObserver.stop()
+            self.udevObserver = None
+
+    def _isScannedInBackground( self ):
+        return self.udevObserver != None
+
+    def _onUdevEvent( self, device ):
+        if device.action in ['add', 'remove']:
+            self._rescan()
+
+    def _enumerate( self, vidPidList ):
+        presentSet = set()
+        for device in self.udevContext.list_devices(subsystem='usb', DEVTYPE='usb_device'):
+            try:
+                vidPid = (int(device.get('ID_VENDOR_ID'), 16), int(device.get('ID_MODEL_ID'), 16))
+            except:
+                continue
+            if vidPid in vidPidList:
+                presentSet.add(vidPid)
+        return presentSet
+
+##
+# @brief Windows backend, the main window gets WM_DEVICECHANGE for HID devices through pywinusb.
+class WinPnpHotplugMonitor(PollingHotplugMonitor):
+
+    def __init__(self, callback, wndHandle):
+        super(WinPnpHotplugMonitor, self).__init__(callback)
+        import pywinusb.hid
+        monitor = self
+        class HidPnpHook(pywinusb.hid.HidPnPWindowMixin):
+            def __init__(self, wndHandle):
+                pywinusb.hid.HidPnPWindowMixin.__init__(self, wndHandle)
+            def on_hid_pnp(self, hid_event = None):
+                monitor._rescan()
+        self.hidPnpHookClass = HidPnpHook
+        self.wndHandle = wndHandle
+        self.hidPnpHook = None
+
+    def start( self ):
+        # Window procedure is hooked when the mixin is created, so hook again after every stop()
+        if self.hidPnpHook == None:
+            self.hidPnpHook = self.hidPnpHookClass(self.wndHandle)
+        self._rescan()
+
+    def stop( self ):
+        if self.hidPnpHook != None:
+            self.hidPnpHook.unhook_wnd_proc()
+            self.hidPnpHook = None
+
+    def _isScannedInBackground( self ):
+        # WM_DEVICECHANGE is handled by main thread, it cannot arrive while main thread is waiting
+        return False
+
+##
+# @brief Pick the best hotplug backend of current host.
+#
+# @param wndHandle Native handle of main window, needed by the Windows backend
+def createHotplugMonitor( callback=None, wndHandle=None ):
+    try:
+        if sys.platform.startswith('linux'):
+            return UdevHotplugMonitor(callback)
+        elif sys.platform == 'win32' and wndHandle != None:
+            return WinPnpHotplugMonitor(callback, wndHandle)
+    except:
+        pass
+    return PollingHotplugMonitor(callback)
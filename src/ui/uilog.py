@@ -0,0 +1,128 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import json
+import threading
+import collections
+
+kLogLevel_Error   = 0
+kLogLevel_Info    = 1
+kLogLevel_Command = 2
+kLogLevel_Debug   = 3
+
+kLogChannel_Log          = 'log'
+kLogChannel_DeviceStatus = 'device'
+
+kLogRingSize = 4096
+# GUI gets records in batches, at most this many records or this long after the first pending one
+kLogFlushRecords = 64
+kLogFlushSeconds = 0.1
+
+class LogRecord(object):
+    __slots__ = ['timestamp', 'level', 'channel', 'message', 'command', 'args', 'status', 'duration', 'bytes']
+
+    def __init__(self, level, channel, message, command=None, args=None, status=None, duration=None, bytes=None):
+        self.timestamp = time.time()
+        self.level = level
+        self.channel = channel
+        self.message = message
+        self.command = command
+        self.args = args
+        self.status = status
+        self.duration = duration
+        self.bytes = bytes
+
+    def toDict( self ):
+        return dict([(name, getattr(self, name)) for name in self.__slots__ if getattr(self, name) != None])
+
+##
+# @brief Sink for headless runs, every record becomes one JSON line.
+class JsonLinesSink(object):
+
+    def __init__(self, filename):
+        self.fileObj = open(filename, 'a')
+
+    def write( self, record ):
+        self.fileObj.write(json.dumps(record.toDict()) + '\n')
+
+    def flush( self ):
+        self.fileObj.flush()
+
+    def close( self ):
+        self.fileObj.close()
+
+##
+# @brief Collect log records, keep the latest ones in a ring buffer for GUI and pass all of them to sinks.
+#
+# Callers should check isEnabledFor() before building any expensive message text.
+class LogPipeline(object):
+
+    def __init__(self, level=kLogLevel_Info, ringSize=kLogRingSize):
+        self.level = level
+        self.pendingRecords = collections.deque(maxlen=ringSize)
+        self.firstPendingTime = None
+        self.sinkList = []
+        self.lock = threading.Lock()
+
+    def setLevel( self, level ):
+        self.level = level
+
+    def isEnabledFor( self, level ):
+        return level <= self.level
+
+    def addSink( self, sink ):
+        self.sinkList.append(sink)
+
+    def removeSink( self, sink ):
+        if sink in self.sinkList:
+            self.sinkList.remove(sink)
+            sink.close()
+
+    def _emit( self, record ):
+        with self.lock:
+            if not len(self.pendingRecords):
+                self.firstPendingTime = record.timestamp
+            self.pendingRecords.append(record)
+            for sink in self.sinkList:
+                sink.write(record)
+
+    def log( self, message, level=kLogLevel_Info, channel=kLogChannel_Log ):
+        if level <= self.level:
+            self._emit(LogRecord(level, channel, message))
+
+    ##
+    # @brief Structured record of one host tool command, only sinks get it as GUI already shows the command line.
+    #
+    # Sinks are only added on request, so command records do not depend on the text verbosity level.
+    def logCommand( self, args, status, duration, bytes ):
+        if len(self.sinkList):
+            record = LogRecord(kLogLevel_Command, None, None, args[0], [str(arg) for arg in args[1:]], status, duration, bytes)
+            with self.lock:
+                for sink in self.sinkList:
+                    sink.write(record)
+
+    def isFlushNeeded( self ):
+        return len(self.pendingRecords) >= kLogFlushRecords or \
+               (self.firstPendingTime != None and time.time() - self.firstPendingTime >= kLogFlushSeconds)
+
+    ##
+    # @brief Take all pending records out, grouped by channel: {channel : text}
+    def popPendingText( self ):
+        with self.lock:
+            records = list(self.pendingRecords)
+            self.pendingRecords.clear()
+            self.firstPendingTime = None
+            for sink in self.sinkList:
+                sink.flush()
+        textDict = {}
+        for record in records:
+            if record.channel != None:
+                textDict.setdefault(record.channel, []).append(record.message)
+        for channel in textDict.keys():
+            textDict[channel] = '\n'.join(textDict[channel]) + '\n'
+        return textDict
+
+    def close( self ):
+        for sink in self.sinkList:
+            sink.close()
+        self.sinkList = []
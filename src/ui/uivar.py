@@ -2,409 +2,77 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-import json
 import uidef
+import uiconfig
 
 g_hasSubWinBeenOpened = False
 
-g_cfgFilename = None
-g_toolCommDict = {'isToolRunAsEntryMode':None,
-                  'secBootType':None,
-                  'mcuSeries':None,
-                  'mcuDevice':None,
-                  'bootDevice':None,
-                  'isUsbhidPortSelected':None,
-                  'isOneStepChecked':None,
-                  'certSerial':None,
-                  'certKeyPass':None,
-                  'appFilename':None,
-                  'appFormat':None,
-                  'appBinBaseAddr':None,
-                  'keyStoreRegion':None,
-                  'certOptForBee':None
-                 }
-
-g_flexspiNorOpt0 = None
-g_flexspiNorOpt1 = None
-g_flexspiNorDeviceModel = None
-
-g_flexspiNandOpt = None
-g_flexspiNandFcbOpt = None
-g_flexspiNandImageInfo = None
-g_flexspiNandKeyBlob = None
-
-g_semcNorOpt = None
-g_semcNorSetting = None
-
-g_semcNandOpt = None
-g_semcNandFcbOpt = None
-g_semcNandImageInfoList = [None] * 8
-
-g_usdhcSdOpt = None
-
-g_usdhcMmcOpt1 = None
-g_usdhcMmcOpt2 = None
-
-g_lpspiNorOpt0 = None
-g_lpspiNorOpt1 = None
-
-g_dcdCtrlDict = {'isDcdEnabled':None,
-                 'dcdFileType':None}
-g_dcdSettingsDict = {'dcdSource':None,
-                     'userBinFile':None,
-                     'userCfgFile':None,
-                     'dcdPurpose':None,
-                     'sdramBase':None,
-                     'deviceModel':None,
-                     'dcdDesc':None}
-
-g_certSettingsDict = {'cstVersion':None,
-                      'useExistingCaKey':None,
-                      'useEllipticCurveCrypto':None,
-                      'pkiTreeKeyLen':None,
-                      'pkiTreeKeyCn':None,
-                      'pkiTreeDuration':None,
-                      'SRKs':None,
-                      'caFlagSet':None}
-
-g_otpmkKeyOpt = None
-g_otpmkEncryptedRegionStartList = [None] * 3
-g_otpmkEncryptedRegionLengthList = [None] * 3
-
-g_userKeyCtrlDict = {'mcu_device':None,
-                     'engine_sel':None,
-                     'engine0_key_src':None,
-                     'engine0_fac_cnt':None,
-                     'engine1_key_src':None,
-                     'engine1_fac_cnt':None}
-g_userKeyCmdDict = {'base_addr':None,
-                    'engine0_key':None,
-                    'engine0_arg':None,
-                    'engine0_lock':None,
-                    'engine1_key':None,
-                    'engine1_arg':None,
-                    'engine1_lock':None,
-                    'use_zero_key':None,
-                    'is_boot_image':None}
+g_cfgStore = None
+
+# Config keys behind each getter/setter group, values are passed in this order
+g_bootDeviceCfgKeysDict = {
+    uidef.kBootDevice_FlexspiNor  : ['flexspiNorOpt0', 'flexspiNorOpt1', 'flexspiNorDeviceModel'],
+    uidef.kBootDevice_FlexspiNand : ['flexspiNandOpt', 'flexspiNandFcbOpt', 'flexspiNandImageInfo', 'flexspiNandKeyBlob'],
+    uidef.kBootDevice_SemcNor     : ['semcNorOpt', 'semcNorSetting'],
+    uidef.kBootDevice_SemcNand    : ['semcNandOpt', 'semcNandFcbOpt', 'semcNandImageInfoList'],
+    uidef.kBootDevice_UsdhcSd     : ['usdhcSdOpt'],
+    uidef.kBootDevice_UsdhcMmc    : ['usdhcMmcOpt1', 'usdhcMmcOpt2'],
+    uidef.kBootDevice_LpspiNor    : ['lpspiNorOpt0', 'lpspiNorOpt1'],
+    uidef.kBootDevice_Dcd         : ['dcdCtrlDict', 'dcdSettingsDict'],
+}
+
+g_advancedSettingsCfgKeysDict = {
+    uidef.kAdvancedSettings_Tool     : ['toolCommDict'],
+    uidef.kAdvancedSettings_Cert     : ['certSettingsDict'],
+    uidef.kAdvancedSettings_OtpmkKey : ['otpmkKeyOpt', 'otpmkEncryptedRegionStartList', 'otpmkEncryptedRegionLengthList'],
+    uidef.kAdvancedSettings_UserKeys : ['userKeyCtrlDict', 'userKeyCmdDict'],
+    uidef.kAdvancedSettings_DekStore : ['dekStoreDict'],
+}
 
 def initVar(cfgFilename):
     global g_hasSubWinBeenOpened
-
-    global g_cfgFilename
-
-    global g_toolCommDict
-
-    global g_flexspiNorOpt0
-    global g_flexspiNorOpt1
-    global g_flexspiNorDeviceModel
-
-    global g_semcNandOpt
-    global g_semcNandFcbOpt
-    global g_semcNandImageInfoList
-
-    global g_lpspiNorOpt0
-    global g_lpspiNorOpt1
-
-    global g_flexspiNandOpt
-    global g_flexspiNandFcbOpt
-    global g_flexspiNandKeyBlob
-    global g_flexspiNandImageInfo
-
-    global g_semcNorOpt
-    global g_semcNorSetting
-
-    global g_usdhcSdOpt
-
-    global g_usdhcMmcOpt1
-    global g_usdhcMmcOpt2
-
-    global g_dcdCtrlDict
-    global g_dcdSettingsDict
-
-    global g_certSettingsDict
-
-    global g_otpmkKeyOpt
-    global g_otpmkEncryptedRegionStartList
-    global g_otpmkEncryptedRegionLengthList
-
-    global g_userKeyCtrlDict
-    global g_userKeyCmdDict
-
+    global g_cfgStore
     g_hasSubWinBeenOpened = False
-    g_cfgFilename = cfgFilename
-    if os.path.isfile(cfgFilename):
-        cfgDict = None
-        with open(cfgFilename, 'r') as fileObj:
-            cfgDict = json.load(fileObj)
-            fileObj.close()
-
-        g_toolCommDict = cfgDict["cfgToolCommon"][0]
-
-        g_flexspiNorOpt0 = cfgDict["cfgFlexspiNor"][0]
-        g_flexspiNorOpt1 = cfgDict["cfgFlexspiNor"][1]
-        g_flexspiNorDeviceModel = cfgDict["cfgFlexspiNor"][2]
-
-        g_semcNandOpt = cfgDict["cfgSemcNand"][0]
-        g_semcNandFcbOpt = cfgDict["cfgSemcNand"][1]
-        g_semcNandImageInfoList = cfgDict["cfgSemcNand"][2]
-
-        g_lpspiNorOpt0 = cfgDict["cfgLpspiNor"][0]
-        g_lpspiNorOpt1 = cfgDict["cfgLpspiNor"][1]
-
-        g_dcdCtrlDict = cfgDict["cfgDcd"][0]
-        g_dcdSettingsDict = cfgDict["cfgDcd"][1]
-
-        g_certSettingsDict = cfgDict["cfgCertificate"][0]
-
-        g_otpmkKeyOpt = cfgDict["cfgSnvsKey"][0]
-        g_otpmkEncryptedRegionStartList = cfgDict["cfgSnvsKey"][1]
-        g_otpmkEncryptedRegionLengthList = cfgDict["cfgSnvsKey"][2]
-
-        g_userKeyCtrlDict = cfgDict["cfgUserKey"][0]
-        g_userKeyCmdDict = cfgDict["cfgUserKey"][1]
-    else:
-        g_toolCommDict = {'isToolRunAsEntryMode':True,
-                          'secBootType':0,
-                          'mcuSeries':0,
-                          'mcuDevice':1,
-                          'bootDevice':0,
-                          'isUsbhidPortSelected':True,
-                          'isOneStepChecked':True,
-                          'certSerial':'12345678',
-                          'certKeyPass':'test',
-                          'appFilename':None,
-                          'appFormat':0,
-                          'appBinBaseAddr':'Eg: 0x00003000',
-                          'keyStoreRegion':1,
-                          'certOptForBee':0
-                         }
-
-        g_flexspiNorOpt0 = 0xc0000007
-        g_flexspiNorOpt1 = 0x00000000
-        g_flexspiNorDeviceModel = 0
-
-        g_semcNandOpt = 0xD0010101
-        g_semcNandFcbOpt = 0x00010101
-        g_semcNandImageInfoList = [None] * 8
-        g_semcNandImageInfoList[0] = 0x00020001
-
-        g_lpspiNorOpt0 = 0xc1100500
-        g_lpspiNorOpt1 = 0x00000000
-
-        g_flexspiNandOpt = 0xD0010101
-        g_flexspiNandFcbOpt = 0x00010601
-        g_flexspiNandImageInfo = 0x0
-        g_flexspiNandKeyBlob = 0x0
-
-        g_semcNorOpt = 0xD0010101
-        g_semcNorSetting = 0x00010601
-
-        g_usdhcSdOpt = 0xD0010101
-
-        g_usdhcMmcOpt1 = 0xD0010101
-        g_usdhcMmcOpt2 = 0xD0010101
-
-        g_dcdCtrlDict['isDcdEnabled'] = False
-        g_dcdCtrlDict['dcdFileType'] = None
-        g_dcdSettingsDict['dcdSource'] = 'Disable DCD'
-        g_dcdSettingsDict['userBinFile'] = 'N/A'
-        g_dcdSettingsDict['userCfgFile'] = 'N/A'
-        g_dcdSettingsDict['dcdPurpose'] = 'SDRAM'
-        g_dcdSettingsDict['sdramBase'] = '0x80000000'
-        g_dcdSettingsDict['deviceModel'] = 'No'
-        g_dcdSettingsDict['dcdDesc'] = None
-
-        g_certSettingsDict['cstVersion'] = uidef.kCstVersion_v3_0_1
-        g_certSettingsDict['useExistingCaKey'] = 'n'
-        g_certSettingsDict['useEllipticCurveCrypto'] = 'n'
-        g_certSettingsDict['pkiTreeKeyLen'] = 2048
-        g_certSettingsDict['pkiTreeDuration'] = 10
-        g_certSettingsDict['SRKs'] = 4
-        g_certSettingsDict['caFlagSet'] = 'y'
-
-        g_otpmkKeyOpt = 0xe0100000
-        g_otpmkEncryptedRegionStartList = [None] * 3
-        g_otpmkEncryptedRegionLengthList = [None] * 3
-
-        g_userKeyCtrlDict['engine_sel'] = uidef.kUserEngineSel_Engine0
-        g_userKeyCtrlDict['engine0_key_src'] = uidef.kUserKeySource_SW_GP2
-        g_userKeyCtrlDict['engine0_fac_cnt'] = 1
-        g_userKeyCtrlDict['engine1_key_src'] = uidef.kUserKeySource_SW_GP2
-        g_userKeyCtrlDict['engine1_fac_cnt'] = 1
-        g_userKeyCmdDict['base_addr'] = '0x60000000'
-        g_userKeyCmdDict['engine0_key'] = '0123456789abcdeffedcba9876543210'
-        g_userKeyCmdDict['engine0_arg'] = '1,[0x60001000,0x1000,0]'
-        g_userKeyCmdDict['engine0_lock'] = '0'
-        g_userKeyCmdDict['engine1_key'] = '0123456789abcdeffedcba9876543210'
-        g_userKeyCmdDict['engine1_arg'] = '1,[0x60002000,0x1000,0]'
-        g_userKeyCmdDict['engine1_lock'] = '0'
-        g_userKeyCmdDict['use_zero_key'] = '1'
-        g_userKeyCmdDict['is_boot_image'] = '1'
+    g_cfgStore = uiconfig.ConfigStore(cfgFilename)
 
 def deinitVar(cfgFilename=None):
-    global g_cfgFilename
-    if cfgFilename == None and g_cfgFilename != None:
-        cfgFilename = g_cfgFilename
-    with open(cfgFilename, 'w') as fileObj:
-        global g_toolCommDict
-        global g_flexspiNorOpt0
-        global g_flexspiNorOpt1
-        global g_flexspiNorDeviceModel
-        global g_semcNandOpt
-        global g_semcNandFcbOpt
-        global g_semcNandImageInfoList
-        global g_lpspiNorOpt0
-        global g_lpspiNorOpt1
-        global g_dcdCtrlDict
-        global g_dcdSettingsDict
-        global g_certSettingsDict
-        global g_otpmkKeyOpt
-        global g_otpmkEncryptedRegionStartList
-        global g_otpmkEncryptedRegionLengthList
-        global g_userKeyCtrlDict
-        global g_userKeyCmdDict
-        cfgDict = {
-            "cfgToolCommon": [g_toolCommDict],
-            "cfgFlexspiNor": [g_flexspiNorOpt0, g_flexspiNorOpt1, g_flexspiNorDeviceModel],
-            "cfgSemcNand": [g_semcNandOpt, g_semcNandFcbOpt, g_semcNandImageInfoList],
-            "cfgLpspiNor": [g_lpspiNorOpt0, g_lpspiNorOpt1],
-            "cfgDcd": [g_dcdCtrlDict, g_dcdSettingsDict],
-            "cfgCertificate": [g_certSettingsDict],
-            "cfgSnvsKey": [g_otpmkKeyOpt, g_otpmkEncryptedRegionStartList, g_otpmkEncryptedRegionLengthList],
-            "cfgUserKey": [g_userKeyCtrlDict, g_userKeyCmdDict]
-        }
-        json.dump(cfgDict, fileObj)
-        fileObj.close()
-
-def getBootDeviceConfiguration( group ):
-    if group == uidef.kBootDevice_FlexspiNor:
-        global g_flexspiNorOpt0
-        global g_flexspiNorOpt1
-        global g_flexspiNorDeviceModel
-        return g_flexspiNorOpt0, g_flexspiNorOpt1, g_flexspiNorDeviceModel
-    elif group == uidef.kBootDevice_FlexspiNand:
-        global g_flexspiNandOpt
-        global g_flexspiNandFcbOpt
-        global g_flexspiNandKeyBlob
-        global g_flexspiNandImageInfo
-        return g_flexspiNandOpt, g_flexspiNandFcbOpt, g_flexspiNandImageInfo, g_flexspiNandKeyBlob
-    elif group == uidef.kBootDevice_SemcNor:
-        global g_semcNorOpt
-        global g_semcNorSetting
-        return g_semcNorOpt, g_semcNorSetting
-    elif group == uidef.kBootDevice_SemcNand:
-        global g_semcNandOpt
-        global g_semcNandFcbOpt
-        global g_semcNandImageInfoList
-        return g_semcNandOpt, g_semcNandFcbOpt, g_semcNandImageInfoList
-    elif group == uidef.kBootDevice_UsdhcSd:
-        global g_usdhcSdOpt
-        return g_usdhcSdOpt
-    elif group == uidef.kBootDevice_UsdhcMmc:
-        global g_usdhcMmcOpt1
-        global g_usdhcMmcOpt2
-        return g_usdhcMmcOpt1, g_usdhcMmcOpt2
-    elif group == uidef.kBootDevice_LpspiNor:
-        global g_lpspiNorOpt0
-        global g_lpspiNorOpt1
-        return g_lpspiNorOpt0, g_lpspiNorOpt1
-    elif group == uidef.kBootDevice_Dcd:
-        global g_dcdCtrlDict
-        global g_dcdSettingsDict
-        return g_dcdCtrlDict, g_dcdSettingsDict
+    global g_cfgStore
+    if cfgFilename != None:
+        g_cfgStore.filename = cfgFilename
+    g_cfgStore.save()
+
+def getCfgStore( ):
+    global g_cfgStore
+    return g_cfgStore
+
+def _getCfgValues( cfgKeysDict, group ):
+    global g_cfgStore
+    if cfgKeysDict.has_key(group):
+        values = g_cfgStore.getList(cfgKeysDict[group])
+        if len(values) == 1:
+            return values[0]
+        return values
     else:
         pass
 
-def setBootDeviceConfiguration( group, *args ):
-    if group == uidef.kBootDevice_FlexspiNor:
-        global g_flexspiNorOpt0
-        global g_flexspiNorOpt1
-        global g_flexspiNorDeviceModel
-        g_flexspiNorOpt0 = args[0]
-        g_flexspiNorOpt1 = args[1]
-        g_flexspiNorDeviceModel = args[2]
-    elif group == uidef.kBootDevice_FlexspiNand:
-        global g_flexspiNandOpt
-        global g_flexspiNandFcbOpt
-        global g_flexspiNandKeyBlob
-        global g_flexspiNandImageInfo
-        g_flexspiNandOpt = args[0]
-        g_flexspiNandFcbOpt = args[1]
-        g_flexspiNandImageInfo = args[2]
-        g_flexspiNandKeyBlob = args[3]
-    elif group == uidef.kBootDevice_SemcNor:
-        global g_semcNorOpt
-        global g_semcNorSetting
-        g_semcNorOpt = args[0]
-        g_semcNorSetting = args[1]
-    elif group == uidef.kBootDevice_SemcNand:
-        global g_semcNandOpt
-        global g_semcNandFcbOpt
-        global g_semcNandImageInfoList
-        g_semcNandOpt = args[0]
-        g_semcNandFcbOpt = args[1]
-        g_semcNandImageInfoList = args[2]
-    elif group == uidef.kBootDevice_UsdhcSd:
-        global g_usdhcSdOpt
-        g_usdhcSdOpt = args[0]
-    elif group == uidef.kBootDevice_UsdhcMmc:
-        global g_usdhcMmcOpt1
-        global g_usdhcMmcOpt2
-        g_usdhcMmcOpt1 = args[0]
-        g_usdhcMmcOpt2 = args[1]
-    elif group == uidef.kBootDevice_LpspiNor:
-        global g_lpspiNorOpt0
-        global g_lpspiNorOpt1
-        g_lpspiNorOpt0 = args[0]
-        g_lpspiNorOpt1 = args[1]
-    elif group == uidef.kBootDevice_Dcd:
-        global g_dcdCtrlDict
-        global g_dcdSettingsDict
-        g_dcdCtrlDict = args[0]
-        g_dcdSettingsDict = args[1]
+def _setCfgValues( cfgKeysDict, group, args ):
+    global g_cfgStore
+    if cfgKeysDict.has_key(group):
+        g_cfgStore.setList(cfgKeysDict[group], args)
     else:
         pass
 
+def getBootDeviceConfiguration( group ):
+    return _getCfgValues(g_bootDeviceCfgKeysDict, group)
+
+def setBootDeviceConfiguration( group, *args ):
+    _setCfgValues(g_bootDeviceCfgKeysDict, group, args)
+
 def getAdvancedSettings( group ):
-    if group == uidef.kAdvancedSettings_Tool:
-        global g_toolCommDict
-        return g_toolCommDict
-    elif group == uidef.kAdvancedSettings_Cert:
-        global g_certSettingsDict
-        return g_certSettingsDict
-    elif group == uidef.kAdvancedSettings_OtpmkKey:
-        global g_otpmkKeyOpt
-        global g_otpmkEncryptedRegionStartList
-        global g_otpmkEncryptedRegionLengthList
-        return g_otpmkKeyOpt, g_otpmkEncryptedRegionStartList, g_otpmkEncryptedRegionLengthList
-    elif group == uidef.kAdvancedSettings_UserKeys:
-        global g_userKeyCtrlDict
-        global g_userKeyCmdDict
-        return g_userKeyCtrlDict, g_userKeyCmdDict
-    else:
-        pass
+    return _getCfgValues(g_advancedSettingsCfgKeysDict, group)
 
 def setAdvancedSettings( group, *args ):
-    if group == uidef.kAdvancedSettings_Tool:
-        global g_toolCommDict
-        g_toolCommDict = args[0]
-    elif group == uidef.kAdvancedSettings_Cert:
-        global g_certSettingsDict
-        g_certSettingsDict = args[0]
-    elif group == uidef.kAdvancedSettings_OtpmkKey:
-        global g_otpmkKeyOpt
-        global g_otpmkEncryptedRegionStartList
-        global g_otpmkEncryptedRegionLengthList
-        g_otpmkKeyOpt = args[0]
-        g_otpmkEncryptedRegionStartList = args[1]
-        g_otpmkEncryptedRegionLengthList = args[2]
-    elif group == uidef.kAdvancedSettings_UserKeys:
-        global g_userKeyCtrlDict
-        global g_userKeyCmdDict
-        g_userKeyCtrlDict = args[0]
-        g_userKeyCmdDict = args[1]
-    else:
-        pass
+    _setCfgValues(g_advancedSettingsCfgKeysDict, group, args)
 
 def getRuntimeSettings( ):
     global g_hasSubWinBeenOpened
@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 
+import binblob
+import bitfield
 import elf
 import filetools
 import misc
 
-__all__ = ["elf", "filetools", "misc"]
+__all__ = ["binblob", "bitfield", "elf", "filetools", "misc"]
 
 
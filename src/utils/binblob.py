@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import mmap
+import struct
+
+##
+# @brief Little-endian binary data kept in memory, all typed accessors work on the buffer only.
+#
+# A file is read (or mapped) once when the blob is created and written once by toFile(), so
+# callers accessing many words of a key or header never reopen the file per word.
+class BinBlob(object):
+
+    def __init__(self, data=''):
+        self.data = bytearray(data)
+        self._fileObj = None
+
+    ##
+    # @brief Load a file, large files can be mapped instead of read (read-only then).
+    @classmethod
+    def fromFile(cls, filename, isMapped=False):
+        blob = cls()
+        if isMapped and os.path.getsize(filename) > 0:
+            blob._fileObj = open(filename, 'rb')
+            blob.data = mmap.mmap(blob._fileObj.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            with open(filename, 'rb') as fileObj:
+                blob.data = bytearray(fileObj.read())
+        return blob
+
+    ##
+    # @brief Same as fromFile(), but a missing file gives an empty blob
+    @classmethod
+    def fromFileIfExists(cls, filename):
+        if os.path.isfile(filename):
+            return cls.fromFile(filename)
+        return cls()
+
+    def close( self ):
+        if self._fileObj != None:
+            self.data.close()
+            self._fileObj.close()
+            self._fileObj = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def u8( self, offset ):
+        return struct.unpack_from('<B', self.data, offset)[0]
+
+    def u32( self, offset ):
+        return struct.unpack_from('<I', self.data, offset)[0]
+
+    def u32List( self, offset, count ):
+        return list(struct.unpack_from('<%dI' % count, self.data, offset))
+
+    def u128( self, offset ):
+        low, high = struct.unpack_from('<QQ', self.data, offset)
+        return (high << 64) | low
+
+    def slice( self, offset, length ):
+        return bytes(self.data[offset:offset + length])
+
+    def setU32( self, offset, val32 ):
+        struct.pack_into('<I', self.data, offset, val32 & 0xFFFFFFFF)
+
+    def appendU32( self, val32 ):
+        self.data += struct.pack('<I', val32 & 0xFFFFFFFF)
+
+    def appendU32List( self, val32List ):
+        self.data += struct.pack('<%dI' % len(val32List), *[val32 & 0xFFFFFFFF for val32 in val32List])
+
+    def appendU128( self, val128 ):
+        self.data += struct.pack('<QQ', val128 & 0xFFFFFFFFFFFFFFFF, (val128 >> 64) & 0xFFFFFFFFFFFFFFFF)
+
+    def appendBytes( self, byteStr ):
+        self.data += byteStr
+
+    def toFile( self, filename, isAppend=False ):
+        mode = 'wb'
+        if isAppend:
+            mode = 'ab'
+        with open(filename, mode) as fileObj:
+            fileObj.write(self.data)
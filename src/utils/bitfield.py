@@ -0,0 +1,202 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##
+# @brief One field of a 32bit word, bits [msb:lsb].
+#
+# @param valueList Allowed values, None means any value that fits in the field
+# @param fixedValue The field must always hold this value (e.g. option tag)
+class BitField(object):
+
+    def __init__(self, name, msb, lsb, default=0, valueList=None, fixedValue=None):
+        self.name = name
+        self.msb = msb
+        self.lsb = lsb
+        self.width = msb - lsb + 1
+        self.shift = lsb
+        self.maxValue = (1 << self.width) - 1
+        self.mask = self.maxValue << lsb
+        self.fixedValue = fixedValue
+        if fixedValue != None:
+            default = fixedValue
+        self.default = default
+        self.valueList = valueList
+
+    ##
+    # @brief Field from the mask/shift constant pair style used by fusedef.
+    @classmethod
+    def fromMask(cls, name, mask, shift, **kwargs):
+        msb = shift
+        while mask >> (msb + 1):
+            msb += 1
+        return cls(name, msb, shift, **kwargs)
+
+    def get( self, word ):
+        return (word & self.mask) >> self.shift
+
+    def set( self, word, value ):
+        return (word & ~self.mask & 0xFFFFFFFF) | ((value << self.shift) & self.mask)
+
+    def check( self, value ):
+        if value < 0 or value > self.maxValue:
+            return '%s = %d does not fit in bits [%d:%d]' % (self.name, value, self.msb, self.lsb)
+        if self.fixedValue != None and value != self.fixedValue:
+            return '%s should be 0x%x, got 0x%x' % (self.name, self.fixedValue, value)
+        if self.valueList != None and value not in self.valueList:
+            return '%s = %d is not one of %s' % (self.name, value, self.valueList)
+        return None
+
+##
+# @brief Layout of a 32bit option/fuse word, fields are looked up by name.
+class BitFieldWord(object):
+
+    def __init__(self, name, fieldList):
+        self.name = name
+        self.fieldList = fieldList
+        self.fieldDict = dict([(field.name, field) for field in fieldList])
+        self.mask = 0
+        for field in fieldList:
+            if self.mask & field.mask:
+                raise ValueError('%s: field %s overlaps another field' % (name, field.name))
+            self.mask |= field.mask
+
+    def get( self, word, fieldName ):
+        return self.fieldDict[fieldName].get(word)
+
+    ##
+    # @brief Return word with the field replaced, raise ValueError for an invalid value.
+    def set( self, word, fieldName, value ):
+        field = self.fieldDict[fieldName]
+        error = field.check(value)
+        if error != None:
+            raise ValueError(self.name + ': ' + error)
+        return field.set(word, value)
+
+    def decode( self, word ):
+        return dict([(field.name, field.get(word)) for field in self.fieldList])
+
+    ##
+    # @brief Build a word from {fieldName : value}, missing fields come from baseWord or field default.
+    def encode( self, fieldValueDict, baseWord=None ):
+        word = baseWord
+        if word == None:
+            word = self.getDefault()
+        for fieldName, value in fieldValueDict.items():
+            word = self.set(word, fieldName, value)
+        return word
+
+    def getDefault( self ):
+        word = 0
+        for field in self.fieldList:
+            word = field.set(word, field.default)
+        return word
+
+    ##
+    # @brief All problems of a word as text list, empty if it is valid.
+    def validate( self, word ):
+        errorList = []
+        for field in self.fieldList:
+            error = field.check(field.get(word))
+            if error != None:
+                errorList.append(self.name + ': ' + error)
+        return errorList
+
+##
+# @brief Convert between two words by a table of (srcField, dstField, convert), convert is None,
+#        a dict or a function of the source field value. srcField None sets dstField to convert.
+def convertBitFieldWord( srcWordDef, srcWord, dstWordDef, conversionTable, dstWord=0 ):
+    for srcFieldName, dstFieldName, convert in conversionTable:
+        if srcFieldName == None:
+            # Constant destination field
+            dstWord = dstWordDef.set(dstWord, dstFieldName, convert)
+            continue
+        value = srcWordDef.get(srcWord, srcFieldName)
+        if isinstance(convert, dict):
+            value = convert[value]
+        elif convert != None:
+            value = convert(value)
+        dstWord = dstWordDef.set(dstWord, dstFieldName, value)
+    return dstWord
+
+def getConvertedFieldMask( dstWordDef, conversionTable ):
+    mask = 0
+    for srcFieldName, dstFieldName, convert in conversionTable:
+        mask |= dstWordDef.fieldDict[dstFieldName].mask
+    return mask
+
+class TestBitField:
+    def setup_method(self, method):
+        self.word = BitFieldWord('test', [
+            BitField('tag',   31, 28, fixedValue=0xC),
+            BitField('mode',  23, 20, valueList=[1, 2, 3]),
+            BitField('size',  11,  8),
+            BitField('flag',   0,  0),
+        ])
+
+    def checkValueError(self, func, *args):
+        try:
+            func(*args)
+        except ValueError:
+            return
+        assert False, 'ValueError was not raised'
+
+    def test_set_get(self):
+        w = self.word.set(0, 'size', 0xF)
+        assert w == 0x00000F00
+        w = self.word.set(w, 'flag', 1)
+        assert w == 0x00000F01
+        assert self.word.get(w, 'size') == 0xF
+        assert self.word.get(w, 'flag') == 1
+        assert self.word.get(w, 'mode') == 0
+
+    def test_set_keeps_other_bits(self):
+        w = self.word.set(0xFFFFFFFF, 'size', 0x5)
+        assert w == 0xFFFFF5FF
+
+    def test_set_out_of_range(self):
+        self.checkValueError(self.word.set, 0, 'size', 0x10)
+        self.checkValueError(self.word.set, 0, 'size', -1)
+        self.checkValueError(self.word.set, 0, 'flag', 2)
+
+    def test_set_value_list(self):
+        assert self.word.set(0, 'mode', 3) == 0x00300000
+        self.checkValueError(self.word.set, 0, 'mode', 0)
+        self.checkValueError(self.word.set, 0, 'mode', 4)
+
+    def test_fixed_value(self):
+        assert self.word.set(0, 'tag', 0xC) == 0xC0000000
+        self.checkValueError(self.word.set, 0, 'tag', 0xD)
+
+    def test_default(self):
+        assert self.word.getDefault() == 0xC0000000
+
+    def test_encode_decode(self):
+        w = self.word.encode({'mode' : 2, 'size' : 7, 'flag' : 1})
+        assert w == 0xC0200701
+        assert self.word.decode(w) == {'tag' : 0xC, 'mode' : 2, 'size' : 7, 'flag' : 1}
+        assert self.word.encode({'size' : 1}, w) == 0xC0200101
+
+    def test_validate(self):
+        assert self.word.validate(0xC0100000) == []
+        assert len(self.word.validate(0x00000000)) == 2
+
+    def test_overlap(self):
+        self.checkValueError(BitFieldWord, 'bad', [BitField('a', 7, 4), BitField('b', 4, 0)])
+
+    def test_from_mask(self):
+        field = BitField.fromMask('f', 0x06000000, 25)
+        assert field.msb == 26
+        assert field.lsb == 25
+        assert field.mask == 0x06000000
+
+    def test_convert(self):
+        dstWord = BitFieldWord('dst', [BitField('a', 3, 0), BitField('b', 7, 4), BitField('c', 8, 8)])
+        table = [('size', 'a', None),
+                 ('mode', 'b', {1 : 4, 2 : 5, 3 : 6}),
+                 ('flag', 'c', lambda flag: flag ^ 1),
+                 (None,   'c', 1)]
+        src = self.word.encode({'mode' : 2, 'size' : 9})
+        assert convertBitFieldWord(self.word, src, dstWord, table) == 0x159
+        assert getConvertedFieldMask(dstWord, table) == 0x1FF
+        # Converted value that does not fit is an error too
+        self.checkValueError(convertBitFieldWord, self.word, src, dstWord, [('size', 'c', None)])
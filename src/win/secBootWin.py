@@ -51,6 +51,21 @@ class secBootWin ( wx.Frame ):
 
 		self.m_menu_tools.AppendSubMenu( self.m_menu_option, u"Option" )
 
+		self.m_menu_perDeviceDek = wx.Menu()
+		self.m_menuItem_perDeviceDek = wx.MenuItem( self.m_menu_perDeviceDek, wx.ID_ANY, u"Enable Per-device DEK", wx.EmptyString, wx.ITEM_CHECK )
+		self.m_menu_perDeviceDek.Append( self.m_menuItem_perDeviceDek )
+
+		self.m_menuItem_genDekStore = wx.MenuItem( self.m_menu_perDeviceDek, wx.ID_ANY, u"Generate DEKs for Devices...", wx.EmptyString, wx.ITEM_NORMAL )
+		self.m_menu_perDeviceDek.Append( self.m_menuItem_genDekStore )
+
+		self.m_menuItem_encImageForDevices = wx.MenuItem( self.m_menu_perDeviceDek, wx.ID_ANY, u"Encrypt Image for Devices", wx.EmptyString, wx.ITEM_NORMAL )
+		self.m_menu_perDeviceDek.Append( self.m_menuItem_encImageForDevices )
+
+		self.m_menu_tools.AppendSubMenu( self.m_menu_perDeviceDek, u"BEE Per-device DEK" )
+
+		self.m_menuItem_runRamImage = wx.MenuItem( self.m_menu_tools, wx.ID_ANY, u"Run RAM Image via SDP...", wx.EmptyString, wx.ITEM_NORMAL )
+		self.m_menu_tools.Append( self.m_menuItem_runRamImage )
+
 		self.m_menubar.Append( self.m_menu_tools, u"Tools" )
 
 		self.m_menu_window = wx.Menu()
@@ -1702,6 +1717,10 @@ class secBootWin ( wx.Frame ):
 		self.Bind( wx.EVT_MENU, self.callbackExit, id = self.m_menuItem_exit.GetId() )
 		self.Bind( wx.EVT_MENU, self.callbackSetEntryMode, id = self.m_menuItem_entryMode.GetId() )
 		self.Bind( wx.EVT_MENU, self.callbackSetMasterMode, id = self.m_menuItem_masterMode.GetId() )
+		self.Bind( wx.EVT_MENU, self.callbackSetPerDeviceDek, id = self.m_menuItem_perDeviceDek.GetId() )
+		self.Bind( wx.EVT_MENU, self.callbackGenDekStore, id = self.m_menuItem_genDekStore.GetId() )
+		self.Bind( wx.EVT_MENU, self.callbackEncImageForDevices, id = self.m_menuItem_encImageForDevices.GetId() )
+		self.Bind( wx.EVT_MENU, self.callbackRunRamImage, id = self.m_menuItem_runRamImage.GetId() )
 		self.Bind( wx.EVT_MENU, self.callbackShowHomePage, id = self.m_menuItem_homePage.GetId() )
 		self.Bind( wx.EVT_MENU, self.callbackShowAboutAuthor, id = self.m_menuItem_aboutAuthor.GetId() )
 		self.Bind( wx.EVT_MENU, self.callbackShowSpecialThanks, id = self.m_menuItem_specialThanks.GetId() )
@@ -1757,6 +1776,18 @@ class secBootWin ( wx.Frame ):
 	def callbackSetMasterMode( self, event ):
 		event.Skip()
 
+	def callbackSetPerDeviceDek( self, event ):
+		event.Skip()
+
+	def callbackGenDekStore( self, event ):
+		event.Skip()
+
+	def callbackEncImageForDevices( self, event ):
+		event.Skip()
+
+	def callbackRunRamImage( self, event ):
+		event.Skip()
+
 	def callbackShowHomePage( self, event ):
 		event.Skip()
 